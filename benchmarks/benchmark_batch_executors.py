@@ -0,0 +1,55 @@
+"""
+Benchmark batch processing with worker threads against worker processes.
+Runs BatchProcessor over the same set of videos in both modes and reports
+videos/hour (each worker loads the model once in both modes; process
+workers split the CPU cores between their torch thread pools).
+
+Usage: python benchmarks/benchmark_batch_executors.py --model models/best.pt --videos 8 --workers 4
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from benchmark_decode_backends import create_sample
+from src.inference.batch_process import BatchProcessor, EXECUTORS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch executors')
+    parser.add_argument('--model', type=str, default='yolov8n.pt', help='Path to model')
+    parser.add_argument('--videos', type=int, default=8, help='Number of synthetic videos')
+    parser.add_argument('--frames', type=int, default=150, help='Frames per video')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel workers')
+    parser.add_argument('--size', type=int, nargs=2, default=[1280, 720], help='Video width and height')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_dir = Path(tmpdir) / 'videos'
+        input_dir.mkdir()
+        for i in range(args.videos):
+            create_sample(input_dir / f'video_{i:03d}.mp4', *args.size, num_frames=args.frames)
+
+        results = {}
+        for executor in EXECUTORS:
+            processor = BatchProcessor(args.model, conf_threshold=0.5, max_workers=args.workers,
+                                       executor=executor)
+            start = time.perf_counter()
+            processed = processor.process_directory(input_dir, Path(tmpdir) / executor)
+            elapsed = time.perf_counter() - start
+
+            failed = sum(1 for r in processed if r['status'] != 'success')
+            results[executor] = (elapsed, failed)
+
+    print(f"\n{args.videos} videos x {args.frames} frames, {args.workers} workers")
+    print(f"{'executor':>10} {'seconds':>9} {'videos/hour':>12} {'failed':>7}")
+    for executor, (elapsed, failed) in results.items():
+        print(f"{executor:>10} {elapsed:>9.1f} {args.videos / elapsed * 3600:>12.0f} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
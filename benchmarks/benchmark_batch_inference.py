@@ -0,0 +1,69 @@
+"""
+Benchmark batched multi-frame inference on CPU.
+Reports frames/s for each batch size over the same set of video frames.
+
+Usage: python benchmarks/benchmark_batch_inference.py --model models/best.pt --video data/videos/test.mp4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+from ultralytics import YOLO
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.frame_reader import FrameReader
+
+
+def load_frames(video_path, num_frames, width=1280, height=720):
+    """Read sampled frames from a video, or synthesize random frames."""
+    if video_path is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(num_frames)]
+
+    with FrameReader(video_path) as reader:
+        frames = []
+        for video_frame in reader:
+            frames.append(video_frame.image)
+            if len(frames) >= num_frames:
+                break
+    return frames
+
+
+def benchmark(model, frames, batch_size, device='cpu'):
+    """Return frames/s when predicting `frames` in batches of `batch_size`."""
+    # Warm-up
+    model.predict(source=frames[:batch_size], device=device, verbose=False)
+
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        model.predict(source=frames[i:i + batch_size], device=device, verbose=False)
+    elapsed = time.perf_counter() - start
+
+    return len(frames) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched inference on CPU')
+    parser.add_argument('--model', type=str, default='yolov8n.pt', help='Path to model')
+    parser.add_argument('--video', type=str, default=None, help='Video to sample frames from')
+    parser.add_argument('--frames', type=int, default=64, help='Number of frames to infer')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                        help='Batch sizes to compare')
+    args = parser.parse_args()
+
+    model = YOLO(args.model)
+    frames = load_frames(args.video, args.frames)
+    print(f"🧪 {len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]} on CPU")
+
+    baseline = None
+    print(f"{'batch':>6} {'frames/s':>10} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        fps = benchmark(model, frames, batch_size)
+        baseline = baseline or fps
+        print(f"{batch_size:>6} {fps:>10.2f} {fps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark video decoding backends.
+Reports decode frames/s and CPU use (cores busy) for OpenCV and PyAV, at
+source resolution and downscaled to the inference size.
+
+Usage: python benchmarks/benchmark_decode_backends.py --videos data/videos/1080p.mp4 data/videos/4k.mp4
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.frame_reader import open_frame_reader
+
+
+def create_sample(video_path, width, height, num_frames=90, fps=30.0):
+    """Write a synthetic clip with moving texture (so frames differ)."""
+    rng = np.random.default_rng(0)
+    texture = rng.integers(0, 255, (height, width * 2, 3), dtype=np.uint8)
+    texture = cv2.GaussianBlur(texture, (9, 9), 0)
+
+    out = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(num_frames):
+        offset = (i * 8) % width
+        out.write(np.ascontiguousarray(texture[:, offset:offset + width]))
+    out.release()
+
+
+def benchmark(video_path, backend, max_size, max_frames):
+    """Return (frames/s, cores busy, output size) when decoding every frame."""
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+
+    count = 0
+    with open_frame_reader(video_path, backend=backend, strategy='grab',
+                           max_size=max_size) as reader:
+        size = f"{reader.width}x{reader.height}"
+        for _ in reader:
+            count += 1
+            if count >= max_frames:
+                break
+
+    wall = time.perf_counter() - start_wall
+    cpu = time.process_time() - start_cpu
+    return count / wall, cpu / wall, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark video decoding backends')
+    parser.add_argument('--videos', type=str, nargs='*', default=None,
+                        help='Videos to decode (default: synthetic 1080p and 4K clips)')
+    parser.add_argument('--frames', type=int, default=300, help='Maximum frames decoded per run')
+    parser.add_argument('--max-size', type=int, default=640,
+                        help='Longest side of downscaled frames')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        videos = args.videos
+        if not videos:
+            videos = []
+            for name, (width, height) in (('1080p', (1920, 1080)), ('4k', (3840, 2160))):
+                video_path = Path(tmpdir) / f"{name}.mp4"
+                create_sample(video_path, width, height)
+                videos.append(str(video_path))
+
+        for video_path in videos:
+            print(f"\n🎬 {Path(video_path).name}")
+            print(f"{'backend':>8} {'output':>10} {'frames/s':>10} {'cores':>6} {'speedup':>8}")
+
+            baseline = None
+            for backend in ('opencv', 'pyav'):
+                for max_size in (None, args.max_size):
+                    fps, cores, size = benchmark(video_path, backend, max_size, args.frames)
+                    baseline = baseline or fps
+                    print(f"{backend:>8} {size:>10} {fps:>10.1f} {cores:>6.2f} {fps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
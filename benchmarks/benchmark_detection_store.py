@@ -0,0 +1,90 @@
+"""
+Benchmark the merged detection store.
+Writes one detections file per video, ingests them into the store, then
+times re-ingesting one updated video and map viewport queries against
+opening a fresh index over all per-video files (what a map client or a
+restarted server pays without the store).
+
+Usage: python benchmarks/benchmark_detection_store.py --videos 300 --detections 2000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.detection_store import DetectionStore
+from src.inference.spatial_index import DetectionIndex
+
+
+def write_video(path, rng, detections):
+    """Detections along a random 20 km drive in a 50 x 50 km area."""
+    start = rng.uniform([48.6, 2.1], [49.0, 2.6])
+    heading = rng.uniform(0, 2 * np.pi)
+    steps = np.linspace(0, 0.18, detections)
+    lat = start[0] + steps * np.sin(heading) + rng.normal(0, 1e-4, detections)
+    lon = start[1] + steps * np.cos(heading) + rng.normal(0, 1e-4, detections)
+    classes = rng.choice(['pothole', 'longitudinal_crack', 'transverse_crack', 'alligator_crack'], detections)
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [float(x), float(y)]},
+         'properties': {'class': str(c), 'class_id': 0, 'confidence': 0.5, 'frame_number': i}}
+        for i, (x, y, c) in enumerate(zip(lon, lat, classes))
+    ]}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the merged detection store')
+    parser.add_argument('--videos', type=int, default=300, help='Number of per-video files')
+    parser.add_argument('--detections', type=int, default=2000, help='Detections per video')
+    parser.add_argument('--queries', type=int, default=200, help='Viewport queries')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir) / 'out'
+        out.mkdir()
+        paths = [out / f'video_{i:04d}_detections.geojson' for i in range(args.videos)]
+        for path in paths:
+            write_video(path, rng, args.detections)
+
+        results = {}
+        with DetectionStore(Path(tmpdir) / 'detections.db') as store:
+            start = time.perf_counter()
+            for path in paths:
+                store.ingest_video(path.name.removesuffix('_detections.geojson'), path)
+            results['ingest all videos'] = time.perf_counter() - start
+
+            write_video(paths[0], rng, args.detections)
+            start = time.perf_counter()
+            store.ingest_video('video_0000', paths[0])
+            results['update one video'] = time.perf_counter() - start
+
+            # Map viewports of about 2 x 1.5 km
+            corners = rng.uniform([48.6, 2.1], [49.0, 2.6], (args.queries, 2))
+            start = time.perf_counter()
+            found = sum(store.bbox(lat, lon, lat + 0.0135, lon + 0.027, limit=1000)[0] for lat, lon in corners)
+            results['viewport query'] = (time.perf_counter() - start) / args.queries
+
+            start = time.perf_counter()
+            store.tiles(10, bbox=(48.6, 2.1, 49.0, 2.6))
+            results['zoom 10 tile counts'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = DetectionIndex(out)
+        index.refresh()
+        index.bbox(corners[0][0], corners[0][1], corners[0][0] + 0.0135, corners[0][1] + 0.027, limit=1000)
+        results['first query, files'] = time.perf_counter() - start
+
+    print(f"\n{args.videos} videos x {args.detections} detections, "
+          f"{found / args.queries:.0f} detections per viewport")
+    print(f"{'operation':>20} {'ms':>10}")
+    for label, elapsed in results.items():
+        print(f"{label:>20} {elapsed * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
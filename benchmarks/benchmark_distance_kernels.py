@@ -0,0 +1,66 @@
+"""
+Benchmark vectorized distance kernels against per-pair geodesic calls.
+Times haversine and Vincenty over 1M point pairs and a 1M-point track, and
+reports their error against geopy's geodesic on a subset.
+
+Usage: python benchmarks/benchmark_distance_kernels.py --pairs 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.geodesy import haversine, vincenty, cumulative_distance
+
+
+def timed(function, *args):
+    """Return (result, seconds) of one call."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark distance kernels')
+    parser.add_argument('--pairs', type=int, default=1_000_000, help='Number of point pairs')
+    parser.add_argument('--geodesic-samples', type=int, default=5000,
+                        help='Pairs computed with geodesic (timing extrapolated)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Road-survey-like pairs: consecutive GPS fixes a few meters apart
+    lat1 = rng.uniform(43.0, 51.0, args.pairs)
+    lon1 = rng.uniform(-4.0, 8.0, args.pairs)
+    lat2 = lat1 + rng.normal(0, 1e-4, args.pairs)
+    lon2 = lon1 + rng.normal(0, 1e-4, args.pairs)
+
+    n = min(args.geodesic_samples, args.pairs)
+    reference, geodesic_time = timed(
+        lambda: np.array([geodesic((a, b), (c, d)).meters
+                          for a, b, c, d in zip(lat1[:n], lon1[:n], lat2[:n], lon2[:n])])
+    )
+    geodesic_time *= args.pairs / n
+
+    haversine_result, haversine_time = timed(haversine, lat1, lon1, lat2, lon2)
+    vincenty_result, vincenty_time = timed(vincenty, lat1, lon1, lat2, lon2)
+
+    print(f"{args.pairs} pairs (geodesic extrapolated from {n})")
+    print(f"\n{'method':>10} {'total (s)':>10} {'ns/pair':>9} {'speedup':>9} "
+          f"{'max rel err':>12} {'max abs err (m)':>16}")
+    for label, elapsed, result in (('geodesic', geodesic_time, reference),
+                                   ('haversine', haversine_time, haversine_result[:n]),
+                                   ('vincenty', vincenty_time, vincenty_result[:n])):
+        error = np.abs(result - reference)
+        print(f"{label:>10} {elapsed:>10.3f} {elapsed / args.pairs * 1e9:>9.1f} "
+              f"{geodesic_time / elapsed:>8.0f}x {np.max(error / reference):>12.2e} {error.max():>16.2e}")
+
+    _, track_time = timed(cumulative_distance, lat2, lon2)
+    print(f"\nCumulative distance over a {args.pairs}-point track: {track_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
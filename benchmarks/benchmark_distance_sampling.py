@@ -0,0 +1,71 @@
+"""
+Benchmark distance-based frame sampling against a fixed frame stride.
+Reports inferred frames, frames per km and the largest road gap between
+consecutive inferred frames on a synthetic stop-and-go survey.
+
+Usage: python benchmarks/benchmark_distance_sampling.py --model models/best.pt
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.detect_video import VideoDetector
+from benchmark_frame_gating import create_stop_and_go_sample
+
+
+def max_gap(detector, frame_numbers, fps, video_start_time):
+    """Largest distance (m) travelled between two consecutive sampled frames."""
+    span_sec, span_distance = detector._track_span(video_start_time, frame_numbers[-1] / fps + 1)
+    distance = np.interp(np.asarray(frame_numbers) / fps, span_sec, span_distance)
+    return float(np.diff(distance).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark distance-based frame sampling')
+    parser.add_argument('--model', type=str, default='yolov8n.pt', help='Path to model')
+    parser.add_argument('--skip-frames', type=int, default=2, help='Fixed stride to compare')
+    parser.add_argument('--sample-distance', type=float, default=5.0, help='Meters between frames')
+    args = parser.parse_args()
+
+    fps = 10.0
+    segments = [(8, True), (6, False), (5, True), (10, False), (6, True), (4, False)]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        video_path = Path(tmpdir) / 'stop_and_go.mp4'
+        gps_path = Path(tmpdir) / 'stop_and_go.csv'
+        create_stop_and_go_sample(video_path, gps_path, segments, fps=fps)
+
+        detector = VideoDetector(args.model, gps_file=str(gps_path))
+        start_time = detector.gps_processor.gps_data['timestamp'].iloc[0]
+        rows = []
+
+        for label, kwargs in [
+            (f"every {args.skip_frames} fr", {'skip_frames': args.skip_frames}),
+            (f"every {args.sample_distance:g} m", {'sample_distance': args.sample_distance}),
+        ]:
+            start = time.perf_counter()
+            detections = detector.process_video(video_path, **kwargs)
+            elapsed = time.perf_counter() - start
+            stats = detector.last_run_stats
+
+            if 'sample_distance' in kwargs:
+                span = detector._track_span(start_time, stats['total_frames'] / fps)
+                frames = detector._distance_frame_numbers(span, args.sample_distance, fps)
+            else:
+                frames = np.arange(0, stats['total_frames'], args.skip_frames)
+
+            rows.append((label, stats['inferred_frames'], stats['frames_per_km'],
+                         max_gap(detector, frames, fps, start_time), elapsed))
+
+    print(f"\n{'sampling':<14} {'inferred':>9} {'frames/km':>10} {'max gap (m)':>12} {'time (s)':>9}")
+    for label, inferred, per_km, gap, elapsed in rows:
+        print(f"{label:<14} {inferred:>9} {per_km:>10.1f} {gap:>12.2f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the parsed GPS track cache.
+Times parsing a GPS CSV against cold (miss) and warm (memory-mapped hit)
+cache reads, as a batch does when several videos or re-runs share a log.
+
+Usage: python benchmarks/benchmark_gps_cache.py --points 1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.gps_cache import GPSTrackCache
+from src.inference.gps_parsers import read_gps_track
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the GPS track cache')
+    parser.add_argument('--points', type=int, default=1_000_000, help='GPS points (10 Hz)')
+    parser.add_argument('--reads', type=int, default=5, help='Warm reads timed')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / 'track.csv'
+        rng = np.random.default_rng(0)
+        pd.DataFrame({
+            'timestamp': pd.date_range(datetime(2024, 5, 1, 8), periods=args.points, freq='100ms'),
+            'latitude': 48.85 + np.cumsum(rng.normal(0, 1e-6, args.points)),
+            'longitude': 2.35 + np.cumsum(rng.normal(0, 1e-6, args.points)),
+            'altitude': rng.uniform(30, 40, args.points),
+            'speed': rng.uniform(0, 50, args.points)
+        }).to_csv(path, index=False)
+        print(f"{args.points} points, {path.stat().st_size / 1e6:.0f} MB CSV")
+
+        start = time.perf_counter()
+        read_gps_track(path)
+        parse = time.perf_counter() - start
+
+        cache = GPSTrackCache(tmp / 'cache')
+        start = time.perf_counter()
+        cache.read(path)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.reads):
+            cache.read(path)
+        warm = (time.perf_counter() - start) / args.reads
+
+        # A later run: new cache instance, file hashed once for the path record
+        rerun = GPSTrackCache(tmp / 'cache')
+        start = time.perf_counter()
+        rerun.read(path)
+        rerun_time = time.perf_counter() - start
+
+    print(f"\n{'read':>16} {'seconds':>9} {'speedup':>8}")
+    for label, elapsed in [('parse', parse), ('cache miss', cold), ('cache hit', warm),
+                           ('hit (new run)', rerun_time)]:
+        print(f"{label:>16} {elapsed:>9.3f} {parse / elapsed:>7.1f}x")
+    print(cache.summary())
+
+
+if __name__ == "__main__":
+    main()
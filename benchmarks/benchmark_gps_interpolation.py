@@ -0,0 +1,117 @@
+"""
+Benchmark GPS interpolation on a long track.
+Compares the former per-call sort and row filtering against the presorted
+GPSTrack, one timestamp at a time and as a single vectorized batch, and
+times frame synchronization (nearest GPS point per extracted frame).
+
+Usage: python benchmarks/benchmark_gps_interpolation.py --duration 3600 --rate 10
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.gps_utils import GPSProcessor
+
+
+def create_track(duration_sec, rate_hz):
+    """Synthetic GPS track sampled at rate_hz for duration_sec."""
+    rng = np.random.default_rng(0)
+    n = int(duration_sec * rate_hz)
+    base_time = datetime(2024, 5, 1, 8, 0, 0)
+    return pd.DataFrame({
+        'timestamp': pd.date_range(base_time, periods=n, freq=pd.Timedelta(seconds=1.0 / rate_hz)),
+        'latitude': 48.85 + rng.normal(0, 1e-5, n).cumsum(),
+        'longitude': 2.35 + rng.normal(0, 1e-5, n).cumsum(),
+        'altitude': 100.0 + rng.normal(0, 0.1, n).cumsum(),
+        'speed': rng.uniform(0, 20, n)
+    })
+
+
+def legacy_interpolate(timestamp, gps_data):
+    """Former interpolate_gps: sort and filter the whole track per call."""
+    gps_sorted = gps_data.sort_values('timestamp').reset_index(drop=True)
+    before = gps_sorted[gps_sorted['timestamp'] <= timestamp]
+    after = gps_sorted[gps_sorted['timestamp'] > timestamp]
+    if len(before) == 0:
+        return gps_sorted.iloc[0].to_dict()
+    if len(after) == 0:
+        return gps_sorted.iloc[-1].to_dict()
+
+    point1 = before.iloc[-1]
+    point2 = after.iloc[0]
+    factor = (timestamp - point1['timestamp']).total_seconds() / \
+        (point2['timestamp'] - point1['timestamp']).total_seconds()
+    return {
+        'latitude': point1['latitude'] + factor * (point2['latitude'] - point1['latitude']),
+        'longitude': point1['longitude'] + factor * (point2['longitude'] - point1['longitude'])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GPS interpolation')
+    parser.add_argument('--duration', type=float, default=3600, help='Track duration (seconds)')
+    parser.add_argument('--rate', type=float, default=10.0, help='GPS rate (Hz)')
+    parser.add_argument('--frame-rate', type=float, default=30.0, help='Video frame rate to query at')
+    parser.add_argument('--legacy-samples', type=int, default=200,
+                        help='Queries timed with the former implementation (extrapolated)')
+    args = parser.parse_args()
+
+    gps_data = create_track(args.duration, args.rate)
+    start_time = gps_data['timestamp'].iloc[0]
+    offsets = np.arange(0, args.duration, 1.0 / args.frame_rate)
+    times = [start_time + timedelta(seconds=float(s)) for s in offsets]
+    print(f"Track: {len(gps_data)} points, {len(times)} frame timestamps")
+
+    processor = GPSProcessor()
+    processor.gps_data = gps_data
+
+    subset = times[::max(1, len(times) // args.legacy_samples)]
+    start = time.perf_counter()
+    legacy = [legacy_interpolate(t, gps_data) for t in subset]
+    legacy_per_call = (time.perf_counter() - start) / len(subset)
+
+    start = time.perf_counter()
+    processor.get_track()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scalar = [processor.interpolate_gps(t) for t in times]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = processor.interpolate_gps_batch(times)
+    batch_time = time.perf_counter() - start
+
+    # Same coordinates from every path
+    step = max(1, len(times) // args.legacy_samples)
+    for i, expected in enumerate(legacy):
+        assert np.isclose(scalar[i * step]['latitude'], expected['latitude'], rtol=0, atol=1e-12)
+        assert np.isclose(batch['latitude'].iloc[i * step], expected['latitude'], rtol=0, atol=1e-12)
+
+    legacy_time = legacy_per_call * len(times)
+    print(f"\n{'method':>18} {'total (s)':>10} {'us/frame':>10} {'speedup':>9}")
+    for label, elapsed in (('per-call sort', legacy_time), ('presorted scalar', scalar_time),
+                           ('vectorized batch', batch_time)):
+        print(f"{label:>18} {elapsed:>10.3f} {elapsed / len(times) * 1e6:>10.2f} "
+              f"{legacy_time / elapsed:>8.0f}x")
+    print(f"\nTrack build: {build_time * 1000:.1f} ms (once per GPS file); "
+          f"per-call sort extrapolated from {len(subset)} queries")
+
+    frames_metadata = [
+        {'frame_number': i, 'filename': f'frame_{i:06d}.jpg', 'timestamp_sec': float(s)}
+        for i, s in enumerate(offsets)
+    ]
+    start = time.perf_counter()
+    synced = processor.synchronize_with_frames(frames_metadata, start_time)
+    sync_time = time.perf_counter() - start
+    print(f"Frame synchronization: {len(synced)} frames in {sync_time:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark incremental batch runs.
+Processes a directory of synthetic videos, then reruns the batch with
+nothing changed and with one video replaced; with the manifest only the
+replaced video is processed again.
+
+Usage: python benchmarks/benchmark_incremental_batch.py --model models/best.pt --videos 8 --workers 2
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from benchmark_decode_backends import create_sample
+from src.inference.batch_process import BatchProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark incremental batch runs')
+    parser.add_argument('--model', type=str, default='yolov8n.pt', help='Path to model')
+    parser.add_argument('--videos', type=int, default=8, help='Number of synthetic videos')
+    parser.add_argument('--frames', type=int, default=60, help='Frames per video')
+    parser.add_argument('--workers', type=int, default=2, help='Parallel workers')
+    parser.add_argument('--size', type=int, nargs=2, default=[640, 360], help='Video width and height')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_dir = Path(tmpdir) / 'videos'
+        output_dir = Path(tmpdir) / 'out'
+        input_dir.mkdir()
+        for i in range(args.videos):
+            create_sample(input_dir / f'video_{i:03d}.mp4', *args.size, num_frames=args.frames)
+
+        def run(force=False):
+            processor = BatchProcessor(args.model, conf_threshold=0.5, max_workers=args.workers, force=force)
+            start = time.perf_counter()
+            results = processor.process_directory(input_dir, output_dir)
+            processed = sum(1 for r in results if r['status'] != 'skipped')
+            return time.perf_counter() - start, processed
+
+        timings = {'first run': run(), 'unchanged': run()}
+        create_sample(input_dir / 'video_000.mp4', *args.size, num_frames=args.frames + 1)
+        timings['one replaced'] = run()
+        timings['--force'] = run(force=True)
+
+    print(f"\n{args.videos} videos x {args.frames} frames, {args.workers} workers")
+    print(f"{'run':>14} {'seconds':>9} {'processed':>10}")
+    for name, (elapsed, processed) in timings.items():
+        print(f"{name:>14} {elapsed:>9.2f} {processed:>10}")
+
+
+if __name__ == "__main__":
+    main()
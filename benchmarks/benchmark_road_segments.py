@@ -0,0 +1,85 @@
+"""
+Benchmark map matching of detections to road segments.
+Times nearest-segment matching of many detections against a synthetic city
+grid of streets and the incremental re-ingestion of one modified file.
+
+Usage: python benchmarks/benchmark_road_segments.py --detections 1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.geojson_writer import GeoJSONSeqWriter
+from src.inference.road_segments import RoadNetwork, SegmentStore
+
+
+def city_grid(blocks, block_size=0.001, segment_blocks=5):
+    """Streets every block_size degrees, split into segments of a few blocks."""
+    for street in range(blocks + 1):
+        for start in range(0, blocks, segment_blocks):
+            along = np.arange(start, min(start + segment_blocks, blocks) + 1) * block_size
+            across = np.full(len(along), street * block_size)
+            yield f"ns/{street}/{start}", None, 'residential', np.column_stack([48.8 + along, 2.3 + across])
+            yield f"ew/{street}/{start}", None, 'residential', np.column_stack([48.8 + across, 2.3 + along])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark road segment matching')
+    parser.add_argument('--detections', type=int, default=1_000_000, help='Number of detections')
+    parser.add_argument('--blocks', type=int, default=200, help='City blocks per side')
+    parser.add_argument('--files', type=int, default=20, help='Detection files ingested')
+    args = parser.parse_args()
+
+    network = RoadNetwork(city_grid(args.blocks))
+    print(f"{len(network)} segments, {len(network.edge_segment)} edges")
+
+    # Detections within a few meters of the streets
+    rng = np.random.default_rng(0)
+    span = args.blocks * 0.001
+    lat = 48.8 + rng.uniform(0, span, args.detections)
+    lon = 2.3 + rng.uniform(0, span, args.detections)
+    on_row = rng.random(args.detections) < 0.5
+    lat[on_row] = 48.8 + np.round((lat[on_row] - 48.8) / 0.001) * 0.001 + rng.normal(0, 3e-5, on_row.sum())
+    lon[~on_row] = 2.3 + np.round((lon[~on_row] - 2.3) / 0.001) * 0.001 + rng.normal(0, 4e-5, (~on_row).sum())
+
+    start = time.perf_counter()
+    segment, _ = network.match(lat, lon, max_distance=20.0)
+    elapsed = time.perf_counter() - start
+    print(f"Matched {np.mean(segment >= 0):.1%} of {args.detections} detections in {elapsed:.2f} s "
+          f"({args.detections / elapsed / 1e6:.2f} M/s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        per_file = min(args.detections, 200_000) // args.files
+        for f in range(args.files):
+            with GeoJSONSeqWriter(tmp / f'run{f}_detections.geojsons') as writer:
+                for i in range(f * per_file, (f + 1) * per_file):
+                    writer.write({'frame_number': i, 'class_id': i % 4, 'class_name': f'class{i % 4}',
+                                  'confidence': 0.5, 'timestamp': '2024-05-06T09:00:00',
+                                  'latitude': lat[i], 'longitude': lon[i]})
+
+        with SegmentStore(tmp / 'segments.db') as store:
+            store.set_network(network)
+            start = time.perf_counter()
+            store.ingest([tmp], network)
+            full = time.perf_counter() - start
+
+            # Rewrite one file: only it is matched and only its segments re-aggregated
+            with open(tmp / 'run0_detections.geojsons', 'a') as f:
+                f.write('\n')
+            start = time.perf_counter()
+            stats = store.ingest([tmp], network)
+            incremental = time.perf_counter() - start
+
+    print(f"Ingest {args.files} files ({per_file * args.files} detections): {full:.2f} s")
+    print(f"Re-ingest after modifying one file: {incremental:.2f} s "
+          f"({stats['ingested']} ingested, {stats['skipped']} skipped)")
+
+
+if __name__ == "__main__":
+    main()
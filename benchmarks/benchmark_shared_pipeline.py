@@ -0,0 +1,66 @@
+"""
+Benchmark the shared-memory decode pipeline.
+Compares process_video frames/s with decoding in the inference process
+against decoding in a separate process feeding a shared-memory ring buffer.
+
+Usage: python benchmarks/benchmark_shared_pipeline.py --model models/best.pt --video data/videos/test.mp4
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from benchmark_decode_backends import create_sample
+from src.inference.detect_video import VideoDetector
+
+
+def benchmark(detector, video_path, pipeline, **options):
+    """Return (frames/s, inferred frames/s) of one process_video run."""
+    start = time.perf_counter()
+    detector.process_video(video_path, pipeline=pipeline, **options)
+    elapsed = time.perf_counter() - start
+
+    stats = detector.last_run_stats
+    return stats['total_frames'] / elapsed, stats['inferred_frames'] / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the shared-memory decode pipeline')
+    parser.add_argument('--model', type=str, default='yolov8n.pt', help='Path to model')
+    parser.add_argument('--video', type=str, default=None,
+                        help='Video to process (default: synthetic 1080p clip)')
+    parser.add_argument('--skip', type=int, default=5, help='Infer every Nth frame')
+    parser.add_argument('--batch-size', type=int, default=8, help='Frames per prediction')
+    parser.add_argument('--decode-backend', type=str, default='opencv', help='Decode backend')
+    args = parser.parse_args()
+
+    detector = VideoDetector(args.model, conf_threshold=0.5)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        video_path = args.video
+        if video_path is None:
+            video_path = str(Path(tmpdir) / '1080p.mp4')
+            create_sample(video_path, 1920, 1080, num_frames=300)
+
+        options = dict(skip_frames=args.skip, batch_size=args.batch_size,
+                       decode_backend=args.decode_backend)
+
+        # Warm-up
+        detector.process_video(video_path, **dict(options, skip_frames=max(args.skip, 50)))
+
+        results = {}
+        for pipeline in (False, True):
+            results[pipeline] = benchmark(detector, video_path, pipeline, **options)
+
+    print(f"\n{'mode':>16} {'frames/s':>10} {'inferred/s':>11} {'speedup':>8}")
+    for pipeline, label in ((False, 'single process'), (True, 'shared memory')):
+        fps, inferred_fps = results[pipeline]
+        print(f"{label:>16} {fps:>10.1f} {inferred_fps:>11.1f} {fps / results[False][0]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
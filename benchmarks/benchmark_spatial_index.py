@@ -0,0 +1,109 @@
+"""
+Benchmark spatial detection queries.
+Times radius and bounding-box queries of the grid index over millions of
+detections against a linear scan of all points, and the refresh of a
+DetectionIndex over result files when one of them changes.
+
+Usage: python benchmarks/benchmark_spatial_index.py --points 2000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.geodesy import haversine
+from src.inference.geojson_writer import GeoJSONSeqWriter
+from src.inference.spatial_index import DetectionIndex, GridIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark spatial detection queries')
+    parser.add_argument('--points', type=int, default=2_000_000, help='Number of detections')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per type')
+    parser.add_argument('--radius', type=float, default=50.0, help='Radius query size (m)')
+    parser.add_argument('--cell-size', type=float, default=0.01, help='Grid cell size (degrees)')
+    parser.add_argument('--file-points', type=int, default=200_000,
+                        help='Detections written to result files for the refresh benchmark')
+    parser.add_argument('--files', type=int, default=50, help='Result files for the refresh benchmark')
+    args = parser.parse_args()
+
+    # Detections along a national-scale road network (~500 x 500 km)
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(45.0, 49.5, args.points)
+    lon = rng.uniform(-1.0, 5.5, args.points)
+
+    start = time.perf_counter()
+    index = GridIndex(lat, lon, args.cell_size)
+    build_time = time.perf_counter() - start
+    print(f"{args.points} detections, index built in {build_time:.2f} s")
+
+    centers = rng.integers(0, args.points, args.queries)
+    results = {}
+
+    start = time.perf_counter()
+    found = sum(len(index.query_radius(lat[i], lon[i], args.radius)[0]) for i in centers)
+    results['radius (grid)'] = (time.perf_counter() - start) / args.queries, found / args.queries
+
+    scan_queries = max(1, args.queries // 20)
+    start = time.perf_counter()
+    for i in centers[:scan_queries]:
+        np.flatnonzero(haversine(lat[i], lon[i], lat, lon) <= args.radius)
+    results['radius (scan)'] = (time.perf_counter() - start) / scan_queries, None
+
+    # Map viewports of about 2 x 1.5 km
+    start = time.perf_counter()
+    found = sum(len(index.query_bbox(lat[i], lon[i], lat[i] + 0.0135, lon[i] + 0.027)) for i in centers)
+    results['bbox (grid)'] = (time.perf_counter() - start) / args.queries, found / args.queries
+
+    start = time.perf_counter()
+    for i in centers[:scan_queries]:
+        np.flatnonzero((lat >= lat[i]) & (lat <= lat[i] + 0.0135) & (lon >= lon[i]) & (lon <= lon[i] + 0.027))
+    results['bbox (scan)'] = (time.perf_counter() - start) / scan_queries, None
+
+    print(f"\n{'query':>14} {'ms/query':>10} {'results':>9}")
+    for label, (elapsed, found) in results.items():
+        print(f"{label:>14} {elapsed * 1000:>10.3f} {'' if found is None else f'{found:.1f}':>9}")
+
+    benchmark_refresh(args, lat, lon)
+
+
+def write_results(path, lat, lon):
+    with GeoJSONSeqWriter(path) as writer:
+        for i, (point_lat, point_lon) in enumerate(zip(lat, lon)):
+            writer.write({'frame_number': i, 'class_id': 0, 'class_name': 'pothole', 'confidence': 0.8,
+                          'latitude': float(point_lat), 'longitude': float(point_lon)})
+
+
+def benchmark_refresh(args, lat, lon):
+    """Time refreshes of a DetectionIndex while one result file keeps changing."""
+    per_file = args.file_points // args.files
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for f in range(args.files):
+            write_results(tmp / f'run{f:03d}_detections.geojsons',
+                          lat[f * per_file:(f + 1) * per_file], lon[f * per_file:(f + 1) * per_file])
+
+        index = DetectionIndex(tmp, args.cell_size)
+        start = time.perf_counter()
+        index.refresh()
+        full_time = time.perf_counter() - start
+
+        # A run appending to one file between queries
+        times = []
+        for step in range(10):
+            write_results(tmp / 'run000_detections.geojsons', lat[:per_file + step * 100], lon[:per_file + step * 100])
+            start = time.perf_counter()
+            index.refresh()
+            index.bbox(lat[0], lon[0], lat[0] + 0.0135, lon[0] + 0.027)
+            times.append(time.perf_counter() - start)
+
+    print(f"\n{args.files} files, {per_file * args.files} detections: full index {full_time * 1000:.0f} ms, "
+          f"refresh + query after one file changed {np.median(times) * 1000:.0f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark clustering of repeated survey detections.
+Times grid-based single-linkage clustering over millions of detections
+(repeated observations of the same defects with GPS noise) and reports the
+peak memory allocated by the clustering step.
+
+Usage: python benchmarks/benchmark_survey_merge.py --defects 200000 --runs 10
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.survey_merge import cluster_detections, MAX_PAIRS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark survey merge clustering')
+    parser.add_argument('--defects', type=int, default=200_000, help='Distinct physical defects')
+    parser.add_argument('--runs', type=int, default=10, help='Surveys observing every defect')
+    parser.add_argument('--radius', type=float, default=5.0, help='Linking distance (m)')
+    parser.add_argument('--noise', type=float, default=1.5, help='GPS noise (m, std)')
+    parser.add_argument('--max-pairs', type=int, default=MAX_PAIRS, help='Pairs per block')
+    args = parser.parse_args()
+
+    # Defects along ~2000 km of streets in a 30 x 30 km city
+    rng = np.random.default_rng(0)
+    defect_lat = rng.uniform(48.7, 49.0, args.defects)
+    defect_lon = rng.uniform(2.1, 2.6, args.defects)
+    defect_class = rng.integers(0, 4, args.defects)
+
+    n = args.defects * args.runs
+    noise = args.noise / 111_195.0
+    lat = np.repeat(defect_lat, args.runs) + rng.normal(0, noise, n)
+    lon = np.repeat(defect_lon, args.runs) + rng.normal(0, noise / np.cos(np.radians(48.85)), n)
+    classes = np.repeat(defect_class, args.runs)
+    print(f"{n} detections of {args.defects} defects ({args.runs} runs)")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    num_clusters, _ = cluster_detections(lat, lon, classes, args.radius, args.max_pairs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    input_mb = (lat.nbytes + lon.nbytes + classes.nbytes) / 1e6
+    print(f"Clusters: {num_clusters} ({num_clusters / args.defects:.3f} per defect)")
+    print(f"Time: {elapsed:.2f} s ({n / elapsed / 1e6:.2f} M detections/s)")
+    print(f"Peak memory during clustering: {peak / 1e6:.0f} MB (inputs: {input_mb:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
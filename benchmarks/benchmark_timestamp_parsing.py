@@ -0,0 +1,63 @@
+"""
+Benchmark GPS timestamp parsing.
+Compares format inference per chunk (pd.to_datetime without a format)
+against parsing with a format detected once per file, for common timestamp
+layouts of multi-million-row GPS logs.
+
+Usage: python benchmarks/benchmark_timestamp_parsing.py --rows 2000000
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inference.timestamps import TimestampParser
+
+
+def layouts(rows):
+    """Timestamp columns of a 10 Hz log as written by different loggers."""
+    times = pd.date_range('2024-05-01 08:00:00', periods=rows, freq='100ms')
+    return {
+        'ISO, space': pd.Series(times.strftime('%Y-%m-%d %H:%M:%S.%f')),
+        'ISO, offset': pd.Series(times.strftime('%Y-%m-%dT%H:%M:%S.%f+02:00')),
+        'day first': pd.Series(times.strftime('%d/%m/%Y %H:%M:%S.%f')),
+        'epoch ms': pd.Series(times.as_unit('ms').asi8)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark timestamp parsing')
+    parser.add_argument('--rows', type=int, default=2_000_000, help='Timestamps per layout')
+    parser.add_argument('--chunk-size', type=int, default=65536, help='Rows per chunk')
+    args = parser.parse_args()
+
+    print(f"{args.rows} timestamps per layout, chunks of {args.chunk_size}")
+    print(f"\n{'layout':>12} {'inferred (s)':>13} {'detected (s)':>13} {'M rows/s':>9} {'speedup':>8}")
+
+    for label, values in layouts(args.rows).items():
+        chunks = [values[i:i + args.chunk_size] for i in range(0, len(values), args.chunk_size)]
+
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for chunk in chunks:
+                inferred = pd.to_datetime(chunk, utc=label == 'ISO, offset')
+        inferred_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parse_times = TimestampParser()
+        for chunk in chunks:
+            parsed = parse_times(chunk)
+        detected_time = time.perf_counter() - start
+
+        print(f"{label:>12} {inferred_time:>13.2f} {detected_time:>13.2f} "
+              f"{args.rows / detected_time / 1e6:>9.2f} {inferred_time / detected_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
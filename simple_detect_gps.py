@@ -9,6 +9,7 @@ import cv2
 import json
 import sys
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -33,6 +34,79 @@ def generate_sample_gps(num_points=100):
     
     return gps_data
 
+def choose_sampling(cap, stride, total_frames, probes=3):
+    """Mesurer grab séquentiel vs seek et choisir le plus rapide pour cette vidéo"""
+    if stride == 1 or total_frames < stride * (probes + 1) * 2:
+        return 'grab'
+    
+    start = time.perf_counter()
+    for _ in range(probes):
+        for _ in range(stride - 1):
+            cap.grab()
+        cap.read()
+    grab_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for i in range(probes):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(total_frames * (i + 1) / (probes + 1)))
+        cap.read()
+    seek_time = time.perf_counter() - start
+    
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    return 'seek' if seek_time < grab_time else 'grab'
+
+def sampled_frames(cap, stride, total_frames, strategy):
+    """Itérer (numéro, frame) toutes les `stride` frames sans décoder les pixels des autres"""
+    if strategy == 'seek':
+        for frame_count in range(0, total_frames, stride):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame_count, frame
+        return
+    
+    frame_count = 0
+    while True:
+        if frame_count % stride == 0:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame_count, frame
+        elif not cap.grab():
+            break
+        frame_count += 1
+
+def detect_batch(model, batch, gps_by_frame, geojson):
+    """Détecter sur un lot de (numéro, frame) en un seul appel et ajouter les features GeoJSON"""
+    results = model.predict([frame for _, frame in batch], conf=0.25, verbose=False)
+    count = 0
+    
+    for (frame_count, _), result in zip(batch, results):
+        gps_point = gps_by_frame.get(frame_count)
+        if not gps_point:
+            continue
+        
+        for box in result.boxes:
+            feature = {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [gps_point['lon'], gps_point['lat']]
+                },
+                "properties": {
+                    "frame": frame_count,
+                    "timestamp": gps_point.get('timestamp', ''),
+                    "class": model.names[int(box.cls[0])],
+                    "confidence": float(box.conf[0]),
+                    "bbox": box.xyxy[0].tolist()
+                }
+            }
+            geojson["features"].append(feature)
+            count += 1
+    
+    return count
+
 def process_video(video_path, model_path):
     """Pipeline: Frames → Détection → GPS → GeoJSON"""
     
@@ -64,6 +138,7 @@ def process_video(video_path, model_path):
     print("📍 Génération GPS simulée...")
     
     gps_data = generate_sample_gps(total_frames)
+    gps_by_frame = {g['frame']: g for g in gps_data}
     
     # GeoJSON structure
     geojson = {
@@ -71,49 +146,30 @@ def process_video(video_path, model_path):
         "features": []
     }
     
-    frame_count = 0
     detections_count = 0
     
     print("\n🔍 Détection en cours...\n")
     
     # Traiter toutes les 30 frames pour accélérer
     stride = 30
+    strategy = choose_sampling(cap, stride, total_frames)
+    print(f"⏩ Échantillonnage: 1 frame sur {stride} ({strategy})")
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        if frame_count % stride == 0:
-            results = model.predict(frame, conf=0.25, verbose=False)
-            
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    gps_point = next((g for g in gps_data if g['frame'] == frame_count), None)
-                    
-                    if gps_point:
-                        feature = {
-                            "type": "Feature",
-                            "geometry": {
-                                "type": "Point",
-                                "coordinates": [gps_point['lon'], gps_point['lat']]
-                            },
-                            "properties": {
-                                "frame": frame_count,
-                                "timestamp": gps_point.get('timestamp', ''),
-                                "class": model.names[int(box.cls[0])],
-                                "confidence": float(box.conf[0]),
-                                "bbox": box.xyxy[0].tolist()
-                            }
-                        }
-                        geojson["features"].append(feature)
-                        detections_count += 1
-        
-        frame_count += 1
+    # Inférence par lots de plusieurs frames
+    batch_size = 8
+    batch = []
+    
+    for frame_count, frame in sampled_frames(cap, stride, total_frames, strategy):
+        batch.append((frame_count, frame))
+        if len(batch) < batch_size:
+            continue
         
-        if frame_count % 100 == 0:
-            print(f"   {frame_count}/{total_frames} frames - {detections_count} détections")
+        detections_count += detect_batch(model, batch, gps_by_frame, geojson)
+        batch = []
+        print(f"   {frame_count}/{total_frames} frames - {detections_count} détections")
+    
+    if batch:
+        detections_count += detect_batch(model, batch, gps_by_frame, geojson)
     
     cap.release()
     
@@ -3,7 +3,7 @@ FastAPI server for road degradation detection.
 Provides REST API for image/video upload, detection, and results retrieval.
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Query
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -14,20 +14,48 @@ from pathlib import Path
 import shutil
 import uuid
 import json
+import threading
 from datetime import datetime
 from ultralytics import YOLO
 import cv2
 import numpy as np
+from src.inference import frame_reader
+from src.inference.frame_reader import open_frame_reader
+from src.inference.geojson_writer import GeoJSONSeqWriter, read_geojson_seq
+from src.inference.checkpoint import Checkpoint
+from src.inference.spatial_index import DetectionIndex
+from src.inference.road_segments import SegmentStore
+from src.inference.detection_store import TILE_ZOOMS, DetectionStore
 
 # Configuration
 MODEL_PATH = Path("models/best.pt")
 UPLOAD_DIR = Path("uploads")
 RESULTS_DIR = Path("results")
 
+# Video decoding for jobs: PyAV when installed, frames decoded near the
+# model input size (boxes are mapped back to source coordinates)
+DECODE_BACKEND = "pyav" if frame_reader.av is not None else "opencv"
+DECODE_SIZE = 640
+
+# Video jobs save a checkpoint every N frames and resume after a restart
+CHECKPOINT_EVERY = 500
+
 # Create directories
 UPLOAD_DIR.mkdir(exist_ok=True)
 RESULTS_DIR.mkdir(exist_ok=True)
 
+# Spatial index over the GeoJSON detection files in RESULTS_DIR, refreshed
+# by queries at most every few seconds (only new or modified files are
+# re-read; streams of running jobs are indexed once they finish)
+detection_index = DetectionIndex(RESULTS_DIR, min_refresh_sec=5.0)
+MAX_QUERY_RESULTS = 10000
+
+# Per-segment aggregates built by src.inference.road_segments
+SEGMENTS_DB = RESULTS_DIR / "segments.db"
+
+# Merged detections of batch runs writing to RESULTS_DIR (src.inference.batch_process)
+DETECTIONS_DB = RESULTS_DIR / "detections.db"
+
 # Initialize FastAPI
 app = FastAPI(
     title="Road Degradation Detection API",
@@ -99,6 +127,7 @@ CLASS_NAMES = ['pothole', 'longitudinal_crack', 'crazing', 'faded_marking']
 async def startup_event():
     """Load model on startup."""
     load_model()
+    resume_interrupted_jobs()
 
 
 @app.get("/", response_model=dict)
@@ -216,7 +245,8 @@ async def detect_video(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     conf_threshold: float = 0.25,
-    skip_frames: int = 5
+    skip_frames: int = 5,
+    batch_size: int = 8
 ):
     """
     Detect degradations in video (background task).
@@ -225,6 +255,7 @@ async def detect_video(
         file: Video file
         conf_threshold: Confidence threshold
         skip_frames: Process every Nth frame
+        batch_size: Number of frames per model prediction
     
     Returns:
         Job ID for tracking
@@ -247,11 +278,14 @@ async def detect_video(
         "created_at": datetime.now().isoformat(),
         "file_path": str(file_path),
         "conf_threshold": conf_threshold,
-        "skip_frames": skip_frames
+        "skip_frames": skip_frames,
+        "batch_size": batch_size
     }
     
     # Start background task
-    background_tasks.add_task(process_video_task, job_id, file_path, conf_threshold, skip_frames)
+    background_tasks.add_task(
+        process_video_task, job_id, file_path, conf_threshold, skip_frames, max(1, batch_size)
+    )
     
     return {
         "success": True,
@@ -261,7 +295,80 @@ async def detect_video(
     }
 
 
-def process_video_task(job_id: str, video_path: Path, conf_threshold: float, skip_frames: int):
+def _detect_frame_batch(frames, conf_threshold: float, box_scale: float = 1.0):
+    """
+    Run one prediction over a batch of sampled frames.
+    
+    Args:
+        frames: List of VideoFrame
+        conf_threshold: Confidence threshold
+        box_scale: Factor from decoded frame to source video coordinates
+    
+    Returns:
+        List of detection dicts, in frame order
+    """
+    results = model.predict(
+        source=[frame.image for frame in frames],
+        conf=conf_threshold,
+        verbose=False
+    )
+    
+    detections = []
+    for video_frame, result in zip(frames, results):
+        for box in result.boxes:
+            xyxy = box.xyxy[0].cpu().numpy() * box_scale
+            conf = float(box.conf[0])
+            cls = int(box.cls[0])
+            
+            detections.append({
+                'frame_number': video_frame.frame_number,
+                'timestamp_sec': video_frame.timestamp_sec,
+                'class_id': cls,
+                'class_name': CLASS_NAMES[cls],
+                'confidence': conf,
+                'bbox': {
+                    'xmin': float(xyxy[0]),
+                    'ymin': float(xyxy[1]),
+                    'xmax': float(xyxy[2]),
+                    'ymax': float(xyxy[3])
+                }
+            })
+    
+    return detections
+
+
+def _write_job_result(seq_path: Path, result_path: Path, summary: dict):
+    """
+    Write a job's JSON result, streaming detections from its GeoJSON sequence.
+    
+    Args:
+        seq_path: GeoJSON text sequence written during processing
+        result_path: Output JSON path
+        summary: Job summary fields written before the detections
+    """
+    with open(result_path, 'w') as f:
+        f.write('{\n')
+        for key, value in summary.items():
+            f.write(f'  {json.dumps(key)}: {json.dumps(value)},\n')
+        f.write('  "detections": [')
+        
+        for i, feature in enumerate(read_geojson_seq(seq_path)):
+            properties = feature['properties']
+            detection = {
+                'frame_number': properties['frame_number'],
+                'timestamp_sec': properties['timestamp_sec'],
+                'class_id': properties['class_id'],
+                'class_name': properties['class'],
+                'confidence': properties['confidence'],
+                'bbox': properties['bbox']
+            }
+            f.write((',' if i else '') + '\n    ' + json.dumps(detection))
+        
+        f.write('\n  ]\n}\n')
+
+
+def process_video_task(job_id: str, video_path: Path, conf_threshold: float, skip_frames: int,
+                       batch_size: int = 8):
     """
     Process video in background.
     
@@ -270,85 +377,128 @@ def process_video_task(job_id: str, video_path: Path, conf_threshold: float, ski
         video_path: Path to video
         conf_threshold: Confidence threshold
         skip_frames: Process every Nth frame
+        batch_size: Number of frames per model prediction
     """
+    checkpoint = Checkpoint(_job_checkpoint_path(job_id))
+    completed = False
+    
     try:
+        # Resume from the checkpoint of an interrupted run of this job
+        state = checkpoint.load()
+        seq_path = RESULTS_DIR / f"{job_id}_detections.geojsons"
+        if state and (not seq_path.exists() or seq_path.stat().st_size < state['stream_offset']):
+            state = None
+        
         # Open video
-        cap = cv2.VideoCapture(str(video_path))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
+        reader = open_frame_reader(video_path, backend=DECODE_BACKEND, skip_frames=skip_frames,
+                                   start_frame=state['last_frame'] + 1 if state else 0,
+                                   max_size=DECODE_SIZE)
+        total_frames = reader.total_frames
         
-        # Process frames
-        detections = []
-        frame_count = 0
+        # Stream detections to disk as batches complete
+        writer = GeoJSONSeqWriter(seq_path, offset=state['stream_offset'] if state else None)
+        writer.count = state['num_detections'] if state else 0
+        processed_count = state['processed_frames'] if state else 0
+        last_checkpoint_frame = reader.start_frame
+        batch = []
+        
+        def save_checkpoint(last_frame):
+            writer.sync()
+            checkpoint.save({
+                'job': jobs[job_id],
+                'last_frame': last_frame,
+                'stream_offset': writer.tell(),
+                'processed_frames': processed_count,
+                'num_detections': writer.count
+            })
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+        if not state:
+            save_checkpoint(-1)
+        
+        for video_frame in reader:
+            batch.append(video_frame)
+            if len(batch) < batch_size:
+                continue
+            
+            for detection in _detect_frame_batch(batch, conf_threshold, reader.scale):
+                writer.write(detection)
+            processed_count += len(batch)
+            batch = []
             
             # Update progress
-            progress = (frame_count / total_frames) * 100
+            progress = (video_frame.frame_number / total_frames) * 100
             jobs[job_id]["progress"] = progress
             
-            # Process every Nth frame
-            if frame_count % skip_frames == 0:
-                results = model.predict(
-                    source=frame,
-                    conf=conf_threshold,
-                    verbose=False
-                )
-                
-                result = results[0]
-                boxes = result.boxes
-                
-                for box in boxes:
-                    xyxy = box.xyxy[0].cpu().numpy()
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    
-                    detections.append({
-                        'frame_number': frame_count,
-                        'timestamp_sec': frame_count / fps,
-                        'class_id': cls,
-                        'class_name': CLASS_NAMES[cls],
-                        'confidence': conf,
-                        'bbox': {
-                            'xmin': float(xyxy[0]),
-                            'ymin': float(xyxy[1]),
-                            'xmax': float(xyxy[2]),
-                            'ymax': float(xyxy[3])
-                        }
-                    })
-            
-            frame_count += 1
+            if video_frame.frame_number - last_checkpoint_frame >= CHECKPOINT_EVERY:
+                save_checkpoint(video_frame.frame_number)
+                last_checkpoint_frame = video_frame.frame_number
+        
+        # Flush the last partial batch
+        if batch:
+            for detection in _detect_frame_batch(batch, conf_threshold, reader.scale):
+                writer.write(detection)
+            processed_count += len(batch)
         
-        cap.release()
+        reader.release()
+        writer.close()
         
         # Save results
         result_path = RESULTS_DIR / f"{job_id}_detections.json"
-        with open(result_path, 'w') as f:
-            json.dump({
-                'job_id': job_id,
-                'total_frames': total_frames,
-                'processed_frames': frame_count // skip_frames,
-                'total_detections': len(detections),
-                'detections': detections
-            }, f, indent=2)
+        _write_job_result(seq_path, result_path, {
+            'job_id': job_id,
+            'total_frames': total_frames,
+            'processed_frames': processed_count,
+            'total_detections': writer.count
+        })
         
         # Update job status
         jobs[job_id]["status"] = "completed"
         jobs[job_id]["progress"] = 100.0
         jobs[job_id]["result_path"] = f"/results/{result_path.name}"
         jobs[job_id]["completed_at"] = datetime.now().isoformat()
-        jobs[job_id]["num_detections"] = len(detections)
+        jobs[job_id]["num_detections"] = writer.count
+        completed = True
         
     except Exception as e:
         jobs[job_id]["status"] = "failed"
         jobs[job_id]["error"] = str(e)
+        completed = True
     
     finally:
-        # Clean up video file
-        video_path.unlink(missing_ok=True)
+        # Keep the video and checkpoint only if the process is going down
+        # mid-job (e.g. shutdown), so the job resumes on the next startup
+        if completed:
+            checkpoint.clear()
+            video_path.unlink(missing_ok=True)
+
+
+def _job_checkpoint_path(job_id: str) -> Path:
+    """Checkpoint file of a video job."""
+    return RESULTS_DIR / f"{job_id}.ckpt.json"
+
+
+def resume_interrupted_jobs():
+    """Restart video jobs left unfinished by a previous server process."""
+    for checkpoint_path in RESULTS_DIR.glob("*.ckpt.json"):
+        state = Checkpoint(checkpoint_path).load()
+        job = state.get('job') if state else None
+        
+        if model is None or not job or not Path(job["file_path"]).exists():
+            # Nothing to resume with
+            if model is not None:
+                checkpoint_path.unlink(missing_ok=True)
+            continue
+        
+        job_id = checkpoint_path.name[:-len(".ckpt.json")]
+        jobs[job_id] = dict(job, status="processing")
+        print(f"↩️ Resuming video job {job_id} at frame {state['last_frame'] + 1}")
+        
+        threading.Thread(
+            target=process_video_task,
+            args=(job_id, Path(job["file_path"]), job["conf_threshold"],
+                  job["skip_frames"], max(1, job["batch_size"])),
+            daemon=True
+        ).start()
 
 
 @app.get("/job/{job_id}")
@@ -392,6 +542,8 @@ async def delete_job(job_id: str):
     if "result_path" in jobs[job_id]:
         result_file = RESULTS_DIR / Path(jobs[job_id]["result_path"]).name
         result_file.unlink(missing_ok=True)
+    (RESULTS_DIR / f"{job_id}_detections.geojsons").unlink(missing_ok=True)
+    _job_checkpoint_path(job_id).unlink(missing_ok=True)
     
     # Remove job
     del jobs[job_id]
@@ -408,6 +560,212 @@ async def get_classes():
     }
 
 
+
+@app.get("/detections/near")
+def detections_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(50.0, gt=0, le=100000, description="Radius in meters"),
+    class_name: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    limit: int = Query(1000, ge=1, le=MAX_QUERY_RESULTS)
+):
+    """
+    Detections within a radius of a location, nearest first.
+    
+    Args:
+        lat: Latitude of the center
+        lon: Longitude of the center
+        radius: Radius in meters
+        class_name: Only this class (optional)
+        min_confidence: Minimum confidence (optional)
+        limit: Maximum number of features returned
+    
+    Returns:
+        GeoJSON FeatureCollection with a distance_m property per feature
+    """
+    detection_index.refresh()
+    total, features = detection_index.near(lat, lon, radius, limit=limit, class_name=class_name,
+                                           min_confidence=min_confidence)
+    
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "total": total,
+        "returned": len(features)
+    }
+
+
+@app.get("/detections/bbox")
+def detections_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    class_name: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    limit: int = Query(1000, ge=1, le=MAX_QUERY_RESULTS)
+):
+    """
+    Detections within a bounding box (e.g. a map viewport).
+    
+    Args:
+        min_lat, min_lon, max_lat, max_lon: Box corners (min_lon > max_lon
+                                            for boxes crossing the antimeridian)
+        class_name: Only this class (optional)
+        min_confidence: Minimum confidence (optional)
+        limit: Maximum number of features returned
+    
+    Returns:
+        GeoJSON FeatureCollection
+    """
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat must not exceed max_lat")
+    
+    detection_index.refresh()
+    total, features = detection_index.bbox(min_lat, min_lon, max_lat, max_lon, limit=limit,
+                                           class_name=class_name, min_confidence=min_confidence)
+    
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "total": total,
+        "returned": len(features)
+    }
+
+
+def _open_segment_store() -> SegmentStore:
+    """Open the segment aggregates (404 if none were built)."""
+    if not SEGMENTS_DB.exists():
+        raise HTTPException(status_code=404, detail="No road segment aggregates available")
+    return SegmentStore(SEGMENTS_DB)
+
+
+@app.get("/segments/{segment_id:path}")
+def get_segment(segment_id: str):
+    """
+    Detection aggregates of one road segment.
+    
+    Args:
+        segment_id: Segment ID from the road network (e.g. way/123)
+    
+    Returns:
+        Per-class counts, density per km and last survey date
+    """
+    with _open_segment_store() as store:
+        segment = store.segment(segment_id)
+    
+    if segment is None:
+        raise HTTPException(status_code=404, detail="Segment not found or without detections")
+    
+    return segment
+
+
+@app.get("/segments")
+def list_segments(
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180),
+    order_by: str = Query("density_per_km", pattern="^(density_per_km|count|last_survey)$"),
+    limit: int = Query(100, ge=1, le=MAX_QUERY_RESULTS)
+):
+    """
+    Road segments with detections, worst first.
+    
+    Args:
+        min_lat, min_lon, max_lat, max_lon: Only segments intersecting this box (optional)
+        order_by: density_per_km, count or last_survey
+        limit: Maximum number of segments returned
+    
+    Returns:
+        List of segment aggregates
+    """
+    corners = (min_lat, min_lon, max_lat, max_lon)
+    if any(c is None for c in corners) and any(c is not None for c in corners):
+        raise HTTPException(status_code=400, detail="Give all four bounding box corners or none")
+    
+    with _open_segment_store() as store:
+        segments = store.segments(None if min_lat is None else corners, order_by=order_by, limit=limit)
+    
+    return {"segments": segments, "returned": len(segments)}
+
+
+def _open_detection_store() -> DetectionStore:
+    """Open the merged batch detections (404 if none were built)."""
+    if not DETECTIONS_DB.exists():
+        raise HTTPException(status_code=404, detail="No merged detection store available")
+    return DetectionStore(DETECTIONS_DB)
+
+
+@app.get("/store/detections")
+def store_detections(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    class_name: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    limit: int = Query(1000, ge=1, le=MAX_QUERY_RESULTS)
+):
+    """
+    Detections of the merged batch store within a bounding box.
+    
+    Args:
+        min_lat, min_lon, max_lat, max_lon: Box corners (min_lon > max_lon
+                                            for boxes crossing the antimeridian)
+        class_name: Only this class (optional)
+        min_confidence: Minimum confidence (optional)
+        limit: Maximum number of features returned
+    
+    Returns:
+        GeoJSON FeatureCollection (source is the video of each detection)
+    """
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat must not exceed max_lat")
+    
+    with _open_detection_store() as store:
+        total, features = store.bbox(min_lat, min_lon, max_lat, max_lon, limit=limit,
+                                     class_name=class_name, min_confidence=min_confidence)
+    
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "total": total,
+        "returned": len(features)
+    }
+
+
+@app.get("/store/tiles/{zoom}")
+def store_tiles(
+    zoom: int,
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180)
+):
+    """
+    Detection counts per map tile of the merged batch store.
+    
+    Args:
+        zoom: Tile zoom level (XYZ scheme; one of the precomputed levels)
+        min_lat, min_lon, max_lat, max_lon: Only tiles overlapping this box (optional)
+    
+    Returns:
+        List of tiles with bounds, total and per-class counts
+    """
+    if zoom not in TILE_ZOOMS:
+        raise HTTPException(status_code=400, detail=f"Zoom must be one of {list(TILE_ZOOMS)}")
+    corners = (min_lat, min_lon, max_lat, max_lon)
+    if any(c is None for c in corners) and any(c is not None for c in corners):
+        raise HTTPException(status_code=400, detail="Give all four bounding box corners or none")
+    
+    with _open_detection_store() as store:
+        tiles = store.tiles(zoom, None if min_lat is None else corners)
+    
+    return {"zoom": zoom, "tiles": tiles, "returned": len(tiles)}
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
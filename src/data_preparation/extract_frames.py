@@ -9,12 +9,14 @@ import argparse
 from pathlib import Path
 from tqdm import tqdm
 import json
+from src.inference.frame_reader import BACKENDS, open_frame_reader
 
 
 class FrameExtractor:
     """Extract frames from video files."""
     
-    def __init__(self, video_path, output_dir, fps=None, max_frames=None, skip_frames=1):
+    def __init__(self, video_path, output_dir, fps=None, max_frames=None, skip_frames=1,
+                 sampling='auto', backend='opencv', max_size=None):
         """
         Initialize the frame extractor.
         
@@ -24,12 +26,18 @@ class FrameExtractor:
             fps: Target FPS for extraction (None = original FPS)
             max_frames: Maximum number of frames to extract
             skip_frames: Extract every Nth frame
+            sampling: Frame sampling strategy ('auto', 'grab' or 'seek')
+            backend: Video decoding backend ('opencv' or 'pyav')
+            max_size: Downscale frames so their longest side is at most this size
         """
         self.video_path = Path(video_path)
         self.output_dir = Path(output_dir)
         self.fps = fps
         self.max_frames = max_frames
         self.skip_frames = skip_frames
+        self.sampling = sampling
+        self.backend = backend
+        self.max_size = max_size
         
         # Create output directory
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -39,70 +47,63 @@ class FrameExtractor:
         print(f"📹 Processing video: {self.video_path.name}")
         
         # Open video
-        cap = cv2.VideoCapture(str(self.video_path))
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {self.video_path}")
+        reader = open_frame_reader(
+            self.video_path,
+            backend=self.backend,
+            skip_frames=self.skip_frames,
+            strategy=self.sampling,
+            target_fps=self.fps,
+            max_size=self.max_size
+        )
         
         # Get video properties
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        video_fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = reader.total_frames
+        video_fps = reader.fps
+        width = reader.width
+        height = reader.height
+        frame_interval = reader.skip_frames
         
         print(f"📊 Video info:")
         print(f"  - Resolution: {width}x{height}")
         print(f"  - FPS: {video_fps:.2f}")
         print(f"  - Total frames: {total_frames}")
-        
-        # Calculate frame interval
-        if self.fps:
-            frame_interval = int(video_fps / self.fps)
-        else:
-            frame_interval = self.skip_frames
+        print(f"  - Sampling: every {frame_interval} frame(s), {reader.strategy} strategy")
             
         # Extract frames
-        frame_count = 0
         extracted_count = 0
         metadata = []
         
-        pbar = tqdm(total=min(total_frames, self.max_frames or total_frames))
+        total_samples = -(-total_frames // frame_interval)
+        pbar = tqdm(total=min(total_samples, self.max_frames or total_samples))
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            # Check if we should extract this frame
-            if frame_count % frame_interval == 0:
-                # Generate filename
-                timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
-                filename = f"frame_{extracted_count:06d}.jpg"
-                filepath = self.output_dir / filename
-                
-                # Save frame
-                cv2.imwrite(str(filepath), frame)
-                
-                # Store metadata
-                metadata.append({
-                    "filename": filename,
-                    "frame_number": frame_count,
-                    "timestamp_ms": timestamp_ms,
-                    "timestamp_sec": timestamp_ms / 1000.0,
-                    "width": width,
-                    "height": height
-                })
-                
-                extracted_count += 1
-                
-                # Check max frames limit
-                if self.max_frames and extracted_count >= self.max_frames:
-                    break
-                    
-            frame_count += 1
+        for video_frame in reader:
+            # Generate filename
+            timestamp_ms = video_frame.timestamp_sec * 1000.0
+            filename = f"frame_{extracted_count:06d}.jpg"
+            filepath = self.output_dir / filename
+            
+            # Save frame
+            cv2.imwrite(str(filepath), video_frame.image)
+            
+            # Store metadata
+            metadata.append({
+                "filename": filename,
+                "frame_number": video_frame.frame_number,
+                "timestamp_ms": timestamp_ms,
+                "timestamp_sec": video_frame.timestamp_sec,
+                "width": width,
+                "height": height
+            })
+            
+            extracted_count += 1
             pbar.update(1)
             
+            # Check max frames limit
+            if self.max_frames and extracted_count >= self.max_frames:
+                break
+            
         pbar.close()
-        cap.release()
+        reader.release()
         
         # Save metadata
         metadata_path = self.output_dir / "frames_metadata.json"
@@ -128,6 +129,12 @@ def main():
     parser.add_argument('--fps', type=float, default=None, help='Target FPS for extraction')
     parser.add_argument('--max-frames', type=int, default=None, help='Maximum frames to extract')
     parser.add_argument('--skip', type=int, default=1, help='Extract every Nth frame')
+    parser.add_argument('--sampling', type=str, choices=['auto', 'grab', 'seek'], default='auto',
+                        help='Frame sampling strategy for skipped frames')
+    parser.add_argument('--backend', type=str, choices=BACKENDS, default='opencv',
+                        help='Video decoding backend')
+    parser.add_argument('--max-size', type=int, default=None,
+                        help='Downscale frames so their longest side is at most this size')
     
     args = parser.parse_args()
     
@@ -136,7 +143,10 @@ def main():
         output_dir=args.output,
         fps=args.fps,
         max_frames=args.max_frames,
-        skip_frames=args.skip
+        skip_frames=args.skip,
+        sampling=args.sampling,
+        backend=args.backend,
+        max_size=args.max_size
     )
     
     extractor.extract()
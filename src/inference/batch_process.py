@@ -3,17 +3,75 @@ Batch processing script for multiple videos.
 """
 
 import argparse
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import zlib
 from pathlib import Path
 from tqdm import tqdm
 import json
+import torch
 from src.inference.detect_video import VideoDetector
+from src.inference.checkpoint import Checkpoint
+from src.inference.detection_store import DetectionStore
+from src.inference.geojson_writer import merge_feature_collections
+from src.inference.gps_cache import GPSTrackCache, file_hash
+from src.inference.manifest import MANIFEST_NAME, BatchManifest, model_version
+from src.inference.profiling import write_profile_report
+from src.inference.scheduling import ORDERS, plan_tasks, probe_video, schedule_report, simulate_makespan, task_key
 import concurrent.futures
 
 
+EXECUTORS = ('thread', 'process')
+
+# Merged store of all detections in the output directory
+STORE_NAME = 'detections.db'
+
+# Detector and GPS cache of a process-pool worker, set up once by _init_worker
+_worker = {}
+
+# Run stats added up over the segments of a split video
+SUMMED_STATS = ('inferred_frames', 'gated_frames', 'gated_speed', 'gated_motion',
+                'raw_detections', 'distance_km')
+
+
+def _run_video(detector, video_path, output_path, gps_file, gps_cache, options):
+    """Process one video (or segment) with an already loaded detector."""
+    start = time.perf_counter()
+    detector.set_gps(gps_file, gps_cache=gps_cache)
+    detector.process_video(video_path=str(video_path), output_path=str(output_path), **options)
+    return dict(detector.last_run_stats, task_sec=time.perf_counter() - start)
+
+
+def _init_worker(model_path, conf_threshold, gps_cache_dir, torch_threads):
+    """Process-pool initializer: limit torch threads, then load the model once."""
+    torch.set_num_threads(torch_threads)
+    _worker['detector'] = VideoDetector(model_path=model_path, conf_threshold=conf_threshold)
+    _worker['gps_cache'] = GPSTrackCache(gps_cache_dir) if gps_cache_dir else None
+
+
+def _process_in_worker(video_path, output_path, gps_file, options):
+    """
+    Process one video in a process-pool worker.
+    
+    Returns:
+        (run stats, GPS cache hit/miss counts of this video or None)
+    """
+    cache = _worker['gps_cache']
+    before = dict(cache.stats) if cache else None
+    stats = _run_video(_worker['detector'], video_path, output_path, gps_file, cache, options)
+    return stats, {name: cache.stats[name] - before[name] for name in before} if cache else None
+
+
 class BatchProcessor:
     """Process multiple videos in batch."""
     
-    def __init__(self, model_path, conf_threshold=0.25, max_workers=2):
+    def __init__(self, model_path, conf_threshold=0.25, max_workers=2, track=False,
+                 stream=False, checkpoint_every=None, profile=False, profile_fraction=1.0,
+                 profile_interval=None, gps_cache_dir=None, executor='thread', torch_threads=None,
+                 schedule='longest-first', max_segment_sec=None, force=False, merged_store=True):
         """
         Initialize batch processor.
         
@@ -21,10 +79,57 @@ class BatchProcessor:
             model_path: Path to trained model
             conf_threshold: Confidence threshold
             max_workers: Number of parallel workers
+            track: Emit one detection per tracked defect instead of per frame
+            stream: Stream detections to disk while each video is processed
+            checkpoint_every: Checkpoint each video every N frames and skip
+                              videos already completed when a run is restarted
+            profile: Record per-stage timings of processed videos
+            profile_fraction: Fraction of videos profiled (chosen by a hash
+                              of the file name, so reruns profile the same ones)
+            profile_interval: Also sample call stacks every N seconds
+            gps_cache_dir: Cache parsed GPS tracks in this directory, shared
+                           by all videos and reused by later runs
+            executor: 'thread' (worker threads sharing the GIL) or 'process'
+                      (worker processes); each worker loads the model once
+            torch_threads: Torch threads per worker process (default: CPU
+                           cores divided by max_workers)
+            schedule: 'longest-first' (probe videos and submit the longest
+                      estimated processing times first) or 'input' (file name order)
+            max_segment_sec: Split videos longer than this many seconds into
+                             segments that any free worker picks up; segment
+                             outputs are merged per video (not with save_videos
+                             or track)
+            force: Process every video, even those whose output is current
+                   according to the output directory's manifest
+            merged_store: Also keep all detections of the output directory in
+                          one spatially indexed store (detections.db), updated
+                          as each video finishes
         """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unsupported executor: {executor}")
+        if schedule not in ORDERS:
+            raise ValueError(f"Unsupported schedule: {schedule}")
+        
         self.model_path = Path(model_path)
         self.conf_threshold = conf_threshold
         self.max_workers = max_workers
+        self.track = track
+        self.stream = stream
+        self.checkpoint_every = checkpoint_every
+        self.profile = profile
+        self.profile_fraction = profile_fraction
+        self.profile_interval = profile_interval
+        self.gps_cache_dir = gps_cache_dir
+        self.gps_cache = GPSTrackCache(gps_cache_dir) if gps_cache_dir else None
+        self.executor = executor
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // max_workers)
+        self.schedule = schedule
+        self.max_segment_sec = max_segment_sec
+        self.force = force
+        self.merged_store = merged_store
+        
+        # One detector per worker thread, created on its first video
+        self._local = threading.local()
     
     def process_directory(self, input_dir, output_dir, gps_dir=None, save_videos=False):
         """
@@ -45,83 +150,386 @@ class BatchProcessor:
         video_files = []
         for ext in video_extensions:
             video_files.extend(input_dir.glob(f'*{ext}'))
+        video_files.sort()
+        total_videos = len(video_files)
         
         print(f"Found {len(video_files)} videos to process")
         
         # Process videos
         results = []
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+        # Videos completed by an interrupted run of this batch
+        checkpoint = None
+        if self.checkpoint_every:
+            checkpoint = Checkpoint(output_dir / 'batch_checkpoint.json')
+            state = checkpoint.load(run={'input_dir': str(input_dir.resolve())})
+            if state:
+                results = state['results']
+                print(f"↩️ Resuming batch: {len(results)} videos already processed")
+        completed = {r['video'] for r in results}
+        video_files = [video_path for video_path in video_files if video_path.name not in completed]
+        
+        # Only new or changed videos (or ones whose model/config changed)
+        manifest = BatchManifest(output_dir / MANIFEST_NAME)
+        model = model_version(self.model_path)
+        video_files, fingerprints, configs, skipped = self._select_changed(
+            manifest, model, video_files, gps_dir, save_videos
+        )
+        results.extend(skipped)
+        
+        # Merged store of all videos, brought up to date with skipped ones
+        store = None
+        if self.merged_store:
+            store = DetectionStore(output_dir / STORE_NAME)
+            for result in skipped:
+                self._update_store(store, Path(result['output_path']))
+        
+        # Probe sizes up front and queue the longest work first
+        tasks = self._plan(video_files, save_videos)
+        
+        timings = {}
+        finished_parts = {}
+        failed = set()
+        start = time.perf_counter()
+        
+        with self._create_executor() as executor:
             futures = {}
             
-            for video_path in video_files:
+            for task in tasks:
+                video_path = task.video_path
+                
                 # Find corresponding GPS file if available
-                gps_file = None
-                if gps_dir:
-                    gps_path = Path(gps_dir) / f"{video_path.stem}.csv"
-                    if gps_path.exists():
-                        gps_file = str(gps_path)
+                gps_file = self._gps_file(gps_dir, video_path)
                 
-                output_path = output_dir / f"{video_path.stem}_detections.geojson"
+                output_path = self._output_path(output_dir, video_path, task)
                 
                 # Submit task
-                future = executor.submit(
-                    self._process_single_video,
-                    video_path,
-                    output_path,
-                    gps_file,
-                    save_videos
-                )
-                futures[future] = video_path.name
+                if self.executor == 'process':
+                    future = executor.submit(
+                        _process_in_worker,
+                        video_path,
+                        output_path,
+                        gps_file,
+                        self._video_options(video_path, save_videos, task.frame_range)
+                    )
+                else:
+                    future = executor.submit(
+                        self._process_single_video,
+                        video_path,
+                        output_path,
+                        gps_file,
+                        save_videos,
+                        task.frame_range
+                    )
+                futures[future] = task
             
             # Wait for completion
             for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures)):
-                video_name = futures[future]
+                task = futures[future]
+                video_name = task.video_path.name
                 try:
-                    result = future.result()
-                    results.append({
-                        'video': video_name,
-                        'status': 'success',
-                        'detections': result
-                    })
+                    stats = future.result()
+                    if self.executor == 'process':
+                        stats, cache_stats = stats
+                        self._add_cache_stats(cache_stats)
+                    timings[task_key(task)] = stats.pop('task_sec')
                 except Exception as e:
-                    results.append({
-                        'video': video_name,
-                        'status': 'failed',
-                        'error': str(e)
-                    })
+                    if video_name not in failed:
+                        failed.add(video_name)
+                        results.append({
+                            'video': video_name,
+                            'status': 'failed',
+                            'error': str(e)
+                        })
+                        # Segments of a failed video are never merged
+                        self._remove_segments(output_dir, task, finished_parts.get(video_name, {}))
                     print(f"Error processing {video_name}: {e}")
+                    continue
+                
+                if task.parts > 1:
+                    if video_name in failed:
+                        self._remove_segments(output_dir, task, [task.part])
+                        continue
+                    # A split video is done when all of its segments are
+                    parts = finished_parts.setdefault(video_name, {})
+                    parts[task.part] = stats
+                    if len(parts) < task.parts:
+                        continue
+                    stats = self._merge_segments(output_dir, task, parts)
+                
+                results.append({
+                    'video': video_name,
+                    'status': 'success',
+                    'detections': stats['detections'],
+                    'stats': stats
+                })
+                if store is not None:
+                    self._update_store(store, self._output_path(output_dir, task.video_path))
+                manifest.record(task.video_path, fingerprints[video_name], model, configs[video_name],
+                                self._output_path(output_dir, task.video_path), {
+                                    'detections': stats['detections'],
+                                    'processing_sec': sum(timings[(video_name, part)] for part in range(task.parts))
+                                })
+                
+                if checkpoint:
+                    checkpoint.save({
+                        'run': {'input_dir': str(input_dir.resolve())},
+                        'results': [r for r in results if r['status'] == 'success']
+                    })
+        
+        self._save_schedule(tasks, timings, time.perf_counter() - start, output_dir / 'batch_schedule.json')
         
         # Save summary
         summary_path = output_dir / 'batch_summary.json'
         with open(summary_path, 'w') as f:
             json.dump({
-                'total_videos': len(video_files),
+                'total_videos': total_videos,
                 'successful': sum(1 for r in results if r['status'] == 'success'),
                 'failed': sum(1 for r in results if r['status'] == 'failed'),
+                'skipped': len(skipped),
+                'gps_cache': self.gps_cache.stats if self.gps_cache else None,
                 'results': results
             }, f, indent=2)
         
+        if checkpoint:
+            checkpoint.clear()
+        
+        if store is not None:
+            print(f"🗺️ Merged store: {len(store)} detections of {len(store.videos())} videos "
+                  f"in {store.path}")
+            store.close()
+        
+        if self.profile:
+            self._save_batch_profile(results, output_dir / 'batch_profile.json')
+        
         print(f"\n✅ Batch processing complete!")
+        if self.gps_cache:
+            print(self.gps_cache.summary())
         print(f"Summary saved to {summary_path}")
         
         return results
     
-    def _process_single_video(self, video_path, output_path, gps_file, save_video):
-        """Process a single video."""
-        detector = VideoDetector(
-            model_path=str(self.model_path),
-            gps_file=gps_file,
-            conf_threshold=self.conf_threshold
-        )
+    @staticmethod
+    def _update_store(store, output_path):
+        """Replace a video's detections in the merged store (a failure only warns)."""
+        video = output_path.name.removesuffix('_detections.geojson')
+        try:
+            store.ingest_video(video, output_path)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"⚠️ Could not add {output_path.name} to the merged store: {e}")
+    
+    @staticmethod
+    def _gps_file(gps_dir, video_path):
+        """GPS file of a video (<gps_dir>/<stem>.csv), or None."""
+        if gps_dir:
+            gps_path = Path(gps_dir) / f"{video_path.stem}.csv"
+            if gps_path.exists():
+                return str(gps_path)
+        return None
+    
+    def _select_changed(self, manifest, model, video_files, gps_dir, save_videos):
+        """
+        Keep the videos that need processing according to the manifest.
+        
+        Returns:
+            (videos to process, fingerprint and config of each of them by
+            name, results of the skipped videos)
+        """
+        to_process = []
+        fingerprints = {}
+        configs = {}
+        skipped = []
+        reasons = {}
+        for video_path in video_files:
+            gps_file = self._gps_file(gps_dir, video_path)
+            fingerprint = manifest.fingerprint(video_path)
+            config = {
+                'conf_threshold': self.conf_threshold,
+                'track': self.track,
+                'save_video': save_videos,
+                'gps_hash': file_hash(gps_file) if gps_file else None
+            }
+            reason = 'forced' if self.force else manifest.change(video_path, fingerprint, model, config)
+            if reason is None:
+                entry = manifest.videos[video_path.name]
+                skipped.append({
+                    'video': video_path.name,
+                    'status': 'skipped',
+                    'detections': entry['detections'],
+                    'output_path': entry['output_path']
+                })
+                continue
+            to_process.append(video_path)
+            fingerprints[video_path.name] = fingerprint
+            configs[video_path.name] = config
+            reasons[reason] = reasons.get(reason, 0) + 1
+        
+        if skipped:
+            saved = sum(manifest.videos[r['video']].get('processing_sec') or 0.0 for r in skipped)
+            print(f"⏭️ Skipped {len(skipped)} unchanged videos (~{saved / 60:.1f} min of processing saved)")
+        if to_process:
+            print(f"🔁 Processing {len(to_process)} videos: "
+                  + ', '.join(f"{count} {reason}" for reason, count in reasons.items()))
+        return to_process, fingerprints, configs, skipped
+    
+    def _plan(self, video_files, save_videos):
+        """Probe videos and build the task queue (see scheduling.plan_tasks)."""
+        max_segment_sec = self.max_segment_sec
+        if max_segment_sec and save_videos:
+            print("⚠️ Annotated videos are not split into segments")
+            max_segment_sec = None
+        elif max_segment_sec and self.track:
+            # Each segment runs its own tracker: a defect seen across a boundary would be counted twice
+            print("⚠️ Tracked videos are not split into segments")
+            max_segment_sec = None
+        
+        infos = {video_path: probe_video(video_path) for video_path in video_files}
+        tasks = plan_tasks(video_files, infos, order=self.schedule, max_segment_sec=max_segment_sec)
+        
+        hours = sum(info.frames / info.fps for info in infos.values() if info) / 3600
+        segments = sum(1 for task in tasks if task.parts > 1)
+        print(f"📐 {len(tasks)} tasks ({segments} segments) over {hours:.2f} h of video, "
+              f"{self.schedule} order, predicted makespan "
+              f"{simulate_makespan([task.cost for task in tasks], self.max_workers):.0f} s")
+        return tasks
+    
+    @staticmethod
+    def _output_path(output_dir, video_path, task=None):
+        """Detections path of a video, or of one segment of a split video."""
+        if task is None or task.parts == 1:
+            return output_dir / f"{video_path.stem}_detections.geojson"
+        return output_dir / f"{video_path.stem}_part{task.part:03d}_detections.geojson"
+    
+    def _merge_segments(self, output_dir, task, part_stats):
+        """
+        Merge the segment outputs of a split video into its detections file.
+        
+        Returns:
+            Run stats of the whole video
+        """
+        video_path = task.video_path
+        part_paths = [self._output_path(output_dir, video_path, task._replace(part=part))
+                      for part in range(task.parts)]
+        count = merge_feature_collections(part_paths, self._output_path(output_dir, video_path))
+        self._remove_segments(output_dir, task, range(task.parts))
+        
+        stats = {
+            'video': video_path.name,
+            'segments': task.parts,
+            'total_frames': part_stats[0].get('total_frames'),
+            'detections': sum(part['detections'] for part in part_stats.values())
+        }
+        for name in SUMMED_STATS:
+            values = [part[name] for part in part_stats.values() if part.get(name) is not None]
+            if values:
+                stats[name] = sum(values)
+        if count != stats['detections']:
+            # Detections without GPS coordinates are left out of GeoJSON
+            stats['geolocated_detections'] = count
+        return stats
+    
+    def _remove_segments(self, output_dir, task, parts):
+        """Delete the outputs of finished segments of a split video."""
+        for part in parts:
+            path = self._output_path(output_dir, task.video_path, task._replace(part=part))
+            path.unlink(missing_ok=True)
+            # Streamed segments also leave a text sequence (VideoDetector.stream_path)
+            path.with_suffix('.geojsons').unlink(missing_ok=True)
+    
+    def _save_schedule(self, tasks, timings, wall_sec, schedule_path):
+        """Write the predicted vs. actual makespan of the batch."""
+        report = schedule_report(tasks, timings, self.max_workers, wall_sec)
+        with open(schedule_path, 'w') as f:
+            json.dump(dict(report, schedule=self.schedule, max_segment_sec=self.max_segment_sec), f, indent=2)
+        
+        utilization = f"{report['utilization']:.0%}" if report['utilization'] is not None else 'n/a'
+        print(f"⏱️ Makespan: predicted {report['predicted_makespan_sec']:.0f} s "
+              f"(calibrated {report['calibrated_makespan_sec']:.0f} s), "
+              f"actual {report['actual_makespan_sec']:.0f} s, worker utilization {utilization}")
+        print(f"Schedule report saved to {schedule_path}")
+    
+    def _create_executor(self):
+        """Worker pool of the configured kind."""
+        if self.executor == 'thread':
+            return concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
         
-        detections = detector.process_video(
-            video_path=str(video_path),
-            output_path=str(output_path),
-            save_video=save_video
+        # Spawned (not forked) workers: torch and decoder threads do not survive fork
+        print(f"🧵 {self.max_workers} worker processes, {self.torch_threads} torch threads each")
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(str(self.model_path), self.conf_threshold, self.gps_cache_dir, self.torch_threads)
         )
+    
+    def _add_cache_stats(self, cache_stats):
+        """Add the GPS cache counts of a worker process to the batch totals."""
+        if cache_stats and self.gps_cache:
+            for name, count in cache_stats.items():
+                self.gps_cache.stats[name] += count
+    
+    def _video_options(self, video_path, save_video, frame_range=None):
+        """process_video options of one video (or segment)."""
+        options = {
+            'save_video': save_video,
+            'track': self.track,
+            'stream': self.stream,
+            # Annotated videos cannot be resumed, those are reprocessed fully
+            'checkpoint_every': None if save_video else self.checkpoint_every,
+            'profile': self._should_profile(Path(video_path).name),
+            'profile_interval': self.profile_interval
+        }
+        if frame_range is not None:
+            options['frame_range'] = frame_range
+        return options
+    
+    def _should_profile(self, video_name):
+        """Whether this video is in the profiled fraction."""
+        if not self.profile:
+            return False
+        return zlib.crc32(video_name.encode('utf-8')) / 2**32 < self.profile_fraction
+    
+    def _save_batch_profile(self, results, profile_path):
+        """Write per-video throughput and stage totals over the profiled videos."""
+        videos = []
+        stages = {}
+        for result in results:
+            profile = result.get('stats', {}).get('profile')
+            if not profile:
+                continue
+            videos.append({
+                'video': result['video'],
+                'wall_sec': profile['wall_sec'],
+                'frames_per_sec': profile['frames_per_sec'],
+                'inferred_frames_per_sec': profile['inferred_frames_per_sec'],
+                'stages': {name: stage['total_sec'] for name, stage in profile['stages'].items()}
+            })
+            for name, stage in profile['stages'].items():
+                stages[name] = stages.get(name, 0.0) + stage['total_sec']
+        
+        total = sum(stages.values())
+        write_profile_report({
+            'profiled_videos': len(videos),
+            'stages': {
+                name: {'total_sec': round(seconds, 6), 'share': round(seconds / total, 4) if total else 0.0}
+                for name, seconds in sorted(stages.items(), key=lambda item: -item[1])
+            },
+            'videos': videos
+        }, profile_path)
+        print(f"Profile of {len(videos)} videos saved to {profile_path}")
+    
+    def _process_single_video(self, video_path, output_path, gps_file, save_video, frame_range=None):
+        """Process a single video (or segment) with the calling thread's detector."""
+        detector = getattr(self._local, 'detector', None)
+        if detector is None:
+            detector = VideoDetector(
+                model_path=str(self.model_path),
+                conf_threshold=self.conf_threshold
+            )
+            self._local.detector = detector
         
-        return len(detections)
+        return _run_video(detector, video_path, output_path, gps_file, self.gps_cache,
+                          self._video_options(video_path, save_video, frame_range))
 
 
 def main():
@@ -133,13 +541,53 @@ def main():
     parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
     parser.add_argument('--save-videos', action='store_true', help='Save annotated videos')
     parser.add_argument('--workers', type=int, default=2, help='Number of parallel workers')
+    parser.add_argument('--track', action='store_true',
+                        help='Emit one detection per tracked defect instead of per frame')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream detections to disk while each video is processed')
+    parser.add_argument('--checkpoint-every', type=int, default=None,
+                        help='Checkpoint every N frames and resume interrupted batches')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-stage timings and write batch_profile.json')
+    parser.add_argument('--profile-fraction', type=float, default=1.0,
+                        help='Fraction of videos to profile (with --profile)')
+    parser.add_argument('--profile-interval', type=float, default=None,
+                        help='With --profile, also sample call stacks every N seconds')
+    parser.add_argument('--gps-cache', type=str, default=None,
+                        help='Cache parsed GPS tracks in this directory across videos and runs')
+    parser.add_argument('--executor', type=str, choices=EXECUTORS, default='thread',
+                        help='Run workers as threads or as processes (one model per worker)')
+    parser.add_argument('--torch-threads', type=int, default=None,
+                        help='Torch threads per worker process (default: cores / workers)')
+    parser.add_argument('--schedule', type=str, choices=ORDERS, default='longest-first',
+                        help='Submit the longest videos first, or in input order')
+    parser.add_argument('--max-segment-sec', type=float, default=None,
+                        help='Split videos longer than this into segments processed by free workers '
+                             '(not with --save-videos or --track)')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocess videos whose outputs are current according to the manifest')
+    parser.add_argument('--no-merged-store', action='store_true',
+                        help='Do not maintain the merged detections.db of the output directory')
     
     args = parser.parse_args()
     
     processor = BatchProcessor(
         model_path=args.model,
         conf_threshold=args.conf,
-        max_workers=args.workers
+        max_workers=args.workers,
+        track=args.track,
+        stream=args.stream,
+        checkpoint_every=args.checkpoint_every,
+        profile=args.profile,
+        profile_fraction=args.profile_fraction,
+        profile_interval=args.profile_interval,
+        gps_cache_dir=args.gps_cache,
+        executor=args.executor,
+        torch_threads=args.torch_threads,
+        schedule=args.schedule,
+        max_segment_sec=args.max_segment_sec,
+        force=args.force,
+        merged_store=not args.no_merged_store
     )
     
     processor.process_directory(
@@ -0,0 +1,72 @@
+"""
+Checkpoints for resuming long video processing runs.
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+def video_fingerprint(video_path):
+    """Identify a video file by path, size and modification time."""
+    stat = Path(video_path).stat()
+    return {
+        'path': str(Path(video_path).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+
+class Checkpoint:
+    """JSON checkpoint file written atomically."""
+
+    def __init__(self, path):
+        """
+        Initialize checkpoint.
+
+        Args:
+            path: Checkpoint file path
+        """
+        self.path = Path(path)
+
+    def load(self, run=None):
+        """
+        Load the checkpoint state.
+
+        Args:
+            run: If given, only return a state saved for this same run
+                 description (video, options...)
+
+        Returns:
+            State dict, or None if there is no usable checkpoint
+        """
+        if not self.path.exists():
+            return None
+
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        # Compare as stored in JSON (tuples become lists...)
+        if run is not None and state.get('run') != json.loads(json.dumps(run)):
+            return None
+
+        return state
+
+    def save(self, state):
+        """Write the state, replacing the previous checkpoint atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Remove the checkpoint."""
+        self.path.unlink(missing_ok=True)
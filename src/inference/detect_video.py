@@ -2,7 +2,6 @@
 Detect road degradations in video with GPS geolocation.
 """
 
-import cv2
 import argparse
 from pathlib import Path
 from ultralytics import YOLO
@@ -10,21 +9,36 @@ import json
 from datetime import datetime, timedelta
 from tqdm import tqdm
 import pandas as pd
+import numpy as np
 from .gps_utils import GPSProcessor
+from .gps_cache import GPSTrackCache
+from .timestamps import to_utc, utc_now
+from .frame_reader import BACKENDS, open_frame_reader
+from .shared_frames import SharedFrameReader
+from .frame_gating import FrameGate
+from .tracking import DetectionTracker
+from .geojson_writer import GeoJSONSeqWriter, detection_to_feature, geojson_seq_to_feature_collection
+from .checkpoint import Checkpoint, video_fingerprint
+from .video_writer import AnnotatedVideoWriter
+from .profiling import (StageProfiler, SamplingProfiler, write_profile_report,
+                        print_profile_report)
 
 
 class VideoDetector:
     """Detect road degradations in video with geolocation."""
     
-    def __init__(self, model_path, gps_file=None, gps_format='csv', conf_threshold=0.25):
+    def __init__(self, model_path, gps_file=None, gps_format='csv', conf_threshold=0.25,
+                 gps_cache=None, gps_timestamp_format=None):
         """
         Initialize video detector.
         
         Args:
             model_path: Path to trained YOLO model
             gps_file: Path to GPS data file
-            gps_format: GPS file format ('csv', 'gpx', 'json')
+            gps_format: GPS file format ('csv', 'gpx', 'nmea', 'json')
             conf_threshold: Confidence threshold for detections
+            gps_cache: GPSTrackCache of parsed GPS tracks (optional)
+            gps_timestamp_format: Format of the GPS timestamps (None to detect it)
         """
         self.model_path = Path(model_path)
         self.conf_threshold = conf_threshold
@@ -35,13 +49,37 @@ class VideoDetector:
         
         # Initialize GPS processor
         self.gps_processor = None
-        if gps_file:
-            self.gps_processor = GPSProcessor(gps_file, gps_format)
+        self.set_gps(gps_file, gps_format, gps_cache, gps_timestamp_format)
         
         self.class_names = ['pothole', 'longitudinal_crack', 'crazing', 'faded_marking']
+        
+        # Frame/detection counts of the last process_video call
+        self.last_run_stats = None
+        
+        # Stage timings of the current process_video call (disabled by default)
+        self.profiler = StageProfiler(enabled=False)
+    
+    def set_gps(self, gps_file=None, gps_format='csv', gps_cache=None, gps_timestamp_format=None):
+        """
+        Use another GPS file for the next videos (the model stays loaded).
+        
+        Args:
+            gps_file: Path to GPS data file (None for no geolocation)
+            gps_format: GPS file format ('csv', 'gpx', 'nmea', 'json')
+            gps_cache: GPSTrackCache of parsed GPS tracks (optional)
+            gps_timestamp_format: Format of the GPS timestamps (None to detect it)
+        """
+        self.gps_processor = None
+        if gps_file:
+            self.gps_processor = GPSProcessor(gps_file, gps_format, cache=gps_cache,
+                                              timestamp_format=gps_timestamp_format)
     
     def process_video(self, video_path, output_path=None, save_video=False, 
-                     video_start_time=None, skip_frames=1):
+                     video_start_time=None, skip_frames=1, sampling='auto', batch_size=1,
+                     min_speed=None, motion_threshold=None, sample_distance=None, track=False,
+                     stream=False, checkpoint_every=None, decode_backend='opencv',
+                     decode_size=None, video_size=None, video_fps=None, profile=False,
+                     profile_interval=None, pipeline=False, frame_range=None):
         """
         Process video and detect degradations.
         
@@ -49,139 +87,543 @@ class VideoDetector:
             video_path: Path to input video
             output_path: Path for output GeoJSON
             save_video: Whether to save annotated video
-            video_start_time: Video start datetime
+            video_start_time: Video start datetime (naive values are taken as UTC)
             skip_frames: Process every Nth frame
+            sampling: Frame sampling strategy ('auto', 'grab' or 'seek')
+            batch_size: Number of sampled frames per model prediction
+            min_speed: Skip inference while GPS speed is below this value
+            motion_threshold: Skip inference when the downsampled frame differs
+                              from the last inferred one by less than this (0-255)
+            sample_distance: Sample frames every N meters along the GPS track
+                             instead of every skip_frames frames
+            track: Link boxes across frames and emit one detection per track
+            stream: Append detections to a GeoJSON text sequence next to output_path
+                    as they are produced instead of keeping them in memory
+            checkpoint_every: Save a checkpoint next to output_path every N frames
+                              and resume from it if the run was interrupted
+                              (implies stream)
+            decode_backend: Video decoding backend ('opencv' or 'pyav')
+            decode_size: Downscale decoded frames so their longest side is at
+                         most this many pixels (boxes are reported in source
+                         video coordinates)
+            video_size: Longest side of the annotated video (None = decoded size)
+            video_fps: Frame rate of the annotated video (None = source frame rate)
+            profile: Record per-stage timings (in last_run_stats['profile'] and
+                     next to output_path as .profile.json)
+            profile_interval: With profile, also sample the call stack every N
+                              seconds and write collapsed stacks (.folded)
+            pipeline: Decode in a separate process that shares frames through
+                      a shared-memory ring buffer
+            frame_range: (first, end) frame numbers to process instead of the
+                         whole video, e.g. one segment of a split batch video
+                         (tracks do not continue across segments)
         
         Returns:
-            List of detections with geolocation
+            List of detections with geolocation (empty when streaming)
         """
         video_path = Path(video_path)
+        batch_size = max(1, int(batch_size))
         print(f"🎬 Processing video: {video_path.name}")
         
+        profiler = self.profiler = StageProfiler(enabled=profile)
+        sampler = None
+        if profile and profile_interval:
+            sampler = SamplingProfiler(interval=profile_interval).start()
+        
+        if checkpoint_every:
+            if not output_path:
+                raise ValueError("Checkpointing requires an output path")
+            if save_video:
+                raise ValueError("Checkpointing is not supported with save_video")
+            stream = True
+        if frame_range is not None and save_video:
+            raise ValueError("Frame ranges are not supported with save_video")
+        
         # Open video
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise ValueError(f"Cannot open video: {video_path}")
+        reader_options = dict(
+            backend=decode_backend,
+            skip_frames=skip_frames,
+            strategy=sampling,
+            retrieve_all=save_video,
+            max_size=decode_size
+        )
+        if pipeline:
+            # Room for a full batch being inferred and the next one being decoded
+            reader = SharedFrameReader(video_path, num_slots=max(8, 2 * batch_size + 2),
+                                       **reader_options)
+        else:
+            reader = open_frame_reader(video_path, **reader_options)
         
         # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-        print(f"📊 Video info: {width}x{height} @ {fps:.2f} FPS, {total_frames} frames")
+        fps = reader.fps
+        total_frames = reader.total_frames
+        width = reader.width
+        height = reader.height
         
-        # Setup video writer if needed
-        video_writer = None
-        if save_video:
-            output_video_path = video_path.parent / f"{video_path.stem}_annotated.mp4"
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            video_writer = cv2.VideoWriter(str(output_video_path), fourcc, fps, (width, height))
+        print(f"📊 Video info: {reader.source_width}x{reader.source_height} @ {fps:.2f} FPS, "
+              f"{total_frames} frames")
+        if reader.scale != 1.0:
+            print(f"🔽 Decoding at {width}x{height} ({decode_backend})")
         
-        # Prepare GPS synchronization
+        # Prepare GPS synchronization (all times naive UTC, like GPS timestamps)
         gps_data = None
+        track_span = None
+        if video_start_time is not None:
+            video_start_time = to_utc(video_start_time).to_pydatetime()
         if self.gps_processor:
             gps_data = self.gps_processor.gps_data
             if video_start_time is None:
                 video_start_time = gps_data['timestamp'].iloc[0]
+            track_span = self._track_span(video_start_time, total_frames / fps)
+        
+        if sample_distance:
+            if track_span is None:
+                raise ValueError("Distance sampling requires GPS data")
+            # Choose frames by distance travelled instead of a fixed stride
+            reader.select_frames(self._distance_frame_numbers(track_span, sample_distance, fps))
+            print(f"⏩ Frame sampling: every {sample_distance:g} m "
+                  f"({len(reader.frame_numbers)} frames), {reader.strategy} strategy")
+        else:
+            print(f"⏩ Frame sampling: every {reader.skip_frames} frame(s), {reader.strategy} strategy")
+        
+        if frame_range is not None:
+            first_frame, end_frame = frame_range
+            reader.select_frames([n for n in reader.sampled_frame_numbers() if first_frame <= n < end_frame])
+            reader.start_frame = first_frame
+            print(f"✂️ Frames {first_frame}-{min(end_frame, total_frames) - 1} only")
         
-        # Process frames
+        # Setup video writer if needed
+        video_writer = None
+        if save_video:
+            output_video_path = video_path.parent / f"{video_path.stem}_annotated.mp4"
+            # Drawn and encoded in a separate process
+            video_writer = AnnotatedVideoWriter(
+                output_video_path, fps, (width, height), self.class_names,
+                output_size=video_size, output_fps=video_fps
+            )
+        
+        # Gate redundant frames before inference
+        gate = FrameGate(min_speed=min_speed, motion_threshold=motion_threshold)
+        
+        # Link boxes across frames into one record per defect
+        tracker = DetectionTracker() if track else None
+        
+        # Resume from a checkpoint of the same run (video and options)
+        checkpoint = None
+        state = None
+        if checkpoint_every:
+            checkpoint = Checkpoint(self.checkpoint_path(output_path))
+            run = {
+                'video': video_fingerprint(video_path),
+                'options': {
+                    'conf_threshold': self.conf_threshold,
+                    'video_start_time': str(video_start_time),
+                    'skip_frames': skip_frames,
+                    'sample_distance': sample_distance,
+                    'batch_size': batch_size,
+                    'min_speed': min_speed,
+                    'motion_threshold': motion_threshold,
+                    'track': track,
+                    'decode_backend': decode_backend,
+                    'decode_size': decode_size,
+                    'frame_range': list(frame_range) if frame_range is not None else None
+                }
+            }
+            state = checkpoint.load(run)
+            stream_file = self.stream_path(output_path)
+            if state and (not stream_file.exists() or stream_file.stat().st_size < state['stream_offset']):
+                state = None
+        
+        # Stream detections to disk instead of accumulating them
+        seq_writer = None
+        if stream:
+            if not output_path:
+                raise ValueError("Streaming requires an output path")
+            seq_writer = GeoJSONSeqWriter(
+                self.stream_path(output_path),
+                offset=state['stream_offset'] if state else None
+            )
+        
+        # Process frames in batches of sampled frames
         detections = []
-        frame_count = 0
-        processed_count = 0
+        detection_count = 0
+        inferred_count = 0
+        pending = []
+        pending_sampled = 0
+        decoded = []
+        decoded_sampled = 0
         
-        pbar = tqdm(total=total_frames)
+        if state:
+            reader.start_frame = state['last_frame'] + 1
+            detection_count = state['detection_count']
+            inferred_count = state['inferred_count']
+            gate.load_state_dict(state['gate'])
+            if tracker:
+                tracker.load_state_dict(state['tracker'])
+            print(f"↩️ Resuming from checkpoint at frame {reader.start_frame}")
+        last_checkpoint_frame = reader.start_frame
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Process every Nth frame
-            if frame_count % skip_frames == 0:
-                # Get timestamp
-                timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
-                timestamp_sec = timestamp_ms / 1000.0
-                
-                # Calculate absolute timestamp
-                if video_start_time:
-                    frame_timestamp = video_start_time + timedelta(seconds=timestamp_sec)
+        def save_checkpoint(last_frame):
+            with profiler.stage('checkpoint'):
+                seq_writer.sync()
+                checkpoint.save({
+                    'run': run,
+                    'last_frame': last_frame,
+                    'stream_offset': seq_writer.tell(),
+                    'detection_count': detection_count,
+                    'inferred_count': inferred_count,
+                    'gate': gate.state_dict(),
+                    'tracker': tracker.state_dict() if tracker else None
+                })
+        
+        def collect(frame_detections):
+            nonlocal detection_count
+            detection_count += len(frame_detections)
+            with profiler.stage('output'):
+                if seq_writer:
+                    for detection in frame_detections:
+                        seq_writer.write(detection)
                 else:
-                    frame_timestamp = datetime.now()
-                
-                # Get GPS coordinates
-                gps_coords = None
-                if self.gps_processor:
-                    gps_coords = self.gps_processor.interpolate_gps(frame_timestamp, gps_data)
-                
-                # Run detection
-                results = self.model.predict(
-                    source=frame,
-                    conf=self.conf_threshold,
-                    verbose=False
-                )
-                
-                # Process detections
-                result = results[0]
-                boxes = result.boxes
-                
-                for box in boxes:
-                    # Get box data
-                    xyxy = box.xyxy[0].cpu().numpy()
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    
-                    detection = {
-                        'frame_number': frame_count,
-                        'timestamp': frame_timestamp.isoformat(),
-                        'timestamp_sec': timestamp_sec,
-                        'class_id': cls,
-                        'class_name': self.class_names[cls],
-                        'confidence': conf,
-                        'bbox': {
-                            'xmin': float(xyxy[0]),
-                            'ymin': float(xyxy[1]),
-                            'xmax': float(xyxy[2]),
-                            'ymax': float(xyxy[3])
-                        }
-                    }
-                    
-                    # Add GPS coordinates
-                    if gps_coords:
-                        detection['latitude'] = gps_coords['latitude']
-                        detection['longitude'] = gps_coords['longitude']
-                        detection['altitude'] = gps_coords.get('altitude', 0.0)
-                    
-                    detections.append(detection)
+                    detections.extend(frame_detections)
+        
+        def collect_batch(frame_results):
+            for frame_number, frame_detections in frame_results:
+                if tracker:
+                    with profiler.stage('tracking'):
+                        frame_detections = tracker.update(frame_number, frame_detections)
+                collect(frame_detections)
+        
+        end_frame = min(frame_range[1], total_frames) if frame_range is not None else total_frames
+        pbar = tqdm(total=end_frame, initial=reader.start_frame)
+        
+        def locate_and_gate():
+            nonlocal decoded, pending_sampled, inferred_count
+            with profiler.stage('gps'):
+                located = self._locate_frames(decoded, video_start_time, gps_data)
+            
+            for video_frame, (frame_timestamp, gps_coords) in zip(decoded, located):
+                if video_frame.sampled and gate.enabled:
+                    speed = gps_coords.get('speed') if gps_coords else None
+                    with profiler.stage('gate'):
+                        infer = gate.should_infer(video_frame.image, speed)
+                    if not infer:
+                        # Gated frames are handled like unsampled ones
+                        video_frame = video_frame._replace(sampled=False)
                 
-                # Draw boxes on frame for video
-                if save_video:
-                    annotated_frame = result.plot()
-                    video_writer.write(annotated_frame)
+                pending.append((video_frame, frame_timestamp, gps_coords))
+                pending_sampled += video_frame.sampled
+                inferred_count += video_frame.sampled
+            decoded = []
+        
+        for video_frame in profiler.iterate('decode', reader):
+            decoded.append(video_frame)
+            decoded_sampled += video_frame.sampled
+            
+            # Geolocate as many frames at once as could still fit in the batch
+            held = len(pending) + len(decoded)
+            if decoded_sampled == batch_size - pending_sampled or held == reader.max_pending:
+                locate_and_gate()
+                decoded_sampled = 0
+            
+            # Full batch, or as many frames held as the reader can lend
+            if pending_sampled == batch_size or held == reader.max_pending:
+                collect_batch(self._process_batch(pending, video_writer, reader.scale))
+                reader.recycle(frame for frame, _, _ in pending)
+                pending, pending_sampled = [], 0
                 
-                processed_count += 1
-            elif save_video:
-                # Write original frame if not processed
-                video_writer.write(frame)
+                if checkpoint and video_frame.frame_number - last_checkpoint_frame >= checkpoint_every:
+                    save_checkpoint(video_frame.frame_number)
+                    last_checkpoint_frame = video_frame.frame_number
             
-            frame_count += 1
-            pbar.update(1)
+            pbar.update(video_frame.frame_number + 1 - pbar.n)
+        
+        # Flush the last partial batch and open tracks
+        if decoded:
+            locate_and_gate()
+        if pending:
+            collect_batch(self._process_batch(pending, video_writer, reader.scale))
+            reader.recycle(frame for frame, _, _ in pending)
+        if tracker:
+            with profiler.stage('tracking'):
+                remaining = tracker.finish()
+            collect(remaining)
+        if seq_writer:
+            with profiler.stage('output'):
+                seq_writer.close()
         
         pbar.close()
-        cap.release()
         
+        # Queued frames are encoded before the reader's buffers go away
         if video_writer:
-            video_writer.release()
+            with profiler.stage('video'):
+                video_writer.close()
             print(f"✅ Annotated video saved to {output_video_path}")
+        reader.release()
+        
+        self.last_run_stats = {
+            'video': video_path.name,
+            'total_frames': total_frames,
+            'inferred_frames': inferred_count,
+            'gated_frames': gate.gated_count(),
+            'gated_speed': gate.stats['gated_speed'],
+            'gated_motion': gate.stats['gated_motion'],
+            'detections': detection_count
+        }
+        
+        if tracker:
+            raw_count = tracker.stats['raw_detections']
+            self.last_run_stats['raw_detections'] = raw_count
+            self.last_run_stats['output_reduction'] = 1 - detection_count / raw_count if raw_count else 0.0
         
-        print(f"✅ Processed {processed_count} frames, found {len(detections)} detections")
+        if track_span is not None:
+            distance_km = (track_span[1][-1] - track_span[1][0]) / 1000.0
+            self.last_run_stats['distance_km'] = distance_km
+            self.last_run_stats['frames_per_km'] = inferred_count / distance_km if distance_km else None
+        
+        print(f"✅ Processed {inferred_count} frames, found {detection_count} detections")
+        if tracker:
+            print(f"🔗 Tracking: {self.last_run_stats['raw_detections']} raw detections → "
+                  f"{detection_count} tracks ({self.last_run_stats['output_reduction']:.0%} smaller output)")
+        if self.last_run_stats.get('frames_per_km') is not None:
+            print(f"🛣️ Covered {distance_km:.2f} km, "
+                  f"{self.last_run_stats['frames_per_km']:.1f} inferred frames per km")
+        if gate.enabled:
+            print(f"🚦 Gated {gate.gated_count()} frames "
+                  f"({gate.stats['gated_speed']} stopped, {gate.stats['gated_motion']} static)")
         
         # Save detections
+        with profiler.stage('output'):
+            if seq_writer and seq_writer.path == Path(output_path):
+                print(f"✅ Detections saved to {output_path}")
+            elif seq_writer:
+                geojson_seq_to_feature_collection(
+                    seq_writer.path, output_path, metadata={'classes': self.class_names}
+                )
+                print(f"✅ Detections saved to {output_path} (stream: {seq_writer.path})")
+            elif output_path:
+                self.save_detections(detections, output_path)
+        
+        if checkpoint:
+            checkpoint.clear()
+        
+        if profile:
+            self._save_profile(profiler, sampler, output_path, end_frame - reader.start_frame)
+        
+        return detections
+    
+    def _save_profile(self, profiler, sampler, output_path, decoded_frames):
+        """
+        Add the profile of the last run to last_run_stats and write it out.
+        
+        Args:
+            profiler: StageProfiler of the run
+            sampler: SamplingProfiler of the run (or None)
+            output_path: Detections output path (reports are written next to it)
+            decoded_frames: Number of frames read in this run
+        """
+        report = profiler.report()
+        wall = report['wall_sec']
+        report['frames_per_sec'] = decoded_frames / wall if wall else None
+        report['inferred_frames_per_sec'] = self.last_run_stats['inferred_frames'] / wall if wall else None
+        
+        if sampler:
+            sampler.stop()
+            report['sampling'] = {'interval_sec': sampler.interval, 'samples': sampler.samples}
+            if output_path:
+                folded_path = Path(output_path).with_suffix('.folded')
+                sampler.write_collapsed(folded_path)
+                report['sampling']['collapsed_stacks'] = str(folded_path)
+        
+        self.last_run_stats['profile'] = report
+        print_profile_report(report)
+        
         if output_path:
-            self.save_detections(detections, output_path)
+            profile_path = Path(output_path).with_suffix('.profile.json')
+            write_profile_report(dict(report, video=self.last_run_stats['video']), profile_path)
+            print(f"📝 Profile saved to {profile_path}")
+    
+    def _track_span(self, video_start_time, duration_sec):
+        """
+        Cumulative track distance over the span of the video.
+        
+        Args:
+            video_start_time: Video start datetime
+            duration_sec: Video duration (seconds)
+        
+        Returns:
+            (seconds since video start, cumulative distance in meters) arrays,
+            both clipped to the video span
+        """
+        track = self.gps_processor.track_distance()
+        track_sec = (track['timestamp'] - video_start_time).dt.total_seconds().to_numpy()
+        distance = track['cumulative_distance'].to_numpy()
+        
+        # Restrict to the video, with the distance interpolated at both ends
+        inside = (track_sec > 0) & (track_sec < duration_sec)
+        span_sec = np.concatenate([[0.0], track_sec[inside], [duration_sec]])
+        span_distance = np.interp(span_sec, track_sec, distance)
+        
+        return span_sec, span_distance
+    
+    def _distance_frame_numbers(self, track_span, sample_distance, fps):
+        """
+        Choose frames so consecutive ones are sample_distance meters apart.
+        
+        Args:
+            track_span: Output of _track_span
+            sample_distance: Distance between sampled frames (meters)
+            fps: Video frame rate
+        
+        Returns:
+            Array of frame numbers
+        """
+        span_sec, span_distance = track_span
+        targets = np.arange(span_distance[0], span_distance[-1], sample_distance)
+        
+        # First time each target distance is reached (stops form plateaus)
+        idx = np.searchsorted(span_distance, targets, side='left').clip(1, len(span_distance) - 1)
+        d0, d1 = span_distance[idx - 1], span_distance[idx]
+        t0, t1 = span_sec[idx - 1], span_sec[idx]
+        factor = np.where(d1 > d0, (targets - d0) / np.where(d1 > d0, d1 - d0, 1.0), 0.0)
+        target_sec = t0 + factor.clip(0.0, 1.0) * (t1 - t0)
+        
+        return np.unique(np.round(target_sec * fps).astype(int))
+    
+    def _locate_frames(self, frames, video_start_time, gps_data):
+        """
+        Compute the absolute timestamps and GPS coordinates of decoded frames.
+        
+        The sampled frames are geolocated with a single vectorized GPS lookup.
+        
+        Args:
+            frames: VideoFrames in decoding order
+            video_start_time: Video start datetime
+            gps_data: GPS DataFrame (or None)
+        
+        Returns:
+            (frame_timestamp, gps_coords) tuple per frame, gps_coords is None
+            without GPS; both are None for unsampled frames
+        """
+        located = [(None, None)] * len(frames)
+        sampled = [i for i, frame in enumerate(frames) if frame.sampled]
+        if not sampled:
+            return located
+        
+        if video_start_time:
+            timestamps = [video_start_time + timedelta(seconds=frames[i].timestamp_sec) for i in sampled]
+        else:
+            timestamps = [utc_now() for _ in sampled]
+        
+        coords = [None] * len(sampled)
+        if self.gps_processor:
+            coords = self.gps_processor.interpolate_gps_batch(timestamps, gps_data).to_dict('records')
+        
+        for i, frame_timestamp, gps_coords in zip(sampled, timestamps, coords):
+            located[i] = (frame_timestamp, gps_coords)
+        
+        return located
+    
+    def _process_batch(self, frames, video_writer=None, box_scale=1.0):
+        """
+        Run a single prediction over the sampled frames of a batch.
+        
+        Args:
+            frames: (VideoFrame, frame_timestamp, gps_coords) tuples in decoding
+                    order (unsampled frames are only written to the annotated video)
+            video_writer: Annotated video writer (or None)
+            box_scale: Factor from decoded frame to source video coordinates
+        
+        Returns:
+            (frame_number, detections) for each sampled frame, in frame order
+        """
+        sampled = [frame for frame, _, _ in frames if frame.sampled]
+        
+        # Run detection on the whole batch at once
+        results = []
+        if sampled:
+            with self.profiler.stage('inference'):
+                results = self.model.predict(
+                    source=[frame.image for frame in sampled],
+                    conf=self.conf_threshold,
+                    verbose=False
+                )
+        results_by_frame = {
+            frame.frame_number: result for frame, result in zip(sampled, results)
+        }
+        
+        frame_results = []
+        for video_frame, frame_timestamp, gps_coords in frames:
+            if not video_frame.sampled:
+                # Write original frame if not processed
+                if video_writer:
+                    with self.profiler.stage('video'):
+                        video_writer.write(video_frame.frame_number, video_frame.image)
+                continue
+            
+            result = results_by_frame[video_frame.frame_number]
+            with self.profiler.stage('postprocess'):
+                frame_results.append((video_frame.frame_number, self._result_to_detections(
+                    result, video_frame.frame_number, frame_timestamp,
+                    video_frame.timestamp_sec, gps_coords, box_scale
+                )))
+            
+            # Boxes are drawn on the frame by the writer process
+            if video_writer:
+                with self.profiler.stage('video'):
+                    boxes = result.boxes
+                    video_writer.write(
+                        video_frame.frame_number, video_frame.image, boxes.xyxy.cpu().numpy(),
+                        boxes.cls.cpu().numpy(), boxes.conf.cpu().numpy()
+                    )
+        
+        return frame_results
+    
+    def _result_to_detections(self, result, frame_number, frame_timestamp, timestamp_sec,
+                              gps_coords=None, box_scale=1.0):
+        """Convert one YOLO result into detection dicts."""
+        detections = []
+        
+        for box in result.boxes:
+            # Get box data
+            xyxy = box.xyxy[0].cpu().numpy() * box_scale
+            conf = float(box.conf[0])
+            cls = int(box.cls[0])
+            
+            detection = {
+                'frame_number': frame_number,
+                'timestamp': frame_timestamp.isoformat(),
+                'timestamp_sec': timestamp_sec,
+                'class_id': cls,
+                'class_name': self.class_names[cls],
+                'confidence': conf,
+                'bbox': {
+                    'xmin': float(xyxy[0]),
+                    'ymin': float(xyxy[1]),
+                    'xmax': float(xyxy[2]),
+                    'ymax': float(xyxy[3])
+                }
+            }
+            
+            # Add GPS coordinates
+            if gps_coords:
+                detection['latitude'] = gps_coords['latitude']
+                detection['longitude'] = gps_coords['longitude']
+                detection['altitude'] = gps_coords.get('altitude', 0.0)
+            
+            detections.append(detection)
         
         return detections
     
+    @staticmethod
+    def checkpoint_path(output_path):
+        """Checkpoint file used when resuming processing for output_path."""
+        return Path(output_path).with_suffix('.ckpt.json')
+    
+    @staticmethod
+    def stream_path(output_path):
+        """GeoJSON text sequence path used when streaming to output_path."""
+        return Path(output_path).with_suffix('.geojsons')
+    
     def save_detections(self, detections, output_path, format='geojson'):
         """
         Save detections to file.
@@ -210,23 +652,7 @@ class VideoDetector:
             if 'latitude' not in det or 'longitude' not in det:
                 continue
             
-            feature = {
-                'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [det['longitude'], det['latitude']]
-                },
-                'properties': {
-                    'class': det['class_name'],
-                    'class_id': det['class_id'],
-                    'confidence': det['confidence'],
-                    'timestamp': det['timestamp'],
-                    'frame_number': det['frame_number'],
-                    'altitude': det.get('altitude', 0.0)
-                }
-            }
-            
-            features.append(feature)
+            features.append(detection_to_feature(det))
         
         geojson = {
             'type': 'FeatureCollection',
@@ -261,15 +687,52 @@ def main():
     parser.add_argument('--video', type=str, required=True, help='Path to input video')
     parser.add_argument('--model', type=str, required=True, help='Path to trained model')
     parser.add_argument('--gps', type=str, default=None, help='Path to GPS data file')
-    parser.add_argument('--gps-format', type=str, choices=['csv', 'gpx', 'json'], 
+    parser.add_argument('--gps-format', type=str, choices=['csv', 'gpx', 'nmea', 'json'], 
                         default='csv', help='GPS file format')
+    parser.add_argument('--gps-cache', type=str, default=None,
+                        help='Cache parsed GPS tracks in this directory')
+    parser.add_argument('--gps-time-format', type=str, default=None,
+                        help='strftime format or epoch_s/epoch_ms/epoch_us/epoch_ns of the '
+                             'GPS timestamps (detected once per file by default)')
     parser.add_argument('--output', type=str, default='results/detections.geojson',
                         help='Output file path')
     parser.add_argument('--save-video', action='store_true', help='Save annotated video')
     parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
     parser.add_argument('--skip-frames', type=int, default=1, help='Process every Nth frame')
+    parser.add_argument('--sampling', type=str, choices=['auto', 'grab', 'seek'], default='auto',
+                        help='Frame sampling strategy for skipped frames')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Number of sampled frames per model prediction')
+    parser.add_argument('--min-speed', type=float, default=None,
+                        help='Skip inference while GPS speed is below this value')
+    parser.add_argument('--motion-threshold', type=float, default=None,
+                        help='Skip inference on frames with less mean pixel change (0-255)')
+    parser.add_argument('--sample-distance', type=float, default=None,
+                        help='Sample frames every N meters along the GPS track')
+    parser.add_argument('--track', action='store_true',
+                        help='Emit one detection per tracked defect instead of per frame')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream detections to a GeoJSON text sequence while processing')
+    parser.add_argument('--checkpoint-every', type=int, default=None,
+                        help='Save a resumable checkpoint every N frames (implies --stream)')
+    parser.add_argument('--decode-backend', type=str, default='opencv', choices=BACKENDS,
+                        help='Video decoding backend')
+    parser.add_argument('--decode-size', type=int, default=None,
+                        help='Decode frames with their longest side downscaled to this size (e.g. 640)')
+    parser.add_argument('--video-size', type=int, default=None,
+                        help='Longest side of the annotated video (with --save-video)')
+    parser.add_argument('--video-fps', type=float, default=None,
+                        help='Frame rate of the annotated video (with --save-video)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-stage timings and write a .profile.json report')
+    parser.add_argument('--profile-interval', type=float, default=None,
+                        help='With --profile, sample the call stack every N seconds '
+                             'and write collapsed stacks (.folded) for a flamegraph')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Decode in a separate process sharing frames through shared memory')
     parser.add_argument('--start-time', type=str, default=None,
-                        help='Video start time (ISO format: 2026-01-09T10:30:00)')
+                        help='Video start time (ISO format, UTC unless an offset is given: '
+                             '2026-01-09T10:30:00)')
     
     args = parser.parse_args()
     
@@ -282,7 +745,9 @@ def main():
         model_path=args.model,
         gps_file=args.gps,
         gps_format=args.gps_format,
-        conf_threshold=args.conf
+        conf_threshold=args.conf,
+        gps_cache=GPSTrackCache(args.gps_cache) if args.gps_cache else None,
+        gps_timestamp_format=args.gps_time_format
     )
     
     detector.process_video(
@@ -290,7 +755,22 @@ def main():
         output_path=args.output,
         save_video=args.save_video,
         video_start_time=start_time,
-        skip_frames=args.skip_frames
+        skip_frames=args.skip_frames,
+        sampling=args.sampling,
+        batch_size=args.batch_size,
+        min_speed=args.min_speed,
+        motion_threshold=args.motion_threshold,
+        sample_distance=args.sample_distance,
+        track=args.track,
+        stream=args.stream,
+        checkpoint_every=args.checkpoint_every,
+        decode_backend=args.decode_backend,
+        decode_size=args.decode_size,
+        video_size=args.video_size,
+        video_fps=args.video_fps,
+        profile=args.profile,
+        profile_interval=args.profile_interval,
+        pipeline=args.pipeline
     )
 
 
@@ -0,0 +1,287 @@
+"""
+Merged store of batch detections.
+All geolocated detections of a batch live in one SQLite file with an R-tree
+spatial index, so a map viewport is a single indexed query instead of
+reading every per-video GeoJSON file. Detection counts are also kept per
+Web Mercator tile (XYZ scheme) at a few zoom levels for zoomed-out views.
+The store is updated per video: re-ingesting a video replaces its rows, and
+unchanged files are skipped.
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from .spatial_index import is_detection_file, read_features
+
+
+# Zoom levels with precomputed tile counts (country, city, street)
+TILE_ZOOMS = (6, 10, 14)
+
+# Web Mercator latitude limit
+MAX_MERCATOR_LAT = 85.0511287798
+
+
+def tile_indices(lat, lon, zoom):
+    """XYZ tile columns and rows of locations (arrays)."""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    n = 2 ** zoom
+    x = np.floor((np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * n).astype(np.int64) % n
+    y = np.floor((1.0 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2.0 * n).astype(np.int64)
+    return x, np.clip(y, 0, n - 1)
+
+
+def tile_xy(lat, lon, zoom):
+    """XYZ tile containing a location."""
+    x, y = tile_indices(lat, lon, zoom)
+    return int(x), int(y)
+
+
+def tile_bounds(x, y, zoom):
+    """(min_lat, min_lon, max_lat, max_lon) of an XYZ tile."""
+    n = 2 ** zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+class DetectionStore:
+    """Geolocated detections of many videos in SQLite with an R-tree index."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS videos (
+            video TEXT PRIMARY KEY, path TEXT, mtime_ns INTEGER, size INTEGER,
+            detections INTEGER, updated_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS detections (
+            id INTEGER PRIMARY KEY, video TEXT, class TEXT, confidence REAL,
+            timestamp TEXT, lat REAL, lon REAL, properties TEXT
+        );
+        CREATE INDEX IF NOT EXISTS detections_video ON detections (video);
+        CREATE VIRTUAL TABLE IF NOT EXISTS detections_rtree USING rtree (
+            id, min_lon, max_lon, min_lat, max_lat
+        );
+        CREATE TABLE IF NOT EXISTS video_tiles (
+            video TEXT, zoom INTEGER, x INTEGER, y INTEGER, class TEXT, count INTEGER,
+            PRIMARY KEY (video, zoom, x, y, class)
+        );
+        CREATE INDEX IF NOT EXISTS video_tiles_tile ON video_tiles (zoom, x, y);
+    """
+
+    def __init__(self, path):
+        """
+        Open (or create) a store.
+
+        Args:
+            path: SQLite database path
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(self.SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+
+    def ingest_video(self, video, path, force=False):
+        """
+        Replace the detections of one video with those of its output file.
+
+        Args:
+            video: Video name (the key of its rows; batches use the file stem)
+            path: Detections file (.geojson or .geojsons)
+            force: Re-read the file even if its size and mtime are unchanged
+
+        Returns:
+            Number of geolocated detections stored, or None if the file was unchanged
+        """
+        path = Path(path)
+        stat = path.stat()
+        row = self.db.execute("SELECT path, mtime_ns, size FROM videos WHERE video = ?", (video,)).fetchone()
+        if not force and row and tuple(row) == (str(path), stat.st_mtime_ns, stat.st_size):
+            return None
+
+        rows = []
+        for feature in read_features(path):
+            geometry = feature.get('geometry')
+            if not geometry or geometry.get('type') != 'Point':
+                continue
+            lon, lat = geometry['coordinates'][:2]
+            properties = feature.get('properties') or {}
+            rows.append((video, properties.get('class'), properties.get('confidence'),
+                         properties.get('timestamp'), lat, lon, json.dumps(properties)))
+        tiles = self._tile_counts(video, rows)
+
+        # One transaction per video: readers see its old or its new detections
+        with self.db:
+            self._delete(video)
+            first_id = self.db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM detections").fetchone()[0]
+            ids = range(first_id, first_id + len(rows))
+            self.db.executemany("INSERT INTO detections VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                [(i, *values) for i, values in zip(ids, rows)])
+            self.db.executemany("INSERT INTO detections_rtree VALUES (?, ?, ?, ?, ?)",
+                                [(i, lon, lon, lat, lat) for i, (*_, lat, lon, _) in zip(ids, rows)])
+            self.db.executemany("INSERT INTO video_tiles VALUES (?, ?, ?, ?, ?, ?)", tiles)
+            self.db.execute("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?)",
+                            (video, str(path), stat.st_mtime_ns, stat.st_size, len(rows),
+                             datetime.now().isoformat()))
+        return len(rows)
+
+    @staticmethod
+    def _tile_counts(video, rows):
+        """video_tiles rows (video, zoom, x, y, class, count) of a video's detections."""
+        if not rows:
+            return []
+        lat = np.array([row[4] for row in rows], dtype=np.float64)
+        lon = np.array([row[5] for row in rows], dtype=np.float64)
+        class_names, class_codes = np.unique(np.array([str(row[1]) for row in rows]), return_inverse=True)
+        names = [None if name == 'None' else str(name) for name in class_names]
+
+        counts = []
+        for zoom in TILE_ZOOMS:
+            x, y = tile_indices(lat, lon, zoom)
+            keys, key_counts = np.unique(np.stack([x, y, class_codes]), axis=1, return_counts=True)
+            counts.extend((video, zoom, int(tx), int(ty), names[code], int(count))
+                          for (tx, ty, code), count in zip(keys.T, key_counts))
+        return counts
+
+    def _delete(self, video):
+        self.db.execute("DELETE FROM detections_rtree WHERE id IN (SELECT id FROM detections WHERE video = ?)",
+                        (video,))
+        self.db.execute("DELETE FROM detections WHERE video = ?", (video,))
+        self.db.execute("DELETE FROM video_tiles WHERE video = ?", (video,))
+
+    def remove_video(self, video):
+        """Remove the detections of a video."""
+        with self.db:
+            self._delete(video)
+            self.db.execute("DELETE FROM videos WHERE video = ?", (video,))
+
+    def videos(self):
+        """Ingested videos with their detection counts."""
+        return [dict(row) for row in self.db.execute("SELECT * FROM videos ORDER BY video")]
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon, limit=None, class_name=None, min_confidence=None):
+        """
+        Detections within a bounding box (min_lon > max_lon crosses the antimeridian).
+
+        Returns:
+            (total number of matches, list of up to limit GeoJSON features)
+        """
+        if min_lon <= max_lon:
+            lon_ranges = [(min_lon, max_lon)]
+        else:
+            lon_ranges = [(min_lon, 180.0), (-180.0, max_lon)]
+
+        total = 0
+        features = []
+        for range_min_lon, range_max_lon in lon_ranges:
+            # The R-tree keeps 32-bit bounds rounded outwards: it selects
+            # candidates, exact coordinates decide
+            where = ("r.max_lon >= ? AND r.min_lon <= ? AND r.max_lat >= ? AND r.min_lat <= ? "
+                     "AND d.lon BETWEEN ? AND ? AND d.lat BETWEEN ? AND ?")
+            params = [range_min_lon, range_max_lon, min_lat, max_lat] * 2
+            if class_name is not None:
+                where += " AND d.class = ?"
+                params.append(class_name)
+            if min_confidence is not None:
+                where += " AND d.confidence >= ?"
+                params.append(min_confidence)
+
+            joined = "FROM detections_rtree r JOIN detections d ON d.id = r.id WHERE " + where
+            total += self.db.execute(f"SELECT COUNT(*) {joined}", params).fetchone()[0]
+            query = f"SELECT d.video, d.lat, d.lon, d.properties {joined} ORDER BY d.id"
+            if limit is not None:
+                query += f" LIMIT {int(limit) - len(features)}"
+
+            features.extend({
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [row['lon'], row['lat']]},
+                'properties': dict(json.loads(row['properties']), source=row['video'])
+            } for row in self.db.execute(query, params))
+        return total, features
+
+    def tiles(self, zoom, bbox=None):
+        """
+        Detection counts per XYZ tile.
+
+        Args:
+            zoom: One of TILE_ZOOMS
+            bbox: (min_lat, min_lon, max_lat, max_lon) the tiles must overlap (optional)
+
+        Returns:
+            List of {'zoom', 'x', 'y', 'bounds', 'count', 'classes'} dicts
+        """
+        if zoom not in TILE_ZOOMS:
+            raise ValueError(f"Tile counts are kept for zoom levels {TILE_ZOOMS}, not {zoom}")
+
+        query = "SELECT x, y, class, SUM(count) AS count FROM video_tiles WHERE zoom = ?"
+        params = [zoom]
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            x0, y1 = tile_xy(min_lat, min_lon, zoom)
+            x1, y0 = tile_xy(max_lat, max_lon, zoom)
+            query += " AND y BETWEEN ? AND ?"
+            params += [y0, y1]
+            if x0 <= x1:
+                query += " AND x BETWEEN ? AND ?"
+            else:
+                query += " AND (x >= ? OR x <= ?)"
+            params += [x0, x1]
+        query += " GROUP BY x, y, class ORDER BY x, y"
+
+        tiles = {}
+        for row in self.db.execute(query, params):
+            tile = tiles.setdefault((row['x'], row['y']), {
+                'zoom': zoom, 'x': row['x'], 'y': row['y'],
+                'bounds': tile_bounds(row['x'], row['y'], zoom), 'count': 0, 'classes': {}
+            })
+            tile['count'] += row['count']
+            tile['classes'][row['class']] = row['count']
+        return list(tiles.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge batch detection outputs into one spatial store')
+    parser.add_argument('--inputs', type=str, nargs='+', required=True,
+                        help='Batch output directories or detection files')
+    parser.add_argument('--db', type=str, default='results/detections.db', help='Merged store')
+    parser.add_argument('--force', action='store_true', help='Re-ingest unchanged files')
+
+    args = parser.parse_args()
+
+    paths = []
+    for value in args.inputs:
+        value = Path(value)
+        paths.extend(sorted(path for path in value.rglob('*_detections.geojson') if is_detection_file(path))
+                     if value.is_dir() else [value])
+
+    ingested = 0
+    with DetectionStore(args.db) as store:
+        for path in paths:
+            video = path.name.removesuffix('_detections.geojson').removesuffix('.geojson')
+            ingested += store.ingest_video(video, path, force=args.force) is not None
+        total = len(store)
+
+    print(f"✅ Ingested {ingested} files ({len(paths) - ingested} unchanged), {total} detections in {args.db}")
+
+
+if __name__ == "__main__":
+    main()
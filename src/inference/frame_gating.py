@@ -0,0 +1,84 @@
+"""
+Gating of redundant frames before inference.
+Skips frames while the vehicle is stopped or when the scene has not changed.
+"""
+
+import cv2
+import numpy as np
+
+
+class FrameGate:
+    """Decide whether a sampled frame is worth running inference on."""
+
+    def __init__(self, min_speed=None, motion_threshold=None, thumbnail_size=(64, 36)):
+        """
+        Initialize frame gate.
+
+        Args:
+            min_speed: Skip frames when GPS speed is below this value
+                       (same unit as the GPS 'speed' column), None to disable
+            motion_threshold: Skip frames whose mean absolute grayscale difference
+                              (0-255) to the last inferred frame is below this value,
+                              None to disable
+            thumbnail_size: (width, height) of the downsampled frame used for differencing
+        """
+        self.min_speed = min_speed
+        self.motion_threshold = motion_threshold
+        self.thumbnail_size = thumbnail_size
+
+        self.reference = None
+        self.stats = {'inferred': 0, 'gated_speed': 0, 'gated_motion': 0}
+
+    @property
+    def enabled(self):
+        return self.min_speed is not None or self.motion_threshold is not None
+
+    def _thumbnail(self, image):
+        """Downsample a BGR frame to a small grayscale thumbnail."""
+        small = cv2.resize(image, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def should_infer(self, image, speed=None):
+        """
+        Check a frame against the speed and motion gates.
+
+        Args:
+            image: BGR frame
+            speed: GPS speed at the frame timestamp (or None if unknown)
+
+        Returns:
+            True if the frame should be inferred
+        """
+        if self.min_speed is not None and speed is not None and speed < self.min_speed:
+            self.stats['gated_speed'] += 1
+            return False
+
+        if self.motion_threshold is not None:
+            thumbnail = self._thumbnail(image)
+            if self.reference is not None:
+                difference = float(np.abs(thumbnail - self.reference).mean())
+                if difference < self.motion_threshold:
+                    self.stats['gated_motion'] += 1
+                    return False
+            # Compare against the last inferred frame so slow drift accumulates
+            self.reference = thumbnail
+
+        self.stats['inferred'] += 1
+        return True
+
+    def state_dict(self):
+        """JSON-serializable gate state, for checkpointing."""
+        return {
+            'stats': dict(self.stats),
+            'reference': self.reference.tolist() if self.reference is not None else None
+        }
+
+    def load_state_dict(self, state):
+        """Restore a state returned by state_dict."""
+        self.stats = dict(state['stats'])
+        reference = state['reference']
+        self.reference = np.array(reference, dtype=np.int16) if reference is not None else None
+
+    def gated_count(self):
+        """Total number of gated frames."""
+        return self.stats['gated_speed'] + self.stats['gated_motion']
@@ -0,0 +1,406 @@
+"""
+Sampled frame reading for video processing.
+Skipped frames are advanced without retrieving pixel data, and sparse
+strides can jump directly to the target frames by seeking.
+Frames are decoded with OpenCV or, optionally, with PyAV (multi-threaded
+FFmpeg decoding, scaled to the requested size during color conversion).
+"""
+
+import time
+from collections import namedtuple
+from pathlib import Path
+import cv2
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+VideoFrame = namedtuple('VideoFrame', ['frame_number', 'timestamp_sec', 'image', 'sampled'])
+
+BACKENDS = ('opencv', 'pyav')
+
+
+def open_frame_reader(video_path, backend='opencv', **kwargs):
+    """
+    Create a frame reader for the given decode backend.
+
+    Args:
+        video_path: Path to input video
+        backend: 'opencv' or 'pyav'
+        **kwargs: FrameReader arguments
+
+    Returns:
+        FrameReader or PyAVFrameReader
+    """
+    if backend == 'opencv':
+        return FrameReader(video_path, **kwargs)
+    if backend == 'pyav':
+        return PyAVFrameReader(video_path, **kwargs)
+    raise ValueError(f"Unsupported decode backend: {backend}")
+
+
+def scaled_size(width, height, max_size):
+    """Frame size with the longest side reduced to max_size, keeping even dimensions."""
+    if not max_size or max(width, height) <= max_size:
+        return width, height
+    scale = max_size / max(width, height)
+    return max(2, int(round(width * scale / 2)) * 2), max(2, int(round(height * scale / 2)) * 2)
+
+
+class FrameReader:
+    """Iterate over the sampled frames of a video with minimal decoding work."""
+
+    STRATEGIES = ('auto', 'grab', 'seek')
+
+    # Frames that may be held before recycle() (None = unlimited)
+    max_pending = None
+
+    def __init__(self, video_path, skip_frames=1, strategy='auto', retrieve_all=False,
+                 target_fps=None, frame_numbers=None, start_frame=0, max_size=None,
+                 probe_samples=3):
+        """
+        Initialize frame reader.
+
+        Args:
+            video_path: Path to input video
+            skip_frames: Sample every Nth frame
+            strategy: 'grab' (decode sequentially, skip pixel retrieval),
+                      'seek' (jump to each sampled frame) or 'auto' (measure both)
+            retrieve_all: Retrieve pixels for every frame (e.g. to write an
+                          annotated video); sampled frames are flagged
+            target_fps: Sample at this rate instead of every skip_frames frames
+            frame_numbers: Explicit frame numbers to sample instead of a fixed stride
+            start_frame: Start reading at this frame (e.g. to resume a run)
+            max_size: Downscale frames so their longest side is at most this
+                      many pixels (None to keep the source resolution)
+            probe_samples: Number of sampled frames timed per strategy in 'auto' mode
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unsupported sampling strategy: {strategy}")
+
+        self.video_path = Path(video_path)
+        self.retrieve_all = retrieve_all
+        self.start_frame = start_frame
+        self.probe_samples = probe_samples
+
+        self._open()
+
+        # Size of the yielded frames, and factor mapping them back to the source
+        self.source_width, self.source_height = self.width, self.height
+        self.width, self.height = scaled_size(self.width, self.height, max_size)
+        self.scale = self.source_width / self.width if self.width else 1.0
+
+        if target_fps:
+            skip_frames = int(self.fps / target_fps)
+        self.skip_frames = max(1, int(skip_frames))
+
+        self.requested_strategy = strategy
+        self.frame_numbers = None
+        if frame_numbers is not None:
+            self.select_frames(frame_numbers)
+        else:
+            self.strategy = self._resolve_strategy(strategy)
+
+    def _open(self):
+        """Open the video and read its properties."""
+        self.cap = cv2.VideoCapture(str(self.video_path))
+        if not self.cap.isOpened():
+            raise ValueError(f"Cannot open video: {self.video_path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def _resize(self, image):
+        """Downscale a decoded frame to the output size."""
+        if image is None or self.scale == 1.0:
+            return image
+        return cv2.resize(image, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+    def select_frames(self, frame_numbers):
+        """
+        Sample an explicit set of frame numbers instead of a fixed stride.
+
+        Args:
+            frame_numbers: Iterable of frame numbers (out-of-range ones are dropped)
+        """
+        self.frame_numbers = sorted(
+            n for n in set(int(n) for n in frame_numbers) if 0 <= n < self.total_frames
+        )
+        # Average stride over the selected span, used to pick the strategy
+        span = self.frame_numbers[-1] - self.frame_numbers[0] + 1 if self.frame_numbers else self.total_frames
+        self.skip_frames = max(1, span // max(1, len(self.frame_numbers)))
+        self.strategy = self._resolve_strategy(self.requested_strategy)
+
+    def _resolve_strategy(self, strategy):
+        """Pick the sampling strategy, timing both on this video when 'auto'."""
+        # Every frame is decoded anyway, or there is nothing to skip
+        if self.retrieve_all or self.skip_frames == 1:
+            return 'grab'
+        if strategy != 'auto':
+            return strategy
+
+        # Too few samples to amortize the probe
+        if self.total_frames < self.skip_frames * (self.probe_samples + 1) * 2:
+            return 'grab'
+
+        grab_time = self._time_grab()
+        seek_time = self._time_seek()
+        self._rewind()
+
+        return 'seek' if seek_time < grab_time else 'grab'
+
+    def _rewind(self):
+        """Go back to the first frame."""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def _time_grab(self):
+        """Time sequential sampling over the first probe strides."""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        start = time.perf_counter()
+        for _ in range(self.probe_samples):
+            for _ in range(self.skip_frames - 1):
+                self.cap.grab()
+            self.cap.read()
+        return (time.perf_counter() - start) / self.probe_samples
+
+    def _time_seek(self):
+        """Time seek-based sampling on strides spread over the video."""
+        targets = [
+            int(self.total_frames * (i + 1) / (self.probe_samples + 1))
+            for i in range(self.probe_samples)
+        ]
+        start = time.perf_counter()
+        for target in targets:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            self.cap.read()
+        return (time.perf_counter() - start) / self.probe_samples
+
+    def __iter__(self):
+        if self.strategy == 'seek':
+            return self._iter_seek()
+        return self._iter_grab()
+
+    def sampled_frame_numbers(self):
+        """Frame numbers this reader samples."""
+        if self.frame_numbers is not None:
+            return self.frame_numbers
+        return range(0, self.total_frames, self.skip_frames)
+
+    def _iter_grab(self):
+        """Decode sequentially, retrieving pixels only for needed frames."""
+        targets = None
+        last_target = None
+        if self.frame_numbers is not None:
+            targets = set(self.frame_numbers)
+            last_target = self.frame_numbers[-1] if self.frame_numbers else -1
+
+        frame_number = self.start_frame
+        if frame_number:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        while True:
+            if targets is not None:
+                # Nothing left to sample
+                if frame_number > last_target and not self.retrieve_all:
+                    break
+                sampled = frame_number in targets
+            else:
+                sampled = frame_number % self.skip_frames == 0
+
+            if sampled or self.retrieve_all:
+                ret, image = self.cap.read()
+            else:
+                ret, image = self.cap.grab(), None
+
+            if not ret:
+                break
+
+            if sampled or self.retrieve_all:
+                timestamp_sec = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                yield VideoFrame(frame_number, timestamp_sec, self._resize(image), sampled)
+
+            frame_number += 1
+
+    def _iter_seek(self):
+        """Jump directly to each sampled frame."""
+        position = 0
+        for frame_number in self.sampled_frame_numbers():
+            if frame_number < self.start_frame:
+                continue
+            if frame_number != position:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            position = frame_number + 1
+
+            ret, image = self.cap.read()
+            if not ret:
+                break
+
+            timestamp_sec = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            yield VideoFrame(frame_number, timestamp_sec, self._resize(image), True)
+
+    def recycle(self, frames):
+        """Hand processed frames back to the reader (nothing to do, images are not reused)."""
+
+    def release(self):
+        """Release the underlying capture."""
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class PyAVFrameReader(FrameReader):
+    """
+    FrameReader decoding with PyAV (FFmpeg) instead of OpenCV.
+
+    The codec decodes with several threads, frames are converted to BGR at
+    the output size in a single swscale pass (no full-resolution BGR array)
+    and timestamps come from the frame presentation timestamps.
+    """
+
+    def __init__(self, video_path, threads=0, **kwargs):
+        """
+        Initialize PyAV frame reader.
+
+        Args:
+            video_path: Path to input video
+            threads: Decoder threads (0 lets FFmpeg choose)
+            **kwargs: FrameReader arguments
+        """
+        if av is None:
+            raise ImportError("The 'pyav' backend requires PyAV: pip install av")
+        self.threads = threads
+        super().__init__(video_path, **kwargs)
+
+    def _open(self):
+        """Open the container and read the video stream properties."""
+        try:
+            self.container = av.open(str(self.video_path))
+        except av.FFmpegError:
+            raise ValueError(f"Cannot open video: {self.video_path}")
+        if not self.container.streams.video:
+            self.container.close()
+            raise ValueError(f"Cannot open video: {self.video_path}")
+
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = 'AUTO'
+        self.stream.codec_context.thread_count = self.threads
+
+        self.time_base = self.stream.time_base
+        self.start_pts = self.stream.start_time or 0
+        self.fps = float(self.stream.average_rate or self.stream.guessed_rate or 0)
+
+        self.total_frames = self.stream.frames
+        if not self.total_frames:
+            if self.stream.duration:
+                duration = float(self.stream.duration * self.time_base)
+            else:
+                duration = (self.container.duration or 0) / av.time_base
+            self.total_frames = int(round(duration * self.fps))
+
+        self.width = self.stream.codec_context.width
+        self.height = self.stream.codec_context.height
+
+    def _timestamp(self, frame):
+        """Presentation time of a decoded frame, from the start of the stream (seconds)."""
+        return float((frame.pts - self.start_pts) * self.time_base)
+
+    def _to_array(self, frame):
+        """Convert a decoded frame to a BGR array at the output size."""
+        return frame.to_ndarray(format='bgr24', width=self.width, height=self.height,
+                                interpolation='AREA')
+
+    def _decode_from(self, frame_number):
+        """
+        Decode frames starting at frame_number.
+
+        Seeks to the preceding keyframe and decodes up to the requested frame.
+
+        Yields:
+            (frame_number, av.VideoFrame) tuples
+        """
+        target_pts = self.start_pts + int(frame_number / self.fps / self.time_base)
+        self.container.seek(target_pts, stream=self.stream, backward=True)
+
+        for frame in self.container.decode(self.stream):
+            if frame.pts is None:
+                continue
+            number = int(round(self._timestamp(frame) * self.fps))
+            if number >= frame_number:
+                yield number, frame
+
+    def _rewind(self):
+        """Nothing to do: each pass seeks to its first frame."""
+
+    def _time_grab(self):
+        """Time sequential sampling over the first probe strides."""
+        start = time.perf_counter()
+        frames = self._decode_from(0)
+        for _ in range(self.probe_samples):
+            for _ in range(self.skip_frames - 1):
+                next(frames, None)
+            item = next(frames, None)
+            if item is not None:
+                self._to_array(item[1])
+        return (time.perf_counter() - start) / self.probe_samples
+
+    def _time_seek(self):
+        """Time seek-based sampling on strides spread over the video."""
+        targets = [
+            int(self.total_frames * (i + 1) / (self.probe_samples + 1))
+            for i in range(self.probe_samples)
+        ]
+        start = time.perf_counter()
+        for target in targets:
+            item = next(self._decode_from(target), None)
+            if item is not None:
+                self._to_array(item[1])
+        return (time.perf_counter() - start) / self.probe_samples
+
+    def _iter_grab(self):
+        """Decode sequentially, converting only the needed frames."""
+        targets = None
+        last_target = None
+        if self.frame_numbers is not None:
+            targets = set(self.frame_numbers)
+            last_target = self.frame_numbers[-1] if self.frame_numbers else -1
+
+        for frame_number, frame in self._decode_from(self.start_frame):
+            if targets is not None:
+                # Nothing left to sample
+                if frame_number > last_target and not self.retrieve_all:
+                    break
+                sampled = frame_number in targets
+            else:
+                sampled = frame_number % self.skip_frames == 0
+
+            if sampled or self.retrieve_all:
+                yield VideoFrame(frame_number, self._timestamp(frame), self._to_array(frame), sampled)
+
+    def _iter_seek(self):
+        """Jump to each sampled frame, decoding forward from the nearest keyframe."""
+        frames = None
+        position = None
+        for frame_number in self.sampled_frame_numbers():
+            if frame_number < self.start_frame:
+                continue
+            if frame_number != position:
+                frames = self._decode_from(frame_number)
+
+            item = next(frames, None)
+            if item is None:
+                break
+            decoded_number, frame = item
+            position = decoded_number + 1
+
+            yield VideoFrame(frame_number, self._timestamp(frame), self._to_array(frame), True)
+
+    def release(self):
+        """Close the container."""
+        self.container.close()
@@ -0,0 +1,139 @@
+"""
+Vectorized distance kernels on GPS coordinates.
+
+All functions take latitudes/longitudes in degrees as scalars or NumPy
+arrays (broadcast together) and return meters.
+
+Accuracy against geopy's geodesic (Karney, WGS-84):
+- haversine: spherical Earth of mean radius 6371008.8 m; relative error
+  within 0.6% at any distance (typically 0.1-0.3%), i.e. below 6 mm per
+  meter along short road segments
+- vincenty: WGS-84 ellipsoid; within 1 mm for non-antipodal points. Pairs
+  that do not converge (nearly antipodal) fall back to haversine
+"""
+
+import numpy as np
+
+
+# Mean Earth radius (IUGG)
+EARTH_RADIUS_M = 6371008.8
+
+# WGS-84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance on a spherical Earth.
+
+    Args:
+        lat1, lon1: First points (degrees)
+        lat2, lon2: Second points (degrees)
+
+    Returns:
+        Distances in meters
+    """
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lon2, dtype=float) - lon1)
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def vincenty(lat1, lon1, lat2, lon2, max_iterations=200, tolerance=1e-12):
+    """
+    Ellipsoidal distance (Vincenty's inverse formula on WGS-84).
+
+    Args:
+        lat1, lon1: First points (degrees)
+        lat2, lon2: Second points (degrees)
+        max_iterations: Iteration limit of the longitude on the auxiliary sphere
+        tolerance: Convergence threshold (radians)
+
+    Returns:
+        Distances in meters (haversine for pairs that did not converge)
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(v, dtype=float)
+                                                   for v in (lat1, lon1, lat2, lon2)))
+    f = WGS84_F
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sin_U1, cos_U1 = np.sin(U1), np.cos(U1)
+    sin_U2, cos_U2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    converged = np.zeros(L.shape, dtype=bool)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(max_iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_U2 * sin_lam, cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lam)
+            cos_sigma = sin_U1 * sin_U2 + cos_U1 * cos_U2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_U1 * cos_U2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # Equatorial lines: cos2_alpha == 0
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_U1 * sin_U2 / cos2_alpha)
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            previous = lam
+            lam = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            converged = np.abs(lam - previous) <= tolerance
+            if converged.all():
+                break
+
+        u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        distance = WGS84_B * A * (sigma - delta_sigma)
+
+    converged &= np.isfinite(distance)
+    if not converged.all():
+        distance = np.where(converged, distance, haversine(lat1, lon1, lat2, lon2))
+
+    return distance if distance.ndim else float(distance)
+
+
+KERNELS = {
+    'haversine': haversine,
+    'vincenty': vincenty
+}
+
+
+def step_distances(lat, lon, method='haversine'):
+    """
+    Distances between consecutive points of a track.
+
+    Args:
+        lat, lon: Track coordinates (degrees), in track order
+        method: 'haversine' or 'vincenty'
+
+    Returns:
+        Array of len(lat) - 1 distances in meters
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    return KERNELS[method](lat[:-1], lon[:-1], lat[1:], lon[1:])
+
+
+def cumulative_distance(lat, lon, method='haversine'):
+    """
+    Distance travelled from the first point of a track.
+
+    Args:
+        lat, lon: Track coordinates (degrees), in track order
+        method: 'haversine' or 'vincenty'
+
+    Returns:
+        Array of len(lat) distances in meters, starting at 0.0
+    """
+    distance = np.zeros(len(lat))
+    np.cumsum(step_distances(lat, lon, method), out=distance[1:])
+    return distance
@@ -0,0 +1,214 @@
+"""
+Streaming GeoJSON output for detections.
+Writes GeoJSON text sequences (RFC 8142) incrementally and converts them
+to a standard FeatureCollection without loading them in memory.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+RECORD_SEPARATOR = '\x1e'
+
+# Optional detection keys copied to feature properties
+OPTIONAL_PROPERTIES = ('timestamp_sec', 'bbox', 'track_id', 'first_frame', 'last_frame',
+                       'first_timestamp', 'last_timestamp', 'num_observations')
+
+
+def detection_to_feature(detection):
+    """
+    Convert a detection dict to a GeoJSON feature.
+
+    Detections without GPS coordinates get a null geometry.
+    """
+    geometry = None
+    if 'latitude' in detection and 'longitude' in detection:
+        geometry = {
+            'type': 'Point',
+            'coordinates': [detection['longitude'], detection['latitude']]
+        }
+
+    properties = {
+        'class': detection['class_name'],
+        'class_id': detection['class_id'],
+        'confidence': detection['confidence'],
+        'timestamp': detection.get('timestamp'),
+        'frame_number': detection['frame_number'],
+        'altitude': detection.get('altitude', 0.0)
+    }
+    for key in OPTIONAL_PROPERTIES:
+        if key in detection:
+            properties[key] = detection[key]
+
+    return {'type': 'Feature', 'geometry': geometry, 'properties': properties}
+
+
+class GeoJSONSeqWriter:
+    """Append detections as GeoJSON text sequence records."""
+
+    def __init__(self, path, flush_every=100, flush_interval=5.0, offset=None):
+        """
+        Initialize writer.
+
+        Args:
+            path: Output .geojsons path
+            flush_every: Flush after this many records
+            flush_interval: Flush at least every N seconds while writing
+            offset: Resume an existing file at this byte offset, dropping
+                    anything written after it (None to start a new file)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        if offset is None:
+            self.file = open(self.path, 'wb')
+        else:
+            self.file = open(self.path, 'r+b')
+            self.file.truncate(offset)
+            self.file.seek(offset)
+        self.count = 0
+        self.unflushed = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, detection):
+        """Write one detection."""
+        self.write_feature(detection_to_feature(detection))
+
+    def write_feature(self, feature):
+        """Write one GeoJSON feature as a RS-prefixed, LF-terminated record."""
+        self.file.write((RECORD_SEPARATOR + json.dumps(feature) + '\n').encode('utf-8'))
+        self.count += 1
+        self.unflushed += 1
+
+        if (self.unflushed >= self.flush_every
+                or time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Flush buffered records to the file."""
+        self.file.flush()
+        self.unflushed = 0
+        self.last_flush = time.monotonic()
+
+    def sync(self):
+        """Flush and force written records to disk."""
+        self.flush()
+        os.fsync(self.file.fileno())
+
+    def tell(self):
+        """Byte offset after the last record written."""
+        return self.file.tell()
+
+    def close(self):
+        """Flush and close the file."""
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_geojson_seq(path):
+    """
+    Iterate over the features of a GeoJSON text sequence.
+
+    Plain newline-delimited GeoJSON (without record separators) is also
+    accepted. A truncated last record, e.g. after a crash, is skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = line.strip().lstrip(RECORD_SEPARATOR)
+            if not record:
+                continue
+            try:
+                yield json.loads(record)
+            except json.JSONDecodeError:
+                if line.endswith('\n'):
+                    raise
+                break
+
+
+def geojson_seq_to_feature_collection(seq_path, output_path, metadata=None):
+    """
+    Convert a GeoJSON text sequence to a FeatureCollection file, streaming.
+
+    Features with a null geometry are left out.
+
+    Args:
+        seq_path: Input .geojsons path
+        output_path: Output .geojson path
+        metadata: Extra metadata dict ('total_detections' and
+                  'generated_at' are filled in)
+
+    Returns:
+        Number of features written
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        for feature in read_geojson_seq(seq_path):
+            if feature.get('geometry') is None:
+                continue
+            if count:
+                f.write(',\n')
+            f.write(json.dumps(feature))
+            count += 1
+
+        metadata = dict(metadata or {})
+        metadata['total_detections'] = count
+        metadata.setdefault('generated_at', datetime.now().isoformat())
+        f.write('\n], "metadata": ' + json.dumps(metadata) + '}\n')
+
+    return count
+
+
+def merge_feature_collections(paths, output_path, metadata=None):
+    """
+    Concatenate the features of FeatureCollection files into one, in order.
+
+    Args:
+        paths: Input .geojson paths (e.g. the segments of one video)
+        output_path: Output .geojson path
+        metadata: Extra metadata dict, added to that of the first input
+                  ('total_detections' and 'generated_at' are filled in)
+
+    Returns:
+        Number of features written
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    merged = {}
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        for path in paths:
+            with open(path, encoding='utf-8') as part:
+                collection = json.load(part)
+            if not merged:
+                merged = dict(collection.get('metadata') or {})
+                merged.pop('generated_at', None)
+            for feature in collection.get('features', []):
+                if count:
+                    f.write(',\n')
+                f.write(json.dumps(feature))
+                count += 1
+
+        merged.update(metadata or {})
+        merged['total_detections'] = count
+        merged.setdefault('generated_at', datetime.now().isoformat())
+        f.write('\n], "metadata": ' + json.dumps(merged) + '}\n')
+
+    return count
@@ -0,0 +1,183 @@
+"""
+On-disk cache of parsed GPS tracks.
+Parsed tracks are stored as one NumPy file per column (timestamps as int64
+nanoseconds) and memory-mapped on reload, so re-runs and batches sharing GPS
+logs skip text parsing. Entries are keyed by the content hash of the source
+file; a per-path record of (size, mtime) avoids re-hashing unchanged files,
+and any change to the file invalidates its entry automatically.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .gps_parsers import CHUNK_SIZE, filter_window, read_gps_track
+
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('GPS_CACHE_DIR', Path.home() / '.cache' / 'road_degradation' / 'gps'))
+
+# Bump when the stored layout changes (older entries are ignored)
+CACHE_VERSION = 2
+
+
+def file_hash(path, block_size=1 << 20):
+    """BLAKE2b digest (hex) of a file's content."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    """Write JSON atomically (readers never see a partial file)."""
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class GPSTrackCache:
+    """Content-addressed cache of parsed GPS tracks, safe to share between threads and processes."""
+
+    def __init__(self, cache_dir=None):
+        """
+        Initialize cache.
+
+        Args:
+            cache_dir: Cache directory (default: $GPS_CACHE_DIR or ~/.cache/road_degradation/gps)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        (self.cache_dir / 'paths').mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / 'tracks').mkdir(parents=True, exist_ok=True)
+        self.stats = {'hits': 0, 'misses': 0, 'rehashed': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _path_record(self, path, gps_format):
+        key = hashlib.blake2b(str(path).encode(), digest_size=16).hexdigest()
+        return self.cache_dir / 'paths' / f"{key}-{gps_format}.json"
+
+    def _track_dir(self, content_hash, gps_format, timestamp_format=None):
+        name = f"{content_hash}-{gps_format}-v{CACHE_VERSION}"
+        if timestamp_format:
+            name += '-' + hashlib.blake2b(timestamp_format.encode(), digest_size=4).hexdigest()
+        return self.cache_dir / 'tracks' / name
+
+    def fingerprint(self, path, gps_format):
+        """
+        Fingerprint of a GPS file.
+
+        The content hash is reused from the path record while the file's
+        size and mtime are unchanged, and recomputed otherwise.
+
+        Returns:
+            Dict with path, size, mtime_ns and content_hash
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        record_path = self._path_record(path, gps_format)
+        previous = None
+        try:
+            with open(record_path) as f:
+                previous = json.load(f)
+            if (previous['size'], previous['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+                return previous
+        except (OSError, ValueError, KeyError):
+            pass
+
+        self._count('rehashed')
+        record = {
+            'path': str(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'content_hash': file_hash(path)
+        }
+        _write_json(record_path, record)
+
+        # Drop the entry of the file's previous content
+        if previous and previous.get('content_hash') != record['content_hash']:
+            for track_dir in (self.cache_dir / 'tracks').glob(f"{previous['content_hash']}-{gps_format}-*"):
+                shutil.rmtree(track_dir, ignore_errors=True)
+        return record
+
+    def read(self, path, gps_format='csv', start_time=None, end_time=None, chunk_size=CHUNK_SIZE,
+             timestamp_format=None):
+        """
+        Read a GPS track through the cache.
+
+        Same arguments and result as gps_parsers.read_gps_track, except that
+        only the timestamp and numeric columns are kept; numeric columns are
+        read-only memory maps on a cache hit.
+        """
+        record = self.fingerprint(path, gps_format)
+        track_dir = self._track_dir(record['content_hash'], gps_format, timestamp_format)
+
+        data = self._load(track_dir)
+        if data is None:
+            self._count('misses')
+            self._store(track_dir, read_gps_track(path, gps_format, chunk_size=chunk_size,
+                                                  timestamp_format=timestamp_format))
+            data = self._load(track_dir)
+        else:
+            self._count('hits')
+
+        return filter_window(data, start_time, end_time).reset_index(drop=True)
+
+    def _store(self, track_dir, gps_data):
+        """Write a track's columns to a fresh directory, then move it in place."""
+        tmp_dir = track_dir.with_name(f"{track_dir.name}.{uuid.uuid4().hex}.tmp")
+        tmp_dir.mkdir()
+
+        meta = {'columns': [], 'rows': len(gps_data)}
+        timestamps = pd.to_datetime(gps_data['timestamp']).dt.as_unit('ns')
+        np.save(tmp_dir / 'timestamp.npy', timestamps.to_numpy().view(np.int64))
+
+        for name in gps_data.columns:
+            if name != 'timestamp' and pd.api.types.is_numeric_dtype(gps_data[name]):
+                np.save(tmp_dir / f"{len(meta['columns'])}.npy", gps_data[name].to_numpy())
+                meta['columns'].append(str(name))
+
+        # meta.json last: a directory without it is incomplete
+        _write_json(tmp_dir / 'meta.json', meta)
+        try:
+            os.rename(tmp_dir, track_dir)
+        except OSError:
+            # Stored concurrently by another worker
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _load(self, track_dir):
+        """Memory-map a stored track (None if absent or incomplete)."""
+        try:
+            with open(track_dir / 'meta.json') as f:
+                meta = json.load(f)
+            timestamps = np.load(track_dir / 'timestamp.npy', mmap_mode='r')
+            columns = {name: np.load(track_dir / f"{i}.npy", mmap_mode='r')
+                       for i, name in enumerate(meta['columns'])}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        timestamps = np.asarray(timestamps).view('datetime64[ns]')
+        return pd.DataFrame({'timestamp': timestamps, **columns}, copy=False)
+
+    def clear(self):
+        """Remove all cached tracks and path records."""
+        shutil.rmtree(self.cache_dir / 'paths', ignore_errors=True)
+        shutil.rmtree(self.cache_dir / 'tracks', ignore_errors=True)
+        (self.cache_dir / 'paths').mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / 'tracks').mkdir(parents=True, exist_ok=True)
+
+    def summary(self):
+        """One-line hit/miss summary."""
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups if lookups else 0.0
+        return (f"GPS cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+                f"({rate:.0%} hit rate), {self.stats['rehashed']} files hashed")
@@ -0,0 +1,390 @@
+"""
+Streaming GPS track parsers.
+GPX, NMEA, CSV and JSON files are read in chunks into typed columns; points
+outside an optional time window are dropped per chunk, so memory stays
+proportional to the retained points rather than to the file. Timestamps
+are normalized to naive UTC datetime64[ns] (see timestamps.py).
+"""
+
+import json
+import xml.etree.ElementTree as ET
+from array import array
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from .timestamps import TimestampParser, to_utc
+
+
+# Default number of points per chunk
+CHUNK_SIZE = 65536
+
+# Typed columns of parsed points
+FLOAT_COLUMNS = ('latitude', 'longitude', 'altitude', 'speed')
+
+KNOTS_TO_KMH = 1.852
+
+
+class _PointBuffer:
+    """Typed column buffers for one chunk of points."""
+
+    def __init__(self):
+        self.times = []
+        self.columns = {name: array('d') for name in FLOAT_COLUMNS}
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, time, latitude, longitude, altitude, speed):
+        self.times.append(time)
+        self.columns['latitude'].append(latitude)
+        self.columns['longitude'].append(longitude)
+        self.columns['altitude'].append(altitude)
+        self.columns['speed'].append(speed)
+
+    def to_frame(self, timestamps):
+        """Chunk DataFrame (timestamps: parsed self.times), then reset the buffer."""
+        df = pd.DataFrame({'timestamp': timestamps})
+        for name, values in self.columns.items():
+            df[name] = np.frombuffer(values, dtype=np.float64) if len(values) else np.empty(0)
+        self.__init__()
+        return df
+
+
+def filter_window(chunk, start_time=None, end_time=None):
+    """
+    Keep points with start_time <= timestamp <= end_time.
+
+    Timestamps are naive UTC; aware bounds are converted to UTC and naive
+    bounds are taken as UTC.
+
+    Args:
+        chunk: DataFrame with a 'timestamp' column
+        start_time: Window start (None for unbounded)
+        end_time: Window end (None for unbounded)
+
+    Returns:
+        Filtered DataFrame
+    """
+    if start_time is None and end_time is None:
+        return chunk
+
+    timestamps = chunk['timestamp']
+    mask = np.ones(len(chunk), dtype=bool)
+    if start_time is not None:
+        mask &= (timestamps >= to_utc(start_time)).to_numpy()
+    if end_time is not None:
+        mask &= (timestamps <= to_utc(end_time)).to_numpy()
+    return chunk[mask]
+
+
+def iter_csv_chunks(path, chunk_size=CHUNK_SIZE, timestamp_format=None):
+    """
+    Read a GPS CSV file in chunks.
+
+    Expected columns: timestamp, latitude, longitude, altitude (optional),
+    speed (optional); other columns are kept. Timestamps may be date strings
+    or epoch numbers; their format is detected on the first chunk unless
+    given.
+
+    Yields:
+        DataFrame chunks
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {name: np.float64 for name in FLOAT_COLUMNS if name in header}
+    parse_times = TimestampParser(timestamp_format)
+
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=dtypes):
+        if 'timestamp' in chunk.columns:
+            chunk['timestamp'] = parse_times(chunk['timestamp']).to_numpy()
+        yield chunk
+
+
+def _iter_json_values(f, read_size=1 << 20):
+    """
+    Decode the items of a top-level JSON array, or a sequence of JSON values
+    (JSON Lines), without loading the whole document.
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(read_size)
+    pos = 0
+    eof = not buffer
+    in_array = None
+
+    while True:
+        # Skip separators
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = f.read(read_size), 0
+            eof = not buffer
+
+        if pos >= len(buffer):
+            return
+
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+                continue
+        if in_array and buffer[pos] == ']':
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Incomplete value: read more
+            more = f.read(read_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        yield value
+        pos = end
+        if pos > read_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def iter_json_chunks(path, chunk_size=CHUNK_SIZE, timestamp_format=None):
+    """
+    Read a GPS JSON file in chunks.
+
+    Supports an array of point objects and JSON Lines (one object per line).
+    A single object of columns ({"timestamp": [...], ...}) cannot be streamed
+    and is loaded as a whole. Timestamps may be date strings or epoch
+    numbers, as for CSV files.
+
+    Yields:
+        DataFrame chunks
+    """
+    parse_times = TimestampParser(timestamp_format)
+    records = []
+    with open(path, 'r') as f:
+        for value in _iter_json_values(f):
+            if isinstance(value, dict) and value and all(isinstance(v, list) for v in value.values()):
+                # Columnar document
+                yield _records_frame(pd.DataFrame(value), parse_times)
+                continue
+
+            records.append(value)
+            if len(records) == chunk_size:
+                yield _records_frame(pd.DataFrame.from_records(records), parse_times)
+                records = []
+
+    if records:
+        yield _records_frame(pd.DataFrame.from_records(records), parse_times)
+
+
+def _records_frame(df, parse_times):
+    """Type the columns of a chunk of JSON points."""
+    for name in FLOAT_COLUMNS:
+        if name in df.columns:
+            df[name] = pd.to_numeric(df[name], errors='coerce').astype(np.float64)
+    if 'timestamp' in df.columns:
+        df['timestamp'] = parse_times(df['timestamp']).to_numpy()
+    return df
+
+
+def iter_gpx_chunks(path, chunk_size=CHUNK_SIZE, timestamp_format=None):
+    """
+    Read the track points of a GPX file in chunks.
+
+    Parsed elements are discarded as soon as their point is stored. Missing
+    elevations are 0.0 and missing speeds (<speed>, also inside
+    <extensions>) are NaN.
+
+    Yields:
+        DataFrame chunks
+    """
+    parse_times = TimestampParser(timestamp_format)
+    buffer = _PointBuffer()
+    parents = []
+
+    for event, elem in ET.iterparse(str(path), events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if elem.tag.rpartition('}')[2] != 'trkpt':
+            continue
+
+        time = None
+        altitude = 0.0
+        speed = np.nan
+        for child in elem.iter():
+            name = child.tag.rpartition('}')[2]
+            if name == 'time':
+                time = child.text
+            elif name == 'ele' and child.text:
+                altitude = float(child.text)
+            elif name == 'speed' and child.text:
+                speed = float(child.text)
+
+        buffer.append(time, float(elem.get('lat')), float(elem.get('lon')), altitude, speed)
+
+        # Drop the parsed point from the tree
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+        if len(buffer) == chunk_size:
+            yield buffer.to_frame(parse_times(buffer.times))
+
+    if len(buffer):
+        yield buffer.to_frame(parse_times(buffer.times))
+
+
+def _nmea_checksum_ok(sentence):
+    """Check the '*HH' checksum of an NMEA sentence (sentences without one pass)."""
+    body, _, checksum = sentence[1:].partition('*')
+    if not checksum:
+        return True
+    value = 0
+    for char in body:
+        value ^= ord(char)
+    try:
+        return value == int(checksum[:2], 16)
+    except ValueError:
+        return False
+
+
+def _nmea_coordinate(value, hemisphere):
+    """Convert an NMEA (d)ddmm.mmmm coordinate to signed decimal degrees."""
+    if not value:
+        return None
+    dot = value.index('.') if '.' in value else len(value)
+    degrees = float(value[:dot - 2]) + float(value[dot - 2:]) / 60.0
+    return -degrees if hemisphere in ('S', 'W') else degrees
+
+
+def _nmea_time_of_day(value):
+    """Convert an NMEA hhmmss.ss time to a timedelta."""
+    return timedelta(hours=int(value[0:2]), minutes=int(value[2:4]), seconds=float(value[4:]))
+
+
+def iter_nmea_chunks(path, chunk_size=CHUNK_SIZE, timestamp_format=None):
+    """
+    Read an NMEA 0183 log in chunks.
+
+    One point per fix time: position and speed come from RMC sentences,
+    position and altitude from GGA sentences of the same time. The date comes
+    from RMC; GGA-only fixes keep the last date and roll over at midnight.
+    Invalid fixes and sentences with a bad checksum are skipped. Speeds are
+    converted from knots to km/h. NMEA times are always UTC, so
+    timestamp_format is ignored.
+
+    Yields:
+        DataFrame chunks
+    """
+    buffer = _PointBuffer()
+    state = {'date': None, 'last': None}
+    fix = {}
+
+    def emit():
+        if fix.get('latitude') is None or fix.get('longitude') is None or state['date'] is None:
+            return
+        date = fix.get('date') or state['date']
+        timestamp = datetime.combine(date, datetime.min.time()) + fix['time_of_day']
+        if fix.get('date') is None and state['last'] is not None and \
+                timestamp < state['last'] - timedelta(hours=12):
+            # GGA-only fix past midnight
+            timestamp += timedelta(days=1)
+            state['date'] = timestamp.date()
+        state['last'] = timestamp
+        buffer.append(timestamp, fix['latitude'], fix['longitude'],
+                      fix.get('altitude', 0.0), fix.get('speed', np.nan))
+
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            start = line.find('$')
+            if start < 0:
+                continue
+            sentence = line[start:].strip()
+            if not _nmea_checksum_ok(sentence):
+                continue
+
+            fields = sentence.partition('*')[0].split(',')
+            kind = fields[0][-3:]
+            if kind not in ('RMC', 'GGA') or not fields[1]:
+                continue
+
+            try:
+                if kind == 'RMC':
+                    if len(fields) < 10 or fields[2] != 'A':
+                        continue
+                    point = {
+                        'date': datetime.strptime(fields[9], '%d%m%y').date(),
+                        'latitude': _nmea_coordinate(fields[3], fields[4]),
+                        'longitude': _nmea_coordinate(fields[5], fields[6])
+                    }
+                    if fields[7]:
+                        point['speed'] = float(fields[7]) * KNOTS_TO_KMH
+                else:
+                    if len(fields) < 10 or fields[6] in ('', '0'):
+                        continue
+                    point = {
+                        'latitude': _nmea_coordinate(fields[2], fields[3]),
+                        'longitude': _nmea_coordinate(fields[4], fields[5])
+                    }
+                    if fields[9]:
+                        point['altitude'] = float(fields[9])
+                time_of_day = _nmea_time_of_day(fields[1])
+            except ValueError:
+                continue
+
+            if fix.get('time') != fields[1]:
+                emit()
+                fix = {'time': fields[1], 'time_of_day': time_of_day}
+                if len(buffer) >= chunk_size:
+                    yield buffer.to_frame(pd.Series(buffer.times, dtype='datetime64[ns]'))
+            if 'date' in point:
+                state['date'] = point['date']
+            fix.update({key: value for key, value in point.items() if value is not None})
+
+    emit()
+    if len(buffer):
+        yield buffer.to_frame(pd.Series(buffer.times, dtype='datetime64[ns]'))
+
+
+READERS = {
+    'csv': iter_csv_chunks,
+    'gpx': iter_gpx_chunks,
+    'nmea': iter_nmea_chunks,
+    'json': iter_json_chunks
+}
+
+
+def read_gps_track(path, gps_format='csv', start_time=None, end_time=None, chunk_size=CHUNK_SIZE,
+                   timestamp_format=None):
+    """
+    Read a GPS track, keeping only points within a time window.
+
+    Args:
+        path: Path to GPS file
+        gps_format: Format of GPS file ('csv', 'gpx', 'nmea', 'json')
+        start_time: Drop points before this time (None to keep)
+        end_time: Drop points after this time (None to keep)
+        chunk_size: Points parsed per chunk
+        timestamp_format: strftime format or 'epoch_s'/'epoch_ms'/'epoch_us'/'epoch_ns'
+                          of CSV/JSON/GPX timestamps (None to detect it once per file)
+
+    Returns:
+        DataFrame with timestamp (naive UTC datetime64[ns]), latitude,
+        longitude, altitude and speed columns
+    """
+    if gps_format not in READERS:
+        raise ValueError(f"Unsupported GPS format: {gps_format}")
+
+    chunks = [
+        filter_window(chunk, start_time, end_time)
+        for chunk in READERS[gps_format](path, chunk_size=chunk_size, timestamp_format=timestamp_format)
+    ]
+    chunks = [chunk for chunk in chunks if len(chunk)] or chunks[:1]
+    if not chunks:
+        return pd.DataFrame(columns=['timestamp', *FLOAT_COLUMNS])
+
+    return pd.concat(chunks, ignore_index=True)
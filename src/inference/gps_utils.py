@@ -7,97 +7,218 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
-import json
-import gpxpy
-import gpxpy.gpx
 from geopy.distance import geodesic
+from .geodesy import KERNELS, cumulative_distance
+from .gps_parsers import CHUNK_SIZE, READERS, read_gps_track
+from .timestamps import to_utc, utc_now
+
+
+def to_epoch_ns(timestamps):
+    """
+    Convert timestamps to int64 nanoseconds since the Unix epoch.
+    
+    Timezone-aware values are converted to UTC, naive values are taken as is.
+    
+    Args:
+        timestamps: Timestamp, datetime, or array-like/Series of them
+    
+    Returns:
+        int64 NumPy array
+    """
+    if isinstance(timestamps, (str, datetime, np.datetime64)):
+        timestamps = [timestamps]
+    index = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.as_unit('ns').asi8
+
+
+class GPSTrack:
+    """GPS track sorted once by time and stored as contiguous NumPy arrays."""
+    
+    # Interpolated columns, when present in the track
+    COLUMNS = ('latitude', 'longitude', 'altitude', 'speed')
+    
+    def __init__(self, gps_data):
+        """
+        Initialize track.
+        
+        Args:
+            gps_data: GPS DataFrame with a 'timestamp' column
+        """
+        self.data = gps_data.sort_values('timestamp').reset_index(drop=True)
+        self.times = np.ascontiguousarray(to_epoch_ns(self.data['timestamp']))
+        self.columns = {
+            name: np.ascontiguousarray(self.data[name].to_numpy(dtype=float))
+            for name in self.COLUMNS if name in self.data.columns
+        }
+    
+    def __len__(self):
+        return len(self.times)
+    
+    def _bracket(self, times_ns):
+        """
+        Locate timestamps in the track.
+        
+        Returns:
+            (index of the first point after each time, interpolation factor)
+        """
+        after = np.searchsorted(self.times, times_ns, side='right')
+        inner = after.clip(1, len(self.times) - 1)
+        t1 = self.times[inner - 1]
+        t2 = self.times[inner]
+        factor = (times_ns - t1) / (t2 - t1)
+        return after, inner, factor
+    
+    def interpolate_many(self, timestamps):
+        """
+        Interpolate the track at many timestamps in one vectorized pass.
+        
+        Timestamps before the first or after the last point get the values
+        of that point (interpolated is False for them).
+        
+        Args:
+            timestamps: Array-like of timestamps
+        
+        Returns:
+            Dict of arrays: one per track column in COLUMNS, plus 'interpolated'
+        """
+        times_ns = to_epoch_ns(timestamps)
+        if len(self.times) < 2:
+            clamped = np.zeros(len(times_ns), dtype=int)
+            result = {name: values[clamped] for name, values in self.columns.items()}
+            result['interpolated'] = np.zeros(len(times_ns), dtype=bool)
+            return result
+        
+        after, inner, factor = self._bracket(times_ns)
+        before_start = after == 0
+        after_end = after == len(self.times)
+        factor = np.where(before_start, 0.0, np.where(after_end, 1.0, factor))
+        
+        result = {}
+        for name, values in self.columns.items():
+            v1 = values[inner - 1]
+            result[name] = v1 + factor * (values[inner] - v1)
+        result['interpolated'] = ~(before_start | after_end)
+        
+        return result
+    
+    def interpolate(self, timestamp):
+        """
+        Interpolate the track at one timestamp.
+        
+        Args:
+            timestamp: Target timestamp
+        
+        Returns:
+            Coordinates dict, or the first/last track row as a dict when the
+            timestamp is outside the track
+        """
+        # Timestamp.value is UTC for aware timestamps, like to_epoch_ns
+        time_ns = pd.Timestamp(timestamp).value
+        after = int(np.searchsorted(self.times, time_ns, side='right'))
+        
+        if after == 0:
+            # Before start - use first point
+            return self.data.iloc[0].to_dict()
+        if after == len(self.times):
+            # After end - use last point
+            return self.data.iloc[-1].to_dict()
+        
+        t1 = int(self.times[after - 1])
+        factor = (time_ns - t1) / (int(self.times[after]) - t1)
+        
+        def value(name):
+            values = self.columns.get(name)
+            if values is None:
+                return 0
+            v1 = float(values[after - 1])
+            return v1 + factor * (float(values[after]) - v1)
+        
+        coords = {
+            'timestamp': timestamp,
+            'latitude': value('latitude'),
+            'longitude': value('longitude'),
+            'altitude': value('altitude'),
+            'interpolated': True
+        }
+        
+        if 'speed' in self.columns:
+            coords['speed'] = value('speed')
+        
+        return coords
 
 
 class GPSProcessor:
     """Process and synchronize GPS data with video frames."""
     
-    def __init__(self, gps_file=None, gps_format='csv'):
+    def __init__(self, gps_file=None, gps_format='csv', start_time=None, end_time=None, cache=None,
+                 timestamp_format=None):
         """
         Initialize GPS processor.
         
         Args:
-            gps_file: Path to GPS data file (CSV, GPX, or JSON)
-            gps_format: Format of GPS file ('csv', 'gpx', 'json')
+            gps_file: Path to GPS data file (CSV, GPX, NMEA, or JSON)
+            gps_format: Format of GPS file ('csv', 'gpx', 'nmea', 'json')
+            start_time: Only load points from this time on (None for no limit)
+            end_time: Only load points up to this time (None for no limit)
+            cache: GPSTrackCache of parsed tracks (None to always parse the file)
+            timestamp_format: strftime format or 'epoch_s'/'epoch_ms'/'epoch_us'/'epoch_ns'
+                              of the file's timestamps (None to detect it)
         """
         self.gps_file = Path(gps_file) if gps_file else None
         self.gps_format = gps_format
+        self.start_time = start_time
+        self.end_time = end_time
+        self.cache = cache
+        self.timestamp_format = timestamp_format
         self.gps_data = None
         
+        # Sorted array view of gps_data, built on first use
+        self._track = None
+        self._track_source = None
+        
         if gps_file:
             self.load_gps_data()
     
-    def load_gps_data(self):
-        """Load GPS data from file."""
+    def load_gps_data(self, chunk_size=CHUNK_SIZE):
+        """
+        Load GPS data from file.
+        
+        The file is parsed in chunks of chunk_size points, keeping only points
+        within [start_time, end_time]. With a cache, a track parsed before
+        from the same file content is memory-mapped instead.
+        """
         print(f"📍 Loading GPS data from {self.gps_file}")
         
-        if self.gps_format == 'csv':
-            self.gps_data = self._load_csv()
-        elif self.gps_format == 'gpx':
-            self.gps_data = self._load_gpx()
-        elif self.gps_format == 'json':
-            self.gps_data = self._load_json()
-        else:
+        if self.gps_format not in READERS:
             raise ValueError(f"Unsupported GPS format: {self.gps_format}")
         
+        if self.cache is not None:
+            self.gps_data = self.cache.read(self.gps_file, self.gps_format, self.start_time,
+                                            self.end_time, chunk_size=chunk_size,
+                                            timestamp_format=self.timestamp_format)
+        else:
+            self.gps_data = read_gps_track(self.gps_file, self.gps_format, self.start_time,
+                                           self.end_time, chunk_size=chunk_size,
+                                           timestamp_format=self.timestamp_format)
+        
         print(f"✅ Loaded {len(self.gps_data)} GPS points")
         
         return self.gps_data
     
-    def _load_csv(self):
-        """
-        Load GPS data from CSV.
-        Expected columns: timestamp, latitude, longitude, altitude (optional), speed (optional)
-        """
-        df = pd.read_csv(self.gps_file)
-        
-        # Convert timestamp to datetime
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        return df
-    
-    def _load_gpx(self):
-        """Load GPS data from GPX file."""
-        with open(self.gps_file, 'r') as f:
-            gpx = gpxpy.parse(f)
-        
-        gps_points = []
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for point in segment.points:
-                    gps_points.append({
-                        'timestamp': point.time,
-                        'latitude': point.latitude,
-                        'longitude': point.longitude,
-                        'altitude': point.elevation if point.elevation else 0.0,
-                        'speed': point.speed if hasattr(point, 'speed') else 0.0
-                    })
-        
-        return pd.DataFrame(gps_points)
-    
-    def _load_json(self):
-        """Load GPS data from JSON file."""
-        with open(self.gps_file, 'r') as f:
-            data = json.load(f)
-        
-        df = pd.DataFrame(data)
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        return df
-    
-    def synchronize_with_frames(self, frames_metadata, video_start_time=None):
+    def synchronize_with_frames(self, frames_metadata, video_start_time=None, max_time_diff_sec=5):
         """
         Synchronize GPS data with video frames.
         
+        Each frame gets the GPS point nearest in time, found for all frames in
+        one sorted as-of merge; frames without a point within max_time_diff_sec
+        are dropped.
+        
         Args:
             frames_metadata: List of frame metadata with timestamps
             video_start_time: Video start datetime (if known)
+            max_time_diff_sec: Maximum allowed time difference in seconds
         
         Returns:
             DataFrame with frame_number, timestamp, latitude, longitude
@@ -110,62 +231,66 @@ class GPSProcessor:
         # Sort GPS data by timestamp
         gps_sorted = self.gps_data.sort_values('timestamp').reset_index(drop=True)
         
-        synchronized_data = []
-        
-        for frame_info in frames_metadata:
-            frame_num = frame_info['frame_number']
-            frame_time_sec = frame_info['timestamp_sec']
-            
-            # Calculate absolute timestamp
-            if video_start_time:
-                frame_timestamp = video_start_time + timedelta(seconds=frame_time_sec)
-            else:
-                # Use relative timestamps
-                frame_timestamp = gps_sorted['timestamp'].iloc[0] + timedelta(seconds=frame_time_sec)
-            
-            # Find closest GPS point
-            gps_point = self._find_closest_gps_point(frame_timestamp, gps_sorted)
-            
-            if gps_point is not None:
-                synchronized_data.append({
-                    'frame_number': frame_num,
-                    'filename': frame_info['filename'],
-                    'timestamp': frame_timestamp,
-                    'latitude': gps_point['latitude'],
-                    'longitude': gps_point['longitude'],
-                    'altitude': gps_point.get('altitude', 0.0),
-                    'speed': gps_point.get('speed', 0.0)
-                })
-        
-        df = pd.DataFrame(synchronized_data)
+        frames = pd.DataFrame(list(frames_metadata), columns=['frame_number', 'filename', 'timestamp_sec'])
+        
+        # Calculate absolute timestamps (relative to the GPS start if unknown)
+        if video_start_time is None:
+            video_start_time = gps_sorted['timestamp'].iloc[0]
+        offsets = pd.to_timedelta(frames['timestamp_sec'].to_numpy(dtype=float), unit='s')
+        frames['timestamp'] = (to_utc(video_start_time) + offsets).as_unit('ns')
+        frames['order'] = np.arange(len(frames))
+        
+        gps_points = pd.DataFrame({
+            'gps_timestamp': gps_sorted['timestamp'].dt.as_unit('ns'),
+            'latitude': gps_sorted['latitude'],
+            'longitude': gps_sorted['longitude'],
+            'altitude': gps_sorted['altitude'] if 'altitude' in gps_sorted.columns else 0.0,
+            'speed': gps_sorted['speed'] if 'speed' in gps_sorted.columns else 0.0
+        })
+        
+        # Nearest GPS point per frame
+        merged = pd.merge_asof(
+            frames.sort_values('timestamp', kind='stable'),
+            gps_points,
+            left_on='timestamp',
+            right_on='gps_timestamp',
+            direction='nearest',
+            tolerance=pd.Timedelta(seconds=max_time_diff_sec)
+        )
+        
+        merged = merged[merged['gps_timestamp'].notna()].sort_values('order')
+        df = merged[['frame_number', 'filename', 'timestamp', 'latitude', 'longitude',
+                     'altitude', 'speed']].reset_index(drop=True)
         print(f"✅ Synchronized {len(df)} frames with GPS")
         
         return df
     
-    def _find_closest_gps_point(self, target_time, gps_data, max_time_diff_sec=5):
+    def get_track(self, gps_data=None):
         """
-        Find closest GPS point to target timestamp.
+        Sorted array view of the GPS data.
+        
+        The track of self.gps_data is built once and reused until gps_data is
+        replaced (call load_gps_data or assign gps_data after editing it in place).
         
         Args:
-            target_time: Target timestamp
-            gps_data: Sorted GPS DataFrame
-            max_time_diff_sec: Maximum allowed time difference in seconds
+            gps_data: GPS DataFrame (uses self.gps_data if None)
         
         Returns:
-            GPS point dict or None
+            GPSTrack
         """
-        # Calculate time differences
-        time_diffs = (gps_data['timestamp'] - target_time).abs()
+        if gps_data is None:
+            gps_data = self.gps_data
+        
+        if gps_data is None:
+            raise ValueError("GPS data not loaded")
         
-        # Find minimum
-        min_idx = time_diffs.idxmin()
-        min_diff = time_diffs[min_idx]
+        if gps_data is not self.gps_data:
+            return GPSTrack(gps_data)
         
-        # Check if within threshold
-        if min_diff.total_seconds() <= max_time_diff_sec:
-            return gps_data.iloc[min_idx].to_dict()
-        else:
-            return None
+        if self._track is None or self._track_source is not gps_data:
+            self._track = GPSTrack(gps_data)
+            self._track_source = gps_data
+        return self._track
     
     def interpolate_gps(self, timestamp, gps_data=None):
         """
@@ -178,49 +303,31 @@ class GPSProcessor:
         Returns:
             Interpolated GPS coordinates dict
         """
-        if gps_data is None:
-            gps_data = self.gps_data
+        return self.get_track(gps_data).interpolate(timestamp)
+    
+    def interpolate_gps_batch(self, timestamps, gps_data=None):
+        """
+        Interpolate GPS coordinates for many timestamps in one vectorized call.
         
-        if gps_data is None:
-            raise ValueError("GPS data not loaded")
+        Args:
+            timestamps: Array-like of timestamps
+            gps_data: GPS DataFrame (uses self.gps_data if None)
         
-        # Sort by timestamp
-        gps_sorted = gps_data.sort_values('timestamp').reset_index(drop=True)
+        Returns:
+            DataFrame with timestamp, latitude, longitude, altitude, speed (when
+            the track has speeds) and interpolated columns, one row per timestamp
+        """
+        coords = self.get_track(gps_data).interpolate_many(timestamps)
         
-        # Find bracketing points
-        before = gps_sorted[gps_sorted['timestamp'] <= timestamp]
-        after = gps_sorted[gps_sorted['timestamp'] > timestamp]
+        df = pd.DataFrame({'timestamp': pd.to_datetime(np.asarray(timestamps))})
+        for name in GPSTrack.COLUMNS:
+            if name in coords:
+                df[name] = coords[name]
+        if 'altitude' not in df.columns:
+            df['altitude'] = 0.0
+        df['interpolated'] = coords['interpolated']
         
-        if len(before) == 0:
-            # Before start - use first point
-            return gps_sorted.iloc[0].to_dict()
-        elif len(after) == 0:
-            # After end - use last point
-            return gps_sorted.iloc[-1].to_dict()
-        else:
-            # Interpolate
-            point1 = before.iloc[-1]
-            point2 = after.iloc[0]
-            
-            # Time interpolation factor
-            t1 = point1['timestamp']
-            t2 = point2['timestamp']
-            t = timestamp
-            
-            factor = (t - t1).total_seconds() / (t2 - t1).total_seconds()
-            
-            # Linear interpolation
-            lat = point1['latitude'] + factor * (point2['latitude'] - point1['latitude'])
-            lon = point1['longitude'] + factor * (point2['longitude'] - point1['longitude'])
-            alt = point1.get('altitude', 0) + factor * (point2.get('altitude', 0) - point1.get('altitude', 0))
-            
-            return {
-                'timestamp': t,
-                'latitude': lat,
-                'longitude': lon,
-                'altitude': alt,
-                'interpolated': True
-            }
+        return df
     
     def calculate_distance(self, coord1, coord2):
         """
@@ -235,6 +342,48 @@ class GPSProcessor:
         """
         return geodesic(coord1, coord2).meters
     
+    def calculate_distances(self, coords1, coords2, method='haversine'):
+        """
+        Calculate distances between many pairs of GPS coordinates.
+        
+        Args:
+            coords1: (N, 2) array-like of (latitude, longitude)
+            coords2: (N, 2) array-like of (latitude, longitude)
+            method: 'haversine' or 'vincenty' (see geodesy for accuracy)
+        
+        Returns:
+            Array of N distances in meters
+        """
+        coords1 = np.asarray(coords1, dtype=float)
+        coords2 = np.asarray(coords2, dtype=float)
+        return KERNELS[method](coords1[..., 0], coords1[..., 1], coords2[..., 0], coords2[..., 1])
+    
+    def track_distance(self, gps_data=None, method='haversine'):
+        """
+        Compute cumulative distance along the GPS track.
+        
+        Args:
+            gps_data: GPS DataFrame (uses self.gps_data if None)
+            method: 'haversine' or 'vincenty'
+        
+        Returns:
+            Track sorted by timestamp with a 'cumulative_distance' column (meters)
+        """
+        if gps_data is None:
+            gps_data = self.gps_data
+        
+        if gps_data is None:
+            raise ValueError("GPS data not loaded")
+        
+        track = gps_data.sort_values('timestamp').reset_index(drop=True)
+        track['cumulative_distance'] = cumulative_distance(
+            track['latitude'].to_numpy(dtype=float),
+            track['longitude'].to_numpy(dtype=float),
+            method
+        )
+        
+        return track
+    
     @staticmethod
     def create_sample_gps_csv(output_path, num_points=100, start_lat=48.8566, start_lon=2.3522):
         """
@@ -248,7 +397,8 @@ class GPSProcessor:
         """
         print(f"📝 Creating sample GPS file: {output_path}")
         
-        timestamps = [datetime.now() + timedelta(seconds=i) for i in range(num_points)]
+        start_time = utc_now()
+        timestamps = [start_time + timedelta(seconds=i) for i in range(num_points)]
         
         # Simulate movement (random walk)
         latitudes = [start_lat]
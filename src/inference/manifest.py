@@ -0,0 +1,116 @@
+"""
+Manifest of processed batch videos, for incremental runs.
+The manifest in a batch output directory records, per video, its content
+hash, the model version and detection config it was processed with and
+its output path. A later run over the same input directory only processes
+videos that are new, whose content changed, or whose model or config
+changed; unchanged videos keep their outputs. Content hashes are reused
+while a video's size and mtime are unchanged, so an unchanged batch is
+checked without reading the videos.
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+from .gps_cache import file_hash
+
+
+MANIFEST_NAME = 'batch_manifest.json'
+
+# Bump when the manifest layout changes (older manifests are ignored)
+MANIFEST_VERSION = 1
+
+
+def model_version(model_path):
+    """Content hash of a model file, or its name when it is not a local file (e.g. 'yolov8n.pt')."""
+    model_path = Path(model_path)
+    if model_path.is_file():
+        return f"blake2b:{file_hash(model_path)}"
+    return str(model_path)
+
+
+class BatchManifest:
+    """Per-video record of what produced the outputs of a batch directory."""
+
+    def __init__(self, path):
+        """
+        Load a manifest (empty if missing, unreadable or of another version).
+
+        Args:
+            path: Manifest path (batch_manifest.json in the output directory)
+        """
+        self.path = Path(path)
+        self.videos = {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.videos = data['videos']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def fingerprint(self, video_path):
+        """
+        Content fingerprint of a video.
+
+        Returns:
+            Dict with size, mtime_ns and content_hash (the recorded hash is
+            reused while size and mtime are unchanged)
+        """
+        video_path = Path(video_path)
+        stat = video_path.stat()
+        entry = self.videos.get(video_path.name)
+        if entry and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            content_hash = entry['content_hash']
+        else:
+            content_hash = file_hash(video_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'content_hash': content_hash}
+
+    def change(self, video_path, fingerprint, model, config):
+        """
+        Why a video needs processing.
+
+        Args:
+            video_path: Video path
+            fingerprint: Output of fingerprint()
+            model: Model version (see model_version)
+            config: JSON-serializable detection config
+
+        Returns:
+            None if its recorded output is current, otherwise 'new',
+            'changed', 'model', 'config' or 'output missing'
+        """
+        entry = self.videos.get(Path(video_path).name)
+        if entry is None:
+            return 'new'
+        if entry['content_hash'] != fingerprint['content_hash']:
+            return 'changed'
+        if entry['model_version'] != model:
+            return 'model'
+        # Compare as stored in JSON
+        if entry['config'] != json.loads(json.dumps(config)):
+            return 'config'
+        if not Path(entry['output_path']).exists():
+            return 'output missing'
+        return None
+
+    def record(self, video_path, fingerprint, model, config, output_path, result):
+        """Record a processed video and save the manifest."""
+        self.videos[Path(video_path).name] = dict(
+            fingerprint,
+            model_version=model,
+            config=config,
+            output_path=str(output_path),
+            detections=result.get('detections'),
+            processing_sec=result.get('processing_sec')
+        )
+        self.save()
+
+    def save(self):
+        """Write the manifest atomically (an interrupted run keeps what it recorded)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'videos': self.videos}, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,181 @@
+"""
+Lightweight profiling of video processing runs.
+Per-stage wall-clock timings, plus an optional sampling profiler writing
+collapsed stacks (flamegraph.pl / speedscope format).
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+
+
+class _Stage:
+    """Context manager adding its elapsed time to a profiler stage."""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+
+
+class StageProfiler:
+    """Accumulate wall-clock time per processing stage."""
+
+    def __init__(self, enabled=True):
+        """
+        Initialize profiler.
+
+        Args:
+            enabled: Record timings (a disabled profiler costs a no-op
+                     context manager per stage)
+        """
+        self.enabled = enabled
+        self.totals = {}
+        self.calls = {}
+        self.start_time = time.perf_counter()
+        self._disabled_stage = nullcontext()
+
+    def stage(self, name):
+        """Context manager timing one execution of a stage."""
+        if not self.enabled:
+            return self._disabled_stage
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        """Add time spent in a stage."""
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def iterate(self, name, iterable):
+        """Iterate over iterable, timing each step as the given stage."""
+        if not self.enabled:
+            yield from iterable
+            return
+
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+    def report(self):
+        """
+        Timings summary.
+
+        Returns:
+            Dict with the wall time since creation and, per stage, total
+            seconds, calls, mean milliseconds and share of the wall time
+        """
+        wall = time.perf_counter() - self.start_time
+        stages = {}
+        for name, total in sorted(self.totals.items(), key=lambda item: -item[1]):
+            calls = self.calls[name]
+            stages[name] = {
+                'total_sec': round(total, 6),
+                'calls': calls,
+                'mean_ms': round(total / calls * 1000.0, 4),
+                'share': round(total / wall, 4) if wall else 0.0
+            }
+
+        return {
+            'wall_sec': round(wall, 6),
+            'unaccounted_sec': round(wall - sum(self.totals.values()), 6),
+            'stages': stages
+        }
+
+
+class SamplingProfiler:
+    """Sample the call stack of a thread at a fixed interval."""
+
+    def __init__(self, interval=0.005, thread_id=None):
+        """
+        Initialize sampling profiler.
+
+        Args:
+            interval: Seconds between samples
+            thread_id: Thread to sample (default: the thread calling start())
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling in a daemon thread."""
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        """Write collapsed stacks, one 'frame;frame;... count' line per stack."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def write_profile_report(report, path):
+    """Write a profile report as JSON."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def print_profile_report(report):
+    """Print the stage table of a profile report."""
+    print(f"⏱️ Profile: {report['wall_sec']:.2f} s wall")
+    for name, stage in report['stages'].items():
+        print(f"  {name:<12} {stage['total_sec']:>9.3f} s {stage['share']:>6.1%} "
+              f"{stage['calls']:>8} calls {stage['mean_ms']:>9.3f} ms/call")
+    print(f"  {'other':<12} {report['unaccounted_sec']:>9.3f} s")
@@ -0,0 +1,502 @@
+"""
+Road-segment map matching and per-segment aggregates.
+Detections are snapped to the nearest segment of a local road network
+(GeoJSON LineStrings or an OSM XML extract) and counted per segment and
+class in a SQLite store. Batch outputs are ingested incrementally: only new
+or modified detection files are matched, files deleted from an input
+directory are dropped, and only the segments they touch are re-aggregated.
+"""
+
+import argparse
+import json
+import sqlite3
+import xml.etree.ElementTree as ET
+from array import array
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .geodesy import step_distances
+from .spatial_index import METERS_PER_DEGREE, find_detection_files
+from .survey_merge import DetectionColumns, isoformat_ns
+
+
+# Largest number of (detection, edge) candidates evaluated at once
+MAX_PAIRS = 1_000_000
+
+
+def _read_geojson_network(path):
+    """Yield (segment_id, name, highway, [(lat, lon), ...]) from GeoJSON lines."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    for index, feature in enumerate(data.get('features', [])):
+        geometry = feature.get('geometry') or {}
+        properties = feature.get('properties') or {}
+        segment_id = str(feature.get('id', properties.get('osm_id', properties.get('id', index))))
+
+        if geometry.get('type') == 'LineString':
+            lines = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiLineString':
+            lines = geometry['coordinates']
+        else:
+            continue
+
+        for part, line in enumerate(lines):
+            part_id = segment_id if len(lines) == 1 else f"{segment_id}:{part}"
+            yield part_id, properties.get('name'), properties.get('highway'), \
+                [(point[1], point[0]) for point in line]
+
+
+def _read_osm_network(path, highway_types=None):
+    """Yield (segment_id, name, highway, [(lat, lon), ...]) from OSM XML ways."""
+    node_ids = array('q')
+    node_lat = array('d')
+    node_lon = array('d')
+    ways = []
+
+    for _, elem in ET.iterparse(str(path), events=('end',)):
+        if elem.tag == 'node':
+            node_ids.append(int(elem.get('id')))
+            node_lat.append(float(elem.get('lat')))
+            node_lon.append(float(elem.get('lon')))
+            elem.clear()
+        elif elem.tag == 'way':
+            tags = {tag.get('k'): tag.get('v') for tag in elem.iter('tag')}
+            highway = tags.get('highway')
+            if highway and (highway_types is None or highway in highway_types):
+                refs = np.array([int(nd.get('ref')) for nd in elem.iter('nd')], dtype=np.int64)
+                ways.append((f"way/{elem.get('id')}", tags.get('name'), highway, refs))
+            elem.clear()
+        elif elem.tag == 'relation':
+            elem.clear()
+
+    ids = np.frombuffer(node_ids, dtype=np.int64)
+    order = np.argsort(ids)
+    ids = ids[order]
+    lat = np.frombuffer(node_lat, dtype=np.float64)[order]
+    lon = np.frombuffer(node_lon, dtype=np.float64)[order]
+
+    for segment_id, name, highway, refs in ways:
+        index = np.minimum(np.searchsorted(ids, refs), len(ids) - 1)
+        index = index[ids[index] == refs]
+        yield segment_id, name, highway, list(zip(lat[index], lon[index]))
+
+
+class RoadNetwork:
+    """Road segments as polylines, with a grid index over their edges."""
+
+    def __init__(self, segments, cell_size=0.0005):
+        """
+        Build network.
+
+        Args:
+            segments: Iterable of (segment_id, name, highway, [(lat, lon), ...])
+            cell_size: Edge grid cell size in degrees
+        """
+        self.segment_ids = []
+        self.names = []
+        self.highways = []
+        self.lengths = []
+        self.bounds = []
+        edges = []
+
+        for segment_id, name, highway, points in segments:
+            points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            if len(points) < 2:
+                continue
+            index = len(self.segment_ids)
+            self.segment_ids.append(segment_id)
+            self.names.append(name)
+            self.highways.append(highway)
+            self.lengths.append(float(step_distances(points[:, 0], points[:, 1]).sum()))
+            self.bounds.append((*points.min(axis=0), *points.max(axis=0)))
+            edges.append(np.column_stack([points[:-1], points[1:], np.full(len(points) - 1, index)]))
+
+        edges = np.concatenate(edges) if edges else np.empty((0, 5))
+        self.edge_lat1, self.edge_lon1, self.edge_lat2, self.edge_lon2 = edges[:, :4].T
+        self.edge_segment = edges[:, 4].astype(np.int64)
+        self.lengths = np.array(self.lengths)
+        self.cell_size = cell_size
+        self._cells = {}
+
+    @classmethod
+    def load(cls, path, highway_types=None, cell_size=0.0005):
+        """
+        Load a road network file.
+
+        Args:
+            path: GeoJSON (LineString/MultiLineString features) or OSM XML (.osm) file
+            highway_types: Only keep OSM ways with these highway tags (None for all)
+            cell_size: Edge grid cell size in degrees
+        """
+        path = Path(path)
+        if path.suffix == '.osm':
+            segments = _read_osm_network(path, highway_types)
+        else:
+            segments = _read_geojson_network(path)
+        return cls(segments, cell_size)
+
+    def __len__(self):
+        return len(self.segment_ids)
+
+    def _edge_cells(self, max_distance):
+        """Sorted (cell key, edge) pairs of the cells each edge may be matched from."""
+        margin = max_distance / METERS_PER_DEGREE
+        lat_margin = margin
+        lat_max = np.maximum(np.abs(self.edge_lat1), np.abs(self.edge_lat2))
+        lon_margin = margin / np.maximum(np.cos(np.radians(np.minimum(lat_max + margin, 89.9))), 1e-6)
+
+        row0 = self._rows(np.minimum(self.edge_lat1, self.edge_lat2) - lat_margin)
+        row1 = self._rows(np.maximum(self.edge_lat1, self.edge_lat2) + lat_margin)
+        col0 = self._cols(np.minimum(self.edge_lon1, self.edge_lon2) - lon_margin)
+        col1 = self._cols(np.maximum(self.edge_lon1, self.edge_lon2) + lon_margin)
+
+        num_rows = row1 - row0 + 1
+        num_cols = col1 - col0 + 1
+        counts = num_rows * num_cols
+        edge = np.repeat(np.arange(len(counts)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        keys = self._key(row0[edge] + local // num_cols[edge], col0[edge] + local % num_cols[edge])
+
+        order = np.argsort(keys, kind='stable')
+        return keys[order], edge[order]
+
+    def _rows(self, lat):
+        return np.floor((np.asarray(lat) + 90.0) / self.cell_size).astype(np.int64)
+
+    def _cols(self, lon):
+        return np.floor((np.asarray(lon) + 180.0) / self.cell_size).astype(np.int64)
+
+    def _key(self, rows, cols):
+        return rows * (int(np.ceil(360.0 / self.cell_size)) + 2) + cols
+
+    def match(self, lat, lon, max_distance=20.0, max_pairs=MAX_PAIRS):
+        """
+        Snap points to the nearest segment.
+
+        Args:
+            lat, lon: Point coordinates (degrees)
+            max_distance: Points farther than this (meters) from every segment
+                          are left unmatched
+            max_pairs: Candidate (point, edge) pairs evaluated per block
+
+        Returns:
+            (segment index per point, -1 if unmatched; distance in meters, inf if unmatched)
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        segment = np.full(len(lat), -1, dtype=np.int64)
+        distance = np.full(len(lat), np.inf)
+        if not len(lat) or not len(self.edge_segment):
+            return segment, distance
+
+        if max_distance not in self._cells:
+            self._cells[max_distance] = self._edge_cells(max_distance)
+        cell_keys, cell_edges = self._cells[max_distance]
+        point_keys = self._key(self._rows(lat), self._cols(lon))
+        lo = np.searchsorted(cell_keys, point_keys, side='left')
+        counts = np.searchsorted(cell_keys, point_keys, side='right') - lo
+
+        # Blocks of points with at most max_pairs candidates (at least one point)
+        cumulative = np.cumsum(counts)
+        start = 0
+        while start < len(lat):
+            base = cumulative[start - 1] if start else 0
+            end = max(int(np.searchsorted(cumulative, base + max_pairs, side='right')), start + 1)
+            self._match_block(lat, lon, lo, counts, start, min(end, len(lat)), cell_edges,
+                              max_distance, segment, distance)
+            start = end
+
+        return segment, distance
+
+    def _match_block(self, lat, lon, lo, counts, start, end, cell_edges, max_distance,
+                     segment, distance):
+        """Nearest edge for points[start:end], written into segment and distance."""
+        block_counts = counts[start:end]
+        point = np.repeat(np.arange(start, end), block_counts)
+        if not len(point):
+            return
+        offsets = np.arange(len(point)) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+        edge = cell_edges[lo[point] + offsets]
+
+        # Point-to-edge distance in a local equirectangular projection (meters)
+        kx = np.cos(np.radians(lat[point])) * METERS_PER_DEGREE
+        ax = (self.edge_lon1[edge] - lon[point]) * kx
+        ay = (self.edge_lat1[edge] - lat[point]) * METERS_PER_DEGREE
+        dx = (self.edge_lon2[edge] - self.edge_lon1[edge]) * kx
+        dy = (self.edge_lat2[edge] - self.edge_lat1[edge]) * METERS_PER_DEGREE
+        length2 = dx * dx + dy * dy
+        t = np.clip(-(ax * dx + ay * dy) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+        pair_distance = np.hypot(ax + t * dx, ay + t * dy)
+
+        # Nearest edge per point (pairs are grouped by point): first pair at the group minimum
+        group_starts = np.flatnonzero(np.concatenate([[True], point[1:] != point[:-1]]))
+        group_min = np.minimum.reduceat(pair_distance, group_starts)
+        nearest = np.flatnonzero(pair_distance == np.repeat(group_min, np.diff(np.append(group_starts, len(point)))))
+        first = nearest[np.concatenate([[True], point[nearest][1:] != point[nearest][:-1]])]
+        best = pair_distance[first]
+        matched = best <= max_distance
+        segment[point[first][matched]] = self.edge_segment[edge[first][matched]]
+        distance[point[first][matched]] = best[matched]
+
+
+class SegmentStore:
+    """Per-segment detection aggregates in SQLite."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS segments (
+            segment_id TEXT PRIMARY KEY, name TEXT, highway TEXT, length_m REAL,
+            min_lat REAL, min_lon REAL, max_lat REAL, max_lon REAL
+        );
+        CREATE INDEX IF NOT EXISTS segments_bounds ON segments (min_lat, max_lat, min_lon, max_lon);
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER,
+            detections INTEGER, matched INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS file_counts (
+            path TEXT, segment_id TEXT, class TEXT, count INTEGER,
+            max_confidence REAL, last_seen TEXT,
+            PRIMARY KEY (path, segment_id, class)
+        );
+        CREATE INDEX IF NOT EXISTS file_counts_segment ON file_counts (segment_id);
+        CREATE TABLE IF NOT EXISTS segment_counts (
+            segment_id TEXT, class TEXT, count INTEGER, max_confidence REAL, last_seen TEXT,
+            PRIMARY KEY (segment_id, class)
+        );
+        CREATE TABLE IF NOT EXISTS segment_totals (
+            segment_id TEXT PRIMARY KEY, count INTEGER, density_per_km REAL, last_survey TEXT
+        );
+        CREATE INDEX IF NOT EXISTS segment_totals_density ON segment_totals (density_per_km);
+    """
+
+    def __init__(self, path):
+        """
+        Open (or create) a store.
+
+        Args:
+            path: SQLite database path
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(self.SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def set_network(self, network):
+        """Store the segments of a road network (existing aggregates are kept)."""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(segment_id, name, highway, float(length), *map(float, bounds))
+                 for segment_id, name, highway, length, bounds in zip(
+                     network.segment_ids, network.names, network.highways,
+                     network.lengths, network.bounds)]
+            )
+
+    def ingest(self, inputs, network, max_distance=20.0, force=False):
+        """
+        Match and count the detections of new or modified files.
+
+        Files previously ingested from an input directory that are no
+        longer in it are removed, with their contributions to the
+        segments. Files given explicitly are only ever added or updated.
+
+        Args:
+            inputs: Detection files or directories (searched recursively)
+            network: RoadNetwork the store's segments come from
+            max_distance: Maximum snapping distance in meters
+            force: Re-ingest unchanged files too
+
+        Returns:
+            Stats dict (files ingested, skipped and removed, detections, matched)
+        """
+        stats = {'ingested': 0, 'skipped': 0, 'removed': 0, 'detections': 0, 'matched': 0}
+        for path in inputs:
+            path = Path(path)
+            file_paths = find_detection_files(path) if path.is_dir() else [path]
+            for file_path in file_paths:
+                stat = file_path.stat()
+                key = str(file_path.resolve())
+                row = self.db.execute("SELECT mtime_ns, size FROM ingested_files WHERE path = ?",
+                                      (key,)).fetchone()
+                if not force and row and tuple(row) == (stat.st_mtime_ns, stat.st_size):
+                    stats['skipped'] += 1
+                    continue
+
+                detections, matched = self._ingest_file(file_path, key, stat, network, max_distance)
+                stats['ingested'] += 1
+                stats['detections'] += detections
+                stats['matched'] += matched
+
+            if path.is_dir():
+                stats['removed'] += self._remove_missing(path, {str(p.resolve()) for p in file_paths})
+
+        return stats
+
+    def _remove_missing(self, directory, present):
+        """Remove the files ingested from under a directory that are not in present."""
+        prefix = str(directory.resolve() / '')
+        removed = [row[0] for row in self.db.execute(
+            "SELECT path FROM ingested_files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+            if row[0] not in present]
+
+        with self.db:
+            touched = set()
+            for key in removed:
+                touched.update(row[0] for row in self.db.execute(
+                    "SELECT DISTINCT segment_id FROM file_counts WHERE path = ?", (key,)))
+                self.db.execute("DELETE FROM file_counts WHERE path = ?", (key,))
+                self.db.execute("DELETE FROM ingested_files WHERE path = ?", (key,))
+            if touched:
+                self._refresh_segments(touched)
+        return len(removed)
+
+    def _ingest_file(self, path, key, stat, network, max_distance):
+        """Replace the contributions of one file and refresh the segments it touches."""
+        detections = DetectionColumns()
+        detections.add_file(path)
+        columns = detections.columns()
+        segment, _ = network.match(columns['lat'], columns['lon'], max_distance)
+        matched = segment >= 0
+
+        # (segment, class) groups of the matched detections
+        groups = pd.DataFrame({
+            'segment': segment[matched],
+            'class_code': columns['class_code'][matched],
+            'confidence': columns['confidence'][matched],
+            'timestamp': columns['timestamp'][matched]
+        }).groupby(['segment', 'class_code']).agg(
+            count=('confidence', 'size'), max_confidence=('confidence', 'max'),
+            last_seen=('timestamp', 'max')
+        ).reset_index()
+        rows = [(key, network.segment_ids[seg], detections.class_names[code][0], int(count),
+                 None if np.isnan(confidence) else float(confidence), isoformat_ns(last))
+                for seg, code, count, confidence, last in groups.itertuples(index=False)]
+
+        with self.db:
+            touched = {row[0] for row in self.db.execute(
+                "SELECT DISTINCT segment_id FROM file_counts WHERE path = ?", (key,))}
+            touched.update(row[1] for row in rows)
+
+            self.db.execute("DELETE FROM file_counts WHERE path = ?", (key,))
+            self.db.executemany("INSERT INTO file_counts VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._refresh_segments(touched)
+            self.db.execute("INSERT OR REPLACE INTO ingested_files VALUES (?, ?, ?, ?, ?)",
+                            (key, stat.st_mtime_ns, stat.st_size, len(segment), int(matched.sum())))
+
+        return len(segment), int(matched.sum())
+
+    def _refresh_segments(self, segment_ids):
+        """Recompute the aggregates of some segments from the per-file counts."""
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS touched (segment_id TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM touched")
+        self.db.executemany("INSERT INTO touched VALUES (?)", [(s,) for s in segment_ids])
+
+        self.db.execute("DELETE FROM segment_counts WHERE segment_id IN touched")
+        self.db.execute("""
+            INSERT INTO segment_counts
+            SELECT segment_id, class, SUM(count), MAX(max_confidence), MAX(last_seen)
+            FROM file_counts WHERE segment_id IN touched GROUP BY segment_id, class
+        """)
+        self.db.execute("DELETE FROM segment_totals WHERE segment_id IN touched")
+        self.db.execute("""
+            INSERT INTO segment_totals
+            SELECT c.segment_id, SUM(c.count),
+                   CASE WHEN s.length_m > 0 THEN SUM(c.count) * 1000.0 / s.length_m END,
+                   MAX(c.last_seen)
+            FROM segment_counts c LEFT JOIN segments s ON s.segment_id = c.segment_id
+            WHERE c.segment_id IN touched GROUP BY c.segment_id
+        """)
+
+    def _segment_dict(self, row):
+        segment = dict(row)
+        counts = self.db.execute(
+            "SELECT class, count, max_confidence, last_seen FROM segment_counts "
+            "WHERE segment_id = ? ORDER BY class", (row['segment_id'],))
+        segment['classes'] = {r['class']: {'count': r['count'], 'max_confidence': r['max_confidence'],
+                                           'last_seen': r['last_seen']} for r in counts}
+        return segment
+
+    _SELECT = """
+        SELECT t.segment_id, s.name, s.highway, s.length_m, t.count, t.density_per_km,
+               t.last_survey
+        FROM segment_totals t LEFT JOIN segments s ON s.segment_id = t.segment_id
+    """
+
+    def segment(self, segment_id):
+        """
+        Aggregates of one segment.
+
+        Returns:
+            Dict with name, highway, length_m, count, density_per_km,
+            last_survey and per-class counts, or None if nothing was matched to it
+        """
+        row = self.db.execute(self._SELECT + " WHERE t.segment_id = ?", (segment_id,)).fetchone()
+        return self._segment_dict(row) if row else None
+
+    def segments(self, bbox=None, order_by='density_per_km', limit=100):
+        """
+        Segments with detections, highest first.
+
+        Args:
+            bbox: (min_lat, min_lon, max_lat, max_lon) the segments must intersect (optional)
+            order_by: 'density_per_km', 'count' or 'last_survey'
+            limit: Maximum number of segments
+
+        Returns:
+            List of segment dicts (see segment())
+        """
+        if order_by not in ('density_per_km', 'count', 'last_survey'):
+            raise ValueError(f"Unsupported order: {order_by}")
+
+        query = self._SELECT
+        params = []
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            query += " WHERE s.max_lat >= ? AND s.min_lat <= ? AND s.max_lon >= ? AND s.min_lon <= ?"
+            params = [min_lat, max_lat, min_lon, max_lon]
+        query += f" ORDER BY t.{order_by} DESC LIMIT ?"
+        params.append(limit)
+
+        return [self._segment_dict(row) for row in self.db.execute(query, params)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match detections to road segments')
+    parser.add_argument('--network', type=str, required=True,
+                        help='Road network file (GeoJSON lines or OSM XML)')
+    parser.add_argument('--inputs', type=str, nargs='+', required=True,
+                        help='Detection files or directories of batch outputs')
+    parser.add_argument('--db', type=str, default='results/segments.db', help='Aggregates database')
+    parser.add_argument('--max-distance', type=float, default=20.0,
+                        help='Maximum snapping distance (meters)')
+    parser.add_argument('--highway', type=str, nargs='*', default=None,
+                        help='Only OSM ways with these highway tags')
+    parser.add_argument('--force', action='store_true', help='Re-ingest unchanged files')
+
+    args = parser.parse_args()
+
+    network = RoadNetwork.load(args.network, highway_types=args.highway)
+    print(f"🛣️ Loaded {len(network)} road segments from {args.network}")
+
+    with SegmentStore(args.db) as store:
+        store.set_network(network)
+        stats = store.ingest(args.inputs, network, args.max_distance, force=args.force)
+
+    print(f"✅ Ingested {stats['ingested']} files ({stats['skipped']} unchanged, {stats['removed']} removed), "
+          f"{stats['matched']}/{stats['detections']} detections matched to segments")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Size-aware scheduling of batch videos.
+Each video is probed up front (frame count, frame rate and resolution) and
+its processing time estimated from the number of frames to infer and the
+pixels to decode. Tasks are queued longest first (LPT), so a long video
+never starts last while the other workers sit idle, and oversized videos
+can be split into frame-range segments: segments wait in the shared queue
+like any other task and are picked up by whichever worker frees up first.
+"""
+
+import heapq
+import math
+from collections import namedtuple
+from pathlib import Path
+import cv2
+
+
+VideoInfo = namedtuple('VideoInfo', ['frames', 'fps', 'width', 'height'])
+
+BatchTask = namedtuple('BatchTask', ['video_path', 'part', 'parts', 'frame_range', 'cost'])
+
+ORDERS = ('longest-first', 'input')
+
+# Rough CPU costs: YOLO inference per frame (input resized to 640) and
+# decoding per megapixel; only their ratio matters for the order
+INFERENCE_SEC_PER_FRAME = 0.05
+DECODE_SEC_PER_MEGAPIXEL = 0.004
+
+
+def probe_video(video_path):
+    """
+    Read a video's frame count, frame rate and size from its header.
+
+    Returns:
+        VideoInfo, or None if the video cannot be opened
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            return None
+        return VideoInfo(
+            frames=max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))),
+            fps=cap.get(cv2.CAP_PROP_FPS) or 30.0,
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        )
+    finally:
+        cap.release()
+
+
+def estimate_cost(info, frames=None):
+    """
+    Estimated processing time (seconds) of a video or of some of its frames.
+
+    Every frame is decoded, every frame is inferred (skip_frames=1 in batches).
+
+    Args:
+        info: VideoInfo of the video (None gives 0)
+        frames: Number of frames processed (default: all)
+    """
+    if info is None:
+        return 0.0
+    frames = info.frames if frames is None else frames
+    megapixels = info.width * info.height / 1e6
+    return frames * (INFERENCE_SEC_PER_FRAME + DECODE_SEC_PER_MEGAPIXEL * megapixels)
+
+
+def plan_tasks(video_paths, infos, order='longest-first', max_segment_sec=None):
+    """
+    Turn videos into an ordered task queue.
+
+    Args:
+        video_paths: Video paths
+        infos: Dict of path -> VideoInfo (None for unreadable videos)
+        order: 'longest-first' (LPT) or 'input' (the given order)
+        max_segment_sec: Split videos longer than this many seconds into
+                         segments of about this length (None = never split)
+
+    Returns:
+        List of BatchTask, in submission order
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Unsupported order: {order}")
+
+    tasks = []
+    for video_path in video_paths:
+        info = infos.get(video_path)
+        parts = 1
+        if max_segment_sec and info and info.frames:
+            parts = max(1, math.ceil(info.frames / info.fps / max_segment_sec))
+
+        if parts == 1:
+            tasks.append(BatchTask(video_path, 0, 1, None, estimate_cost(info)))
+            continue
+
+        segment_frames = math.ceil(info.frames / parts)
+        for part in range(parts):
+            first = part * segment_frames
+            end = min(info.frames, first + segment_frames)
+            tasks.append(BatchTask(video_path, part, parts, (first, end), estimate_cost(info, end - first)))
+
+    if order == 'longest-first':
+        # Stable: equal costs keep the input order
+        tasks.sort(key=lambda task: -task.cost)
+    return tasks
+
+
+def task_key(task):
+    """(video name, part) identifying a task in results."""
+    return Path(task.video_path).name, task.part
+
+
+def simulate_makespan(durations, workers):
+    """
+    Makespan of running tasks in order, each on the first free worker.
+
+    Args:
+        durations: Task durations in submission order
+        workers: Number of workers
+
+    Returns:
+        Time at which the last task finishes
+    """
+    finish_times = [0.0] * max(1, workers)
+    for duration in durations:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + duration)
+    return max(finish_times)
+
+
+def schedule_report(tasks, timings, workers, wall_sec):
+    """
+    Compare the predicted schedule of a batch with the run.
+
+    Predicted durations come from the cost model; 'calibrated' rescales them
+    by the ratio of measured to predicted time over the completed tasks, so
+    it reflects the schedule quality independently of the absolute speed.
+
+    Args:
+        tasks: BatchTasks in submission order
+        timings: Dict of task_key -> measured task seconds
+        workers: Number of workers
+        wall_sec: Wall-clock time of the batch
+
+    Returns:
+        Report dict
+    """
+    predicted = [task.cost for task in tasks]
+    actual = [timings.get(task_key(task)) for task in tasks]
+    done = [(task.cost, seconds) for task, seconds in zip(tasks, actual) if seconds is not None]
+    predicted_done = sum(cost for cost, _ in done)
+    measured = sum(seconds for _, seconds in done)
+    scale = measured / predicted_done if predicted_done else 1.0
+
+    return {
+        'workers': workers,
+        'tasks': len(tasks),
+        'split_videos': len({task.video_path for task in tasks if task.parts > 1}),
+        'predicted_makespan_sec': round(simulate_makespan(predicted, workers), 3),
+        'calibrated_makespan_sec': round(simulate_makespan([cost * scale for cost in predicted], workers), 3),
+        'actual_makespan_sec': round(wall_sec, 3),
+        # Busy share of the workers over the run
+        'utilization': round(measured / (workers * wall_sec), 4) if wall_sec else None,
+        'task_times': [
+            {
+                'video': Path(task.video_path).name,
+                'part': task.part,
+                'parts': task.parts,
+                'frame_range': list(task.frame_range) if task.frame_range else None,
+                'predicted_sec': round(task.cost, 3),
+                'actual_sec': round(seconds, 3) if seconds is not None else None
+            }
+            for task, seconds in zip(tasks, actual)
+        ]
+    }
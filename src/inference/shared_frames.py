@@ -0,0 +1,198 @@
+"""
+Decoding in a separate process through a shared-memory frame ring buffer.
+The decoder process writes frames into preallocated shared-memory slots and
+only slot indices and frame metadata cross the process boundary; the
+consumer reads the slots as NumPy views and hands them back once processed.
+"""
+
+import multiprocessing
+import traceback
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from .frame_reader import VideoFrame, open_frame_reader
+
+
+# Reader attributes mirrored from the decoder process
+_INFO_ATTRIBUTES = ('fps', 'total_frames', 'width', 'height', 'source_width', 'source_height',
+                    'scale', 'skip_frames', 'strategy', 'frame_numbers')
+
+
+def _reader_info(reader):
+    return {name: getattr(reader, name) for name in _INFO_ATTRIBUTES}
+
+
+def _decoder_main(video_path, backend, reader_kwargs, commands, replies, free_slots, frames):
+    """Decoder process: answer property requests, then decode into the ring buffer."""
+    try:
+        reader = open_frame_reader(video_path, backend=backend, **reader_kwargs)
+    except Exception as e:
+        replies.put(('error', f"{type(e).__name__}: {e}"))
+        return
+
+    try:
+        replies.put(('info', _reader_info(reader)))
+
+        while True:
+            command, args = commands.get()
+            if command == 'select':
+                reader.select_frames(args)
+                replies.put(('info', _reader_info(reader)))
+            elif command == 'start':
+                _decode_into(reader, *args, free_slots=free_slots, frames=frames)
+                return
+            else:
+                return
+    except Exception:
+        frames.put(('error', traceback.format_exc()))
+    finally:
+        reader.release()
+
+
+def _decode_into(reader, shm_name, num_slots, start_frame, free_slots, frames):
+    """Decode every frame of reader into free slots of the shared ring buffer."""
+    # Attached segments are tracked by the consumer's resource tracker (child
+    # processes share it), which unlinks them only if the consumer leaks them
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffer = np.ndarray((num_slots, reader.height, reader.width, 3), dtype=np.uint8, buffer=shm.buf)
+
+    try:
+        reader.start_frame = start_frame
+        for video_frame in reader:
+            slot = free_slots.get()
+            if slot is None:
+                # Consumer stopped early
+                return
+            buffer[slot] = video_frame.image
+            frames.put(('frame', slot, video_frame.frame_number, video_frame.timestamp_sec,
+                        video_frame.sampled))
+        frames.put(('end',))
+    finally:
+        del buffer
+        shm.close()
+
+
+class SharedFrameReader:
+    """
+    Frame reader decoding in a separate process.
+
+    Behaves like FrameReader, except that yielded images are views into a
+    shared ring buffer: they stay valid until passed to recycle(), and at
+    most max_pending frames can be held at once.
+    """
+
+    def __init__(self, video_path, backend='opencv', num_slots=16, **reader_kwargs):
+        """
+        Initialize reader and start the decoder process.
+
+        Args:
+            video_path: Path to input video
+            backend: Decode backend used in the decoder process ('opencv' or 'pyav')
+            num_slots: Number of frames in the ring buffer
+            **reader_kwargs: FrameReader arguments
+        """
+        self.video_path = video_path
+        self.num_slots = max(2, num_slots)
+        self.max_pending = self.num_slots - 1
+        self.start_frame = reader_kwargs.pop('start_frame', 0)
+        self.shm = None
+        self.frames = None
+        self._slots = {}
+        self._started = False
+
+        # Start the resource tracker now so the decoder process shares it
+        resource_tracker.ensure_running()
+        self._commands = multiprocessing.Queue()
+        self._replies = multiprocessing.Queue()
+        self._free_slots = multiprocessing.Queue()
+        self._frame_queue = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=_decoder_main,
+            args=(str(video_path), backend, reader_kwargs, self._commands, self._replies,
+                  self._free_slots, self._frame_queue),
+            daemon=True
+        )
+        self.process.start()
+        self._update_info()
+
+    def _update_info(self):
+        """Copy reader properties sent by the decoder process."""
+        kind, payload = self._replies.get()
+        if kind == 'error':
+            self.process.join()
+            raise ValueError(payload)
+        for name, value in payload.items():
+            setattr(self, name, value)
+
+    def select_frames(self, frame_numbers):
+        """Sample an explicit set of frame numbers (see FrameReader.select_frames)."""
+        self._commands.put(('select', [int(n) for n in frame_numbers]))
+        self._update_info()
+
+    def sampled_frame_numbers(self):
+        """Frame numbers this reader samples."""
+        if self.frame_numbers is not None:
+            return self.frame_numbers
+        return range(0, self.total_frames, self.skip_frames)
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError("SharedFrameReader can only be iterated once")
+        self._started = True
+
+        frame_bytes = self.height * self.width * 3
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, frame_bytes * self.num_slots))
+        self.frames = np.ndarray((self.num_slots, self.height, self.width, 3), dtype=np.uint8,
+                                 buffer=self.shm.buf)
+        for slot in range(self.num_slots):
+            self._free_slots.put(slot)
+
+        self._commands.put(('start', (self.shm.name, self.num_slots, self.start_frame)))
+        return self._iter_frames()
+
+    def _iter_frames(self):
+        while True:
+            message = self._frame_queue.get()
+            if message[0] == 'end':
+                return
+            if message[0] == 'error':
+                raise RuntimeError(f"Decoder process failed:\n{message[1]}")
+
+            _, slot, frame_number, timestamp_sec, sampled = message
+            self._slots[frame_number] = slot
+            yield VideoFrame(frame_number, timestamp_sec, self.frames[slot], sampled)
+
+    def recycle(self, frames):
+        """Return the slots of processed frames to the decoder."""
+        for video_frame in frames:
+            slot = self._slots.pop(video_frame.frame_number, None)
+            if slot is not None:
+                self._free_slots.put(slot)
+
+    def release(self):
+        """Stop the decoder process and free the shared memory."""
+        if self.process.is_alive():
+            if self._started:
+                # Unblock a decoder waiting for a free slot
+                self._free_slots.put(None)
+            else:
+                self._commands.put(('stop', None))
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+
+        if self.shm is not None:
+            self.frames = None
+            self.shm.unlink()
+            try:
+                self.shm.close()
+            except BufferError:
+                # Frames are still referenced; the mapping goes away with them
+                pass
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
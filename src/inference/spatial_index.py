@@ -0,0 +1,442 @@
+"""
+Spatial index over geolocated detections.
+Points are bucketed in a fixed latitude/longitude grid and stored sorted by
+cell, so radius and bounding-box queries only scan the cells they overlap.
+"""
+
+import json
+import re
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from .geodesy import EARTH_RADIUS_M, haversine
+from .geojson_writer import read_geojson_seq
+
+
+# Meters per degree of latitude
+METERS_PER_DEGREE = np.pi * EARTH_RADIUS_M / 180.0
+
+# Per-video detection outputs: detections.geojson (detect_video default) or
+# <video>_detections.geojson, and their .geojsons streams
+DETECTION_FILE_RE = re.compile(r'(?:.*_)?detections\.geojsons?')
+
+# Segment outputs of split batch videos, merged into <video>_detections.geojson
+SEGMENT_FILE_RE = re.compile(r'.*_part\d+_detections\.geojsons?')
+
+
+class GridIndex:
+    """Static grid index over points."""
+
+    def __init__(self, lat, lon, cell_size=0.01):
+        """
+        Build index.
+
+        Args:
+            lat: Point latitudes (degrees)
+            lon: Point longitudes (degrees)
+            cell_size: Grid cell size in degrees (0.01 is about 1.1 km)
+        """
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.cell_size = cell_size
+        self.num_cols = int(np.ceil(360.0 / cell_size))
+        self.max_row = int(np.ceil(180.0 / cell_size)) - 1
+
+        keys = self._cell_keys(self.lat, self.lon)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _rows(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90.0) / self.cell_size).astype(np.int64),
+                       0, self.max_row)
+
+    def _cols(self, lon):
+        return np.floor((np.asarray(lon) + 180.0) / self.cell_size).astype(np.int64) % self.num_cols
+
+    def _cell_keys(self, lat, lon):
+        return self._rows(lat) * self.num_cols + self._cols(lon)
+
+    def _candidates(self, min_lat, max_lat, col_ranges):
+        """Indices of points in the cells of a row range and column ranges."""
+        rows = np.arange(self._rows(min_lat), self._rows(max_lat) + 1)
+        starts = np.concatenate([rows * self.num_cols + c0 for c0, _ in col_ranges])
+        ends = np.concatenate([rows * self.num_cols + c1 for _, c1 in col_ranges])
+
+        lo = np.searchsorted(self.keys, starts, side='left')
+        hi = np.searchsorted(self.keys, ends, side='right')
+        slices = [self.order[a:b] for a, b in zip(lo, hi) if b > a]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def _col_ranges(self, min_lon, max_lon):
+        """Column ranges covering a longitude span (min_lon > max_lon crosses 180)."""
+        if max_lon - min_lon >= 360.0:
+            return [(0, self.num_cols - 1)]
+        c0 = int(self._cols(min_lon))
+        c1 = int(self._cols(max_lon))
+        if c0 <= c1 and min_lon <= max_lon:
+            return [(c0, c1)]
+        return [(c0, self.num_cols - 1), (0, c1)]
+
+    def query_radius(self, lat, lon, radius):
+        """
+        Points within a distance of a location (haversine).
+
+        Args:
+            lat, lon: Center (degrees)
+            radius: Radius in meters
+
+        Returns:
+            (indices, distances) sorted by distance
+        """
+        dlat = radius / METERS_PER_DEGREE
+        cos_lat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        dlon = 360.0 if cos_lat < 1e-9 else dlat / cos_lat
+
+        if dlon >= 180.0:
+            col_ranges = [(0, self.num_cols - 1)]
+        else:
+            col_ranges = self._col_ranges(((lon - dlon + 180.0) % 360.0) - 180.0,
+                                          ((lon + dlon + 180.0) % 360.0) - 180.0)
+
+        candidates = self._candidates(lat - dlat, lat + dlat, col_ranges)
+        distances = haversine(lat, lon, self.lat[candidates], self.lon[candidates])
+        inside = distances <= radius
+        candidates, distances = candidates[inside], distances[inside]
+
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def query_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Points within a bounding box.
+
+        Args:
+            min_lat, min_lon, max_lat, max_lon: Box (degrees); min_lon > max_lon
+                                                 for boxes crossing the antimeridian
+
+        Returns:
+            Indices, in index order
+        """
+        candidates = self._candidates(min_lat, max_lat, self._col_ranges(min_lon, max_lon))
+        lat = self.lat[candidates]
+        lon = self.lon[candidates]
+
+        inside = (lat >= min_lat) & (lat <= max_lat)
+        if min_lon <= max_lon:
+            inside &= (lon >= min_lon) & (lon <= max_lon)
+        else:
+            inside &= (lon >= min_lon) | (lon <= max_lon)
+
+        return np.sort(candidates[inside])
+
+
+def is_detection_file(path):
+    """Whether a file is a per-video detection output (not a derived or partial output)."""
+    name = Path(path).name
+    return bool(DETECTION_FILE_RE.fullmatch(name)) and not SEGMENT_FILE_RE.fullmatch(name)
+
+
+def find_detection_files(directory):
+    """
+    Detection files under a directory, searched recursively.
+
+    Per-video outputs only (see is_detection_file): merged surveys, road
+    segment exports and batch segment files hold detections that are
+    already in a per-video output. GeoJSON FeatureCollections (.geojson)
+    and GeoJSON text sequences (.geojsons; skipped when a .geojson of the
+    same name exists, as it holds the same detections).
+
+    Returns:
+        Sorted list of paths
+    """
+    directory = Path(directory)
+    paths = {path for path in directory.rglob('*detections.geojson') if is_detection_file(path)}
+    for path in directory.rglob('*detections.geojsons'):
+        if is_detection_file(path) and path.with_suffix('.geojson') not in paths:
+            paths.add(path)
+    return sorted(paths)
+
+
+def stream_in_progress(path):
+    """
+    Whether a GeoJSON text sequence is still being written.
+
+    Runs that can resume keep a checkpoint next to their stream until they
+    finish: <name>.ckpt.json for VideoDetector, <job_id>.ckpt.json for API
+    jobs streaming to <job_id>_detections.geojsons.
+    """
+    path = Path(path)
+    if path.suffix != '.geojsons':
+        return False
+    return (path.with_suffix('.ckpt.json').exists()
+            or path.with_name(path.name.removesuffix('_detections.geojsons') + '.ckpt.json').exists())
+
+
+def read_features(path):
+    """Features of a GeoJSON FeatureCollection or GeoJSON text sequence file."""
+    path = Path(path)
+    if path.suffix == '.geojsons':
+        yield from read_geojson_seq(path)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    yield from data.get('features', [])
+
+
+def _int_or(value, default):
+    return default if value is None else int(value)
+
+
+class _FileColumns:
+    """Detection columns read from one file."""
+
+    def __init__(self, path):
+        lat, lon, confidence, class_id, frame_number = [], [], [], [], []
+        self.classes = []
+        self.timestamps = []
+
+        for feature in read_features(path):
+            geometry = feature.get('geometry')
+            if not geometry or geometry.get('type') != 'Point':
+                continue
+            properties = feature.get('properties', {})
+            lon.append(geometry['coordinates'][0])
+            lat.append(geometry['coordinates'][1])
+            confidence.append(properties.get('confidence'))
+            class_id.append(_int_or(properties.get('class_id'), -1))
+            frame_number.append(_int_or(properties.get('frame_number'), -1))
+            self.classes.append(properties.get('class'))
+            self.timestamps.append(properties.get('timestamp'))
+
+        self.lat = np.array(lat, dtype=np.float64)
+        self.lon = np.array(lon, dtype=np.float64)
+        self.confidence = np.array(confidence, dtype=np.float64)
+        self.class_id = np.array(class_id, dtype=np.int16)
+        self.frame_number = np.array(frame_number, dtype=np.int64)
+
+
+class _IndexPart:
+    """Grid index over the detections of a set of files."""
+
+    def __init__(self, files, results_dir, cell_size):
+        """
+        Concatenate file columns and build the grid.
+
+        Args:
+            files: Dict of path -> _FileColumns
+            results_dir: Directory sources are given relative to
+            cell_size: Grid cell size in degrees
+        """
+        parts = list(files.items())
+        self.class_names = sorted({name for _, columns in parts for name in columns.classes
+                                   if name is not None})
+        codes = {name: code for code, name in enumerate(self.class_names)}
+
+        def concat(arrays, dtype):
+            return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+        self.columns = {
+            'confidence': concat([columns.confidence for _, columns in parts], np.float64),
+            'class_id': concat([columns.class_id for _, columns in parts], np.int16),
+            'class_code': np.array([codes.get(name, -1) for _, columns in parts
+                                    for name in columns.classes], dtype=np.int16),
+            'frame_number': concat([columns.frame_number for _, columns in parts], np.int64),
+            'source': concat([np.full(len(columns.lat), i, dtype=np.int32)
+                              for i, (_, columns) in enumerate(parts)], np.int32),
+            'timestamps': [value for _, columns in parts for value in columns.timestamps]
+        }
+        self.paths = {path: i for i, (path, _) in enumerate(parts)}
+        self.sources = [str(path.relative_to(results_dir)) for path, _ in parts]
+        self.sizes = [len(columns.lat) for _, columns in parts]
+        # Files replaced or removed since the build are masked out
+        self.alive = np.ones(len(parts), dtype=bool)
+        self.dead_points = 0
+        self.grid = GridIndex(concat([columns.lat for _, columns in parts], np.float64),
+                              concat([columns.lon for _, columns in parts], np.float64),
+                              cell_size)
+
+    def __len__(self):
+        return len(self.grid) - self.dead_points
+
+    def contains(self, path):
+        return path in self.paths and self.alive[self.paths[path]]
+
+    def remove(self, path):
+        """Mask out the detections of a file."""
+        source = self.paths[path]
+        if self.alive[source]:
+            self.alive[source] = False
+            self.dead_points += self.sizes[source]
+
+    def select(self, indices, class_name, min_confidence):
+        """Filter query results by file, class and confidence."""
+        keep = self.alive[self.columns['source'][indices]]
+        if min_confidence is not None:
+            keep &= self.columns['confidence'][indices] >= min_confidence
+        if class_name is not None:
+            if class_name not in self.class_names:
+                keep[:] = False
+            else:
+                keep &= self.columns['class_code'][indices] == self.class_names.index(class_name)
+        return keep
+
+    def feature(self, index, distance=None):
+        """GeoJSON feature of an indexed detection."""
+        code = self.columns['class_code'][index]
+        properties = {
+            'class': self.class_names[code] if code >= 0 else None,
+            'class_id': int(self.columns['class_id'][index]),
+            'confidence': float(self.columns['confidence'][index]),
+            'timestamp': self.columns['timestamps'][index],
+            'frame_number': int(self.columns['frame_number'][index]),
+            'source': self.sources[self.columns['source'][index]]
+        }
+        if distance is not None:
+            properties['distance_m'] = round(float(distance), 3)
+        return {
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Point',
+                'coordinates': [float(self.grid.lon[index]), float(self.grid.lat[index])]
+            },
+            'properties': properties
+        }
+
+
+class DetectionIndex:
+    """
+    Spatial index over the detections stored under a results directory.
+
+    Indexes the files of find_detection_files(), except streams still being
+    written (see stream_in_progress); detections without coordinates are
+    left out. refresh() re-reads only files that changed since the last
+    refresh, into a small delta index queried along with the main one; the
+    main index is rebuilt once the delta and the detections of replaced or
+    removed files reach MERGE_FRACTION of it.
+    """
+
+    # Size of the delta (plus masked detections) relative to the main index
+    # that triggers a full rebuild
+    MERGE_FRACTION = 0.25
+
+    def __init__(self, results_dir, cell_size=0.01, min_refresh_sec=0.0):
+        """
+        Initialize index.
+
+        Args:
+            results_dir: Directory searched recursively for detection files
+            cell_size: Grid cell size in degrees
+            min_refresh_sec: refresh() does not rescan the directory more
+                             often than this (servers refreshing per query)
+        """
+        self.results_dir = Path(results_dir)
+        self.cell_size = cell_size
+        self.min_refresh_sec = min_refresh_sec
+        self.files = {}
+        self.signatures = {}
+        self._last_refresh = None
+        self._lock = threading.Lock()
+        self._main = self._delta = _IndexPart({}, self.results_dir, cell_size)
+
+    def refresh(self):
+        """
+        Re-index added, modified and removed detection files.
+
+        Returns:
+            True if the index changed
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._last_refresh is not None and now - self._last_refresh < self.min_refresh_sec:
+                return False
+            self._last_refresh = now
+
+            signatures = {}
+            for path in find_detection_files(self.results_dir):
+                if stream_in_progress(path):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                signatures[path] = (stat.st_mtime_ns, stat.st_size)
+
+            if signatures == self.signatures:
+                return False
+
+            files = {}
+            for path, signature in signatures.items():
+                if self.signatures.get(path) == signature:
+                    files[path] = self.files[path]
+                    continue
+                try:
+                    files[path] = _FileColumns(path)
+                except (OSError, ValueError):
+                    # Unreadable or being rewritten: keep the previous
+                    # contents and retry on the next refresh
+                    if path in self.files:
+                        files[path] = self.files[path]
+                    signatures[path] = None
+
+            # Changed and removed files leave the main index; the delta
+            # holds every file the main index does not
+            for path, signature in self.signatures.items():
+                if signatures.get(path, ()) != signature and self._main.contains(path):
+                    self._main.remove(path)
+            delta_files = {path: columns for path, columns in files.items() if not self._main.contains(path)}
+            delta_points = sum(len(columns.lat) for columns in delta_files.values())
+
+            if delta_points + self._main.dead_points > self.MERGE_FRACTION * len(self._main):
+                self._main = _IndexPart(files, self.results_dir, self.cell_size)
+                delta_files = {}
+            self._delta = _IndexPart(delta_files, self.results_dir, self.cell_size)
+
+            self.files = files
+            self.signatures = signatures
+            return True
+
+    def __len__(self):
+        return len(self._main) + len(self._delta)
+
+    def near(self, lat, lon, radius, limit=None, class_name=None, min_confidence=None):
+        """
+        Detections within radius meters of a location, nearest first.
+
+        Returns:
+            (total number of matches, list of up to limit GeoJSON features)
+        """
+        with self._lock:
+            matches = []
+            for part in (self._main, self._delta):
+                indices, distances = part.grid.query_radius(lat, lon, radius)
+                keep = part.select(indices, class_name, min_confidence)
+                matches.extend((distance, part, index) for index, distance in zip(indices[keep], distances[keep]))
+            # Stable: the main index first among equal distances
+            matches.sort(key=lambda match: match[0])
+            return len(matches), [part.feature(i, d) for d, part, i in matches[:limit]]
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon, limit=None, class_name=None,
+             min_confidence=None):
+        """
+        Detections within a bounding box.
+
+        Returns:
+            (total number of matches, list of up to limit GeoJSON features)
+        """
+        with self._lock:
+            total = 0
+            features = []
+            for part in (self._main, self._delta):
+                indices = part.grid.query_bbox(min_lat, min_lon, max_lat, max_lon)
+                indices = indices[part.select(indices, class_name, min_confidence)]
+                total += len(indices)
+                remaining = None if limit is None else max(0, limit - len(features))
+                features.extend(part.feature(i) for i in indices[:remaining])
+            return total, features
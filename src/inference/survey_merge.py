@@ -0,0 +1,337 @@
+"""
+Merge detections of repeated surveys into canonical defects.
+Detections of the same class closer than a radius are linked (single
+linkage, haversine distance) and each connected cluster becomes one defect
+with its observation count, first/last seen times and best confidence.
+
+Candidate pairs only come from neighbouring grid cells of radius size, are
+generated in blocks of at most max_pairs and folded into a union-find array
+right away, so working memory stays bounded; detections themselves are held
+as compact columns (~40 bytes each).
+Clusters are not linked across the antimeridian.
+"""
+
+import argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .geodesy import haversine
+from .geojson_writer import GeoJSONSeqWriter, geojson_seq_to_feature_collection
+from .spatial_index import METERS_PER_DEGREE, find_detection_files, read_features
+
+
+# Largest number of candidate pairs evaluated at once
+MAX_PAIRS = 250_000
+
+# Unknown timestamps in int64 ns columns
+NO_TIME = np.iinfo(np.int64).min
+
+
+def timestamps_to_ns(values):
+    """Parse ISO timestamps to int64 ns (UTC for timestamps with an offset)."""
+    values = pd.Series(values, dtype=object)
+    try:
+        times = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    except (ValueError, TypeError):
+        # Mixed offsets
+        times = pd.to_datetime(values, errors='coerce', format='ISO8601', utc=True)
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+    return times.dt.as_unit('ns').to_numpy().view(np.int64)
+
+
+class DetectionColumns:
+    """Geolocated detections of many files as typed columns."""
+
+    def __init__(self):
+        self.sources = []
+        self.class_names = []
+        self._codes = {}
+        self._chunks = []
+
+    def add_file(self, path):
+        """Append the geolocated detections of a GeoJSON (sequence) file."""
+        lat, lon, confidence, classes, timestamps = [], [], [], [], []
+        for feature in read_features(path):
+            geometry = feature.get('geometry')
+            if not geometry or geometry.get('type') != 'Point':
+                continue
+            properties = feature.get('properties', {})
+            lon.append(geometry['coordinates'][0])
+            lat.append(geometry['coordinates'][1])
+            confidence.append(properties.get('confidence'))
+            classes.append(self._class_code(properties.get('class'), properties.get('class_id')))
+            timestamps.append(properties.get('timestamp'))
+
+        self._chunks.append({
+            'lat': np.array(lat, dtype=np.float64),
+            'lon': np.array(lon, dtype=np.float64),
+            'confidence': np.array(confidence, dtype=np.float32),
+            'class_code': np.array(classes, dtype=np.int32),
+            'timestamp': timestamps_to_ns(timestamps),
+            'source': np.full(len(lat), len(self.sources), dtype=np.int32)
+        })
+        self.sources.append(str(path))
+
+    def _class_code(self, name, class_id):
+        key = (name, class_id)
+        if key not in self._codes:
+            self._codes[key] = len(self.class_names)
+            self.class_names.append(key)
+        return self._codes[key]
+
+    def columns(self):
+        """Concatenate the files added so far into single arrays."""
+        if len(self._chunks) > 1:
+            self._chunks = [{name: np.concatenate([chunk[name] for chunk in self._chunks])
+                             for name in self._chunks[0]}]
+        if not self._chunks:
+            return {
+                'lat': np.empty(0), 'lon': np.empty(0), 'confidence': np.empty(0, np.float32),
+                'class_code': np.empty(0, np.int32), 'timestamp': np.empty(0, np.int64),
+                'source': np.empty(0, np.int32)
+            }
+        return self._chunks[0]
+
+
+def _block_pairs(starts_a, starts_b, sizes_a, sizes_b, max_pairs):
+    """
+    Cartesian products of point runs, in blocks of at most max_pairs pairs.
+
+    Yields:
+        (i, j) arrays of point positions
+    """
+    offsets = np.concatenate([[0], np.cumsum(sizes_a * sizes_b)])
+    for lo in range(0, int(offsets[-1]), max_pairs):
+        k = np.arange(lo, min(lo + max_pairs, offsets[-1]), dtype=np.int64)
+        run = np.searchsorted(offsets, k, side='right') - 1
+        local = k - offsets[run]
+        yield starts_a[run] + local // sizes_b[run], starts_b[run] + local % sizes_b[run]
+
+
+def _find(parent, nodes):
+    """Roots of nodes in a union-find parent array."""
+    roots = parent[nodes]
+    while True:
+        next_roots = parent[roots]
+        if np.array_equal(next_roots, roots):
+            return roots
+        roots = next_roots
+
+
+def _union(parent, i, j):
+    """Link the sets of node pairs (i, j); smaller root indices become roots."""
+    while len(i):
+        ri = _find(parent, i)
+        rj = _find(parent, j)
+        apart = ri != rj
+        if not apart.any():
+            break
+        ri, rj = ri[apart], rj[apart]
+        # Concurrent links of one root keep a single write; retried next pass
+        parent[np.maximum(ri, rj)] = np.minimum(ri, rj)
+        i, j = i[apart], j[apart]
+
+    # Path compression of the touched nodes
+    parent[i] = _find(parent, i)
+    parent[j] = _find(parent, j)
+
+
+def cluster_detections(lat, lon, class_code, radius, max_pairs=MAX_PAIRS):
+    """
+    Cluster detections of the same class within radius of each other.
+
+    Args:
+        lat, lon: Detection coordinates (degrees)
+        class_code: Integer class per detection (only equal codes are linked)
+        radius: Linking distance in meters
+        max_pairs: Candidate pairs evaluated per block (bounds working memory)
+
+    Returns:
+        (number of clusters, cluster label per detection)
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    n = len(lat)
+    if n == 0:
+        return 0, np.empty(0, dtype=np.int64)
+
+    # Cells at least radius wide, in latitude and (at the highest latitude) longitude
+    cell_lat = radius / METERS_PER_DEGREE
+    cell_lon = cell_lat / max(np.cos(np.radians(min(np.abs(lat).max() + cell_lat, 89.9))), 1e-6)
+    rows = np.floor((lat + 90.0) / cell_lat).astype(np.int64)
+    cols = np.floor((lon + 180.0) / cell_lon).astype(np.int64)
+    num_rows = int(rows.max()) + 2
+    num_cols = int(cols.max()) + 2
+    keys = (np.asarray(class_code, dtype=np.int64) * num_rows + rows) * num_cols + cols
+
+    del rows, cols
+
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    cells = keys[starts]
+    sizes = np.diff(np.append(starts, n))
+    del keys
+    lat_sorted = lat[order]
+    lon_sorted = lon[order]
+
+    parent = np.arange(n, dtype=np.int64)
+    # Same cell, then the half-neighbourhood (each neighbouring pair once)
+    for offset in (0, 1, num_cols - 1, num_cols, num_cols + 1):
+        if offset:
+            target = np.searchsorted(cells, cells + offset)
+            target = np.minimum(target, len(cells) - 1)
+            found = cells[target] == cells + offset
+            a, b = np.flatnonzero(found), target[found]
+        else:
+            a = b = np.flatnonzero(sizes > 1)
+
+        for i, j in _block_pairs(starts[a], starts[b], sizes[a], sizes[b], max_pairs):
+            if not offset:
+                keep = i < j
+                i, j = i[keep], j[keep]
+            close = haversine(lat_sorted[i], lon_sorted[i], lat_sorted[j], lon_sorted[j]) <= radius
+            _union(parent, i[close], j[close])
+
+    # Roots are the smallest member, so first occurrences number the clusters
+    roots = _find(parent, np.arange(n))
+    is_root = roots == np.arange(n)
+    labels_sorted = (np.cumsum(is_root) - 1)[roots]
+    num_clusters = int(is_root.sum())
+
+    labels = np.empty(n, dtype=np.int64)
+    labels[order] = labels_sorted
+    return num_clusters, labels
+
+
+def summarize_clusters(columns, num_clusters, labels):
+    """
+    Aggregate detections per cluster.
+
+    Args:
+        columns: DetectionColumns.columns() dict
+        num_clusters: Number of clusters
+        labels: Cluster label per detection
+
+    Returns:
+        Dict of per-cluster arrays: latitude, longitude (centroid),
+        class_code, num_observations, num_surveys, max_confidence,
+        mean_confidence, first_seen, last_seen (int64 ns, NO_TIME if unknown)
+    """
+    order = np.argsort(labels, kind='stable')
+    sorted_labels = labels[order]
+    starts = np.searchsorted(sorted_labels, np.arange(num_clusters))
+    counts = np.bincount(labels, minlength=num_clusters)
+
+    confidence = np.nan_to_num(columns['confidence'][order].astype(np.float64), nan=0.0)
+    timestamp = columns['timestamp'][order]
+    known = timestamp != NO_TIME
+    first = np.where(known, timestamp, np.iinfo(np.int64).max)
+
+    # Distinct (cluster, source) pairs
+    surveys = np.unique(sorted_labels * (int(columns['source'].max(initial=0)) + 1)
+                        + columns['source'][order])
+    num_surveys = np.bincount(surveys // (int(columns['source'].max(initial=0)) + 1),
+                              minlength=num_clusters)
+
+    first_seen = np.minimum.reduceat(first, starts) if num_clusters else first[:0]
+    return {
+        'latitude': np.bincount(labels, weights=columns['lat'], minlength=num_clusters) / counts,
+        'longitude': np.bincount(labels, weights=columns['lon'], minlength=num_clusters) / counts,
+        'class_code': columns['class_code'][order][starts],
+        'num_observations': counts,
+        'num_surveys': num_surveys,
+        'max_confidence': np.maximum.reduceat(confidence, starts) if num_clusters else confidence[:0],
+        'mean_confidence': np.bincount(labels, weights=np.nan_to_num(columns['confidence']),
+                                       minlength=num_clusters) / counts,
+        'first_seen': np.where(first_seen == np.iinfo(np.int64).max, NO_TIME, first_seen),
+        'last_seen': np.maximum.reduceat(timestamp, starts) if num_clusters else timestamp[:0]
+    }
+
+
+def isoformat_ns(value):
+    """ISO 8601 string of an int64 nanosecond timestamp (None for NO_TIME)."""
+    return None if value == NO_TIME else pd.Timestamp(int(value)).isoformat()
+
+
+def merge_surveys(inputs, output_path, radius=5.0, min_observations=1, max_pairs=MAX_PAIRS):
+    """
+    Merge the detections of many survey runs into one defect per cluster.
+
+    Args:
+        inputs: Detection files or directories (searched recursively)
+        output_path: Output GeoJSON FeatureCollection path
+        radius: Linking distance in meters
+        min_observations: Drop defects seen fewer times
+        max_pairs: Candidate pairs evaluated per block
+
+    Returns:
+        Stats dict (detections, defects, files)
+    """
+    detections = DetectionColumns()
+    for path in inputs:
+        path = Path(path)
+        for file_path in (find_detection_files(path) if path.is_dir() else [path]):
+            detections.add_file(file_path)
+
+    columns = detections.columns()
+    print(f"📍 Merging {len(columns['lat'])} detections from {len(detections.sources)} files")
+
+    num_clusters, labels = cluster_detections(columns['lat'], columns['lon'], columns['class_code'],
+                                              radius, max_pairs)
+    clusters = summarize_clusters(columns, num_clusters, labels)
+
+    output_path = Path(output_path)
+    seq_path = output_path.with_suffix('.geojsons')
+    defects = 0
+    with GeoJSONSeqWriter(seq_path) as writer:
+        for index in np.flatnonzero(clusters['num_observations'] >= min_observations):
+            class_name, class_id = detections.class_names[clusters['class_code'][index]]
+            writer.write_feature({
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': [float(clusters['longitude'][index]), float(clusters['latitude'][index])]
+                },
+                'properties': {
+                    'class': class_name,
+                    'class_id': class_id,
+                    'confidence': float(clusters['max_confidence'][index]),
+                    'mean_confidence': round(float(clusters['mean_confidence'][index]), 4),
+                    'num_observations': int(clusters['num_observations'][index]),
+                    'num_surveys': int(clusters['num_surveys'][index]),
+                    'first_seen': isoformat_ns(clusters['first_seen'][index]),
+                    'last_seen': isoformat_ns(clusters['last_seen'][index])
+                }
+            })
+            defects += 1
+
+    geojson_seq_to_feature_collection(seq_path, output_path,
+                                      metadata={'merge_radius_m': radius, 'sources': len(detections.sources)})
+    seq_path.unlink()
+    print(f"✅ {defects} defects saved to {output_path}")
+
+    return {'detections': len(columns['lat']), 'defects': defects, 'files': len(detections.sources)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge detections of repeated surveys')
+    parser.add_argument('--inputs', type=str, nargs='+', required=True,
+                        help='Detection files or directories of survey runs')
+    parser.add_argument('--output', type=str, required=True, help='Output GeoJSON path')
+    parser.add_argument('--radius', type=float, default=5.0,
+                        help='Detections of the same class closer than this (meters) are merged')
+    parser.add_argument('--min-observations', type=int, default=1,
+                        help='Drop defects seen fewer times')
+    parser.add_argument('--max-pairs', type=int, default=MAX_PAIRS,
+                        help='Candidate pairs evaluated per block (bounds memory)')
+
+    args = parser.parse_args()
+
+    merge_surveys(args.inputs, args.output, radius=args.radius,
+                  min_observations=args.min_observations, max_pairs=args.max_pairs)
+
+
+if __name__ == "__main__":
+    main()
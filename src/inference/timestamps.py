@@ -0,0 +1,292 @@
+"""
+Timestamp detection and normalization.
+GPS timestamps are stored as naive datetime64[ns] values in UTC (int64
+nanoseconds since the epoch). The format of a file is detected once from a
+sample (an explicit strftime format, ISO 8601, or epoch seconds/ms/us/ns)
+and every chunk is parsed with it, instead of inferring it per chunk.
+Timezone-aware values are converted to UTC; naive values are taken as UTC.
+"""
+
+import re
+import warnings
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+
+# Epoch units by magnitude of the values (seconds up to year ~5000)
+EPOCH_UNITS = (('s', 1e11), ('ms', 1e14), ('us', 1e17), ('ns', np.inf))
+
+# Values checked when detecting a format
+SAMPLE_SIZE = 100
+
+_NUMBER = re.compile(r'^[+-]?\d+(\.\d*)?$')
+
+
+def _epoch_unit(values):
+    """Epoch unit matching the magnitude of numeric timestamps."""
+    magnitude = np.nanmedian(np.abs(values)) if len(values) else 0.0
+    return next(unit for unit, limit in EPOCH_UNITS if magnitude < limit)
+
+
+def detect_format(values, sample_size=SAMPLE_SIZE):
+    """
+    Detect the timestamp format of a column from a sample.
+
+    Args:
+        values: Array-like of timestamps (strings, numbers or datetimes)
+        sample_size: Number of non-null values checked
+
+    Returns:
+        'epoch_s', 'epoch_ms', 'epoch_us' or 'epoch_ns' for numbers, a
+        strftime format matching every sampled string, 'ISO8601' for ISO
+        strings of varying precision, 'mixed' otherwise, or None for
+        datetime objects (and empty samples)
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return None
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return f"epoch_{_epoch_unit(series.dropna().to_numpy(dtype=float)[:sample_size])}"
+
+    sample = series.dropna()[:sample_size]
+    if not len(sample) or not all(isinstance(value, str) for value in sample):
+        return None
+    sample = sample.str.strip()
+    if sample.str.match(_NUMBER).all():
+        return f"epoch_{_epoch_unit(sample.astype(float).to_numpy())}"
+
+    for dayfirst in (False, True, None):
+        if dayfirst is None:
+            fmt = 'ISO8601'
+        else:
+            with warnings.catch_warnings():
+                # Raised for formats where dayfirst does not apply
+                warnings.simplefilter('ignore', UserWarning)
+                fmt = guess_datetime_format(sample.iloc[0], dayfirst=dayfirst)
+        if fmt is None:
+            continue
+        try:
+            pd.to_datetime(sample, format=fmt, utc=True)
+            return fmt
+        except (ValueError, TypeError):
+            continue
+    return 'mixed'
+
+
+# Fixed-width fields of strftime directives: (name, digits)
+_FIELDS = {'%Y': ('year', 4), '%m': ('month', 2), '%d': ('day', 2),
+           '%H': ('hour', 2), '%M': ('minute', 2), '%S': ('second', 2)}
+
+# Valid field values (out-of-range chunks are left to pandas, which gives NaT)
+_RANGES = {'month': (1, 12), 'day': (1, 31), 'hour': (0, 23), 'minute': (0, 59), 'second': (0, 59)}
+
+# Days per month of common years (February gains a day in leap years)
+_MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+_NS_PER = {'hour': 3_600_000_000_000, 'minute': 60_000_000_000, 'second': 1_000_000_000}
+
+
+class FixedWidthLayout:
+    """
+    Vectorized parser for strftime formats whose fields sit at fixed positions.
+
+    Formats made of %Y %m %d %H %M %S, an optional %f and a trailing %z, with
+    literal separators, are parsed by reading digit columns of a byte matrix
+    instead of parsing strings one by one. Chunks whose strings do not all
+    match the layout are left to pandas.
+    """
+
+    def __init__(self, fmt, sample):
+        """
+        Compile a layout.
+
+        Args:
+            fmt: strftime format
+            sample: A timestamp string in this format (fixes %f and %z widths)
+
+        Raises:
+            ValueError: If the format has other directives or the sample does not match
+        """
+        self.width = len(sample)
+        self.fields = []
+        self.literals = []
+        self.offset = None
+        pos = 0
+        i = 0
+        while i < len(fmt):
+            directive = fmt[i:i + 2]
+            if directive in _FIELDS:
+                name, digits = _FIELDS[directive]
+                self.fields.append((name, pos, digits))
+                pos += digits
+                i += 2
+            elif directive == '%f':
+                digits = len(sample[pos:]) - len(sample[pos:].lstrip('0123456789'))
+                if not 1 <= digits <= 9:
+                    raise ValueError("Fraction must have 1 to 9 digits")
+                self.fields.append(('fraction', pos, digits))
+                pos += digits
+                i += 2
+            elif directive == '%z' and i + 2 == len(fmt):
+                self.offset = (pos, self.width - pos)
+                if sample[pos:] != 'Z' and self.width - pos not in (5, 6):
+                    raise ValueError("Unsupported UTC offset")
+                pos = self.width
+                i += 2
+            elif fmt[i] == '%':
+                raise ValueError(f"Unsupported directive {directive}")
+            else:
+                self.literals.append((pos, fmt[i]))
+                pos += 1
+                i += 1
+
+        names = {name for name, _, _ in self.fields}
+        if pos != self.width or not {'year', 'month', 'day'} <= names:
+            raise ValueError("Sample does not match the format")
+
+    def parse(self, series):
+        """
+        Parse a chunk of strings.
+
+        Returns:
+            int64 nanoseconds since the epoch (UTC), or None if the chunk
+            does not match the layout
+        """
+        # One spare byte per string: shorter strings end in padding, longer ones fill it
+        try:
+            raw = series.to_numpy(dtype=f'S{self.width + 1}')
+        except (UnicodeEncodeError, TypeError, ValueError):
+            return None
+        chars = raw.view(np.uint8).reshape(len(raw), self.width + 1)
+        if chars[:, self.width].any() or not chars[:, self.width - 1].all():
+            return None
+        if any((chars[:, pos] != ord(char)).any() for pos, char in self.literals):
+            return None
+
+        values = {}
+        for name, pos, width in self.fields:
+            block = chars[:, pos:pos + width] - np.uint8(ord('0'))
+            if (block > 9).any():
+                return None
+            value = block[:, 0].astype(np.int64)
+            for column in range(1, width):
+                value = value * 10 + block[:, column]
+            values[name] = value
+            if name in _RANGES and ((values[name] < _RANGES[name][0]) | (values[name] > _RANGES[name][1])).any():
+                return None
+
+        # Days past the end of their month (e.g. 2024-02-31) are NaT for pandas, not a later date
+        year, month, day = values['year'], values['month'], values['day']
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        if (day > _MONTH_DAYS[month - 1] + ((month == 2) & leap)).any():
+            return None
+
+        ns = _days_from_civil(year, month, day) * 86_400_000_000_000
+        for name, factor in _NS_PER.items():
+            if name in values:
+                ns += values[name] * factor
+        if 'fraction' in values:
+            width = next(w for name, _, w in self.fields if name == 'fraction')
+            ns += values['fraction'] * 10 ** (9 - width)
+
+        if self.offset is not None and self.width - self.offset[0] > 1:
+            pos = self.offset[0]
+            digits = (chars[:, pos + 1:self.width] - np.uint8(ord('0'))).astype(np.int64)
+            sign = np.where(chars[:, pos] == ord('-'), 1, -1)
+            hours = digits[:, 0] * 10 + digits[:, 1]
+            minutes = digits[:, -2] * 10 + digits[:, -1]
+            ns += sign * (hours * 60 + minutes) * 60_000_000_000
+        return ns
+
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 of proleptic Gregorian dates (arrays)."""
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _parse_fixed_width(series, fmt):
+    """Parse strings with a fixed-width layout of fmt (None if not applicable)."""
+    # Naive ISO 8601 layouts are parsed faster by pandas itself
+    if fmt.startswith('%Y-%m-%d') and '%z' not in fmt:
+        return None
+    sample = series.dropna()
+    if not len(sample) or not isinstance(sample.iloc[0], str):
+        return None
+    try:
+        layout = FixedWidthLayout(fmt, sample.iloc[0])
+    except ValueError:
+        return None
+    return layout.parse(series)
+
+
+def parse_timestamps(values, fmt=None):
+    """
+    Parse timestamps to naive UTC datetime64[ns].
+
+    Args:
+        values: Array-like of timestamps
+        fmt: Output of detect_format or a strftime format (detected if None)
+
+    Returns:
+        datetime64[ns] Series (unparsable values are NaT)
+    """
+    series = pd.Series(values).reset_index(drop=True)
+    if fmt is None:
+        fmt = detect_format(series)
+
+    if fmt is not None and fmt.startswith('epoch_'):
+        numbers = pd.to_numeric(series, errors='coerce')
+        times = pd.to_datetime(numbers, unit=fmt[len('epoch_'):], utc=True)
+    elif fmt not in (None, 'ISO8601', 'mixed') and (ns := _parse_fixed_width(series, fmt)) is not None:
+        return pd.Series(ns.view('datetime64[ns]'))
+    elif fmt is None:
+        times = pd.to_datetime(series, utc=True, errors='coerce')
+    else:
+        times = pd.to_datetime(series, format=fmt, utc=True, errors='coerce')
+
+    return times.dt.tz_localize(None).dt.as_unit('ns')
+
+
+class TimestampParser:
+    """Parse the chunks of one file with a format detected on the first chunk."""
+
+    def __init__(self, fmt=None):
+        """
+        Initialize parser.
+
+        Args:
+            fmt: Explicit strftime format or 'epoch_s'/'epoch_ms'/'epoch_us'/'epoch_ns'
+                 (None to detect it from the first non-empty chunk)
+        """
+        self.format = fmt
+        self._detected = fmt is not None
+
+    def __call__(self, values):
+        if not self._detected and len(values):
+            self.format = detect_format(values)
+            self._detected = True
+        return parse_timestamps(values, self.format)
+
+
+def to_utc(timestamp):
+    """
+    Normalize a scalar timestamp to a naive UTC pd.Timestamp.
+
+    Timezone-aware values are converted to UTC, naive ones are taken as UTC.
+    """
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return timestamp
+
+
+def utc_now():
+    """Current time as a naive UTC datetime."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
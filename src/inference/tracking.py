@@ -0,0 +1,206 @@
+"""
+Multi-object tracking of detections across video frames.
+Links boxes of the same physical defect into tracks and emits one
+consolidated detection per track.
+"""
+
+import numpy as np
+
+
+def box_iou(boxes1, boxes2):
+    """
+    Pairwise IoU between two sets of boxes.
+
+    Args:
+        boxes1: (N, 4) array of xmin, ymin, xmax, ymax
+        boxes2: (M, 4) array of xmin, ymin, xmax, ymax
+
+    Returns:
+        (N, M) IoU matrix
+    """
+    boxes1 = np.asarray(boxes1, dtype=float).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=float).reshape(-1, 4)
+
+    x1 = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y2 = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+
+    return np.where(union > 0, intersection / np.where(union > 0, union, 1), 0.0)
+
+
+def _bbox_array(detection):
+    bbox = detection['bbox']
+    return np.array([bbox['xmin'], bbox['ymin'], bbox['xmax'], bbox['ymax']], dtype=float)
+
+
+class _Track:
+    """State of a single track."""
+
+    def __init__(self, track_id, frame_number, detection):
+        self.track_id = track_id
+        self.class_id = detection['class_id']
+        self.first = detection
+        self.last = detection
+        self.best = detection
+        self.first_frame = frame_number
+        self.last_frame = frame_number
+        self.box = _bbox_array(detection)
+        self.velocity = np.zeros(4)
+        self.observations = 1
+        self.missed = 0
+
+    def predict(self, frame_number):
+        """Constant-velocity prediction of the box at a later frame."""
+        return self.box + self.velocity * (frame_number - self.last_frame)
+
+    def update(self, frame_number, detection):
+        box = _bbox_array(detection)
+        self.velocity = (box - self.box) / max(1, frame_number - self.last_frame)
+        self.box = box
+        self.last = detection
+        self.last_frame = frame_number
+        self.observations += 1
+        self.missed = 0
+        if detection['confidence'] > self.best['confidence']:
+            self.best = detection
+
+    def state_dict(self):
+        state = dict(vars(self))
+        state['box'] = self.box.tolist()
+        state['velocity'] = self.velocity.tolist()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        track = cls.__new__(cls)
+        vars(track).update(state)
+        track.box = np.array(state['box'], dtype=float)
+        track.velocity = np.array(state['velocity'], dtype=float)
+        return track
+
+    def consolidate(self):
+        """
+        Single detection summarizing the track.
+
+        Attributes come from the best-confidence observation; the GPS point is
+        the one of the last observation, when the defect is closest to the
+        vehicle and its position is the best estimate of the defect's.
+        """
+        detection = dict(self.best)
+        for key in ('latitude', 'longitude', 'altitude'):
+            if key in self.last:
+                detection[key] = self.last[key]
+
+        detection.update({
+            'track_id': self.track_id,
+            'first_frame': self.first_frame,
+            'last_frame': self.last_frame,
+            'first_timestamp': self.first['timestamp'],
+            'last_timestamp': self.last['timestamp'],
+            'num_observations': self.observations
+        })
+        return detection
+
+
+class DetectionTracker:
+    """Greedy IoU tracker producing one detection per physical defect."""
+
+    def __init__(self, iou_threshold=0.2, max_missed=3):
+        """
+        Initialize tracker.
+
+        Args:
+            iou_threshold: Minimum IoU between a track's predicted box and a detection
+            max_missed: Close a track after this many processed frames without a match
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+
+        self.tracks = []
+        self.next_id = 0
+        self.stats = {'raw_detections': 0, 'tracks': 0}
+
+    def update(self, frame_number, detections):
+        """
+        Add the detections of one processed frame.
+
+        Args:
+            frame_number: Frame number
+            detections: Detection dicts of this frame (may be empty)
+
+        Returns:
+            Consolidated detections of the tracks closed by this update
+        """
+        self.stats['raw_detections'] += len(detections)
+        unmatched = list(range(len(detections)))
+
+        if self.tracks and detections:
+            predicted = np.stack([track.predict(frame_number) for track in self.tracks])
+            boxes = np.stack([_bbox_array(det) for det in detections])
+            iou = box_iou(predicted, boxes)
+
+            # Only same-class pairs can match
+            track_classes = np.array([track.class_id for track in self.tracks])
+            det_classes = np.array([det['class_id'] for det in detections])
+            iou[track_classes[:, None] != det_classes[None, :]] = 0.0
+
+            # Greedy assignment by decreasing IoU
+            matched_tracks = set()
+            matched_dets = set()
+            for flat in np.argsort(-iou, axis=None):
+                t, d = (int(i) for i in np.unravel_index(flat, iou.shape))
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or d in matched_dets:
+                    continue
+                self.tracks[t].update(frame_number, detections[d])
+                matched_tracks.add(t)
+                matched_dets.add(d)
+
+            for t, track in enumerate(self.tracks):
+                if t not in matched_tracks:
+                    track.missed += 1
+            unmatched = [d for d in unmatched if d not in matched_dets]
+        else:
+            for track in self.tracks:
+                track.missed += 1
+
+        # Close stale tracks
+        closed = [track for track in self.tracks if track.missed > self.max_missed]
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        # Start new tracks
+        for d in unmatched:
+            self.tracks.append(_Track(self.next_id, frame_number, detections[d]))
+            self.next_id += 1
+
+        return self._close(closed)
+
+    def state_dict(self):
+        """JSON-serializable tracker state, for checkpointing."""
+        return {
+            'tracks': [track.state_dict() for track in self.tracks],
+            'next_id': self.next_id,
+            'stats': dict(self.stats)
+        }
+
+    def load_state_dict(self, state):
+        """Restore a state returned by state_dict."""
+        self.tracks = [_Track.from_state(track) for track in state['tracks']]
+        self.next_id = state['next_id']
+        self.stats = dict(state['stats'])
+
+    def finish(self):
+        """Close all open tracks and return their consolidated detections."""
+        closed, self.tracks = self.tracks, []
+        return self._close(closed)
+
+    def _close(self, tracks):
+        self.stats['tracks'] += len(tracks)
+        return [track.consolidate() for track in sorted(tracks, key=lambda t: t.first_frame)]
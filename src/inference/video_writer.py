@@ -0,0 +1,141 @@
+"""
+Annotated video output in a separate process.
+Frames and their detection arrays are passed through a bounded queue, and
+boxes are drawn, resized and encoded off the inference path.
+"""
+
+import multiprocessing
+from queue import Full
+import cv2
+import numpy as np
+from .frame_reader import scaled_size
+
+
+# BGR box colors, cycled by class id
+CLASS_COLORS = [(0, 0, 255), (0, 165, 255), (255, 0, 255), (255, 255, 0), (0, 255, 0)]
+
+
+def draw_boxes(image, boxes, class_ids, confidences, class_names):
+    """
+    Draw detection boxes and labels on an image, in place.
+
+    Args:
+        image: BGR frame
+        boxes: (N, 4) array of xyxy boxes in image coordinates
+        class_ids: (N,) array of class ids
+        confidences: (N,) array of confidences
+        class_names: List of class names
+    """
+    thickness = max(1, round(max(image.shape[:2]) / 640))
+    for (x1, y1, x2, y2), cls, conf in zip(boxes.astype(int), class_ids, confidences):
+        cls = int(cls)
+        color = CLASS_COLORS[cls % len(CLASS_COLORS)]
+        name = class_names[cls] if cls < len(class_names) else str(cls)
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, thickness)
+        cv2.putText(image, f"{name} {conf:.2f}", (x1, max(y1 - 4, 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.4 * thickness, color, thickness)
+    return image
+
+
+def _writer_loop(queue, path, fps, size, class_names):
+    """Writer process: draw, resize and encode frames until the None sentinel."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    try:
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+
+            image, boxes, class_ids, confidences = item
+            if len(boxes):
+                draw_boxes(image, boxes, class_ids, confidences, class_names)
+            if (image.shape[1], image.shape[0]) != size:
+                image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            writer.write(image)
+    finally:
+        writer.release()
+
+
+class AnnotatedVideoWriter:
+    """Write annotated frames from a background process fed by a bounded queue."""
+
+    def __init__(self, path, fps, size, class_names, output_size=None, output_fps=None,
+                 queue_size=32):
+        """
+        Initialize writer and start its process.
+
+        Args:
+            path: Output video path
+            fps: Frame rate of the frames passed to write()
+            size: (width, height) of the frames passed to write()
+            class_names: List of class names for labels
+            output_size: Longest side of the output video in pixels (None = input size)
+            output_fps: Output frame rate (None = input frame rate); frames are
+                        dropped before being queued
+            queue_size: Maximum number of frames waiting to be encoded; write()
+                        blocks when the writer falls this far behind
+        """
+        self.path = path
+        self.fps = fps
+        self.output_fps = min(output_fps or fps, fps)
+
+        self.output_size = scaled_size(size[0], size[1], output_size)
+
+        self.written = 0
+        self._next_slot = 0
+
+        self.queue = multiprocessing.Queue(maxsize=queue_size)
+        self.process = multiprocessing.Process(
+            target=_writer_loop,
+            args=(self.queue, path, self.output_fps, self.output_size, list(class_names)),
+            daemon=True
+        )
+        self.process.start()
+
+    def write(self, frame_number, image, boxes=None, class_ids=None, confidences=None):
+        """
+        Queue a frame with its detections.
+
+        Args:
+            frame_number: Frame number in the source video (used to drop
+                          frames when writing at a lower frame rate)
+            image: BGR frame (copied: the queue pickles it later, and the
+                   caller may reuse its buffer, e.g. a shared-memory slot)
+            boxes: (N, 4) array of xyxy boxes in image coordinates (or None)
+            class_ids: (N,) array of class ids
+            confidences: (N,) array of confidences
+        """
+        # Keep the first frame of each output frame interval
+        slot = int(frame_number * self.output_fps / self.fps)
+        if slot < self._next_slot:
+            return
+        self._next_slot = slot + 1
+
+        if boxes is None:
+            boxes, class_ids, confidences = np.zeros((0, 4), np.float32), (), ()
+        self._put((image.copy(), boxes, class_ids, confidences))
+        self.written += 1
+
+    def _put(self, item):
+        """Queue an item, failing instead of blocking forever if the writer died."""
+        while True:
+            try:
+                self.queue.put(item, timeout=1.0)
+                return
+            except Full:
+                if not self.process.is_alive():
+                    raise RuntimeError("Annotated video writer process exited")
+
+    def close(self):
+        """Flush queued frames and wait for the writer process."""
+        if self.process.is_alive():
+            self._put(None)
+        self.process.join()
+        if self.process.exitcode != 0:
+            raise RuntimeError(f"Annotated video writer failed (exit code {self.process.exitcode})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,604 @@
+"""
+Multi-node batch processing through a work queue on shared storage.
+Each video is a task file that moves between the pending/, leased/, done/
+and failed/ directories of a queue directory (e.g. on an NFS mount). A
+worker claims a task by renaming it into claiming/ under its own name, which
+exactly one worker can do, records the attempt there and publishes the
+lease by renaming it into leased/. It keeps the lease alive by touching the file
+from a heartbeat thread. Leases not touched for lease_sec (dead or cut-off
+nodes) are moved back to pending/ by any worker or by the status command.
+Ages are measured against the storage server's clock, not the nodes'.
+
+Processing is at-least-once: a requeued video may have been partly
+processed, and resumes from its frame checkpoint when checkpoint_every is
+set. Each video writes to its own output directory, each attempt to its
+own files there, moved to the video's output path once the attempt has
+completed the task.
+
+Usage:
+    python -m src.inference.work_queue submit --queue /mnt/q --input videos/ --output out/ --model best.pt
+    python -m src.inference.work_queue work --queue /mnt/q      (on every node)
+    python -m src.inference.work_queue status --queue /mnt/q
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+import uuid
+from collections import namedtuple
+from pathlib import Path
+import torch
+from src.inference.detect_video import VideoDetector
+
+
+STATES = ('pending', 'leased', 'done', 'failed')
+
+DEFAULT_LEASE_SEC = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+Lease = namedtuple('Lease', ['task_id', 'worker_id', 'path', 'task'])
+
+
+def _write_json(path, data):
+    """Write JSON atomically and durably (readers on other nodes never see a partial file)."""
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    """Read a JSON file (None if it was moved away or is being replaced)."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def attempt_output_path(output_path, worker_id):
+    """Output path of one worker's attempt at a task (moved to output_path once the task is done)."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.{worker_id}.tmp{output_path.suffix}")
+
+
+def _output_files(output_path):
+    """Detections file, stream and checkpoint written for an output path."""
+    output_path = Path(output_path)
+    return [output_path, VideoDetector.stream_path(output_path), VideoDetector.checkpoint_path(output_path)]
+
+
+def default_worker_id():
+    """Worker name unique across nodes: host name and process id."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """Task files in a shared directory, claimed with atomic renames."""
+
+    def __init__(self, queue_dir, lease_sec=DEFAULT_LEASE_SEC, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Open (or create) a queue.
+
+        Args:
+            queue_dir: Queue directory on storage shared by all nodes
+            lease_sec: A lease without heartbeat for this long is requeued
+            max_attempts: Claims of a task before it is failed (a video that
+                          keeps killing its worker is not retried forever)
+        """
+        self.queue_dir = Path(queue_dir)
+        self.lease_sec = lease_sec
+        self.max_attempts = max_attempts
+        # claiming/ holds tasks between their claim and the publication of the lease
+        for state in STATES + ('claiming', 'workers'):
+            (self.queue_dir / state).mkdir(parents=True, exist_ok=True)
+        self._clock = self.queue_dir / 'clock'
+        self._clock.touch()
+
+    def now(self):
+        """Current time of the storage server (file times are set by it)."""
+        os.utime(self._clock)
+        return self._clock.stat().st_mtime
+
+    def _path(self, state, task_id, worker_id=None):
+        name = f"{task_id}@{worker_id}.json" if worker_id else f"{task_id}.json"
+        return self.queue_dir / state / name
+
+    def _task_ids(self, state):
+        return sorted(path.name[:-len('.json')].rsplit('@', 1)[0]
+                      for path in (self.queue_dir / state).glob('*.json'))
+
+    def submit(self, video_files, output_dir, model_path, conf_threshold=0.25, gps_dir=None, options=None):
+        """
+        Add videos to the queue.
+
+        Videos already in the queue (by file name, in any state) are not
+        added again.
+
+        Args:
+            video_files: Video paths (visible at the same path on every node)
+            output_dir: Output directory; each video gets <output_dir>/<stem>/
+            model_path: Model weights used by the workers
+            conf_threshold: Confidence threshold
+            gps_dir: Directory with <stem>.csv GPS files (optional)
+            options: Extra process_video options (track, stream, checkpoint_every...)
+
+        Returns:
+            Number of tasks added
+        """
+        queued = {task_id for state in STATES + ('claiming',) for task_id in self._task_ids(state)}
+        added = 0
+        for video_path in video_files:
+            video_path = Path(video_path).resolve()
+            task_id = video_path.name
+            if task_id in queued:
+                continue
+
+            gps_file = None
+            if gps_dir and (Path(gps_dir) / f"{video_path.stem}.csv").exists():
+                gps_file = str((Path(gps_dir) / f"{video_path.stem}.csv").resolve())
+
+            _write_json(self._path('pending', task_id), {
+                'video': str(video_path),
+                'gps_file': gps_file,
+                'output_path': str(Path(output_dir).resolve() / video_path.stem / f"{video_path.stem}_detections.geojson"),
+                'model_path': str(model_path),
+                'conf_threshold': conf_threshold,
+                'options': options or {},
+                'attempts': 0
+            })
+            queued.add(task_id)
+            added += 1
+        return added
+
+    def claim(self, worker_id):
+        """
+        Claim the next pending task.
+
+        Returns:
+            Lease, or None if no task is pending
+        """
+        for task_id in self._task_ids('pending'):
+            pending_path = self._path('pending', task_id)
+            claim_path = self._path('claiming', task_id, worker_id)
+            lease_path = self._path('leased', task_id, worker_id)
+            try:
+                # Renaming keeps the mtime: refresh it first so the claim starts fresh
+                os.utime(pending_path)
+                os.rename(pending_path, claim_path)
+            except FileNotFoundError:
+                # Claimed by another worker
+                continue
+
+            # The claim is private to this worker until it is renamed into
+            # leased/, so the update cannot resurrect a requeued lease
+            task = _read_json(claim_path)
+            if task is None:
+                continue
+            task['previous_worker'] = task.get('worker')
+            task['attempts'] = task.get('attempts', 0) + 1
+            task['worker'] = worker_id
+            _write_json(claim_path, task)
+            try:
+                os.rename(claim_path, lease_path)
+            except FileNotFoundError:
+                # Stalled past lease_sec and requeued
+                continue
+            lease = Lease(task_id, worker_id, lease_path, task)
+
+            if task['attempts'] > self.max_attempts:
+                self.fail(lease, f"Lease lost {task['attempts'] - 1} times (worker crashes?)")
+                continue
+            return lease
+        return None
+
+    def heartbeat(self, lease):
+        """
+        Renew a lease.
+
+        Returns:
+            False if the lease expired and was taken away
+        """
+        try:
+            os.utime(lease.path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _finish(self, lease, state, record):
+        """Move a held lease to done/ or failed/ (False if it was lost)."""
+        final_path = self._path(state, lease.task_id)
+        try:
+            os.rename(lease.path, final_path)
+        except FileNotFoundError:
+            return False
+        _write_json(final_path, dict(lease.task, **record))
+        return True
+
+    def complete(self, lease, stats):
+        """Mark a leased task done with its run stats (False if the lease was lost)."""
+        return self._finish(lease, 'done', {'stats': stats, 'finished_at': self.now()})
+
+    def fail(self, lease, error):
+        """Mark a leased task failed (False if the lease was lost)."""
+        return self._finish(lease, 'failed', {'error': error, 'finished_at': self.now()})
+
+    def requeue_expired(self):
+        """
+        Move leases without a heartbeat for lease_sec back to pending.
+
+        Returns:
+            Task ids requeued
+        """
+        now = self.now()
+        requeued = []
+        # Claims of workers that died before publishing their lease expire too
+        lease_paths = list((self.queue_dir / 'leased').glob('*.json'))
+        lease_paths += (self.queue_dir / 'claiming').glob('*.json')
+        for lease_path in lease_paths:
+            try:
+                if now - lease_path.stat().st_mtime <= self.lease_sec:
+                    continue
+                task_id = lease_path.name[:-len('.json')].rsplit('@', 1)[0]
+                os.rename(lease_path, self._path('pending', task_id))
+            except FileNotFoundError:
+                # Finished or requeued meanwhile
+                continue
+            requeued.append(task_id)
+        return requeued
+
+    def requeue_failed(self):
+        """Move failed tasks back to pending with a fresh attempt count."""
+        requeued = []
+        for task_id in self._task_ids('failed'):
+            failed_path = self._path('failed', task_id)
+            task = _read_json(failed_path)
+            if task is None:
+                # Being replaced or requeued by another process
+                continue
+            task.pop('error', None)
+            task['attempts'] = 0
+            _write_json(failed_path, task)
+            try:
+                os.rename(failed_path, self._path('pending', task_id))
+            except FileNotFoundError:
+                continue
+            requeued.append(task_id)
+        return requeued
+
+    def update_worker(self, worker_id, record):
+        """Publish a worker's state (shown by status)."""
+        _write_json(self.queue_dir / 'workers' / f"{worker_id}.json", dict(record, worker=worker_id))
+
+    def is_drained(self):
+        """Whether no task is pending or leased."""
+        return not any(self._task_ids(state) for state in ('pending', 'claiming', 'leased'))
+
+    def status(self):
+        """
+        Progress of the queue.
+
+        Returns:
+            Dict with task counts per state, leases (task, worker, age) and
+            workers (last published state and heartbeat age)
+        """
+        now = self.now()
+        leases = []
+        for lease_path in sorted((self.queue_dir / 'leased').glob('*.json')):
+            task_id, worker_id = lease_path.name[:-len('.json')].rsplit('@', 1)
+            try:
+                age = now - lease_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            leases.append({'task': task_id, 'worker': worker_id, 'heartbeat_age_sec': round(age, 1),
+                           'expired': age > self.lease_sec})
+
+        workers = []
+        for worker_path in sorted((self.queue_dir / 'workers').glob('*.json')):
+            record = _read_json(worker_path)
+            if record is None:
+                continue
+            try:
+                record['heartbeat_age_sec'] = round(now - worker_path.stat().st_mtime, 1)
+            except FileNotFoundError:
+                continue
+            workers.append(record)
+
+        return {
+            'counts': {state: len(self._task_ids(state)) for state in STATES},
+            'leases': leases,
+            'workers': workers
+        }
+
+    def results(self):
+        """Records of finished tasks, in the format of batch_summary.json results."""
+        results = []
+        for state in ('done', 'failed'):
+            for task_id in self._task_ids(state):
+                task = _read_json(self._path(state, task_id))
+                if task is None:
+                    continue
+                if state == 'done':
+                    stats = task.get('stats') or {}
+                    results.append({'video': task_id, 'status': 'success', 'detections': stats.get('detections'),
+                                    'output_path': task['output_path'], 'worker': task.get('worker'),
+                                    'stats': stats})
+                else:
+                    results.append({'video': task_id, 'status': 'failed', 'error': task.get('error'),
+                                    'worker': task.get('worker')})
+        return results
+
+
+class QueueWorker:
+    """Process tasks of a WorkQueue until it is drained."""
+
+    def __init__(self, queue, worker_id=None, heartbeat_sec=None, poll_sec=5.0, process=None):
+        """
+        Initialize worker.
+
+        Args:
+            queue: WorkQueue
+            worker_id: Unique worker name (default: host name and pid)
+            heartbeat_sec: Lease renewal interval (default: a quarter of the lease)
+            poll_sec: Wait between checks while other workers hold the last leases
+            process: Callable(task) -> run stats (default: run VideoDetector)
+        """
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.heartbeat_sec = heartbeat_sec or queue.lease_sec / 4
+        self.poll_sec = poll_sec
+        self.process = process or self._process_video
+        self.stats = {'done': 0, 'failed': 0, 'lost': 0}
+        self._lease = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._detector = None
+
+    def run(self):
+        """
+        Claim and process tasks until none is pending or leased.
+
+        Returns:
+            Counts of tasks done, failed and lost (lease expired meanwhile)
+        """
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        try:
+            while True:
+                requeued = self.queue.requeue_expired()
+                if requeued:
+                    print(f"♻️ Requeued expired leases: {', '.join(requeued)}")
+
+                lease = self.queue.claim(self.worker_id)
+                if lease is None:
+                    if self.queue.is_drained():
+                        break
+                    # Other workers hold the last leases; one may still expire
+                    time.sleep(self.poll_sec)
+                    continue
+
+                with self._lock:
+                    self._lease = lease
+                self._publish()
+                self._run_task(lease)
+                with self._lock:
+                    self._lease = None
+                self._publish()
+        finally:
+            self._stop.set()
+            heartbeat.join()
+            self._publish(stopped=True)
+        return self.stats
+
+    def _run_task(self, lease):
+        """
+        Process one claimed task and record its outcome.
+
+        The task is processed into outputs of this attempt only, moved to
+        the task's output path once the task is marked done: a worker whose
+        lease expired meanwhile never touches the output of the new holder.
+        """
+        print(f"🎬 {self.worker_id}: {lease.task_id} (attempt {lease.task['attempts']})")
+        output_path = Path(lease.task['output_path'])
+        attempt_path = attempt_output_path(output_path, self.worker_id)
+        previous = lease.task.get('previous_worker')
+        task = dict(lease.task, output_path=str(attempt_path),
+                    resume_from=str(attempt_output_path(output_path, previous)) if previous else None)
+        try:
+            stats = self.process(task)
+        except Exception as e:
+            traceback.print_exc()
+            # Outputs are kept: a retry resumes from their checkpoint
+            finished = self.queue.fail(lease, str(e))
+            outcome = 'failed'
+        else:
+            finished = self.queue.complete(lease, stats)
+            if finished:
+                self._publish_output(task, output_path)
+            outcome = 'done'
+
+        if not finished:
+            print(f"⚠️ Lease of {lease.task_id} expired while processing, result left to the new holder")
+            for path in _output_files(attempt_path):
+                path.unlink(missing_ok=True)
+            outcome = 'lost'
+        self.stats[outcome] += 1
+
+    @staticmethod
+    def _publish_output(task, output_path):
+        """Move the outputs of a completed attempt to the task's output path."""
+        attempt_files = _output_files(task['output_path'])
+        # Detections and stream (the checkpoint is cleared when processing ends)
+        for attempt_file, final_file in list(zip(attempt_files, _output_files(output_path)))[:2]:
+            if attempt_file.exists():
+                os.replace(attempt_file, final_file)
+        # Leftovers of an earlier attempt whose worker died
+        if task['resume_from'] and Path(task['resume_from']) != attempt_files[0]:
+            for path in _output_files(task['resume_from']):
+                path.unlink(missing_ok=True)
+
+    def _heartbeat_loop(self):
+        """Renew the current lease and publish this worker's state periodically."""
+        while not self._stop.wait(self.heartbeat_sec):
+            with self._lock:
+                lease = self._lease
+            if lease is not None and not self.queue.heartbeat(lease):
+                print(f"⚠️ Lost the lease of {lease.task_id}")
+            self._publish()
+
+    def _publish(self, stopped=False):
+        with self._lock:
+            task = self._lease.task_id if self._lease else None
+        self.queue.update_worker(self.worker_id, {
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'task': task,
+            'stopped': stopped,
+            **self.stats
+        })
+
+    def _process_video(self, task):
+        """Run the detector on a task's video (the model is loaded once per worker)."""
+        key = (task['model_path'], task['conf_threshold'])
+        if self._detector is None or self._detector[0] != key:
+            self._detector = (key, VideoDetector(model_path=task['model_path'],
+                                                 conf_threshold=task['conf_threshold']))
+        detector = self._detector[1]
+
+        output_path = Path(task['output_path'])
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if task.get('resume_from') and task['options'].get('checkpoint_every'):
+            self._adopt_checkpoint(Path(task['resume_from']), output_path)
+        detector.set_gps(task['gps_file'])
+        detector.process_video(video_path=task['video'], output_path=str(output_path), **task['options'])
+        return detector.last_run_stats
+
+
+    @staticmethod
+    def _adopt_checkpoint(previous_path, output_path):
+        """
+        Copy the checkpoint and stream of an earlier attempt, to resume from them.
+
+        The checkpoint is copied first: the stream copied after it is at
+        least as long as the checkpoint's stream offset, and the rest is
+        truncated on resume.
+        """
+        checkpoint_path = VideoDetector.checkpoint_path(output_path)
+        if previous_path == output_path or checkpoint_path.exists():
+            return
+        try:
+            shutil.copyfile(VideoDetector.checkpoint_path(previous_path), checkpoint_path)
+            shutil.copyfile(VideoDetector.stream_path(previous_path), VideoDetector.stream_path(output_path))
+        except FileNotFoundError:
+            checkpoint_path.unlink(missing_ok=True)
+
+
+def print_status(queue):
+    """Print the progress of a queue across nodes."""
+    status = queue.status()
+    counts = status['counts']
+    total = sum(counts.values())
+    finished = counts['done'] + counts['failed']
+    print(f"📋 {queue.queue_dir}: {total} videos, {counts['done']} done, {counts['leased']} running, "
+          f"{counts['pending']} pending, {counts['failed']} failed "
+          f"({finished / total if total else 0:.0%} finished)")
+
+    leases = {lease['worker']: lease for lease in status['leases']}
+    for worker in status['workers']:
+        lease = leases.get(worker['worker'])
+        if lease:
+            state = f"{lease['task']} (lease renewed {lease['heartbeat_age_sec']:.0f} s ago)"
+            if lease['expired']:
+                state += ' EXPIRED'
+        elif worker['stopped']:
+            state = 'stopped'
+        else:
+            state = 'idle'
+        print(f"🖥️ {worker['worker']}: {state}, {worker['done']} done, {worker['failed']} failed, "
+              f"last seen {worker['heartbeat_age_sec']:.0f} s ago")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed batch processing through a shared work queue')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    submit = subparsers.add_parser('submit', help='Queue the videos of a directory')
+    submit.add_argument('--queue', type=str, required=True, help='Queue directory on shared storage')
+    submit.add_argument('--input', type=str, required=True, help='Input directory with videos')
+    submit.add_argument('--output', type=str, required=True, help='Output directory')
+    submit.add_argument('--model', type=str, required=True, help='Path to trained model')
+    submit.add_argument('--gps-dir', type=str, default=None, help='Directory with GPS files')
+    submit.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
+    submit.add_argument('--track', action='store_true',
+                        help='Emit one detection per tracked defect instead of per frame')
+    submit.add_argument('--stream', action='store_true',
+                        help='Stream detections to disk while each video is processed')
+    submit.add_argument('--checkpoint-every', type=int, default=None,
+                        help='Checkpoint every N frames, so requeued videos resume')
+
+    work = subparsers.add_parser('work', help='Process queued videos until the queue is drained')
+    work.add_argument('--queue', type=str, required=True, help='Queue directory on shared storage')
+    work.add_argument('--lease-sec', type=float, default=DEFAULT_LEASE_SEC,
+                      help='Requeue leases without heartbeat for this long')
+    work.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                      help='Fail videos whose lease was lost this many times')
+    work.add_argument('--torch-threads', type=int, default=None, help='Torch threads of this worker')
+
+    status = subparsers.add_parser('status', help='Show progress across nodes and requeue expired leases')
+    status.add_argument('--queue', type=str, required=True, help='Queue directory on shared storage')
+    status.add_argument('--lease-sec', type=float, default=DEFAULT_LEASE_SEC,
+                        help='Requeue leases without heartbeat for this long')
+    status.add_argument('--requeue-failed', action='store_true', help='Retry failed videos')
+    status.add_argument('--summary', type=str, default=None,
+                        help='Write a batch_summary.json of finished videos to this path')
+
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        queue = WorkQueue(args.queue)
+        video_files = sorted(path for path in Path(args.input).iterdir() if path.suffix in VIDEO_EXTENSIONS)
+        options = {'track': args.track, 'stream': args.stream, 'checkpoint_every': args.checkpoint_every}
+        added = queue.submit(video_files, args.output, args.model, conf_threshold=args.conf,
+                             gps_dir=args.gps_dir, options=options)
+        print(f"✅ Queued {added} videos ({len(video_files) - added} already in the queue)")
+
+    elif args.command == 'work':
+        if args.torch_threads:
+            torch.set_num_threads(args.torch_threads)
+        queue = WorkQueue(args.queue, lease_sec=args.lease_sec, max_attempts=args.max_attempts)
+        stats = QueueWorker(queue).run()
+        print(f"✅ Queue drained: {stats['done']} done, {stats['failed']} failed, {stats['lost']} lost leases")
+
+    else:
+        queue = WorkQueue(args.queue, lease_sec=args.lease_sec)
+        requeued = queue.requeue_expired()
+        if requeued:
+            print(f"♻️ Requeued expired leases: {', '.join(requeued)}")
+        if args.requeue_failed:
+            print(f"♻️ Requeued {len(queue.requeue_failed())} failed videos")
+        print_status(queue)
+
+        if args.summary:
+            results = queue.results()
+            with open(args.summary, 'w') as f:
+                json.dump({
+                    'total_videos': sum(queue.status()['counts'].values()),
+                    'successful': sum(1 for r in results if r['status'] == 'success'),
+                    'failed': sum(1 for r in results if r['status'] == 'failed'),
+                    'results': results
+                }, f, indent=2)
+            print(f"Summary saved to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,11 @@ Pytest configuration and fixtures.
 """
 
 import pytest
+import os
 import sys
+from datetime import datetime, timedelta
 from pathlib import Path
+import numpy as np
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -54,3 +57,111 @@ def sample_video():
     yield video_path
     
     Path(video_path).unlink(missing_ok=True)
+
+
+@pytest.fixture
+def survey(tmp_path):
+    """Video of a square moving down the frame, with a matching GPS track."""
+    import cv2
+    
+    video_path = tmp_path / 'survey.mp4'
+    out = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*'mp4v'), 10.0, (160, 120))
+    for frame in range(120):
+        image = np.zeros((120, 160, 3), dtype=np.uint8)
+        image[:, :, 2] = 40 + frame
+        # The square stops between frames 70 and 100
+        y = (min(frame, 70) + max(frame - 100, 0)) * 3 % 90
+        image[y:y + 20, 60:80, 1] = 255
+        out.write(image)
+    out.release()
+
+    gps_path = tmp_path / 'survey.csv'
+    start = datetime(2026, 1, 9, 10, 30)
+    with open(gps_path, 'w') as f:
+        f.write('timestamp,latitude,longitude,altitude,speed\n')
+        for i in range(14):
+            f.write(f'{(start + timedelta(seconds=i)).isoformat()},'
+                    f'{48.8566 + i * 0.0001},2.3522,100.0,{0.0 if 4 <= i < 6 else 30.0}\n')
+
+    return video_path, gps_path, start
+
+
+class _Array:
+    """Minimal stand-in for a torch tensor."""
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def __getitem__(self, index):
+        return _Array(self.values[index])
+
+    def __float__(self):
+        return float(self.values)
+
+    def __int__(self):
+        return int(self.values)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class _Boxes:
+    """Minimal stand-in for ultralytics Boxes: (N, ...) arrays, iterating yields single boxes."""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = _Array(np.reshape(np.asarray(xyxy, dtype=np.float32), (-1, 4)))
+        self.conf = _Array(conf)
+        self.cls = _Array(cls)
+
+    def __len__(self):
+        return len(self.conf.values)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield _Boxes(self.xyxy.values[i:i + 1], self.conf.values[i:i + 1], self.cls.values[i:i + 1])
+
+
+class _Result:
+    def __init__(self, boxes, image):
+        self.boxes = boxes
+        self.image = image
+
+    def plot(self):
+        return self.image
+
+
+class FakeYOLO:
+    """Deterministic model boxing the bright square drawn in the test video."""
+
+    # Exit the process after this many predict calls (None to never crash)
+    crash_after = None
+
+    def __init__(self, model_path):
+        self.calls = 0
+
+    def predict(self, source, **kwargs):
+        self.calls += 1
+        if self.crash_after is not None and self.calls > self.crash_after:
+            os._exit(1)
+
+        results = []
+        for image in source:
+            ys, xs = np.nonzero(image[:, :, 1] > 200)
+            boxes = _Boxes(np.zeros((0, 4)), [], [])
+            if len(xs):
+                conf = round(float(image[:, :, 2].mean()) / 255.0, 4)
+                boxes = _Boxes([xs.min(), ys.min(), xs.max(), ys.max()], [conf], [0])
+            results.append(_Result(boxes, image))
+        return results
+
+
+@pytest.fixture
+def fake_yolo(monkeypatch):
+    """Replace the YOLO model used by VideoDetector with FakeYOLO."""
+    import src.inference.detect_video as detect_video
+    monkeypatch.setattr(detect_video, 'YOLO', FakeYOLO)
+    FakeYOLO.crash_after = None
+    return FakeYOLO
@@ -8,7 +8,12 @@ from pathlib import Path
 import tempfile
 import numpy as np
 import cv2
+from src.api import main as api_main
 from src.api.main import app
+from src.inference.geojson_writer import GeoJSONSeqWriter
+from src.inference.spatial_index import DetectionIndex
+from src.inference.road_segments import RoadNetwork, SegmentStore
+from src.inference.detection_store import DetectionStore
 
 
 client = TestClient(app)
@@ -75,6 +80,107 @@ class TestAPIEndpoints:
         assert "total" in data
 
 
+class TestDetectionQueries:
+    """Test spatial detection queries."""
+    
+    @pytest.fixture
+    def index(self, tmp_path, monkeypatch):
+        """Index over a results directory with one detection stream."""
+        with GeoJSONSeqWriter(tmp_path / 'survey_detections.geojsons') as writer:
+            for i in range(5):
+                writer.write({
+                    'frame_number': i,
+                    'class_id': 0,
+                    'class_name': 'pothole',
+                    'confidence': 0.8,
+                    'latitude': 48.85 + i * 0.001,
+                    'longitude': 2.35
+                })
+        monkeypatch.setattr(api_main, 'detection_index', DetectionIndex(tmp_path))
+    
+    def test_near(self, index):
+        """Test radius query returns nearest detections first."""
+        response = client.get("/detections/near", params={"lat": 48.8501, "lon": 2.35, "radius": 150})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["type"] == "FeatureCollection"
+        assert data["total"] == 2
+        assert [f["properties"]["frame_number"] for f in data["features"]] == [0, 1]
+    
+    def test_bbox(self, index):
+        """Test bounding box query and parameter validation."""
+        response = client.get("/detections/bbox", params={
+            "min_lat": 48.8505, "min_lon": 2.34, "max_lat": 48.86, "max_lon": 2.36, "limit": 2
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 4
+        assert data["returned"] == 2
+        
+        response = client.get("/detections/bbox", params={
+            "min_lat": 48.9, "min_lon": 2.34, "max_lat": 48.8, "max_lon": 2.36
+        })
+        assert response.status_code == 400
+        
+        response = client.get("/detections/near", params={"lat": 95, "lon": 2.35})
+        assert response.status_code == 422
+
+
+class TestSegmentQueries:
+    """Test road segment aggregate lookups."""
+    
+    def test_segments(self, tmp_path, monkeypatch):
+        """Test segment lookup, ranking and missing database."""
+        monkeypatch.setattr(api_main, 'SEGMENTS_DB', tmp_path / 'segments.db')
+        response = client.get("/segments")
+        assert response.status_code == 404
+        
+        network = RoadNetwork([('way/1', 'Main', 'primary', [(48.85, 2.35), (48.85, 2.36)])])
+        with GeoJSONSeqWriter(tmp_path / 'survey.geojsons') as writer:
+            writer.write({'frame_number': 0, 'class_id': 0, 'class_name': 'pothole',
+                          'confidence': 0.8, 'latitude': 48.85001, 'longitude': 2.355})
+        with SegmentStore(tmp_path / 'segments.db') as store:
+            store.set_network(network)
+            store.ingest([tmp_path / 'survey.geojsons'], network)
+        
+        response = client.get("/segments/way/1")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["name"] == "Main"
+        assert data["classes"]["pothole"]["count"] == 1
+        
+        response = client.get("/segments", params={"order_by": "count"})
+        assert [s["segment_id"] for s in response.json()["segments"]] == ["way/1"]
+        
+        assert client.get("/segments/way/2").status_code == 404
+        assert client.get("/segments", params={"min_lat": 48.8}).status_code == 400
+
+
+
+class TestDetectionStoreQueries:
+    """Test merged batch store queries."""
+    
+    def test_store(self, tmp_path, monkeypatch):
+        """Test box and tile queries and missing store."""
+        monkeypatch.setattr(api_main, 'DETECTIONS_DB', tmp_path / 'detections.db')
+        params = {"min_lat": 48.8, "min_lon": 2.3, "max_lat": 48.9, "max_lon": 2.4}
+        assert client.get("/store/detections", params=params).status_code == 404
+        
+        with GeoJSONSeqWriter(tmp_path / 'run_detections.geojsons') as writer:
+            writer.write({'frame_number': 0, 'class_id': 0, 'class_name': 'pothole',
+                          'confidence': 0.8, 'latitude': 48.85, 'longitude': 2.35})
+        with DetectionStore(tmp_path / 'detections.db') as store:
+            store.ingest_video('run', tmp_path / 'run_detections.geojsons')
+        
+        data = client.get("/store/detections", params=params).json()
+        assert data["total"] == 1
+        assert data["features"][0]["properties"]["source"] == "run"
+        
+        data = client.get("/store/tiles/10", params=params).json()
+        assert data["tiles"][0]["count"] == 1
+        assert client.get("/store/tiles/12").status_code == 400
+        assert client.get("/store/tiles/10", params={"min_lat": 48.8}).status_code == 400
+
 class TestAPICORS:
     """Test CORS configuration."""
     
@@ -0,0 +1,211 @@
+"""
+Unit tests for batch processing.
+"""
+
+import pytest
+import json
+from pathlib import Path
+from src.inference import batch_process
+from src.inference.batch_process import BatchProcessor
+from src.inference.detection_store import DetectionStore
+from src.inference.scheduling import VideoInfo
+
+
+class FakeDetector:
+    """Stands in for VideoDetector: counts model loads and videos."""
+
+    loads = 0
+    processed = []
+
+    def __init__(self, model_path, conf_threshold=0.25, **kwargs):
+        FakeDetector.loads += 1
+        self.gps_file = None
+        self.last_run_stats = None
+
+    def set_gps(self, gps_file=None, gps_format='csv', gps_cache=None, gps_timestamp_format=None):
+        self.gps_file = gps_file
+
+    def process_video(self, video_path, output_path=None, frame_range=None, **options):
+        FakeDetector.processed.append(Path(video_path).name)
+        # One feature at the first processed frame
+        first_frame = frame_range[0] if frame_range else 0
+        Path(output_path).write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [2.35, 48.85]},
+             'properties': {'class': 'pothole', 'first_frame': first_frame}}
+        ]}))
+        self.last_run_stats = {'video': Path(video_path).name, 'detections': 1,
+                               'inferred_frames': 10, 'gps_file': self.gps_file}
+
+
+@pytest.fixture
+def videos(tmp_path, monkeypatch):
+    """Input directory with six empty videos and GPS files for half of them."""
+    monkeypatch.setattr(batch_process, 'VideoDetector', FakeDetector)
+    FakeDetector.loads = 0
+    FakeDetector.processed = []
+    (tmp_path / 'videos').mkdir()
+    (tmp_path / 'gps').mkdir()
+    for i in range(6):
+        (tmp_path / 'videos' / f'run{i}.mp4').touch()
+        if i % 2 == 0:
+            (tmp_path / 'gps' / f'run{i}.csv').touch()
+    return tmp_path
+
+
+class TestBatchProcessor:
+    """Test worker setup and per-video GPS files."""
+
+    def test_model_loaded_once_per_worker(self, videos):
+        """Test thread workers reuse their detector across videos."""
+        processor = BatchProcessor('model.pt', max_workers=2)
+        results = processor.process_directory(videos / 'videos', videos / 'out', gps_dir=videos / 'gps')
+
+        assert len(results) == 6
+        assert all(r['status'] == 'success' for r in results)
+        assert 1 <= FakeDetector.loads <= 2
+
+        # A reused detector still gets each video's own GPS file (or none)
+        for result in results:
+            index = int(result['video'][3])
+            expected = str(videos / 'gps' / f'run{index}.csv') if index % 2 == 0 else None
+            assert result['stats']['gps_file'] == expected
+
+    def test_executor_validation(self):
+        """Test unknown executors and torch thread defaults."""
+        with pytest.raises(ValueError):
+            BatchProcessor('model.pt', executor='cluster')
+
+        processor = BatchProcessor('model.pt', max_workers=4, executor='process', torch_threads=3)
+        assert processor.torch_threads == 3
+
+
+class TestScheduling:
+    """Test longest-first order, segments and the makespan report."""
+
+    @pytest.fixture
+    def probed(self, videos, monkeypatch):
+        """Probe run0.mp4 as a 100 s video and the others as 10 s videos."""
+        def probe(video_path):
+            return VideoInfo(3000 if video_path.name == 'run0.mp4' else 300, 30.0, 1280, 720)
+        monkeypatch.setattr(batch_process, 'probe_video', probe)
+        return videos
+
+    def test_split_video_merged(self, probed):
+        """Test segments of a long video are merged into one output in frame order."""
+        processor = BatchProcessor('model.pt', max_workers=2, max_segment_sec=30)
+        results = processor.process_directory(probed / 'videos', probed / 'out')
+
+        assert len(results) == 6
+        split = next(r for r in results if r['video'] == 'run0.mp4')
+        assert split['stats']['segments'] == 4
+        assert split['detections'] == 4
+        assert split['stats']['inferred_frames'] == 40
+
+        with open(probed / 'out' / 'run0_detections.geojson') as f:
+            merged = json.load(f)
+        assert [f['properties']['first_frame'] for f in merged['features']] == [0, 750, 1500, 2250]
+        assert not list((probed / 'out').glob('*_part*'))
+
+        with open(probed / 'out' / 'batch_schedule.json') as f:
+            report = json.load(f)
+        assert report['tasks'] == 9
+        assert report['split_videos'] == 1
+        assert all(task['actual_sec'] is not None for task in report['task_times'])
+        # Longest first: the four 25 s segments precede the 10 s videos
+        assert [task['video'] for task in report['task_times'][:4]] == ['run0.mp4'] * 4
+
+    def test_failed_segment(self, probed, monkeypatch):
+        """Test a failed segment fails its video and removes the other segment outputs."""
+        process_video = FakeDetector.process_video
+
+        def fail_third(self, video_path, output_path=None, frame_range=None, **options):
+            if frame_range and frame_range[0] == 1500:
+                raise RuntimeError('corrupt segment')
+            process_video(self, video_path, output_path, frame_range, **options)
+
+        monkeypatch.setattr(FakeDetector, 'process_video', fail_third)
+        processor = BatchProcessor('model.pt', max_workers=2, max_segment_sec=30)
+        results = processor.process_directory(probed / 'videos', probed / 'out')
+
+        assert [r for r in results if r['status'] == 'failed'] == [
+            {'video': 'run0.mp4', 'status': 'failed', 'error': 'corrupt segment'}
+        ]
+        assert FakeDetector.processed.count('run0.mp4') == 3
+        assert not (probed / 'out' / 'run0_detections.geojson').exists()
+        assert not list((probed / 'out').glob('*_part*'))
+
+    def test_no_split_when_tracking(self, probed):
+        """Test tracked videos are not split (tracks would break at segment boundaries)."""
+        processor = BatchProcessor('model.pt', max_workers=2, max_segment_sec=30, track=True)
+        processor.process_directory(probed / 'videos', probed / 'out')
+
+        with open(probed / 'out' / 'batch_schedule.json') as f:
+            report = json.load(f)
+        assert report['tasks'] == 6
+        assert report['split_videos'] == 0
+
+    def test_merged_store(self, probed):
+        """Test the merged store is updated with the merged output of split videos."""
+        BatchProcessor('model.pt', max_workers=2, max_segment_sec=30).process_directory(
+            probed / 'videos', probed / 'out'
+        )
+
+        with DetectionStore(probed / 'out' / 'detections.db') as store:
+            counts = {video['video']: video['detections'] for video in store.videos()}
+            assert counts == {'run0': 4, 'run1': 1, 'run2': 1, 'run3': 1, 'run4': 1, 'run5': 1}
+            assert store.tiles(10)[0]['count'] == 9
+
+    def test_invalid_schedule(self):
+        """Test unknown schedules are rejected."""
+        with pytest.raises(ValueError):
+            BatchProcessor('model.pt', schedule='random')
+
+
+class TestIncrementalRuns:
+    """Test the manifest skips videos whose outputs are current."""
+
+    def run(self, videos, model_path='model.pt', **kwargs):
+        FakeDetector.processed = []
+        processor = BatchProcessor(model_path, max_workers=2, **kwargs)
+        results = processor.process_directory(videos / 'videos', videos / 'out', gps_dir=videos / 'gps')
+        return results, sorted(FakeDetector.processed)
+
+    def test_unchanged_skipped(self, videos):
+        """Test a second run only processes new and changed videos."""
+        _, processed = self.run(videos)
+        assert len(processed) == 6
+
+        results, processed = self.run(videos)
+        assert processed == []
+        assert all(r['status'] == 'skipped' and r['detections'] == 1 for r in results)
+        with open(videos / 'out' / 'batch_summary.json') as f:
+            assert json.load(f)['skipped'] == 6
+
+        # The merged store holds each video once
+        with DetectionStore(videos / 'out' / 'detections.db') as store:
+            assert len(store.videos()) == 6
+            assert len(store) == 6
+
+        (videos / 'videos' / 'run1.mp4').write_bytes(b'new content')
+        (videos / 'videos' / 'run6.mp4').touch()
+        (videos / 'gps' / 'run2.csv').write_text('timestamp,latitude,longitude\n')
+        (videos / 'out' / 'run3_detections.geojson').unlink()
+        _, processed = self.run(videos)
+        assert processed == ['run1.mp4', 'run2.mp4', 'run3.mp4', 'run6.mp4']
+
+    def test_config_and_force(self, videos):
+        """Test a config change or force reprocesses everything."""
+        self.run(videos)
+        assert len(self.run(videos, conf_threshold=0.5)[1]) == 6
+        assert self.run(videos, conf_threshold=0.5)[1] == []
+        assert len(self.run(videos, conf_threshold=0.5, force=True)[1]) == 6
+
+    def test_model_change(self, videos, tmp_path):
+        """Test new model weights reprocess everything."""
+        model_path = tmp_path / 'model.pt'
+        model_path.write_bytes(b'weights v1')
+        self.run(videos, model_path=model_path)
+        assert self.run(videos, model_path=model_path)[1] == []
+
+        model_path.write_bytes(b'weights v2')
+        assert len(self.run(videos, model_path=model_path)[1]) == 6
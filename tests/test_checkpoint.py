@@ -0,0 +1,75 @@
+"""
+Unit tests for checkpointed video processing.
+"""
+
+import pytest
+import json
+import multiprocessing
+import src.inference.detect_video as detect_video
+from src.inference.checkpoint import Checkpoint
+from src.inference.detect_video import VideoDetector
+
+
+def _run(video_path, gps_path, start, output_path, crash_after=None, **options):
+    detect_video.YOLO.crash_after = crash_after
+    detector = VideoDetector('fake.pt', gps_file=str(gps_path))
+    detector.process_video(str(video_path), output_path=str(output_path),
+                           video_start_time=start, **options)
+    return detector.last_run_stats
+
+
+def _features(output_path):
+    with open(output_path) as f:
+        return json.load(f)['features']
+
+
+@pytest.mark.usefixtures('fake_yolo')
+class TestCheckpointResume:
+    """Test an interrupted run resumes to the same output."""
+
+    def test_checkpoint_roundtrip(self, tmp_path):
+        """Test checkpoints only load for the same run."""
+        checkpoint = Checkpoint(tmp_path / 'run.ckpt.json')
+        checkpoint.save({'run': {'options': (1, 2)}, 'last_frame': 5})
+
+        assert checkpoint.load({'options': (1, 2)})['last_frame'] == 5
+        assert checkpoint.load({'options': (1, 3)}) is None
+
+        checkpoint.clear()
+        assert checkpoint.load() is None
+
+    @pytest.mark.parametrize('options', [
+        {'skip_frames': 2, 'batch_size': 4},
+        {'skip_frames': 3, 'batch_size': 2, 'track': True, 'min_speed': 5.0, 'motion_threshold': 1.5},
+    ])
+    def test_kill_and_resume(self, survey, tmp_path, options):
+        """Test killing a run and resuming it gives the uninterrupted output."""
+        video_path, gps_path, start = survey
+        options = dict(options, checkpoint_every=10)
+
+        reference_path = tmp_path / 'reference.geojson'
+        reference_stats = _run(video_path, gps_path, start, reference_path, **options)
+        assert not VideoDetector.checkpoint_path(reference_path).exists()
+
+        # Kill the run part way through, from a child process
+        output_path = tmp_path / 'resumed.geojson'
+        context = multiprocessing.get_context('fork')
+        child = context.Process(target=_run, args=(video_path, gps_path, start, output_path, 5),
+                                kwargs=options)
+        child.start()
+        child.join()
+
+        assert child.exitcode == 1
+        assert not output_path.exists()
+        state = Checkpoint(VideoDetector.checkpoint_path(output_path)).load()
+        assert state['last_frame'] > 0
+
+        resumed_stats = _run(video_path, gps_path, start, output_path, **options)
+
+        assert _features(output_path) == _features(reference_path)
+        assert resumed_stats == reference_stats
+        assert not VideoDetector.checkpoint_path(output_path).exists()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,111 @@
+"""
+Unit tests for the merged detection store.
+"""
+
+import pytest
+import json
+import os
+from src.inference.detection_store import DetectionStore, tile_bounds, tile_xy
+from src.inference.geojson_writer import GeoJSONSeqWriter
+
+
+def write_detections(path, points, class_name='pothole', confidence=0.8):
+    """Write a FeatureCollection with one detection per (lat, lon)."""
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+         'properties': {'class': class_name, 'confidence': confidence, 'frame_number': i}}
+        for i, (lat, lon) in enumerate(points)
+    ]}))
+    return path
+
+
+class TestTiles:
+    """Test XYZ tile math."""
+
+    def test_tile_xy(self):
+        """Test known tile coordinates."""
+        assert tile_xy(0.0, 0.0, 0) == (0, 0)
+        assert tile_xy(10.0, 10.0, 1) == (1, 0)
+        assert tile_xy(-10.0, -10.0, 1) == (0, 1)
+        # Paris at zoom 10
+        assert tile_xy(48.8566, 2.3522, 10) == (518, 352)
+
+    def test_bounds_contain_point(self):
+        """Test a tile's bounds contain the points mapped to it."""
+        min_lat, min_lon, max_lat, max_lon = tile_bounds(*tile_xy(48.8566, 2.3522, 14), 14)
+        assert min_lat <= 48.8566 <= max_lat
+        assert min_lon <= 2.3522 <= max_lon
+
+
+class TestDetectionStore:
+    """Test per-video updates and spatial queries."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = DetectionStore(tmp_path / 'detections.db')
+        write_detections(tmp_path / 'a_detections.geojson', [(48.85, 2.35), (48.86, 2.36)])
+        write_detections(tmp_path / 'b_detections.geojson', [(48.851, 2.351)], class_name='crack', confidence=0.4)
+        store.ingest_video('a', tmp_path / 'a_detections.geojson')
+        store.ingest_video('b', tmp_path / 'b_detections.geojson')
+        yield store
+        store.close()
+
+    def test_bbox(self, store):
+        """Test box queries with class and confidence filters."""
+        total, features = store.bbox(48.84, 2.34, 48.855, 2.355)
+        assert total == 2
+        assert {f['properties']['source'] for f in features} == {'a', 'b'}
+
+        assert store.bbox(48.84, 2.34, 48.87, 2.37, class_name='crack')[0] == 1
+        assert store.bbox(48.84, 2.34, 48.87, 2.37, min_confidence=0.5)[0] == 2
+
+        total, features = store.bbox(48.84, 2.34, 48.87, 2.37, limit=1)
+        assert (total, len(features)) == (3, 1)
+
+        # Exact edges: the point at 2.35 is inside, not just its rounded R-tree box
+        assert store.bbox(48.85, 2.35, 48.85, 2.35)[0] == 1
+
+    def test_antimeridian(self, tmp_path):
+        """Test boxes crossing the antimeridian."""
+        with DetectionStore(tmp_path / 'pacific.db') as store:
+            store.ingest_video('v', write_detections(tmp_path / 'v.geojson', [(0.0, 179.5), (0.0, -179.5), (0.0, 0.0)]))
+            assert store.bbox(-1.0, 179.0, 1.0, -179.0)[0] == 2
+
+    def test_reingest_replaces(self, store, tmp_path):
+        """Test a video's detections are replaced, and unchanged files skipped."""
+        assert store.ingest_video('a', tmp_path / 'a_detections.geojson') is None
+
+        path = write_detections(tmp_path / 'a_detections.geojson', [(48.85, 2.35)])
+        os.utime(path, ns=(1, 1))
+        assert store.ingest_video('a', path) == 1
+        assert len(store) == 2
+        assert store.bbox(48.855, 2.355, 48.87, 2.37)[0] == 0
+        assert {v['video']: v['detections'] for v in store.videos()} == {'a': 1, 'b': 1}
+
+        store.remove_video('b')
+        assert len(store) == 1
+        assert [t['count'] for t in store.tiles(14)] == [1]
+
+    def test_tiles(self, store):
+        """Test per-tile counts at precomputed zoom levels."""
+        tiles = store.tiles(10)
+        assert len(tiles) == 1
+        assert tiles[0]['count'] == 3
+        assert tiles[0]['classes'] == {'crack': 1, 'pothole': 2}
+
+        assert sum(t['count'] for t in store.tiles(14)) == 3
+        assert store.tiles(14, bbox=(48.855, 2.355, 48.87, 2.37))[0]['count'] == 1
+        assert store.tiles(10, bbox=(40.0, -5.0, 41.0, -4.0)) == []
+
+        with pytest.raises(ValueError):
+            store.tiles(12)
+
+    def test_stream_files(self, tmp_path):
+        """Test GeoJSON text sequences are ingested, null geometries skipped."""
+        with GeoJSONSeqWriter(tmp_path / 'v.geojsons') as writer:
+            writer.write({'frame_number': 0, 'class_id': 0, 'class_name': 'pothole', 'confidence': 0.9,
+                          'latitude': 48.85, 'longitude': 2.35})
+            writer.write({'frame_number': 1, 'class_id': 0, 'class_name': 'pothole', 'confidence': 0.9})
+
+        with DetectionStore(tmp_path / 'detections.db') as store:
+            assert store.ingest_video('v', tmp_path / 'v.geojsons') == 1
@@ -0,0 +1,46 @@
+"""
+Unit tests for frame gating.
+"""
+
+import pytest
+import numpy as np
+from src.inference.frame_gating import FrameGate
+
+
+class TestFrameGate:
+    """Test speed and motion gating."""
+
+    @pytest.fixture
+    def frame(self):
+        """Create a random BGR frame."""
+        rng = np.random.default_rng(0)
+        return rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+
+    def test_disabled_gate(self, frame):
+        """Test gate without thresholds never skips."""
+        gate = FrameGate()
+
+        assert not gate.enabled
+        assert gate.should_infer(frame, speed=0.0)
+
+    def test_speed_gate(self, frame):
+        """Test frames are skipped below the minimum speed."""
+        gate = FrameGate(min_speed=2.0)
+
+        assert not gate.should_infer(frame, speed=0.5)
+        assert gate.should_infer(frame, speed=30.0)
+        assert gate.should_infer(frame, speed=None)
+        assert gate.stats == {'inferred': 2, 'gated_speed': 1, 'gated_motion': 0}
+
+    def test_motion_gate(self, frame):
+        """Test static frames are skipped and changed frames inferred."""
+        gate = FrameGate(motion_threshold=2.0)
+
+        assert gate.should_infer(frame)
+        assert not gate.should_infer(frame.copy())
+        assert gate.should_infer(255 - frame)
+        assert gate.gated_count() == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
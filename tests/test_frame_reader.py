@@ -0,0 +1,125 @@
+"""
+Unit tests for sampled frame reading.
+"""
+
+import pytest
+import numpy as np
+from src.inference.frame_reader import FrameReader, open_frame_reader
+
+
+class TestFrameReader:
+    """Test frame sampling strategies."""
+
+    def test_grab_sampling(self, sample_video):
+        """Test sequential sampling yields every Nth frame."""
+        reader = FrameReader(sample_video, skip_frames=4, strategy='grab')
+        frames = list(reader)
+        reader.release()
+
+        assert [f.frame_number for f in frames] == list(range(0, 30, 4))
+        assert all(f.sampled and f.image is not None for f in frames)
+
+    def test_seek_matches_grab(self, sample_video):
+        """Test seek sampling returns the same frames and timestamps."""
+        with FrameReader(sample_video, skip_frames=7, strategy='grab') as reader:
+            grabbed = [(f.frame_number, f.timestamp_sec) for f in reader]
+
+        with FrameReader(sample_video, skip_frames=7, strategy='seek') as reader:
+            seeked = [(f.frame_number, f.timestamp_sec) for f in reader]
+
+        assert grabbed == seeked
+
+    def test_retrieve_all(self, sample_video):
+        """Test all frames are retrieved and sampled ones flagged."""
+        with FrameReader(sample_video, skip_frames=5, retrieve_all=True) as reader:
+            frames = list(reader)
+
+        assert reader.strategy == 'grab'
+        assert len(frames) == 30
+        assert sum(f.sampled for f in frames) == 6
+
+    def test_auto_strategy(self, sample_video):
+        """Test automatic strategy selection."""
+        with FrameReader(sample_video, skip_frames=3, strategy='auto', probe_samples=2) as reader:
+            frames = list(reader)
+
+        assert reader.strategy in ('grab', 'seek')
+        assert [f.frame_number for f in frames] == list(range(0, 30, 3))
+
+    def test_explicit_frame_numbers(self, sample_video):
+        """Test sampling an explicit set of frames with both strategies."""
+        targets = [0, 2, 3, 11, 25, 40]
+
+        for strategy in ('grab', 'seek'):
+            with FrameReader(sample_video, strategy=strategy, frame_numbers=targets) as reader:
+                frames = [f.frame_number for f in reader]
+
+            assert frames == [0, 2, 3, 11, 25]
+
+    def test_contiguous_segment(self, sample_video):
+        """Test a contiguous range is read sequentially from its first frame."""
+        with FrameReader(sample_video, strategy='auto', frame_numbers=range(10, 20)) as reader:
+            reader.start_frame = 10
+            frames = [f.frame_number for f in reader]
+
+        assert reader.skip_frames == 1
+        assert reader.strategy == 'grab'
+        assert frames == list(range(10, 20))
+
+    def test_invalid_strategy(self, sample_video):
+        """Test unsupported strategy is rejected."""
+        with pytest.raises(ValueError):
+            FrameReader(sample_video, strategy='random')
+
+    def test_max_size(self, sample_video):
+        """Test frames are downscaled with the scale back to the source reported."""
+        with FrameReader(sample_video, skip_frames=10, max_size=320) as reader:
+            frames = list(reader)
+
+        assert (reader.width, reader.height) == (320, 240)
+        assert reader.scale == 2.0
+        assert frames[0].image.shape == (240, 320, 3)
+
+
+class TestPyAVFrameReader:
+    """Test the PyAV decode backend against OpenCV."""
+
+    @pytest.fixture(autouse=True)
+    def require_pyav(self):
+        pytest.importorskip('av')
+
+    @pytest.mark.parametrize('strategy', ['grab', 'seek'])
+    def test_matches_opencv(self, sample_video, strategy):
+        """Test both backends yield the same frames and timestamps."""
+        with FrameReader(sample_video, skip_frames=4, strategy=strategy) as reader:
+            expected = [(f.frame_number, f.timestamp_sec, f.image) for f in reader]
+
+        with open_frame_reader(sample_video, backend='pyav', skip_frames=4,
+                               strategy=strategy) as reader:
+            frames = [(f.frame_number, f.timestamp_sec, f.image) for f in reader]
+
+        assert reader.total_frames == 30
+        assert [f[0] for f in frames] == [f[0] for f in expected]
+        assert [f[1] for f in frames] == pytest.approx([f[1] for f in expected])
+        for (_, _, image), (_, _, expected_image) in zip(frames, expected):
+            # Same decoded pixels, up to color conversion rounding
+            assert np.abs(image.astype(int) - expected_image).mean() < 2.0
+
+    def test_scaled_decode_and_resume(self, sample_video):
+        """Test in-decoder downscaling and starting part way through."""
+        with open_frame_reader(sample_video, backend='pyav', skip_frames=5,
+                               max_size=320, start_frame=12) as reader:
+            frames = list(reader)
+
+        assert [f.frame_number for f in frames] == [15, 20, 25]
+        assert frames[0].timestamp_sec == pytest.approx(1.5)
+        assert frames[0].image.shape == (240, 320, 3)
+
+    def test_invalid_backend(self, sample_video):
+        """Test unsupported backend is rejected."""
+        with pytest.raises(ValueError):
+            open_frame_reader(sample_video, backend='gstreamer')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
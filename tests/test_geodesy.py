@@ -0,0 +1,67 @@
+"""
+Unit tests for the vectorized distance kernels.
+"""
+
+import pytest
+import numpy as np
+from geopy.distance import geodesic
+from src.inference.geodesy import haversine, vincenty, step_distances, cumulative_distance
+
+
+@pytest.fixture
+def pairs():
+    """Random pairs worldwide, and short (~100 m) pairs."""
+    rng = np.random.default_rng(0)
+    lat1 = rng.uniform(-85, 85, 300)
+    lon1 = rng.uniform(-180, 180, 300)
+    far = (lat1, lon1, rng.uniform(-85, 85, 300), rng.uniform(-180, 180, 300))
+    near = (lat1, lon1, lat1 + rng.normal(0, 0.001, 300), lon1 + rng.normal(0, 0.001, 300))
+    return [far, near]
+
+
+def geodesic_distances(lat1, lon1, lat2, lon2):
+    return np.array([geodesic((a, b), (c, d)).meters for a, b, c, d in zip(lat1, lon1, lat2, lon2)])
+
+
+class TestGeodesy:
+    """Test kernels against geopy's geodesic."""
+
+    def test_haversine_accuracy(self, pairs):
+        """Test haversine stays within the documented 0.6% of geodesic."""
+        for lat1, lon1, lat2, lon2 in pairs:
+            expected = geodesic_distances(lat1, lon1, lat2, lon2)
+            error = np.abs(haversine(lat1, lon1, lat2, lon2) - expected) / expected
+            assert error.max() < 0.006
+
+    def test_vincenty_accuracy(self, pairs):
+        """Test Vincenty stays within 1 mm of geodesic."""
+        for lat1, lon1, lat2, lon2 in pairs:
+            expected = geodesic_distances(lat1, lon1, lat2, lon2)
+            assert np.abs(vincenty(lat1, lon1, lat2, lon2) - expected).max() < 1e-3
+
+    def test_edge_cases(self):
+        """Test identical, scalar and nearly antipodal points."""
+        assert haversine(48.85, 2.35, 48.85, 2.35) == 0.0
+        assert vincenty(48.85, 2.35, 48.85, 2.35) == 0.0
+        assert isinstance(vincenty(48.85, 2.35, 48.86, 2.36), float)
+
+        # Does not converge: haversine fallback
+        distance = vincenty(0.0, 0.0, 0.5, 179.7)
+        assert distance == pytest.approx(geodesic((0.0, 0.0), (0.5, 179.7)).meters, rel=0.006)
+
+    def test_cumulative_distance(self, pairs):
+        """Test track distances are consecutive steps summed from 0."""
+        lat, lon = pairs[1][2], pairs[1][3]
+
+        steps = step_distances(lat, lon)
+        distance = cumulative_distance(lat, lon)
+
+        assert len(steps) == len(lat) - 1
+        assert distance[0] == 0.0
+        assert np.allclose(np.diff(distance), steps)
+        assert steps[5] == pytest.approx(haversine(lat[5], lon[5], lat[6], lon[6]))
+        assert len(cumulative_distance([], [])) == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,86 @@
+"""
+Unit tests for streaming GeoJSON output.
+"""
+
+import pytest
+import tempfile
+import json
+from pathlib import Path
+from src.inference.geojson_writer import (
+    GeoJSONSeqWriter, read_geojson_seq, geojson_seq_to_feature_collection, RECORD_SEPARATOR
+)
+
+
+def make_detection(frame, with_gps=True):
+    """Create a detection dict."""
+    detection = {
+        'frame_number': frame,
+        'timestamp': '2026-01-09T10:30:00',
+        'timestamp_sec': frame / 10,
+        'class_id': 0,
+        'class_name': 'pothole',
+        'confidence': 0.8,
+        'bbox': {'xmin': 1.0, 'ymin': 2.0, 'xmax': 3.0, 'ymax': 4.0}
+    }
+    if with_gps:
+        detection.update({'latitude': 48.85, 'longitude': 2.35, 'altitude': 30.0})
+    return detection
+
+
+class TestGeoJSONSeqWriter:
+    """Test GeoJSON text sequence writing and conversion."""
+
+    def test_write_and_read(self):
+        """Test records are RS-prefixed and read back in order."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'detections.geojsons'
+
+            with GeoJSONSeqWriter(path, flush_every=2) as writer:
+                for frame in range(5):
+                    writer.write(make_detection(frame))
+
+            lines = path.read_text().split('\n')[:-1]
+            assert len(lines) == 5
+            assert all(line.startswith(RECORD_SEPARATOR) for line in lines)
+
+            features = list(read_geojson_seq(path))
+            assert [f['properties']['frame_number'] for f in features] == list(range(5))
+            assert features[0]['geometry']['coordinates'] == [2.35, 48.85]
+
+    def test_truncated_record_skipped(self):
+        """Test a partially written last record is ignored."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'detections.geojsons'
+
+            with GeoJSONSeqWriter(path) as writer:
+                writer.write(make_detection(0))
+            with open(path, 'a') as f:
+                f.write(RECORD_SEPARATOR + '{"type": "Feat')
+
+            assert len(list(read_geojson_seq(path))) == 1
+
+    def test_feature_collection_conversion(self):
+        """Test conversion keeps only geolocated features."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            seq_path = Path(tmpdir) / 'detections.geojsons'
+            output_path = Path(tmpdir) / 'detections.geojson'
+
+            with GeoJSONSeqWriter(seq_path) as writer:
+                writer.write(make_detection(0))
+                writer.write(make_detection(1, with_gps=False))
+                writer.write(make_detection(2))
+
+            count = geojson_seq_to_feature_collection(seq_path, output_path, {'classes': ['pothole']})
+
+            with open(output_path) as f:
+                geojson = json.load(f)
+
+            assert count == 2
+            assert geojson['type'] == 'FeatureCollection'
+            assert len(geojson['features']) == 2
+            assert geojson['metadata']['total_detections'] == 2
+            assert geojson['metadata']['classes'] == ['pothole']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
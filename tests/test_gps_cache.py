@@ -0,0 +1,105 @@
+"""
+Unit tests for the parsed GPS track cache.
+"""
+
+import pytest
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from src.inference.gps_cache import GPSTrackCache
+from src.inference.gps_parsers import read_gps_track
+from src.inference.gps_utils import GPSProcessor
+
+
+BASE_TIME = datetime(2024, 5, 1, 10, 0, 0)
+
+
+def write_csv(path, num_points=50, offset=0.0):
+    """Write a GPS CSV with one point per second."""
+    pd.DataFrame({
+        'timestamp': [BASE_TIME + timedelta(seconds=i) for i in range(num_points)],
+        'latitude': 48.85 + offset + np.arange(num_points) * 1e-4,
+        'longitude': 2.35 + np.arange(num_points) * 1e-4,
+        'speed': np.full(num_points, 30.0)
+    }).to_csv(path, index=False)
+    return path
+
+
+class TestGPSTrackCache:
+    """Test hits, misses and invalidation."""
+
+    def test_hit_matches_parse(self, tmp_path):
+        """Test a cached track equals the parsed one and is memory-mapped."""
+        path = write_csv(tmp_path / 'track.csv')
+        cache = GPSTrackCache(tmp_path / 'cache')
+
+        first = cache.read(path)
+        second = cache.read(path)
+        expected = read_gps_track(path)
+
+        assert cache.stats == {'hits': 1, 'misses': 1, 'rehashed': 1}
+        pd.testing.assert_frame_equal(second, expected)
+        pd.testing.assert_frame_equal(first, expected)
+
+        # Another cache instance (a later run) reuses the entry without re-hashing
+        rerun = GPSTrackCache(tmp_path / 'cache')
+        rerun.read(path)
+        assert rerun.stats == {'hits': 1, 'misses': 0, 'rehashed': 0}
+
+    def test_time_window(self, tmp_path):
+        """Test the time window is applied to cached tracks."""
+        path = write_csv(tmp_path / 'track.csv')
+        cache = GPSTrackCache(tmp_path / 'cache')
+        cache.read(path)
+
+        window = cache.read(path, start_time=BASE_TIME + timedelta(seconds=10),
+                            end_time=BASE_TIME + timedelta(seconds=19))
+        assert len(window) == 10
+        assert window['timestamp'].iloc[0] == pd.Timestamp(BASE_TIME + timedelta(seconds=10))
+
+    def test_invalidation(self, tmp_path):
+        """Test a modified file is re-parsed and a touched one is not."""
+        path = write_csv(tmp_path / 'track.csv')
+        cache = GPSTrackCache(tmp_path / 'cache')
+        cache.read(path)
+
+        # Same content, new mtime: re-hashed but still a hit
+        os.utime(path, ns=(1, 1))
+        cache.read(path)
+        assert cache.stats == {'hits': 1, 'misses': 1, 'rehashed': 2}
+
+        write_csv(path, offset=0.01)
+        df = cache.read(path)
+        assert cache.stats['misses'] == 2
+        assert df['latitude'].iloc[0] == pytest.approx(48.86)
+        assert len(list((tmp_path / 'cache' / 'tracks').iterdir())) == 1
+
+    def test_timezone_aware(self, tmp_path):
+        """Test UTC timestamps round-trip as naive UTC."""
+        path = tmp_path / 'track.gpx'
+        path.write_text(
+            '<?xml version="1.0"?><gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">'
+            '<trk><trkseg>'
+            '<trkpt lat="48.85" lon="2.35"><time>2024-05-01T10:00:00Z</time></trkpt>'
+            '<trkpt lat="48.86" lon="2.36"><time>2024-05-01T10:00:01Z</time></trkpt>'
+            '</trkseg></trk></gpx>'
+        )
+        cache = GPSTrackCache(tmp_path / 'cache')
+        cache.read(path, 'gpx')
+        df = cache.read(path, 'gpx')
+
+        assert df['timestamp'].iloc[1] == pd.Timestamp('2024-05-01T10:00:01')
+        pd.testing.assert_frame_equal(df, read_gps_track(path, 'gpx'))
+
+    def test_processor(self, tmp_path):
+        """Test GPSProcessor loads through the cache."""
+        path = write_csv(tmp_path / 'track.csv')
+        cache = GPSTrackCache(tmp_path / 'cache')
+
+        GPSProcessor(path, cache=cache)
+        processor = GPSProcessor(path, cache=cache)
+
+        assert cache.stats['hits'] == 1
+        coords = processor.interpolate_gps(BASE_TIME + timedelta(seconds=2.5))
+        assert coords['latitude'] == pytest.approx(48.85025)
@@ -0,0 +1,152 @@
+"""
+Unit tests for the streaming GPS parsers.
+"""
+
+import pytest
+import json
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from src.inference.gps_parsers import read_gps_track
+from src.inference.gps_utils import GPSProcessor
+
+
+BASE_TIME = datetime(2024, 5, 1, 23, 59, 51)
+
+
+def nmea_sentence(body):
+    """Add the leading $ and checksum to an NMEA sentence body."""
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+def nmea_coordinate(value, degree_digits):
+    """Format decimal degrees as NMEA (d)ddmm.mmmm."""
+    degrees = int(abs(value))
+    return f"{degrees:0{degree_digits}d}{(abs(value) - degrees) * 60:07.4f}"
+
+
+@pytest.fixture
+def points():
+    """Twenty one-second points crossing midnight."""
+    return [
+        {
+            'timestamp': BASE_TIME + timedelta(seconds=i),
+            'latitude': 48.8566 + i * 0.0001,
+            'longitude': -2.3522 - i * 0.0001,
+            'altitude': 100.0 + i,
+            'speed': 10.0 + i
+        }
+        for i in range(20)
+    ]
+
+
+class TestGPSParsers:
+    """Test chunked parsing and time-window filtering."""
+
+    def test_csv(self, points, tmp_path):
+        """Test chunked CSV reading keeps every point and extra columns."""
+        path = tmp_path / 'track.csv'
+        pd.DataFrame(points).assign(heading=90.0).to_csv(path, index=False)
+
+        df = read_gps_track(path, 'csv', chunk_size=7)
+
+        assert len(df) == 20
+        assert df['heading'].eq(90.0).all()
+        assert df['latitude'].tolist() == pytest.approx([p['latitude'] for p in points])
+        assert df['timestamp'].iloc[3] == points[3]['timestamp']
+
+    def test_time_window(self, points, tmp_path):
+        """Test only points within the window are kept, across chunks."""
+        path = tmp_path / 'track.csv'
+        pd.DataFrame(points).to_csv(path, index=False)
+
+        start = BASE_TIME + timedelta(seconds=5)
+        end = BASE_TIME + timedelta(seconds=12)
+        processor = GPSProcessor(path, 'csv', start_time=start, end_time=end)
+
+        assert processor.gps_data['timestamp'].tolist() == [p['timestamp'] for p in points[5:13]]
+
+    @pytest.mark.parametrize('layout', ['array', 'lines'])
+    def test_json(self, points, tmp_path, layout):
+        """Test JSON arrays and JSON Lines are streamed in chunks."""
+        records = [dict(p, timestamp=p['timestamp'].isoformat()) for p in points]
+        path = tmp_path / 'track.json'
+        if layout == 'array':
+            path.write_text(json.dumps(records, indent=2))
+        else:
+            path.write_text('\n'.join(json.dumps(r) for r in records))
+
+        df = read_gps_track(path, 'json', chunk_size=6,
+                            start_time=BASE_TIME + timedelta(seconds=2))
+
+        assert len(df) == 18
+        assert df['speed'].dtype == np.float64
+        assert df['altitude'].tolist() == pytest.approx([p['altitude'] for p in points[2:]])
+
+    def test_gpx(self, points, tmp_path):
+        """Test GPX track points, elevations and extension speeds."""
+        trkpts = ''.join(
+            f'<trkpt lat="{p["latitude"]}" lon="{p["longitude"]}">'
+            + (f'<ele>{p["altitude"]}</ele>' if i else '')
+            + f'<time>{p["timestamp"].isoformat()}Z</time>'
+            + f'<extensions><gpxtpx:TrackPointExtension><gpxtpx:speed>{p["speed"]}'
+            + '</gpxtpx:speed></gpxtpx:TrackPointExtension></extensions></trkpt>'
+            for i, p in enumerate(points)
+        )
+        path = tmp_path / 'track.gpx'
+        path.write_text(
+            '<?xml version="1.0"?><gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1" '
+            'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">'
+            f'<trk><trkseg>{trkpts}</trkseg></trk></gpx>'
+        )
+
+        df = read_gps_track(path, 'gpx', chunk_size=8)
+
+        assert len(df) == 20
+        assert df['timestamp'].dtype == 'datetime64[ns]'
+        assert df['timestamp'].iloc[12] == pd.Timestamp(points[12]['timestamp'])
+        assert df['altitude'].iloc[0] == 0.0
+        assert df['altitude'].iloc[1] == pytest.approx(101.0)
+        assert df['speed'].tolist() == pytest.approx([p['speed'] for p in points])
+
+    def test_nmea(self, points, tmp_path):
+        """Test RMC and GGA sentences merge per fix and dates roll over."""
+        lines = []
+        for i, p in enumerate(points):
+            time = p['timestamp'].strftime('%H%M%S.00')
+            lat = nmea_coordinate(p['latitude'], 2)
+            lon = nmea_coordinate(p['longitude'], 3)
+            lines.append(nmea_sentence(f"GPGGA,{time},{lat},N,{lon},W,1,08,0.9,{p['altitude']:.1f},M,,M,,"))
+            # RMC only every other fix (GGA-only fixes keep the last date)
+            if i % 2 == 0:
+                lines.append(nmea_sentence(
+                    f"GPRMC,{time},A,{lat},N,{lon},W,{p['speed'] / 1.852:.3f},0.0,"
+                    f"{p['timestamp'].strftime('%d%m%y')},,,A"))
+        # Corrupted and invalid sentences are skipped
+        lines.insert(3, lines[2][:-2] + '00')
+        lines.append(nmea_sentence('GPRMC,000100.00,V,,,,,,,020524,,,N'))
+
+        path = tmp_path / 'track.nmea'
+        path.write_text('\n'.join(lines) + '\n')
+
+        df = read_gps_track(path, 'nmea', chunk_size=5)
+
+        expected = pd.to_datetime([p['timestamp'] for p in points])
+        assert df['timestamp'].tolist() == expected.tolist()
+        assert df['latitude'].tolist() == pytest.approx([p['latitude'] for p in points], abs=1e-6)
+        assert df['longitude'].tolist() == pytest.approx([p['longitude'] for p in points], abs=1e-6)
+        assert df['altitude'].tolist() == pytest.approx([p['altitude'] for p in points])
+        assert df['speed'].iloc[::2].tolist() == pytest.approx([p['speed'] for p in points[::2]], abs=1e-3)
+        assert df['speed'].iloc[1::2].isna().all()
+
+    def test_unsupported_format(self, tmp_path):
+        """Test unknown formats are rejected."""
+        with pytest.raises(ValueError):
+            read_gps_track(tmp_path / 'track.kml', 'kml')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
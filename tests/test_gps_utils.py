@@ -5,9 +5,10 @@ Unit tests for GPS utilities.
 import pytest
 import tempfile
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from src.inference.gps_utils import GPSProcessor
+from src.inference.gps_utils import GPSProcessor, GPSTrack
 
 
 class TestGPSProcessor:
@@ -26,6 +27,7 @@ class TestGPSProcessor:
                 lon = 2.3522 + i * 0.0001
                 f.write(f'{timestamp.isoformat()},{lat},{lon},100.0,30.0\n')
             
+            f.flush()
             yield f.name
         
         Path(f.name).unlink(missing_ok=True)
@@ -72,6 +74,26 @@ class TestGPSProcessor:
         assert distance > 0
         assert distance < 200  # Should be less than 200m
     
+    def test_track_distance(self, sample_gps_csv):
+        """Test cumulative track distance."""
+        processor = GPSProcessor(sample_gps_csv, 'csv')
+        
+        track = processor.track_distance()
+        distance = track['cumulative_distance']
+        
+        assert distance.iloc[0] == 0.0
+        assert distance.is_monotonic_increasing
+        
+        # Matches the sum of per-step geodesic distances
+        expected = sum(
+            processor.calculate_distance(
+                (track['latitude'].iloc[i], track['longitude'].iloc[i]),
+                (track['latitude'].iloc[i + 1], track['longitude'].iloc[i + 1])
+            )
+            for i in range(len(track) - 1)
+        )
+        assert abs(distance.iloc[-1] - expected) / expected < 0.005
+    
     def test_synchronization(self, sample_gps_csv):
         """Test frame synchronization."""
         processor = GPSProcessor(sample_gps_csv, 'csv')
@@ -113,5 +135,123 @@ class TestGPSProcessor:
         Path(output_path).unlink()
 
 
+
+def reference_interpolate(timestamp, gps_data):
+    """Row-filtering interpolation the vectorized track must reproduce."""
+    gps_sorted = gps_data.sort_values('timestamp').reset_index(drop=True)
+    before = gps_sorted[gps_sorted['timestamp'] <= timestamp]
+    after = gps_sorted[gps_sorted['timestamp'] > timestamp]
+    
+    if len(before) == 0:
+        return gps_sorted.iloc[0].to_dict()
+    if len(after) == 0:
+        return gps_sorted.iloc[-1].to_dict()
+    
+    point1 = before.iloc[-1]
+    point2 = after.iloc[0]
+    factor = (timestamp - point1['timestamp']).total_seconds() / \
+        (point2['timestamp'] - point1['timestamp']).total_seconds()
+    return {
+        name: point1[name] + factor * (point2[name] - point1[name])
+        for name in ('latitude', 'longitude', 'altitude', 'speed')
+    }
+
+
+class TestGPSTrack:
+    """Test vectorized interpolation against the row-filtering version."""
+    
+    @pytest.fixture
+    def gps_data(self):
+        """Irregular, unsorted track with a duplicated timestamp."""
+        rng = np.random.default_rng(0)
+        base_time = datetime(2024, 5, 1, 12, 0, 0)
+        offsets = np.cumsum(rng.uniform(0.05, 0.3, size=50))
+        offsets[20] = offsets[19]
+        df = pd.DataFrame({
+            'timestamp': [base_time + timedelta(seconds=float(s)) for s in offsets],
+            'latitude': 48.85 + rng.normal(0, 1e-4, 50).cumsum(),
+            'longitude': 2.35 + rng.normal(0, 1e-4, 50).cumsum(),
+            'altitude': rng.uniform(90, 110, 50),
+            'speed': rng.uniform(0, 20, 50)
+        })
+        return df.sample(frac=1.0, random_state=1).reset_index(drop=True)
+    
+    def query_times(self, gps_data):
+        start = gps_data['timestamp'].min() - timedelta(seconds=1)
+        end = gps_data['timestamp'].max() + timedelta(seconds=1)
+        times = list(pd.date_range(start, end, periods=200))
+        # Exact sample times
+        return times + list(gps_data['timestamp'].iloc[:10])
+    
+    def test_matches_reference(self, gps_data):
+        """Test scalar and batch interpolation match the reference."""
+        processor = GPSProcessor()
+        track = GPSTrack(gps_data)
+        times = self.query_times(gps_data)
+        batch = processor.interpolate_gps_batch(times, gps_data)
+        
+        for i, t in enumerate(times):
+            expected = reference_interpolate(t, gps_data)
+            result = track.interpolate(t)
+            for name in ('latitude', 'longitude', 'altitude', 'speed'):
+                assert result[name] == pytest.approx(expected[name], rel=1e-12)
+                assert batch[name].iloc[i] == pytest.approx(expected[name], rel=1e-12)
+        
+        inside = (batch['timestamp'] >= gps_data['timestamp'].min()) & \
+            (batch['timestamp'] < gps_data['timestamp'].max())
+        assert (batch['interpolated'] == inside).all()
+    
+    def test_timezone_aware(self, gps_data):
+        """Test aware timestamps compare in UTC."""
+        track = GPSTrack(gps_data.assign(timestamp=gps_data['timestamp'].dt.tz_localize('UTC')))
+        t = gps_data['timestamp'].sort_values().iloc[5] + timedelta(milliseconds=10)
+        
+        local = pd.Timestamp(t).tz_localize('UTC').tz_convert('Europe/Paris')
+        result = track.interpolate_many([local])
+        
+        assert result['latitude'][0] == pytest.approx(reference_interpolate(t, gps_data)['latitude'])
+    
+    def test_synchronization_matches_reference(self, gps_data):
+        """Test the as-of merge picks the nearest point within the limit."""
+        # Drop the duplicated timestamp, where nearest ties are ambiguous
+        gps_data = gps_data.drop_duplicates('timestamp')
+        # Leave a gap longer than the time limit
+        gps_sorted = gps_data.sort_values('timestamp')
+        elapsed = (gps_sorted['timestamp'] - gps_sorted['timestamp'].iloc[0]).dt.total_seconds()
+        gps_data = gps_sorted[~elapsed.between(2.0, 4.0)]
+        
+        processor = GPSProcessor()
+        processor.gps_data = gps_data
+        start_time = gps_sorted['timestamp'].iloc[0] - timedelta(seconds=1)
+        frames_metadata = [
+            {'frame_number': i, 'filename': f'frame_{i:06d}.jpg', 'timestamp_sec': t}
+            for i, t in enumerate(np.random.default_rng(2).uniform(0, 12, 300))
+        ]
+        
+        synced = processor.synchronize_with_frames(frames_metadata, start_time, max_time_diff_sec=0.5)
+        
+        expected = []
+        for frame in frames_metadata:
+            target = start_time + timedelta(seconds=frame['timestamp_sec'])
+            diffs = (gps_data['timestamp'] - target).abs()
+            if diffs.min().total_seconds() <= 0.5:
+                expected.append((frame['frame_number'], gps_data.loc[diffs.idxmin(), 'latitude']))
+        
+        assert 0 < len(expected) < len(frames_metadata)
+        assert synced['frame_number'].tolist() == [n for n, _ in expected]
+        assert synced['latitude'].tolist() == [lat for _, lat in expected]
+    
+    def test_track_cached(self, gps_data):
+        """Test the track is built once per loaded GPS data."""
+        processor = GPSProcessor()
+        processor.gps_data = gps_data
+        
+        track = processor.get_track()
+        assert processor.get_track() is track
+        
+        processor.gps_data = gps_data.copy()
+        assert processor.get_track() is not track
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,86 @@
+"""
+Unit tests for run profiling.
+"""
+
+import pytest
+import time
+from src.inference.profiling import StageProfiler, SamplingProfiler
+
+
+def busy_loop(seconds):
+    """Spin for the given time."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestStageProfiler:
+    """Test per-stage timings."""
+
+    def test_stage_timings(self):
+        """Test stages accumulate time and calls, sorted by total."""
+        profiler = StageProfiler()
+
+        for _ in range(3):
+            with profiler.stage('inference'):
+                busy_loop(0.01)
+        with profiler.stage('output'):
+            pass
+
+        report = profiler.report()
+        assert list(report['stages']) == ['inference', 'output']
+        assert report['stages']['inference']['calls'] == 3
+        assert report['stages']['inference']['total_sec'] >= 0.03
+        assert 0.0 < report['stages']['inference']['share'] <= 1.0
+
+    def test_iterate(self):
+        """Test time spent producing items is attributed to the stage."""
+        profiler = StageProfiler()
+
+        def frames():
+            for i in range(4):
+                busy_loop(0.005)
+                yield i
+
+        items = []
+        for item in profiler.iterate('decode', frames()):
+            busy_loop(0.005)
+            items.append(item)
+
+        assert items == [0, 1, 2, 3]
+        # One call per item, plus the final exhausted step
+        assert profiler.calls['decode'] == 5
+        assert 0.02 <= profiler.totals['decode'] < 0.04
+
+    def test_disabled(self):
+        """Test a disabled profiler records nothing."""
+        profiler = StageProfiler(enabled=False)
+
+        with profiler.stage('inference'):
+            pass
+        assert list(profiler.iterate('decode', range(3))) == [0, 1, 2]
+
+        assert profiler.report()['stages'] == {}
+
+
+class TestSamplingProfiler:
+    """Test call stack sampling."""
+
+    def test_collapsed_stacks(self, tmp_path):
+        """Test samples land in the busy function and are written collapsed."""
+        with SamplingProfiler(interval=0.001) as sampler:
+            busy_loop(0.2)
+
+        assert sampler.samples > 0
+        hottest = sampler.stacks.most_common(1)[0][0]
+        assert 'busy_loop' in hottest.split(';')[-1]
+
+        path = tmp_path / 'profile.folded'
+        sampler.write_collapsed(path)
+        stack, count = path.read_text().splitlines()[0].rsplit(' ', 1)
+        assert stack == hottest
+        assert int(count) == sampler.stacks[hottest]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,143 @@
+"""
+Unit tests for road-segment map matching and aggregates.
+"""
+
+import pytest
+import json
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from src.inference.geojson_writer import GeoJSONSeqWriter
+from src.inference.road_segments import RoadNetwork, SegmentStore
+
+
+def write_network(path):
+    """Two parallel east-west streets 100 m apart, each ~730 m long."""
+    features = [
+        {'type': 'Feature', 'id': 'north',
+         'properties': {'name': 'Rue Nord', 'highway': 'residential'},
+         'geometry': {'type': 'LineString', 'coordinates': [[2.35, 48.8509], [2.355, 48.8509], [2.36, 48.8509]]}},
+        {'type': 'Feature', 'id': 'south',
+         'properties': {'name': 'Rue Sud', 'highway': 'primary'},
+         'geometry': {'type': 'LineString', 'coordinates': [[2.35, 48.85], [2.36, 48.85]]}}
+    ]
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+    return path
+
+
+def write_detections(path, points, start=datetime(2024, 5, 6, 9, 0, 0)):
+    """Write (lat, lon, class_name) detections as a GeoJSON sequence."""
+    with GeoJSONSeqWriter(path) as writer:
+        for i, (lat, lon, class_name) in enumerate(points):
+            writer.write({
+                'frame_number': i,
+                'class_id': 0 if class_name == 'pothole' else 1,
+                'class_name': class_name,
+                'confidence': 0.5 + i / 100,
+                'timestamp': (start + timedelta(seconds=i)).isoformat(),
+                'latitude': lat,
+                'longitude': lon
+            })
+
+
+class TestRoadNetwork:
+    """Test network loading and nearest-segment matching."""
+
+    def test_match_against_brute_force(self, tmp_path):
+        """Test grid matching equals the nearest of all edges."""
+        network = RoadNetwork.load(write_network(tmp_path / 'roads.geojson'), cell_size=0.0005)
+        assert network.segment_ids == ['north', 'south']
+        assert network.lengths[1] == pytest.approx(732, rel=0.01)
+
+        rng = np.random.default_rng(0)
+        lat = rng.uniform(48.8495, 48.8515, 300)
+        lon = rng.uniform(2.3495, 2.3605, 300)
+
+        for max_pairs in (3, 1_000_000):
+            segment, distance = network.match(lat, lon, max_distance=20.0, max_pairs=max_pairs)
+
+            # Streets are east-west: distance to the street latitude inside the span
+            street_lat = np.array([48.8509, 48.85])
+            lon_offset = np.maximum(np.maximum(2.35 - lon, lon - 2.36), 0) * 111195 * np.cos(np.radians(48.85))
+            expected = np.hypot((lat[:, None] - street_lat) * 111195, lon_offset[:, None])
+            nearest = np.where(expected.min(axis=1) <= 20.0, expected.argmin(axis=1), -1)
+
+            assert np.array_equal(segment, nearest)
+            matched = segment >= 0
+            assert np.allclose(distance[matched], expected.min(axis=1)[matched], atol=0.05)
+            assert np.all(np.isinf(distance[~matched]))
+
+    def test_osm_xml(self, tmp_path):
+        """Test OSM ways with highway tags become segments."""
+        path = tmp_path / 'roads.osm'
+        path.write_text("""<?xml version="1.0"?>
+<osm version="0.6">
+  <node id="1" lat="48.85" lon="2.35"/>
+  <node id="2" lat="48.85" lon="2.36"/>
+  <node id="3" lat="48.86" lon="2.36"/>
+  <way id="10"><nd ref="1"/><nd ref="2"/><tag k="highway" v="primary"/><tag k="name" v="A"/></way>
+  <way id="11"><nd ref="2"/><nd ref="3"/><tag k="building" v="yes"/></way>
+</osm>
+""")
+        network = RoadNetwork.load(path)
+        assert network.segment_ids == ['way/10']
+        assert network.names == ['A']
+        assert network.highways == ['primary']
+
+        segment, _ = network.match([48.85001, 48.855], [2.355, 2.36])
+        assert segment.tolist() == [0, -1]
+
+
+class TestSegmentStore:
+    """Test incremental per-segment aggregates."""
+
+    def test_incremental_ingest(self, tmp_path):
+        """Test counts, density and re-aggregation of modified files only."""
+        network = RoadNetwork.load(write_network(tmp_path / 'roads.geojson'))
+        results = tmp_path / 'results'
+        results.mkdir()
+        write_detections(results / 'run1_detections.geojsons', [
+            (48.85001, 2.351, 'pothole'), (48.84999, 2.352, 'pothole'),
+            (48.85002, 2.353, 'crack'), (48.8509, 2.354, 'pothole'), (48.8530, 2.354, 'pothole')
+        ])
+
+        with SegmentStore(tmp_path / 'segments.db') as store:
+            store.set_network(network)
+            stats = store.ingest([results], network)
+            assert stats == {'ingested': 1, 'skipped': 0, 'removed': 0, 'detections': 5, 'matched': 4}
+
+            south = store.segment('south')
+            assert south['count'] == 3
+            assert south['classes']['pothole']['count'] == 2
+            assert south['classes']['crack']['count'] == 1
+            assert south['density_per_km'] == pytest.approx(3 / 0.732, rel=0.01)
+            assert south['last_survey'] == datetime(2024, 5, 6, 9, 0, 2).isoformat()
+            assert store.segment('missing') is None
+
+            # Unchanged files are skipped, new ones only touch their segments
+            write_detections(results / 'run2_detections.geojsons', [(48.8509, 2.356, 'crack')],
+                             start=datetime(2024, 6, 3, 9, 0, 0))
+            stats = store.ingest([results], network)
+            assert stats['ingested'] == 1 and stats['skipped'] == 1
+            north = store.segment('north')
+            assert north['count'] == 2
+            assert north['last_survey'] == datetime(2024, 6, 3, 9, 0, 0).isoformat()
+            assert store.segment('south')['count'] == 3
+            assert [s['segment_id'] for s in store.segments(order_by='count')] == ['south', 'north']
+            assert [s['segment_id'] for s in store.segments(order_by='last_survey')] == ['north', 'south']
+
+            # A rewritten file replaces its previous contributions
+            write_detections(results / 'run1_detections.geojsons', [(48.85001, 2.351, 'pothole')])
+            os.utime(results / 'run1_detections.geojsons', ns=(1, 1))
+            store.ingest([results], network)
+            assert store.segment('south')['count'] == 1
+            assert store.segment('north')['count'] == 1
+
+            assert [s['segment_id'] for s in store.segments(bbox=(48.8505, 2.34, 48.86, 2.37))] == ['north']
+
+            # A deleted file no longer counts
+            (results / 'run2_detections.geojsons').unlink()
+            stats = store.ingest([results], network)
+            assert stats['removed'] == 1 and stats['skipped'] == 1
+            assert store.segment('north') is None
+            assert store.segment('south')['count'] == 1
@@ -0,0 +1,88 @@
+"""
+Unit tests for size-aware batch scheduling.
+"""
+
+import pytest
+from pathlib import Path
+from src.inference.scheduling import (
+    VideoInfo, estimate_cost, plan_tasks, probe_video, schedule_report, simulate_makespan, task_key
+)
+
+
+def infos_for(durations, fps=30.0, size=(1280, 720)):
+    """Video paths and infos for videos of the given durations (seconds)."""
+    paths = [Path(f'video{i}.mp4') for i in range(len(durations))]
+    return paths, {path: VideoInfo(int(duration * fps), fps, *size) for path, duration in zip(paths, durations)}
+
+
+class TestPlanTasks:
+    """Test task order and segment splitting."""
+
+    def test_longest_first(self):
+        """Test tasks are queued by decreasing estimated cost."""
+        paths, infos = infos_for([10, 60, 30])
+        tasks = plan_tasks(paths, infos)
+
+        assert [task.video_path.name for task in tasks] == ['video1.mp4', 'video2.mp4', 'video0.mp4']
+        assert all(task.parts == 1 and task.frame_range is None for task in tasks)
+
+        tasks = plan_tasks(paths, infos, order='input')
+        assert [task.video_path for task in tasks] == paths
+
+    def test_resolution_counts(self):
+        """Test larger frames cost more to decode."""
+        small = VideoInfo(300, 30.0, 640, 360)
+        large = VideoInfo(300, 30.0, 3840, 2160)
+        assert estimate_cost(large) > estimate_cost(small)
+        assert estimate_cost(None) == 0.0
+
+    def test_split(self):
+        """Test long videos are split into contiguous segments covering every frame."""
+        paths, infos = infos_for([100, 20])
+        tasks = plan_tasks(paths, infos, max_segment_sec=30)
+
+        segments = sorted((task for task in tasks if task.video_path == paths[0]), key=lambda task: task.part)
+        assert [task.part for task in segments] == [0, 1, 2, 3]
+        assert all(task.parts == 4 for task in segments)
+        assert segments[0].frame_range[0] == 0
+        assert segments[-1].frame_range[1] == 3000
+        assert all(a.frame_range[1] == b.frame_range[0] for a, b in zip(segments, segments[1:]))
+
+        # The short video is not split
+        assert [task.frame_range for task in tasks if task.video_path == paths[1]] == [None]
+
+    def test_invalid_order(self):
+        """Test unknown orders are rejected."""
+        with pytest.raises(ValueError):
+            plan_tasks([], {}, order='random')
+
+
+class TestMakespan:
+    """Test the makespan simulation and report."""
+
+    def test_lpt_beats_input_order(self):
+        """Test a long task submitted last stretches the makespan."""
+        assert simulate_makespan([1, 1, 1, 1, 4], workers=2) == 6
+        assert simulate_makespan([4, 1, 1, 1, 1], workers=2) == 4
+
+    def test_report(self):
+        """Test predicted, calibrated and actual makespans."""
+        paths, infos = infos_for([60, 30, 30])
+        tasks = plan_tasks(paths, infos)
+        # Twice as slow as predicted, perfectly balanced
+        timings = {task_key(task): task.cost * 2 for task in tasks}
+        wall = simulate_makespan([task.cost * 2 for task in tasks], workers=2)
+
+        report = schedule_report(tasks, timings, workers=2, wall_sec=wall)
+        assert report['calibrated_makespan_sec'] == pytest.approx(2 * report['predicted_makespan_sec'], rel=1e-3)
+        assert report['actual_makespan_sec'] == pytest.approx(wall, rel=1e-3)
+        assert report['utilization'] == pytest.approx(1.0)
+        assert report['task_times'][0]['actual_sec'] == pytest.approx(2 * tasks[0].cost, rel=1e-3)
+
+    def test_probe(self, sample_video, tmp_path):
+        """Test probing reads the video header."""
+        info = probe_video(sample_video)
+        assert info.frames == 30
+        assert info.width > 0 and info.height > 0
+
+        assert probe_video(tmp_path / 'missing.mp4') is None
@@ -0,0 +1,127 @@
+"""
+Unit tests for the shared-memory decode pipeline.
+"""
+
+import pytest
+import json
+import numpy as np
+import cv2
+from datetime import datetime
+from src.inference.frame_reader import FrameReader
+from src.inference.shared_frames import SharedFrameReader
+from src.inference.detect_video import VideoDetector
+
+
+class TestSharedFrameReader:
+    """Test decoding through the shared-memory ring buffer."""
+
+    def test_matches_frame_reader(self, sample_video):
+        """Test frames, timestamps and pixels match in-process decoding."""
+        with FrameReader(sample_video, skip_frames=3) as reader:
+            expected = [(f.frame_number, f.timestamp_sec, f.image) for f in reader]
+
+        frames = []
+        with SharedFrameReader(sample_video, num_slots=3, skip_frames=3) as reader:
+            assert reader.total_frames == 30
+            for video_frame in reader:
+                frames.append((video_frame.frame_number, video_frame.timestamp_sec,
+                               video_frame.image.copy()))
+                reader.recycle([video_frame])
+
+        assert [f[:2] for f in frames] == [f[:2] for f in expected]
+        assert all(np.array_equal(a[2], b[2]) for a, b in zip(frames, expected))
+
+    def test_select_frames_and_start(self, sample_video):
+        """Test explicit frame selection and resuming part way through."""
+        with SharedFrameReader(sample_video, num_slots=2) as reader:
+            reader.select_frames([2, 9, 17, 25])
+            reader.start_frame = 10
+            numbers = []
+            for video_frame in reader:
+                numbers.append(video_frame.frame_number)
+                reader.recycle([video_frame])
+
+        assert reader.frame_numbers == [2, 9, 17, 25]
+        assert numbers == [17, 25]
+
+    def test_invalid_video(self, tmp_path):
+        """Test errors opening the video surface in the consumer."""
+        with pytest.raises(ValueError):
+            SharedFrameReader(tmp_path / 'missing.mp4')
+
+
+@pytest.mark.usefixtures('fake_yolo')
+class TestPipelineDetection:
+    """Test process_video with the decoder process."""
+
+    def test_pipeline_matches_single_process(self, survey, tmp_path):
+        """Test the pipeline yields the same detections with few slots."""
+        video_path, gps_path, start = survey
+        features = {}
+
+        for pipeline in (False, True):
+            output_path = tmp_path / f'pipeline_{pipeline}.geojson'
+            detector = VideoDetector('fake.pt', gps_file=str(gps_path))
+            detector.process_video(str(video_path), output_path=str(output_path),
+                                   video_start_time=start, skip_frames=2, batch_size=4,
+                                   motion_threshold=1.5, pipeline=pipeline)
+            with open(output_path) as f:
+                features[pipeline] = json.load(f)['features']
+
+        assert len(features[True]) > 0
+        assert features[True] == features[False]
+
+    def test_batch_geolocation(self, survey, tmp_path, monkeypatch):
+        """Test each batch is geolocated with one vectorized lookup."""
+        video_path, gps_path, start = survey
+        output_path = tmp_path / 'batched.geojson'
+        detector = VideoDetector('fake.pt', gps_file=str(gps_path))
+        interpolate_gps = detector.gps_processor.interpolate_gps
+        interpolate_gps_batch = detector.gps_processor.interpolate_gps_batch
+        lookups = []
+
+        def batch(timestamps, gps_data=None):
+            lookups.append(len(timestamps))
+            return interpolate_gps_batch(timestamps, gps_data)
+
+        monkeypatch.setattr(detector.gps_processor, 'interpolate_gps', None)
+        monkeypatch.setattr(detector.gps_processor, 'interpolate_gps_batch', batch)
+        detector.process_video(str(video_path), output_path=str(output_path),
+                               video_start_time=start, skip_frames=2, batch_size=4)
+        with open(output_path) as f:
+            features = json.load(f)['features']
+
+        # 60 sampled frames in batches of 4
+        assert lookups == [4] * 15
+        assert len(features) > 0
+        for feature in features:
+            expected = interpolate_gps(datetime.fromisoformat(feature['properties']['timestamp']))
+            assert feature['geometry']['coordinates'][:2] == pytest.approx(
+                [expected['longitude'], expected['latitude']])
+
+    def test_pipeline_with_annotated_video(self, tmp_path):
+        """Test annotated frames outlive their recycled shared-memory slots."""
+        # Every frame differs from its neighbours by 60 levels
+        video_path = tmp_path / 'cycle.mp4'
+        out = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*'mp4v'), 10.0, (160, 120))
+        for frame in range(60):
+            out.write(np.full((120, 160, 3), (frame % 4) * 60, dtype=np.uint8))
+        out.release()
+
+        detector = VideoDetector('fake.pt')
+        detector.process_video(str(video_path), save_video=True, skip_frames=2, batch_size=4,
+                               pipeline=True)
+
+        cap = cv2.VideoCapture(str(tmp_path / 'cycle_annotated.mp4'))
+        levels = []
+        while True:
+            ok, image = cap.read()
+            if not ok:
+                break
+            levels.append(float(np.median(image)))
+        cap.release()
+
+        assert levels == pytest.approx([(frame % 4) * 60 for frame in range(60)], abs=20)
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
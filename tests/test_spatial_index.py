@@ -0,0 +1,181 @@
+"""
+Unit tests for the detection spatial index.
+"""
+
+import pytest
+import json
+import os
+import numpy as np
+from src.inference.geodesy import haversine
+from src.inference.geojson_writer import GeoJSONSeqWriter
+from src.inference.spatial_index import GridIndex, DetectionIndex, find_detection_files
+
+
+@pytest.fixture
+def points():
+    """Random points around Paris, plus points on both sides of the antimeridian."""
+    rng = np.random.default_rng(0)
+    lat = np.concatenate([rng.uniform(48.80, 48.90, 5000), rng.uniform(-0.01, 0.01, 200)])
+    lon = np.concatenate([rng.uniform(2.30, 2.40, 5000), rng.uniform(179.99, 180.01, 200)])
+    return lat, ((lon + 180.0) % 360.0) - 180.0
+
+
+def detection(i, lat, lon, class_name='pothole'):
+    return {
+        'frame_number': i,
+        'class_id': 0 if class_name == 'pothole' else 1,
+        'class_name': class_name,
+        'confidence': 0.5 + (i % 5) / 10,
+        'latitude': lat,
+        'longitude': lon
+    }
+
+
+class TestGridIndex:
+    """Test grid queries against brute force."""
+
+    def test_radius(self, points):
+        """Test radius queries return exactly the points within the radius."""
+        lat, lon = points
+        index = GridIndex(lat, lon, cell_size=0.005)
+
+        for center_lat, center_lon, radius in ((48.85, 2.35, 50.0), (48.85, 2.35, 900.0),
+                                               (48.801, 2.301, 2000.0), (0.0, 180.0, 800.0)):
+            indices, distances = index.query_radius(center_lat, center_lon, radius)
+            expected = np.flatnonzero(haversine(center_lat, center_lon, lat, lon) <= radius)
+
+            assert sorted(indices) == sorted(expected)
+            assert np.all(np.diff(distances) >= 0)
+
+        # Both sides of the antimeridian
+        indices, _ = index.query_radius(0.0, 180.0, 800.0)
+        assert (lon[indices] > 0).any() and (lon[indices] < 0).any()
+
+    def test_bbox(self, points):
+        """Test box queries, including a box crossing the antimeridian."""
+        lat, lon = points
+        index = GridIndex(lat, lon, cell_size=0.005)
+
+        indices = index.query_bbox(48.84, 2.33, 48.86, 2.37)
+        expected = np.flatnonzero((lat >= 48.84) & (lat <= 48.86) & (lon >= 2.33) & (lon <= 2.37))
+        assert indices.tolist() == expected.tolist()
+
+        indices = index.query_bbox(-0.005, 179.995, 0.005, -179.995)
+        expected = np.flatnonzero((np.abs(lat) <= 0.005) & (np.abs(lon) >= 179.995))
+        assert len(expected) and indices.tolist() == expected.tolist()
+
+
+class TestDetectionIndex:
+    """Test indexing of detection files."""
+
+    def test_refresh(self, tmp_path):
+        """Test new, modified and removed files are picked up."""
+        (tmp_path / 'survey').mkdir()
+        with GeoJSONSeqWriter(tmp_path / 'survey' / 'a_detections.geojsons') as writer:
+            for i in range(10):
+                writer.write(detection(i, 48.85 + i * 1e-4, 2.35))
+            # No coordinates: not indexed
+            writer.write({'frame_number': 99, 'class_id': 0, 'class_name': 'pothole',
+                          'confidence': 0.9})
+
+        index = DetectionIndex(tmp_path)
+        assert index.refresh()
+        assert len(index) == 10
+        assert not index.refresh()
+
+        total, features = index.near(48.85, 2.35, 25.0, limit=2)
+        assert total == 3
+        assert [f['properties']['frame_number'] for f in features] == [0, 1]
+        assert features[0]['properties']['source'] == 'survey/a_detections.geojsons'
+        assert features[1]['properties']['distance_m'] == pytest.approx(11.1, abs=0.1)
+
+        # A FeatureCollection replaces the stream of the same name
+        collection = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [2.35, 48.85]},
+             'properties': {'class': 'crazing', 'class_id': 2, 'confidence': 0.7, 'frame_number': 5}}
+        ]}
+        (tmp_path / 'survey' / 'a_detections.geojson').write_text(json.dumps(collection))
+        assert index.refresh()
+        total, features = index.bbox(48.0, 2.0, 49.0, 3.0)
+        assert total == 1 and features[0]['properties']['class'] == 'crazing'
+
+        (tmp_path / 'survey' / 'a_detections.geojson').unlink()
+        (tmp_path / 'survey' / 'a_detections.geojsons').unlink()
+        assert index.refresh()
+        assert len(index) == 0
+        assert index.near(48.85, 2.35, 25.0) == (0, [])
+
+    def test_filters(self, tmp_path):
+        """Test class and confidence filters."""
+        with GeoJSONSeqWriter(tmp_path / 'b_detections.geojsons') as writer:
+            for i in range(20):
+                writer.write(detection(i, 48.85, 2.35, 'pothole' if i % 2 else 'crazing'))
+
+        index = DetectionIndex(tmp_path)
+        index.refresh()
+
+        total, features = index.bbox(48.8, 2.3, 48.9, 2.4, class_name='pothole', min_confidence=0.75)
+        assert total == len(features) == 4
+        assert all(f['properties']['class'] == 'pothole' for f in features)
+        assert all(f['properties']['confidence'] >= 0.75 for f in features)
+        assert index.bbox(48.8, 2.3, 48.9, 2.4, class_name='unknown') == (0, [])
+
+    def test_delta_index(self, tmp_path):
+        """Test changed files go to the delta index until it is large enough to merge."""
+        for name in 'abcdefghij':
+            with GeoJSONSeqWriter(tmp_path / f'{name}_detections.geojsons') as writer:
+                for i in range(20):
+                    writer.write(detection(i, 48.85 + i * 1e-4, 2.35))
+        index = DetectionIndex(tmp_path)
+        index.refresh()
+        assert len(index._main) == 200 and len(index._delta) == 0
+
+        # One rewritten file: masked in the main index, indexed in the delta
+        with GeoJSONSeqWriter(tmp_path / 'a_detections.geojsons') as writer:
+            writer.write(detection(0, 48.85, 2.35, 'crazing'))
+        os.utime(tmp_path / 'a_detections.geojsons', ns=(1, 1))
+        assert index.refresh()
+        assert len(index._main) == 180 and len(index._delta) == 1
+        total, features = index.near(48.85, 2.35, 1.0)
+        assert total == 10
+        assert sorted(f['properties']['class'] for f in features) == ['crazing'] + ['pothole'] * 9
+        assert index.bbox(48.0, 2.0, 49.0, 3.0, class_name='crazing')[0] == 1
+
+        # Enough removed detections trigger a full rebuild
+        (tmp_path / 'b_detections.geojsons').unlink()
+        assert index.refresh()
+        assert len(index._main) == 161 and len(index._delta) == 0
+
+    def test_refresh_rate_and_running_streams(self, tmp_path):
+        """Test refreshes are rate-limited and streams with a checkpoint are skipped."""
+        index = DetectionIndex(tmp_path, min_refresh_sec=60.0)
+        index.refresh()
+        with GeoJSONSeqWriter(tmp_path / 'v_detections.geojsons') as writer:
+            writer.write(detection(0, 48.85, 2.35))
+        assert not index.refresh()
+
+        index = DetectionIndex(tmp_path)
+        (tmp_path / 'v_detections.ckpt.json').write_text('{}')
+        (tmp_path / 'job_detections.geojsons').write_bytes((tmp_path / 'v_detections.geojsons').read_bytes())
+        (tmp_path / 'job.ckpt.json').write_text('{}')
+        assert not index.refresh()
+
+        (tmp_path / 'v_detections.ckpt.json').unlink()
+        (tmp_path / 'job.ckpt.json').unlink()
+        assert index.refresh()
+        assert len(index) == 2
+
+    def test_derived_outputs_skipped(self, tmp_path):
+        """Test merged surveys, exports and segment files are not indexed twice."""
+        for name in ('v_detections.geojsons', 'detections.geojsons', 'defects.geojsons',
+                     'v_part001_detections.geojsons'):
+            with GeoJSONSeqWriter(tmp_path / name) as writer:
+                writer.write(detection(0, 48.85, 2.35))
+
+        assert [path.name for path in find_detection_files(tmp_path)] == [
+            'detections.geojsons', 'v_detections.geojsons'
+        ]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,102 @@
+"""
+Unit tests for merging repeated surveys.
+"""
+
+import pytest
+import json
+from datetime import datetime, timedelta
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+from src.inference.geodesy import haversine
+from src.inference.geojson_writer import GeoJSONSeqWriter
+from src.inference.survey_merge import cluster_detections, merge_surveys
+
+
+def same_partition(labels1, labels2):
+    """Check two labelings group points identically."""
+    pairs = set(zip(labels1.tolist(), labels2.tolist()))
+    return len(pairs) == len(set(labels1.tolist())) == len(set(labels2.tolist()))
+
+
+class TestClusterDetections:
+    """Test grid clustering against brute-force single linkage."""
+
+    @pytest.mark.parametrize('max_pairs', [7, 1_000_000])
+    def test_matches_brute_force(self, max_pairs):
+        """Test clusters equal connected components of the full distance graph."""
+        rng = np.random.default_rng(0)
+        lat = 48.85 + rng.uniform(0, 0.002, 400)
+        lon = 2.35 + rng.uniform(0, 0.003, 400)
+        classes = rng.integers(0, 2, 400)
+
+        num_clusters, labels = cluster_detections(lat, lon, classes, 8.0, max_pairs=max_pairs)
+
+        adjacency = (haversine(lat[:, None], lon[:, None], lat[None, :], lon[None, :]) <= 8.0) \
+            & (classes[:, None] == classes[None, :])
+        expected_count, expected = connected_components(adjacency, directed=False)
+
+        assert num_clusters == expected_count
+        assert same_partition(labels, expected)
+
+    def test_empty(self):
+        """Test no detections give no clusters."""
+        num_clusters, labels = cluster_detections([], [], [], 5.0)
+        assert num_clusters == 0 and len(labels) == 0
+
+
+class TestMergeSurveys:
+    """Test canonical defects from several runs."""
+
+    def test_weekly_runs(self, tmp_path):
+        """Test the same defects seen in three runs merge into one each."""
+        rng = np.random.default_rng(1)
+        defects = [(48.85, 2.35, 'pothole', 0), (48.8502, 2.35, 'pothole', 0),
+                   (48.85, 2.35, 'crazing', 2)]
+        start = datetime(2024, 5, 6, 9, 0, 0)
+
+        for week in range(3):
+            run_dir = tmp_path / f'week{week}'
+            with GeoJSONSeqWriter(run_dir / 'street_detections.geojsons') as writer:
+                for i, (lat, lon, class_name, class_id) in enumerate(defects):
+                    # Pothole 1 was only found in the last two runs
+                    if i == 1 and week == 0:
+                        continue
+                    writer.write({
+                        'frame_number': i,
+                        'class_id': class_id,
+                        'class_name': class_name,
+                        'confidence': 0.5 + week / 10,
+                        'timestamp': (start + timedelta(weeks=week)).isoformat(),
+                        'latitude': lat + rng.normal(0, 1e-5),
+                        'longitude': lon + rng.normal(0, 1e-5)
+                    })
+
+        output = tmp_path / 'defects.geojson'
+        stats = merge_surveys([tmp_path / f'week{w}' for w in range(3)], output, radius=5.0)
+
+        assert stats == {'detections': 8, 'defects': 3, 'files': 3}
+        features = json.loads(output.read_text())['features']
+        by_key = {(f['properties']['class'], round(f['geometry']['coordinates'][1], 4)): f['properties']
+                  for f in features}
+
+        pothole = by_key[('pothole', 48.85)]
+        assert pothole['num_observations'] == 3
+        assert pothole['num_surveys'] == 3
+        assert pothole['confidence'] == pytest.approx(0.7)
+        assert pothole['first_seen'] == start.isoformat()
+        assert pothole['last_seen'] == (start + timedelta(weeks=2)).isoformat()
+
+        later = by_key[('pothole', 48.8502)]
+        assert later['num_observations'] == 2
+        assert later['first_seen'] == (start + timedelta(weeks=1)).isoformat()
+
+        assert by_key[('crazing', 48.85)]['num_observations'] == 3
+
+        # Drop defects seen only once or twice
+        stats = merge_surveys([tmp_path / 'week0', tmp_path / 'week1', tmp_path / 'week2'],
+                              output, radius=5.0, min_observations=3)
+        assert stats['defects'] == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
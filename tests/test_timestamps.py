@@ -0,0 +1,153 @@
+"""
+Unit tests for timestamp detection and normalization.
+"""
+
+import pytest
+from datetime import datetime, timezone, timedelta
+import numpy as np
+import pandas as pd
+from src.inference.gps_parsers import read_gps_track
+from src.inference.timestamps import (FixedWidthLayout, TimestampParser, detect_format,
+                                     parse_timestamps, to_utc)
+
+
+BASE_TIME = pd.Timestamp('2024-05-01T10:00:00')
+
+
+class TestDetectFormat:
+    """Test format detection from samples."""
+
+    @pytest.mark.parametrize('values, expected', [
+        (['2024-05-01 10:00:00', '2024-05-01 10:00:01'], '%Y-%m-%d %H:%M:%S'),
+        (['2024-05-01T10:00:00Z', '2024-05-01T10:00:01Z'], '%Y-%m-%dT%H:%M:%S%z'),
+        (['2024-05-01T10:00:00Z', '2024-05-01T10:00:01.5Z'], 'ISO8601'),
+        (['01/05/2024 10:00:00', '13/05/2024 10:00:00'], '%d/%m/%Y %H:%M:%S'),
+        ([1714557600, 1714557601], 'epoch_s'),
+        ([1714557600000, 1714557601000], 'epoch_ms'),
+        (['1714557600000000'], 'epoch_us'),
+        ([1714557600000000000], 'epoch_ns')
+    ])
+    def test_formats(self, values, expected):
+        """Test strftime, ISO and epoch formats are recognized."""
+        assert detect_format(values) == expected
+
+
+class TestParseTimestamps:
+    """Test normalization to naive UTC nanoseconds."""
+
+    @pytest.mark.parametrize('values', [
+        ['2024-05-01 10:00:00', '2024-05-01 10:00:01.5'],
+        ['2024-05-01T12:00:00+02:00', '2024-05-01T11:00:01.5+01:00'],
+        [1714557600, 1714557601.5],
+        [1714557600000, 1714557601500],
+        [datetime(2024, 5, 1, 10, tzinfo=timezone.utc),
+         datetime(2024, 5, 1, 10, 0, 1, 500000, tzinfo=timezone.utc)]
+    ])
+    def test_utc_ns(self, values):
+        """Test every input kind gives the same naive UTC values."""
+        times = parse_timestamps(values)
+
+        assert times.dtype == 'datetime64[ns]'
+        assert times.tolist() == [BASE_TIME, BASE_TIME + pd.Timedelta(seconds=1.5)]
+
+    def test_explicit_format(self):
+        """Test an explicit format is used as given."""
+        times = parse_timestamps(['05/01/2024 10:00:00'], '%m/%d/%Y %H:%M:%S')
+        assert times.iloc[0] == BASE_TIME
+
+    def test_unparsable(self):
+        """Test values not matching the detected format become NaT."""
+        times = parse_timestamps(['2024-05-01 10:00:00', 'garbage'], '%Y-%m-%d %H:%M:%S')
+        assert times.isna().tolist() == [False, True]
+
+    def test_parser_detects_once(self):
+        """Test the format found on the first chunk is kept for later ones."""
+        parser = TimestampParser()
+        parser(pd.Series([], dtype=object))
+        parser(['2024-05-01 10:00:00'])
+        assert parser.format == '%Y-%m-%d %H:%M:%S'
+
+        assert parser(['2024-05-01 10:00:01']).iloc[0] == BASE_TIME + pd.Timedelta(seconds=1)
+
+    def test_to_utc(self):
+        """Test aware scalars are converted and naive ones kept."""
+        paris = datetime(2024, 5, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+        assert to_utc(paris) == BASE_TIME
+        assert to_utc(BASE_TIME.to_pydatetime()) == BASE_TIME
+
+
+class TestFixedWidthLayout:
+    """Test the vectorized fixed-width parser against pandas."""
+
+    @pytest.mark.parametrize('fmt', [
+        '%Y-%m-%dT%H:%M:%S.%f%z',
+        '%Y-%m-%dT%H:%M:%S%z',
+        '%d/%m/%Y %H:%M:%S.%f',
+        '%Y%m%d%H%M%S'
+    ])
+    def test_matches_pandas(self, fmt):
+        """Test random timestamps, offsets and leap days parse like pandas."""
+        rng = np.random.default_rng(0)
+        times = pd.to_datetime(rng.integers(-2_000_000_000, 4_000_000_000, 500), unit='s') \
+            + pd.to_timedelta(rng.integers(0, 1_000_000, 500), unit='us')
+        offsets = ['+02:00', '-05:30', 'Z', '+0100']
+        values = [t.strftime(fmt.replace('%z', '')) + (offsets[i % 4] if '%z' in fmt else '')
+                  for i, t in enumerate(times)]
+        # Equal widths per layout
+        values = [v for v in values if len(v) == len(values[0])]
+
+        layout = FixedWidthLayout(fmt, values[0])
+        ns = layout.parse(pd.Series(values))
+        expected = pd.to_datetime(pd.Series(values), format='ISO8601' if '%z' in fmt else fmt, utc=True)
+
+        assert ns.tolist() == expected.dt.as_unit('ns').astype('int64').tolist()
+
+    def test_mismatch_falls_back(self):
+        """Test chunks not matching the layout are left to pandas."""
+        layout = FixedWidthLayout('%d/%m/%Y %H:%M:%S', '01/05/2024 10:00:00')
+        assert layout.parse(pd.Series(['01/05/2024 10:00:00', '1/5/2024 10:00:00'])) is None
+        assert layout.parse(pd.Series(['01/05/2024 10:00:00', '32/05/2024 10:00:00'])) is None
+        assert layout.parse(pd.Series(['01/05/2024 10:00:00', None])) is None
+        # Days past the end of the month do not roll over
+        assert layout.parse(pd.Series(['29/02/2024 10:00:00', '31/02/2024 10:00:00'])) is None
+        assert layout.parse(pd.Series(['29/02/2023 10:00:00'])) is None
+        assert layout.parse(pd.Series(['29/02/2000 10:00:00', '31/12/2024 10:00:00'])) is not None
+
+        times = parse_timestamps(['01/05/2024 10:00:00', '31/02/2024 10:00:00'], '%d/%m/%Y %H:%M:%S')
+        assert times[0] == BASE_TIME and pd.isna(times[1])
+
+        times = parse_timestamps(['01/05/2024 10:00:00', '1/5/2024 10:00:00'], '%d/%m/%Y %H:%M:%S')
+        assert times.tolist() == [BASE_TIME, BASE_TIME]
+
+    def test_unsupported_format(self):
+        """Test formats with other directives are rejected."""
+        with pytest.raises(ValueError):
+            FixedWidthLayout('%b %d %Y', 'May 01 2024')
+
+
+class TestGPSFiles:
+    """Test normalized timestamps in parsed GPS files."""
+
+    def test_csv_epoch_ms(self, tmp_path):
+        """Test epoch milliseconds in a CSV, parsed in chunks."""
+        path = tmp_path / 'track.csv'
+        epoch_ms = BASE_TIME.value // 1_000_000 + np.arange(10) * 100
+        pd.DataFrame({'timestamp': epoch_ms, 'latitude': 48.85, 'longitude': 2.35}).to_csv(path, index=False)
+
+        df = read_gps_track(path, chunk_size=3)
+
+        assert df['timestamp'].iloc[0] == BASE_TIME
+        assert df['timestamp'].iloc[9] == BASE_TIME + pd.Timedelta(milliseconds=900)
+
+    def test_csv_offsets_and_window(self, tmp_path):
+        """Test offsets are converted to UTC and aware window bounds compare in UTC."""
+        path = tmp_path / 'track.csv'
+        path.write_text(
+            "timestamp,latitude,longitude\n"
+            "2024-05-01T12:00:00+02:00,48.85,2.35\n"
+            "2024-05-01T12:00:01+02:00,48.86,2.36\n"
+        )
+
+        df = read_gps_track(path, start_time=datetime(2024, 5, 1, 12, 0, 1, tzinfo=timezone(timedelta(hours=2))))
+
+        assert df['timestamp'].tolist() == [BASE_TIME + pd.Timedelta(seconds=1)]
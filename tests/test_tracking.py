@@ -0,0 +1,86 @@
+"""
+Unit tests for detection tracking.
+"""
+
+import pytest
+import numpy as np
+from src.inference.tracking import DetectionTracker, box_iou
+
+
+def make_detection(frame, x, y, cls=0, conf=0.5, size=40):
+    """Create a detection dict with a square box."""
+    return {
+        'frame_number': frame,
+        'timestamp': f'2026-01-09T10:30:{frame:02d}',
+        'class_id': cls,
+        'class_name': 'pothole',
+        'confidence': conf,
+        'bbox': {'xmin': x, 'ymin': y, 'xmax': x + size, 'ymax': y + size},
+        'latitude': 48.0 + frame * 1e-5,
+        'longitude': 2.0
+    }
+
+
+class TestBoxIoU:
+    """Test IoU computation."""
+
+    def test_iou_values(self):
+        """Test identical, disjoint and half-overlapping boxes."""
+        boxes = np.array([[0, 0, 10, 10], [20, 20, 30, 30], [5, 0, 15, 10]])
+        iou = box_iou(boxes[:1], boxes)
+
+        assert iou.shape == (1, 3)
+        assert iou[0, 0] == pytest.approx(1.0)
+        assert iou[0, 1] == 0.0
+        assert iou[0, 2] == pytest.approx(1 / 3)
+
+
+class TestDetectionTracker:
+    """Test track linking and consolidation."""
+
+    def test_single_moving_defect(self):
+        """Test a box moving down the frame yields one consolidated detection."""
+        tracker = DetectionTracker()
+        output = []
+
+        for frame in range(10):
+            conf = 0.9 if frame == 4 else 0.5
+            output.extend(tracker.update(frame, [make_detection(frame, 100, 100 + frame * 15, conf=conf)]))
+        output.extend(tracker.finish())
+
+        assert len(output) == 1
+        track = output[0]
+        assert track['num_observations'] == 10
+        assert track['first_frame'] == 0
+        assert track['last_frame'] == 9
+        assert track['confidence'] == 0.9
+        assert track['frame_number'] == 4
+        # GPS point of the last observation
+        assert track['latitude'] == pytest.approx(48.0 + 9 * 1e-5)
+        assert tracker.stats == {'raw_detections': 10, 'tracks': 1}
+
+    def test_classes_not_merged(self):
+        """Test overlapping boxes of different classes stay separate."""
+        tracker = DetectionTracker()
+
+        for frame in range(3):
+            tracker.update(frame, [make_detection(frame, 100, 100, cls=0),
+                                   make_detection(frame, 100, 100, cls=1)])
+
+        assert len(tracker.finish()) == 2
+
+    def test_track_closed_after_missed_frames(self):
+        """Test a track is emitted once it has been unmatched too long."""
+        tracker = DetectionTracker(max_missed=2)
+        tracker.update(0, [make_detection(0, 100, 100)])
+
+        assert tracker.update(1, []) == []
+        assert tracker.update(2, []) == []
+        closed = tracker.update(3, [])
+
+        assert len(closed) == 1
+        assert tracker.tracks == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,79 @@
+"""
+Unit tests for the annotated video writer.
+"""
+
+import pytest
+import numpy as np
+import cv2
+from src.inference.video_writer import AnnotatedVideoWriter, draw_boxes
+from src.inference.detect_video import VideoDetector
+
+
+class TestAnnotatedVideoWriter:
+    """Test background annotated video writing."""
+
+    def test_draw_boxes(self):
+        """Test boxes are drawn in the class color."""
+        image = np.zeros((100, 100, 3), dtype=np.uint8)
+        draw_boxes(image, np.array([[10, 20, 60, 80]], dtype=np.float32), np.array([0]),
+                   np.array([0.9]), ['pothole'])
+
+        assert tuple(image[50, 10]) == (0, 0, 255)
+        assert image[50, 30].sum() == 0
+
+    def test_lower_resolution_and_fps(self, tmp_path):
+        """Test frames are dropped and resized to the requested output."""
+        path = tmp_path / 'annotated.mp4'
+        boxes = np.array([[100, 100, 200, 200]], dtype=np.float32)
+
+        with AnnotatedVideoWriter(path, 10.0, (640, 480), ['pothole'],
+                                  output_size=320, output_fps=5.0, queue_size=4) as writer:
+            for frame in range(20):
+                image = np.full((480, 640, 3), frame * 10, dtype=np.uint8)
+                if frame % 2:
+                    writer.write(frame, image)
+                else:
+                    writer.write(frame, image, boxes, np.array([1]), np.array([0.5]))
+
+        assert writer.written == 10
+
+        cap = cv2.VideoCapture(str(path))
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 10
+        assert int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == 320
+        assert int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == 240
+        assert cap.get(cv2.CAP_PROP_FPS) == pytest.approx(5.0)
+        cap.release()
+
+
+@pytest.mark.usefixtures('fake_yolo')
+class TestProcessVideoAnnotated:
+    """Test annotated video output of process_video."""
+
+    @pytest.mark.parametrize('pipeline', [False, True])
+    def test_boxes_drawn(self, survey, tmp_path, pipeline):
+        """Test every frame is written and boxes are drawn on inferred frames only."""
+        video_path, gps_path, start = survey
+        detector = VideoDetector('fake.pt', gps_file=str(gps_path))
+        detector.process_video(str(video_path), output_path=str(tmp_path / 'out.geojson'),
+                               save_video=True, video_start_time=start, skip_frames=2,
+                               batch_size=4, pipeline=pipeline)
+
+        annotated = cv2.VideoCapture(str(tmp_path / 'survey_annotated.mp4'))
+        source = cv2.VideoCapture(str(video_path))
+        drawn = []
+        while True:
+            ok, image = annotated.read()
+            if not ok:
+                break
+            _, original = source.read()
+            # Boxes and labels differ strongly from the source frame
+            drawn.append(int((np.abs(image.astype(int) - original) > 80).sum()) > 50)
+        annotated.release()
+        source.release()
+
+        assert len(drawn) == 120
+        assert drawn == [frame % 2 == 0 for frame in range(120)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
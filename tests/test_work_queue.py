@@ -0,0 +1,204 @@
+"""
+Unit tests for the shared-filesystem work queue.
+"""
+
+import pytest
+import multiprocessing
+import os
+import threading
+import time
+from pathlib import Path
+from src.inference import work_queue
+from src.inference.work_queue import QueueWorker, WorkQueue, _read_json, attempt_output_path
+
+
+def fake_process(task):
+    """Stands in for video processing."""
+    time.sleep(0.01)
+    if 'bad' in task['video']:
+        raise RuntimeError('corrupt video')
+    return {'detections': 1, 'pid': os.getpid()}
+
+
+def run_worker(queue_dir, worker_id):
+    """Worker process entry point."""
+    queue = WorkQueue(queue_dir, lease_sec=5.0)
+    QueueWorker(queue, worker_id=worker_id, heartbeat_sec=0.1, poll_sec=0.05, process=fake_process).run()
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Queue with ten videos."""
+    queue = WorkQueue(tmp_path / 'queue', lease_sec=5.0)
+    queue.submit([tmp_path / f'run{i}.mp4' for i in range(10)], tmp_path / 'out', 'model.pt')
+    return queue
+
+
+class TestWorkQueue:
+    """Test claims, leases and requeueing."""
+
+    def test_submit_once(self, queue, tmp_path):
+        """Test videos already queued are not added again."""
+        assert queue.submit([tmp_path / 'run0.mp4', tmp_path / 'new.mp4'], tmp_path / 'out', 'model.pt') == 1
+        assert queue.status()['counts']['pending'] == 11
+
+        lease = queue.claim('node1-1')
+        assert lease.task['output_path'] == str(tmp_path / 'out' / 'new' / 'new_detections.geojson')
+
+    def test_worker_processes(self, queue):
+        """Test several worker processes drain the queue, each video done exactly once."""
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=run_worker, args=(queue.queue_dir, f'node{i}-1')) for i in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert queue.status()['counts'] == {'pending': 0, 'leased': 0, 'done': 10, 'failed': 0}
+        results = queue.results()
+        assert sorted(r['video'] for r in results) == sorted(f'run{i}.mp4' for i in range(10))
+        assert {r['stats']['pid'] for r in results} <= {worker.pid for worker in workers}
+
+        # Every worker published its final state
+        assert sorted(w['worker'] for w in queue.status()['workers']) == ['node0-1', 'node1-1', 'node2-1']
+        assert all(w['stopped'] for w in queue.status()['workers'])
+
+    def test_expired_lease_requeued(self, queue):
+        """Test a lease without heartbeat goes back to pending and its late result is dropped."""
+        lease = queue.claim('dead-1')
+        assert queue.requeue_expired() == []
+
+        # No heartbeat since long before the lease duration
+        os.utime(lease.path, (1, 1))
+        assert queue.requeue_expired() == [lease.task_id]
+        assert not queue.heartbeat(lease)
+        assert not queue.complete(lease, {'detections': 0})
+
+        retry = queue.claim('alive-1')
+        assert retry.task_id == lease.task_id
+        assert retry.task['attempts'] == 2
+        assert queue.complete(retry, {'detections': 3})
+
+    def test_claim_published_by_rename(self, queue, monkeypatch):
+        """Test a lease is only visible once complete, and stalled claims expire."""
+        claimed = []
+        real_write = work_queue._write_json
+
+        def write(path, data):
+            # Between the claim and the publication of the lease
+            claimed.append((path.parent.name, queue.status()['counts']['leased'], queue.is_drained()))
+            real_write(path, data)
+
+        monkeypatch.setattr(work_queue, '_write_json', write)
+        lease = queue.claim('node-1')
+        monkeypatch.undo()
+        assert claimed == [('claiming', 0, False)]
+        assert _read_json(lease.path)['attempts'] == 1
+
+        # A worker that died mid-claim does not hold the task forever
+        os.rename(lease.path, queue.queue_dir / 'claiming' / lease.path.name)
+        os.utime(queue.queue_dir / 'claiming' / lease.path.name, (1, 1))
+        assert queue.requeue_expired() == [lease.task_id]
+        assert queue.claim('node-2').task['attempts'] == 2
+
+    def test_stale_worker_output(self, tmp_path):
+        """Test a worker whose lease expired mid-task leaves the new holder's output alone."""
+        queue = WorkQueue(tmp_path / 'queue', lease_sec=5.0)
+        queue.submit([tmp_path / 'run0.mp4'], tmp_path / 'out', 'model.pt')
+        output_path = tmp_path / 'out' / 'run0' / 'run0_detections.geojson'
+
+        def write(task, text):
+            path = Path(task['output_path'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+            path.with_suffix('.geojsons').write_text(text)
+            return {'detections': 1}
+
+        def stale(task):
+            write(task, 'stale partial')
+            # The lease expires and another node processes the video meanwhile
+            os.utime(next((queue.queue_dir / 'leased').glob('*.json')), (1, 1))
+            QueueWorker(WorkQueue(queue.queue_dir, lease_sec=5.0), worker_id='node-2',
+                        process=lambda task: write(task, 'fresh')).run()
+            return write(task, 'stale')
+
+        stats = QueueWorker(queue, worker_id='node-1', heartbeat_sec=10.0, process=stale).run()
+
+        assert stats == {'done': 0, 'failed': 0, 'lost': 1}
+        assert output_path.read_text() == 'fresh'
+        assert output_path.with_suffix('.geojsons').read_text() == 'fresh'
+        assert sorted(path.name for path in output_path.parent.iterdir()) == [
+            'run0_detections.geojson', 'run0_detections.geojsons'
+        ]
+        assert queue.results()[0]['worker'] == 'node-2'
+
+    def test_resume_from_previous_attempt(self, tmp_path):
+        """Test a new attempt copies the checkpoint and stream of the previous one."""
+        output_path = tmp_path / 'run0_detections.geojson'
+        previous = attempt_output_path(output_path, 'node-1')
+        current = attempt_output_path(output_path, 'node-2')
+        previous.with_suffix('.ckpt.json').write_text('{}')
+        previous.with_suffix('.geojsons').write_text('features')
+
+        QueueWorker._adopt_checkpoint(previous, current)
+        assert current.with_suffix('.ckpt.json').read_text() == '{}'
+        assert current.with_suffix('.geojsons').read_text() == 'features'
+
+        # Without a checkpoint there is nothing to resume
+        QueueWorker._adopt_checkpoint(tmp_path / 'missing.geojson', attempt_output_path(output_path, 'node-3'))
+        assert not attempt_output_path(output_path, 'node-3').with_suffix('.ckpt.json').exists()
+
+    def test_max_attempts(self, tmp_path):
+        """Test a video whose lease keeps expiring is failed."""
+        queue = WorkQueue(tmp_path / 'queue', max_attempts=2)
+        queue.submit([tmp_path / 'crash.mp4'], tmp_path / 'out', 'model.pt')
+
+        for _ in range(2):
+            lease = queue.claim('node-1')
+            os.utime(lease.path, (1, 1))
+            queue.requeue_expired()
+
+        assert queue.claim('node-1') is None
+        assert queue.status()['counts']['failed'] == 1
+        assert 'Lease lost' in queue.results()[0]['error']
+
+    def test_failures(self, queue, tmp_path):
+        """Test processing errors fail the video and can be retried."""
+        queue.submit([tmp_path / 'bad.mp4'], tmp_path / 'out', 'model.pt')
+        stats = QueueWorker(queue, worker_id='node-1', process=fake_process).run()
+
+        assert stats == {'done': 10, 'failed': 1, 'lost': 0}
+        failed = [r for r in queue.results() if r['status'] == 'failed']
+        assert failed == [{'video': 'bad.mp4', 'status': 'failed', 'error': 'corrupt video', 'worker': 'node-1'}]
+
+        # A task file caught mid-rewrite is left for the next requeue
+        (queue.queue_dir / 'failed' / 'torn.mp4.json').write_text('{"video": ')
+        assert queue.requeue_failed() == ['bad.mp4']
+        assert queue.status()['counts']['pending'] == 1
+        assert queue.status()['counts']['failed'] == 1
+
+    def test_heartbeat_keeps_lease(self, tmp_path):
+        """Test a slow video keeps its lease while the worker is alive."""
+        queue = WorkQueue(tmp_path / 'queue', lease_sec=0.3)
+        queue.submit([tmp_path / 'slow.mp4'], tmp_path / 'out', 'model.pt')
+        requeued = []
+
+        def slow(task):
+            deadline = time.time() + 1.0
+            while time.time() < deadline:
+                requeued.extend(WorkQueue(tmp_path / 'queue', lease_sec=0.3).requeue_expired())
+                time.sleep(0.05)
+            return {'detections': 0}
+
+        worker = QueueWorker(queue, worker_id='node-1', heartbeat_sec=0.05, process=slow)
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        time.sleep(0.3)
+        status = queue.status()
+        thread.join()
+
+        assert requeued == []
+        assert status['leases'][0]['task'] == 'slow.mp4'
+        assert status['workers'][0]['task'] == 'slow.mp4'
+        assert worker.stats == {'done': 1, 'failed': 0, 'lost': 0}